@@ -0,0 +1,89 @@
+"""
+Scénarios représentatifs mesurés par run_benchmarks.py.
+
+Chaque flow part de l'écran de login (app remise à zéro avant chaque
+itération) et n'utilise que les page objects, pour que le coût mesuré soit
+celui du framework. Un flow lève AssertionError s'il n'arrive pas au bout :
+des chiffres mesurés sur un parcours raté ne veulent rien dire.
+"""
+
+from pages.checkout_page import CheckoutPage
+from pages.home_page import HomePage
+from pages.login_page import LoginPage
+from utils.waits import gone
+
+
+BACKPACK = ("xpath", "//android.widget.TextView[contains(@text, 'Sauce Labs Backpack')]")
+SORT_MODAL = ("xpath", '//android.view.ViewGroup[@content-desc="test-Modal Selector Button"]'
+                       '/android.view.ViewGroup/android.view.ViewGroup/android.widget.ImageView')
+
+
+def _login(driver):
+    LoginPage(driver).login("standard_user", "secret_sauce")
+    home = HomePage(driver)
+    home.wait_for_products()
+    return home
+
+
+def flow_login(driver):
+    _login(driver)
+
+
+def flow_add_remove_cart(driver):
+    home = _login(driver)
+    home.add_to_cart(item_index=0)
+    assert home.wait_for_cart_count(1), "product was not added to the cart"
+    home.remove_from_cart(item_index=0)
+    assert home.try_wait(gone(("accessibility id", "test-REMOVE")), timeout=3), "product was not removed"
+
+
+def flow_full_purchase(driver):
+    home = _login(driver)
+    home.add_to_cart(item_index=0)
+    home.add_to_cart(item_index=1)
+    home.click_cart_icon()
+    checkout = CheckoutPage(driver)
+    checkout.click("accessibility id", "test-CHECKOUT")
+    checkout.enter_user_info_default()
+    checkout.click_continue_button()
+    checkout.click_finish_button()
+    assert checkout.find("xpath", "//android.widget.TextView[@text='CHECKOUT: COMPLETE!']"), "order not completed"
+    home.logout()
+
+
+def flow_sort_price_low_to_high(driver):
+    home = _login(driver)
+    home.select_sort_option("Price (low to high)")
+    prices = [float(p.replace("$", "")) for p in home.get_all_product_prices()]
+    assert prices and prices == sorted(prices), f"prices not sorted: {prices}"
+    home.find_with_scroll(*BACKPACK)
+
+
+def flow_sort_name_z_to_a(driver):
+    home = _login(driver)
+    home.select_sort_option("Name (Z to A)")
+    names = home.get_all_product_names()
+    assert names and names == sorted(names, reverse=True), f"names not sorted: {names}"
+    home.find_with_scroll(*BACKPACK)
+
+
+def flow_sort_cancel(driver):
+    home = _login(driver)
+    before = home.get_all_product_names()
+    home.click(*SORT_MODAL)
+    cancel = ("xpath", '//android.widget.TextView[@text="Cancel"]')
+    home.click(*cancel)
+    home.try_wait(gone(cancel), timeout=3)
+    assert home.get_all_product_names() == before, "cancelling the sort changed the order"
+
+
+FLOWS = {
+    "login": flow_login,
+    "add_remove_cart": flow_add_remove_cart,
+    "full_purchase": flow_full_purchase,
+    "sort_price_low_to_high": flow_sort_price_low_to_high,
+    "sort_name_z_to_a": flow_sort_name_z_to_a,
+    "sort_cancel": flow_sort_cancel,
+}
+
+PAGE_CLASSES = (LoginPage, HomePage, CheckoutPage)
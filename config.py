@@ -3,6 +3,8 @@ Configuration Appium pour Swag Labs Mobile APK
 Supports multiple AVD via udid parameter
 """
 
+import os
+
 # Capacités de base (sans udid - Appium choisira le premier disponible)
 BASE_CAPS = {
     "platformName": "Android",
@@ -14,18 +16,23 @@ BASE_CAPS = {
 }
 
 # Configurations spécifiques par AVD
+# systemPort doit être unique par device pour que plusieurs sessions UiAutomator2
+# tournent en parallèle sur le même serveur Appium (voir run_parallel.py)
 AVD_CONFIGS = {
     "emulator-5556": {  # Petit téléphone 4.7" (720x1280)
         "deviceName": "Pixel_4_7_Small",
         "udid": "emulator-5556",
+        "systemPort": 8200,
     },
     "emulator-5554": {  # Téléphone moyen 6.4" (1080x2400)
         "deviceName": "Pixel_6_4_Medium",
         "udid": "emulator-5554",
+        "systemPort": 8201,
     },
     "emulator-5558": {  # Tablette 10" (2560x1600)
         "deviceName": "Pixel_Tablet_10",
         "udid": "emulator-5558",
+        "systemPort": 8202,
     },
 }
 
@@ -35,4 +42,121 @@ caps = {**BASE_CAPS, "deviceName": "Android Emulator"}
 # Pour cibler un AVD spécifique, utiliser :
 # caps = {**BASE_CAPS, **AVD_CONFIGS["emulator-5556"]}
 
-APPIUM_SERVER = "http://127.0.0.1:4723"
\ No newline at end of file
+# Surchargeable via la variable d'environnement APPIUM_SERVER
+# (ex. le faux serveur de utils/fake_appium.py pour tourner sans émulateur)
+APPIUM_SERVER = os.environ.get("APPIUM_SERVER", "http://127.0.0.1:4723")
+
+# Transport HTTP vers le serveur Appium (pool keep-alive partagée, voir utils/connection.py)
+# Taille de la pool : une connexion par worker/session simultanée du process (--http-pool-size)
+HTTP_POOL_SIZE = int(os.environ.get("APPIUM_HTTP_POOL_SIZE", len(AVD_CONFIGS)))
+# Retries sur erreur de socket transitoire (lecture : commandes idempotentes seulement)
+HTTP_RETRIES = 2
+# Timeouts (s) : connexion, lecture par défaut, et lecture par commande
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_TIMEOUT = 60
+HTTP_COMMAND_TIMEOUTS = {
+    "newSession": 300,
+    "quit": 60,
+    "findElement": 30,
+    "findElements": 30,
+    "getPageSource": 60,
+    "screenshot": 60,
+    "w3cExecuteScript": 120,
+    "installApp": 600,
+}
+
+# Stratégie de reset de l'app entre deux tests (pool de sessions, voir utils/driver_pool.py)
+# "restart" | "clear" | "new_session" — surchargeable via --reset-strategy ou @pytest.mark.reset(...)
+DEFAULT_RESET_STRATEGY = "restart"
+
+# Mise en place des états de départ des tests (utils/app_state.py, --state-seeding)
+# "deep_link" (repli sur l'UI si le lien échoue) | "ui" (toujours par les écrans)
+STATE_SEEDING = "deep_link"
+
+# Ordre des tests d'après l'état de l'app demandé / laissé (utils/state_order.py, --state-order)
+# "on" : tests marqués @pytest.mark.state enchaînés, reset évité quand l'état est déjà le bon | "off"
+STATE_ORDERING = "on"
+
+# XPath des page objects compilées en UiSelector quand c'est possible (utils/xpath_compiler.py, --xpath-compile)
+# "on" : -android uiautomator au lieu de XPath, vérifié une fois par XPath et par run | "off"
+XPATH_COMPILE = "on"
+
+# Mode performance (utils/perf_stats.py) — surchargeable via --perf-warmup, --perf-iterations...
+# Itérations d'échauffement non mesurées, puis itérations mesurées (app remise à zéro entre chaque)
+PERF_WARMUP = 1
+PERF_ITERATIONS = 5
+# Percentile comparé aux seuils, niveau et nombre de rééchantillonnages des intervalles bootstrap
+PERF_PERCENTILE = 95
+PERF_CONFIDENCE = 0.95
+PERF_BOOTSTRAP_RESAMPLES = 2000
+# Latence de chaque étape mesurée aussi côté device (utils/device_timing.py, gfxinfo + logcat),
+# enregistrée sous "<étape>.device" — "on" | "off", surchargeable via --perf-device-timing
+PERF_DEVICE_TIMING = "on"
+
+# Fluidité du rendu autour des blocs de gestes (utils/frame_metrics.py, fixture frame_metrics)
+# Seuils de assert_smooth() : part de frames hors délai, percentiles du temps de frame (ms, None = libre)
+FRAME_MAX_JANKY_PERCENT = 10
+FRAME_MAX_P95_MS = 32
+FRAME_MAX_P99_MS = None
+
+# Mémoire de l'app par cycle dans les tests de stress (utils/meminfo.py, fixture memory_sampler)
+# Croissance max (KB par cycle, pente des moindres carrés) par série ; la pente du PSS total est
+# surchargeable via --memory-max-slope. Les premiers cycles (caches, JIT) sont exclus de la pente.
+MEMORY_MAX_SLOPE_KB = {"pss": 256, "java_heap": 128, "native_heap": 128, "graphics": 128}
+MEMORY_WARMUP_CYCLES = 3
+
+# CPU de l'app et de ses threads pendant les tests de stress (utils/cpu_sampler.py, fixture cpu_sampler)
+# Intervalle d'échantillonnage (s, surchargeable via --cpu-interval), taille du ring buffer (échantillons),
+# part d'un coeur à partir de laquelle un thread est signalé saturé, threads affichés dans le rapport
+CPU_SAMPLE_INTERVAL = 0.5
+CPU_RING_CAPACITY = 2400
+CPU_SATURATION = 0.9
+CPU_HOT_THREADS = 5
+
+# Démarrage de l'app (utils/app_startup.py, tests/TestSuite9_Startup.py) : démarrages mesurés
+# par type (cold, warm, hot) via `am start -W`, surchargeable via --startup-iterations, et
+# démarrages d'échauffement non mesurés
+STARTUP_ITERATIONS = 10
+STARTUP_WARMUP = 1
+# TotalTime médian max (ms) par type de démarrage : seuils "excessifs" d'Android vitals
+STARTUP_MAX_MEDIAN_MS = {"cold": 5000, "warm": 2000, "hot": 1500}
+
+# Historique des mesures et détection des régressions (utils/perf_baseline.py, --perf-db)
+# Base SQLite relative à la racine du projet (ignorée par git)
+PERF_BASELINE_DB = ".perf_baselines.sqlite"
+# Baseline glissant : derniers runs sans régression du même test sur le même device (toutes versions)
+PERF_BASELINE_WINDOW = 10
+PERF_BASELINE_MIN_SAMPLES = 5
+# Budgets (ms, sur le percentile --perf-percentile) des étapes tant qu'elles n'ont pas de baseline
+PERF_BUDGETS_MS = {
+    "products_page_load": 3000,
+    "login": 5000,
+    "add_products": 4000,
+    "cart_navigation": 3000,
+    "checkout_navigation": 3000,
+    "form_filling": 6000,
+    "order_completion": 5000,
+    "total": 20000,
+}
+# Ralentissement signalé si p < alpha (Welch unilatéral) ET moyenne > baseline de plus de 10 %
+# ET de plus de 50 ms
+PERF_REGRESSION_ALPHA = 0.01
+PERF_REGRESSION_MIN_SLOWDOWN = 0.10
+PERF_REGRESSION_MIN_SLOWDOWN_MS = 50
+
+# Artefacts d'échec capturés en arrière-plan (utils/artifacts.py)
+# Workers d'écriture disque, artefacts en mémoire en attente d'écriture, lignes de logcat gardées
+ARTIFACT_WRITE_WORKERS = 2
+ARTIFACT_MAX_PENDING = 8
+ARTIFACT_LOG_LINES = 200
+# Store adressé par contenu (utils/artifact_store.py), partagé par les runs et les workers
+# Dossier relatif à la racine du projet (--artifact-store)
+ARTIFACT_STORE_DIR = "reports/artifacts"
+# Rétention : objets inutilisés depuis N jours, puis les plus anciens au-delà de la taille max
+ARTIFACT_RETENTION_DAYS = 14
+ARTIFACT_RETENTION_BYTES = 500 * 1024 * 1024
+# Recompression PNG sans perte, gzip des page sources / logs ; réduction des captures
+# à N px de large (None = taille d'origine, nécessite Pillow)
+ARTIFACT_RECOMPRESS_IMAGES = True
+ARTIFACT_COMPRESS_TEXT = True
+ARTIFACT_IMAGE_MAX_WIDTH = None
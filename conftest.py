@@ -1,28 +1,451 @@
 import pytest
 import os
-import base64
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
-from config import BASE_CAPS, AVD_CONFIGS, APPIUM_SERVER
+import glob
+import html
+import json
+import re
+from config import BASE_CAPS, AVD_CONFIGS, APPIUM_SERVER, DEFAULT_RESET_STRATEGY, HTTP_POOL_SIZE, STATE_SEEDING
+from config import STATE_ORDERING, XPATH_COMPILE
+from config import ARTIFACT_WRITE_WORKERS, ARTIFACT_MAX_PENDING, ARTIFACT_LOG_LINES
+from config import (ARTIFACT_STORE_DIR, ARTIFACT_RETENTION_DAYS, ARTIFACT_RETENTION_BYTES,
+                    ARTIFACT_RECOMPRESS_IMAGES, ARTIFACT_COMPRESS_TEXT, ARTIFACT_IMAGE_MAX_WIDTH)
+from config import PERF_WARMUP, PERF_ITERATIONS, PERF_PERCENTILE, PERF_CONFIDENCE, PERF_BOOTSTRAP_RESAMPLES
+from config import PERF_DEVICE_TIMING, FRAME_MAX_JANKY_PERCENT, FRAME_MAX_P95_MS, FRAME_MAX_P99_MS
+from config import MEMORY_MAX_SLOPE_KB, MEMORY_WARMUP_CYCLES
+from config import CPU_SAMPLE_INTERVAL, CPU_RING_CAPACITY, CPU_SATURATION, CPU_HOT_THREADS
+from config import STARTUP_ITERATIONS, STARTUP_WARMUP, STARTUP_MAX_MEDIAN_MS
+from config import (PERF_BASELINE_DB, PERF_BASELINE_WINDOW, PERF_BASELINE_MIN_SAMPLES, PERF_BUDGETS_MS,
+                    PERF_REGRESSION_ALPHA, PERF_REGRESSION_MIN_SLOWDOWN, PERF_REGRESSION_MIN_SLOWDOWN_MS)
+from utils.app_startup import StartupBenchmark, describe_startup
+from utils.app_state import StateSeeder, SEEDING_STRATEGIES
+from utils.artifact_store import ArtifactStore
+from utils.artifacts import ArtifactCollector
+from utils.command_timing import timings as command_timings
+from utils.connection import close_shared_pools, transport_stats
+from utils.cpu_sampler import CpuSampler
+from utils.driver_pool import DriverPool, RESET_STRATEGIES
+from utils.frame_metrics import FrameCollector, describe_metrics
+from utils.locator_cache import registry as locator_registry
+from utils.meminfo import MemorySampler
+from utils.device import device_profile
+from utils.perf_baseline import FAILING, BaselineStore, describe_comparison
+from utils.perf_stats import PerfRunner
+from utils.screen_graph import Navigator, costs as screen_costs
+from utils.state_order import SetupCosts, order_by_state, state_marker
+from utils.xpath_compiler import compiler as xpath_compiler
 from datetime import datetime
 
 
+# Durées des tests du run courant (nodeid -> secondes), voir pytest_sessionfinish
+_durations = {}
+
+# Comparaisons au baseline de performance du run courant, voir la fixture perf_baseline
+_perf_comparisons = []
+
+# Métriques de rendu (frames, jank) des blocs mesurés pendant le run, voir la fixture frame_metrics
+_frame_metrics = []
+
+# Tendances mémoire des tests de stress du run (test, sampler), voir la fixture memory_sampler
+_memory_trends = []
+
+# Profils CPU de l'app pendant le run (test, sampler), voir la fixture cpu_sampler
+_cpu_profiles = []
+
+# Distributions des temps de démarrage du run (test, device, résumé), voir la fixture startup_benchmark
+_startup_results = []
+
+# États de départ mis en place pendant le run (test, état, "deep_link" / "ui", ms), voir la fixture app_state
+_seeded_states = []
+
+# Tests qui ont repris l'état laissé par le précédent (test, état, ms de mise en place évités),
+# voir la fixture driver ; coûts de reset et de mise en place observés pour l'estimation
+_reused_states = []
+_setup_costs = SetupCosts()
+
+
 # --- Paramètre CLI pour choisir l'AVD ---
 def pytest_addoption(parser):
-    """Ajoute l'option --avd pour choisir l'émulateur cible"""
+    """Ajoute les options --avd et --reset-strategy"""
     parser.addoption(
         "--avd",
         action="store",
         default=None,
         help="Target AVD (emulator ID, e.g., emulator-5556, emulator-5554)"
     )
+    parser.addoption(
+        "--reset-strategy",
+        action="store",
+        default=DEFAULT_RESET_STRATEGY,
+        choices=RESET_STRATEGIES,
+        help="App reset between tests when reusing pooled sessions (restart, clear, new_session)"
+    )
+    parser.addoption(
+        "--state-seeding",
+        action="store",
+        default=STATE_SEEDING,
+        choices=SEEDING_STRATEGIES,
+        help="How fixtures like logged_in / cart_with reach their state (deep_link with UI fallback, or ui)"
+    )
+    parser.addoption(
+        "--state-order",
+        action="store",
+        default=STATE_ORDERING,
+        choices=("on", "off"),
+        help="Reorder tests marked @pytest.mark.state so they reuse the app state left by the previous test"
+    )
+    parser.addoption(
+        "--xpath-compile",
+        action="store",
+        default=XPATH_COMPILE,
+        choices=("on", "off"),
+        help="Send page-object XPath lookups as UiAutomator UiSelector expressions when they translate"
+    )
+    parser.addoption(
+        "--shard",
+        action="store",
+        default=None,
+        help="Run only shard i of N of the collected TC* tests, as 'i/N' (used by run_parallel.py)"
+    )
+    parser.addoption(
+        "--reports-dir",
+        action="store",
+        default="reports",
+        help="Folder for run reports (durations, command log...; one per worker in parallel mode)"
+    )
+    parser.addoption(
+        "--artifact-store",
+        action="store",
+        default=ARTIFACT_STORE_DIR,
+        help="Content-addressed store for failure screenshots, page sources and logs (shared by runs)"
+    )
+    parser.addoption(
+        "--http-pool-size",
+        action="store",
+        type=int,
+        default=HTTP_POOL_SIZE,
+        help="Keep-alive connections shared by the Appium sessions of this process"
+    )
+    parser.addoption(
+        "--perf-warmup",
+        action="store",
+        type=int,
+        default=PERF_WARMUP,
+        help="Unmeasured iterations per performance scenario"
+    )
+    parser.addoption(
+        "--perf-iterations",
+        action="store",
+        type=int,
+        default=PERF_ITERATIONS,
+        help="Measured iterations per performance scenario (app reset between each)"
+    )
+    parser.addoption(
+        "--perf-percentile",
+        action="store",
+        type=int,
+        default=PERF_PERCENTILE,
+        help="Percentile of the measured iterations compared to the thresholds (e.g. 50, 95)"
+    )
+    parser.addoption(
+        "--perf-confidence",
+        action="store",
+        type=float,
+        default=PERF_CONFIDENCE,
+        help="Confidence level of the bootstrap intervals"
+    )
+    parser.addoption(
+        "--perf-device-timing",
+        action="store",
+        default=PERF_DEVICE_TIMING,
+        choices=("on", "off"),
+        help="Also record each step's tap-to-render latency from device timestamps (gfxinfo, logcat)"
+    )
+    parser.addoption(
+        "--memory-max-slope",
+        action="store",
+        type=float,
+        default=MEMORY_MAX_SLOPE_KB["pss"],
+        help="Max total PSS growth per stress cycle (KB, least-squares slope) before a leak is reported"
+    )
+    parser.addoption(
+        "--cpu-interval",
+        action="store",
+        type=float,
+        default=CPU_SAMPLE_INTERVAL,
+        help="Seconds between two background samples of the app's CPU time (/proc/<pid>/stat)"
+    )
+    parser.addoption(
+        "--startup-iterations",
+        action="store",
+        type=int,
+        default=STARTUP_ITERATIONS,
+        help="Measured launches per start kind (cold, warm, hot) in startup benchmarks"
+    )
+    parser.addoption(
+        "--perf-db",
+        action="store",
+        default=PERF_BASELINE_DB,
+        help="SQLite database of past performance runs used as regression baseline"
+    )
+
+
+def parse_shard(value):
+    """'1/3' -> (1, 3). Les shards sont numérotés à partir de 1."""
+    try:
+        index, total = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise pytest.UsageError(f"--shard expects 'i/N', got '{value}'")
+    if not 1 <= index <= total:
+        raise pytest.UsageError(f"--shard index must be between 1 and {total}, got {index}")
+    return index, total
+
+
+def load_known_durations():
+    """Durées (s) des tests des runs précédents, lues dans reports/**/durations.json."""
+    durations = {}
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+    for path in glob.glob(os.path.join(root, "**", "durations.json"), recursive=True):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                for nodeid, seconds in json.load(fh).items():
+                    durations[nodeid] = max(seconds, durations.get(nodeid, 0.0))
+        except Exception:
+            continue
+    return durations
+
+
+def assign_shards(items, total, durations):
+    """Répartit les tests entre `total` shards.
+
+    Sans historique : round-robin dans l'ordre de collecte. Avec les durées des
+    runs précédents : le test le plus long va au shard le moins chargé (LPT),
+    pour que les workers finissent à peu près en même temps. Le calcul est
+    déterministe, chaque worker obtient donc la même répartition.
+    """
+    if not durations:
+        return [position % total for position in range(len(items))]
+    default = sum(durations.values()) / len(durations)
+    order = sorted(range(len(items)), key=lambda i: (-durations.get(items[i].nodeid, default), i))
+    loads = [0.0] * total
+    shards = [0] * len(items)
+    for i in order:
+        target = min(range(total), key=lambda s: (loads[s], s))
+        shards[i] = target
+        loads[target] += durations.get(items[i].nodeid, default)
+    return shards
+
+
+def pytest_collection_modifyitems(config, items):
+    """En mode parallèle, ne garde que les tests du shard de ce worker, puis enchaîne les tests
+    marqués `state` pour qu'ils partagent l'état de l'app (utils/state_order.py, --state-order).
+
+    Les tests marqués `all_devices` (ex. démarrage de l'app) ne sont pas répartis :
+    chaque worker les exécute sur son device.
+    """
+    shard = config.getoption("--shard")
+    if shard:
+        index, total = parse_shard(shard)
+        sharded = [item for item in items if not item.get_closest_marker("all_devices")]
+        shards = dict(zip(sharded, assign_shards(sharded, total, load_known_durations())))
+        selected, deselected = [], []
+        for item in items:
+            (selected if shards.get(item, index - 1) == index - 1 else deselected).append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+    if state_reuse(config):
+        items[:] = order_by_state(items)
+
+
+def pytest_runtest_logreport(report):
+    """Accumule la durée de chaque test (setup + call + teardown) pour le sharding."""
+    _durations[report.nodeid] = _durations.get(report.nodeid, 0.0) + report.duration
+
+
+def pytest_sessionfinish(session):
+    """Écrit reports/<...>/durations.json (sharding) et startup.json (temps de démarrage, repris par
+    run_parallel.py), sauvegarde le cache des sélecteurs, les coûts des transitions entre écrans
+    et les XPath vérifiées en UiSelector,
+    ferme le journal des commandes, attend l'écriture des artefacts d'échec puis
+    applique la rétention du store et régénère son index."""
+    artifacts = getattr(session.config, "_artifacts", None)
+    if artifacts is not None:
+        artifacts.close()
+        try:
+            artifacts.store.stats["pruned"] = artifacts.store.prune()
+            artifacts.store.write_html()
+        except OSError:
+            pass
+    try:
+        locator_registry.save()
+    except Exception:
+        pass
+    try:
+        screen_costs.save()
+    except Exception:
+        pass
+    try:
+        xpath_compiler.save()
+    except Exception:
+        pass
+    command_timings.close()
+    if _startup_results:
+        try:
+            path = os.path.join(get_reports_dir(session.config), "startup.json")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump([{"test": nodeid, "device": device, "starts": summary}
+                           for nodeid, device, summary in _startup_results], fh, indent=2)
+        except Exception:
+            pass
+    if not _durations:
+        return
+    try:
+        path = os.path.join(get_reports_dir(session.config), "durations.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({k: round(v, 3) for k, v in _durations.items()}, fh, indent=2)
+    except Exception:
+        pass
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Affiche les hits/misses du cache de sélecteurs, le temps gagné par les XPath compilées en UiSelector,
+    les compteurs du transport HTTP,
+    les artefacts d'échec non capturés, les états mis en place (deep link / UI) ou repris du test
+    précédent, les transitions entre écrans, la fluidité du rendu, la mémoire par cycle, les comparaisons au baseline de performance et les percentiles de
+    latence des commandes en fin de run."""
+    stats = locator_registry.stats()
+    if stats:
+        terminalreporter.write_sep("-", "locator fallback cache")
+        for chain, values in stats.items():
+            terminalreporter.write_line(f"{chain}: {values['hits']} hits, {values['misses']} misses")
+    compiled = xpath_compiler.stats()
+    if compiled:
+        terminalreporter.write_sep("-", "xpath compiled to UiSelector")
+        for xpath, values in compiled.items():
+            if values["selector"] is None:
+                terminalreporter.write_line(f"{xpath}: kept as XPath (UiSelector found other elements)")
+            elif values["uses"]:
+                terminalreporter.write_line(
+                    f"{xpath}: {values['uses']} lookups, {values['selector_ms']}ms vs {values['xpath_ms']}ms XPath, "
+                    f"saved ~{values['saved_ms']:.0f}ms"
+                )
+        saved = sum(values["saved_ms"] for values in compiled.values() if values["uses"])
+        terminalreporter.write_line(f"total saved: ~{saved:.0f}ms")
+        checks = [values["checked_ms"] for values in compiled.values() if values["checked_ms"]]
+        if checks:
+            terminalreporter.write_line(f"verification: {len(checks)} XPath checked, ~{sum(checks):.0f}ms of extra lookups")
+    transport = transport_stats()
+    if transport["requests"]:
+        terminalreporter.write_sep("-", "appium http transport")
+        terminalreporter.write_line(
+            f"{transport['requests']} requests, {transport['new_connections']} new connections, "
+            f"{transport['reused']} reused, {transport['retries']} retries"
+        )
+    artifacts = getattr(terminalreporter.config, "_artifacts", None)
+    if artifacts is not None and (artifacts.errors or artifacts.store.stats["stored"] + artifacts.store.stats["deduplicated"]):
+        store = artifacts.store.stats
+        terminalreporter.write_sep("-", "failure artifacts")
+        terminalreporter.write_line(
+            f"{store['stored']} stored, {store['deduplicated']} deduplicated, "
+            f"{store['bytes_in'] / 1024:.0f} KB captured -> {store['bytes_stored'] / 1024:.0f} KB written, "
+            f"{store.get('pruned', 0)} pruned ({os.path.relpath(artifacts.store.html_path)})"
+        )
+        for error in artifacts.errors:
+            terminalreporter.write_line(f"⚠ {error}")
+    if _seeded_states:
+        terminalreporter.write_sep("-", "state seeding")
+        for via in ("deep_link", "ui"):
+            durations = [ms for _, _, v, ms in _seeded_states if v == via]
+            if durations:
+                terminalreporter.write_line(
+                    f"{via}: {len(durations)} states, {sum(durations) / len(durations):.0f}ms average"
+                )
+    if _reused_states:
+        terminalreporter.write_sep("-", "state reuse")
+        terminalreporter.write_line(
+            f"{len(_reused_states)} tests started from the state left by the previous test, "
+            f"~{sum(ms for _, _, ms in _reused_states) / 1000:.1f}s of resets and seeding saved"
+        )
+        for nodeid, state, ms in _reused_states:
+            terminalreporter.write_line(f"{nodeid.split('::')[-1]}: {state} (~{ms:.0f}ms)")
+    transitions = screen_costs.stats()
+    if transitions:
+        terminalreporter.write_sep("-", "screen transitions (ms)")
+        for edge, values in transitions.items():
+            terminalreporter.write_line(f"{edge:<32} n={values['count']:<5} mean={values['mean_ms']}")
+    if _frame_metrics:
+        terminalreporter.write_sep("-", "frame rendering")
+        for entry in _frame_metrics:
+            terminalreporter.write_line(f"{entry['test'].split('::')[-1]} {describe_metrics(entry)}")
+    if _memory_trends:
+        terminalreporter.write_sep("-", "memory per cycle")
+        for nodeid, sampler in _memory_trends:
+            leaks = " ⚠ LEAK" if sampler.leaks() else ""
+            terminalreporter.write_line(f"{nodeid.split('::')[-1]} {sampler.describe()}{leaks}")
+    if _cpu_profiles:
+        terminalreporter.write_sep("-", "app cpu")
+        for nodeid, sampler in _cpu_profiles:
+            saturated = sampler.saturated()
+            hot = f" ⚠ SATURATED: {', '.join(t[0] for t in saturated)}" if saturated else ""
+            terminalreporter.write_line(f"{nodeid.split('::')[-1]} {sampler.describe()}{hot}")
+    if _startup_results:
+        terminalreporter.write_sep("-", "app startup (TotalTime, ms)")
+        for nodeid, device, summary in _startup_results:
+            for kind, s in summary.items():
+                terminalreporter.write_line(f"[{device}] {describe_startup(kind, s)}")
+    if _perf_comparisons:
+        terminalreporter.write_sep("-", "performance vs baseline")
+        for entry in _perf_comparisons:
+            terminalreporter.write_line(f"{entry['test'].split('::')[-1]} [{entry['device']}] {describe_comparison(entry)}")
+    latencies = command_timings.by_command()
+    if latencies:
+        terminalreporter.write_sep("-", "webdriver command latency (ms)")
+        for command, values in latencies.items():
+            terminalreporter.write_line(
+                f"{command:<24} n={values['count']:<5} p50={values['p50']:<8} "
+                f"p95={values['p95']:<8} p99={values['p99']:<8} max={values['max_ms']}"
+            )
+
+
+def get_reports_dir(config):
+    """Dossier des rapports de ce run (relatif à la racine du projet si non absolu)."""
+    reports_dir = config.getoption("--reports-dir")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), reports_dir)
+
+
+def report_link(config, path):
+    """Lien vers `path` relatif au dossier du rapport HTML (reports/<udid>/ sous run_parallel.py)."""
+    htmlpath = getattr(config.option, "htmlpath", None)
+    base = os.path.dirname(os.path.abspath(htmlpath)) if htmlpath else os.getcwd()
+    return os.path.relpath(os.path.abspath(path), base).replace('\\', '/')
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request):
+    """Pool de sessions Appium (une par device), fermé en fin de session pytest."""
+    pool = DriverPool(APPIUM_SERVER, pool_size=request.config.getoption("--http-pool-size"))
+    yield pool
+    # les captures d'échec en cours ont encore besoin des sessions
+    request.config._artifacts.drain()
+    pool.close_all()
+    close_shared_pools()
 
 
 @pytest.fixture(scope="function")
-def driver(request):
+def driver(request, driver_pool):
     """
     Fixture Appium Driver avec support multi-AVD
     
+    La session est prise dans le pool et réutilisée d'un test à l'autre ; l'app est
+    remise à zéro avant chaque test selon la stratégie choisie :
+    - marker : @pytest.mark.reset("clear")
+    - CLI    : --reset-strategy new_session
+
+    Sans marker reset, un test marqué @pytest.mark.state(requires=...) garde l'app telle
+    que l'a laissée le test précédent si c'est l'état demandé (--state-order on).
+    
     Usage:
     - Sans paramètre: pytest tests/test_responsive.py  (utilise le 1er AVD)
     - Avec AVD spécifique: pytest tests/test_responsive.py --avd emulator-5556
@@ -30,40 +453,252 @@ def driver(request):
     # Récupérer l'AVD cible depuis les options CLI
     avd_id = request.config.getoption("--avd")
     
-    # Construire les capabilities
-    caps = {**BASE_CAPS}
-    
     if avd_id and avd_id in AVD_CONFIGS:
-        # Cibler un AVD spécifique
-        caps.update(AVD_CONFIGS[avd_id])
         print(f"\n🎯 Targeting AVD: {avd_id} ({AVD_CONFIGS[avd_id]['deviceName']})")
-    else:
+    elif not avd_id:
         # Utiliser le device name générique (Appium choisira le premier)
-        if not avd_id:
-            print(f"\n📱 Using default device (first available). Use --avd <emulator-id> to target specific AVD")
-    
-    # Création des options Appium
-    options = UiAutomator2Options()
-    options.platform_name = caps["platformName"]
-    options.automation_name = caps["automationName"]
-    
-    if "deviceName" in caps:
-        options.device_name = caps["deviceName"]
-    if "udid" in caps:
-        options.udid = caps["udid"]
-    
-    options.app = caps["app"]
-    options.app_package = caps["appPackage"]
-    options.app_activity = caps["appActivity"]
-    options.new_command_timeout = caps.get("newCommandTimeout", 300)
+        print(f"\n📱 Using default device (first available). Use --avd <emulator-id> to target specific AVD")
 
-    driver = webdriver.Remote(APPIUM_SERVER, options=options)
+    # Les captures d'échec du test précédent doivent voir son écran, pas l'app remise à zéro
+    request.config._artifacts.drain()
+    strategy = reset_strategy(request)
+    requires, leaves = state_marker(request.node)
+    keep = requires if state_reuse(request.config) and not request.node.get_closest_marker("reset") else None
+    driver, caps, ran, reset_ms = driver_pool.acquire(avd_id, strategy, keep=keep)
+    if ran == "kept":
+        # le StateSeeder du test ne refait pas la mise en place de cet état
+        request.node._reused_state = requires
+        saved_ms = _setup_costs.saved(strategy, requires)
+        _reused_states.append((request.node.nodeid, requires, saved_ms))
+        print(f"♻ App state kept: {requires} (saved ~{saved_ms:.0f}ms)")
+        request.node.user_properties.append(("reused_state", requires))
+        request.node.user_properties.append(("setup_saved_ms", round(saved_ms, 1)))
+    else:
+        _setup_costs.record_reset(ran, reset_ms)
+        print(f"♻ App reset: {ran} ({reset_ms:.0f}ms)")
+    request.node.user_properties.append(("reset_strategy", ran))
+    request.node.user_properties.append(("reset_ms", round(reset_ms, 1)))
     
     # Store the used config for metadata
     request.config._used_caps = caps
+
+    # Latence de chaque commande du test (utils/command_timing.py)
+    command_timings.attach(driver)
+    command_timings.start_test(request.node.nodeid, caps.get("deviceName", "default"))
     
     yield driver
-    driver.quit()
+
+    command_timings.end_test()
+    # état laissé pour le test suivant : seulement si le test a réussi
+    driver_pool.set_state(avd_id, leaves if getattr(request.node, "_call_passed", False) else None)
+
+
+@pytest.fixture(scope="session")
+def perf_store(request):
+    """Base SQLite des runs de performance (utils/perf_baseline.py), partagée par la session."""
+    path = request.config.getoption("--perf-db")
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    store = BaselineStore(path, window=PERF_BASELINE_WINDOW, min_samples=PERF_BASELINE_MIN_SAMPLES,
+                          alpha=PERF_REGRESSION_ALPHA, min_slowdown=PERF_REGRESSION_MIN_SLOWDOWN,
+                          min_slowdown_ms=PERF_REGRESSION_MIN_SLOWDOWN_MS, budgets=PERF_BUDGETS_MS, q=request.config.getoption("--perf-percentile"))
+    yield store
+    store.close()
+
+
+@pytest.fixture(scope="function")
+def perf_baseline(request, driver, perf_store):
+    """Enregistre les durées {étape: [ms, ...]} du test et échoue sur un ralentissement significatif
+    (ou, sans baseline, sur un dépassement de config.PERF_BUDGETS_MS).
+
+    Les durées sont rangées par test, profil du device, version de l'app et commit.
+    """
+    device, app_version = device_profile(driver).split("|", 1)
+
+    def check(steps):
+        comparisons = perf_store.check(request.node.nodeid, device, app_version, steps)
+        _perf_comparisons.extend(comparisons)
+        for entry in comparisons:
+            print(f"  📈 {describe_comparison(entry)}")
+        regressions = [describe_comparison(c) for c in comparisons if c["status"] in FAILING]
+        assert not regressions, "Significant slowdown or budget exceeded:\n  " + "\n  ".join(regressions)
+        return comparisons
+    return check
+
+
+@pytest.fixture(scope="function")
+def frame_metrics(request, driver):
+    """frame_metrics(name) -> FrameCollector (utils/frame_metrics.py) à utiliser en `with`.
+
+    Les métriques de chaque bloc sont jointes au résultat du test et résumées en fin de run.
+    """
+    collectors = []
+
+    def collect(name):
+        collector = FrameCollector(driver, name, max_janky_percent=FRAME_MAX_JANKY_PERCENT,
+                                   max_p95_ms=FRAME_MAX_P95_MS, max_p99_ms=FRAME_MAX_P99_MS)
+        collectors.append(collector)
+        return collector
+
+    yield collect
+    for collector in collectors:
+        if collector.metrics is not None:
+            request.node.user_properties.append(("frame_metrics", describe_metrics(collector.metrics)))
+            _frame_metrics.append({"test": request.node.nodeid, **collector.metrics})
+
+
+@pytest.fixture(scope="function")
+def memory_sampler(request, driver):
+    """memory_sampler(name) -> MemorySampler (utils/meminfo.py) : mémoire de l'app après chaque cycle.
+
+    Les échantillons sont exportés en CSV (reports/memory/) et tracés dans le rapport HTML.
+    """
+    max_slope = {**MEMORY_MAX_SLOPE_KB, "pss": request.config.getoption("--memory-max-slope")}
+    samplers = []
+
+    def create(name):
+        sampler = MemorySampler(driver, name, max_slope_kb=max_slope, warmup=MEMORY_WARMUP_CYCLES)
+        samplers.append(sampler)
+        return sampler
+
+    # lus par pytest_runtest_makereport pour joindre CSV et graphique au rapport du test
+    request.node._memory_samplers = samplers
+    yield create
+    for sampler in samplers:
+        if sampler.samples:
+            _memory_trends.append((request.node.nodeid, sampler))
+
+
+@pytest.fixture(scope="function")
+def cpu_sampler(request, driver):
+    """cpu_sampler(name) -> CpuSampler (utils/cpu_sampler.py) déjà démarré : CPU de l'app et de ses
+    threads en arrière-plan. `mark(cycle)` délimite les cycles ; arrêté au plus tard en fin de test.
+    """
+    interval = request.config.getoption("--cpu-interval")
+    samplers = []
+
+    def create(name):
+        sampler = CpuSampler(driver, name, interval=interval, capacity=CPU_RING_CAPACITY,
+                             saturation=CPU_SATURATION)
+        samplers.append(sampler)
+        return sampler.start()
+
+    # lus par pytest_runtest_makereport pour joindre le profil CPU au rapport du test
+    request.node._cpu_samplers = samplers
+    yield create
+    for sampler in samplers:
+        sampler.stop()
+        if len(sampler.samples):
+            _cpu_profiles.append((request.node.nodeid, sampler))
+
+
+@pytest.fixture(scope="function")
+def startup_benchmark(request, driver):
+    """StartupBenchmark (utils/app_startup.py) réglé par --startup-iterations et --perf-*.
+
+    La distribution de chaque type de démarrage est résumée en fin de run, par device, et écrite
+    dans reports/<...>/startup.json.
+    """
+    config = request.config
+    bench = StartupBenchmark(
+        driver,
+        iterations=config.getoption("--startup-iterations"),
+        warmup=STARTUP_WARMUP,
+        q=config.getoption("--perf-percentile"),
+        confidence=config.getoption("--perf-confidence"),
+        resamples=PERF_BOOTSTRAP_RESAMPLES,
+        seed=request.node.nodeid,
+        max_median_ms=STARTUP_MAX_MEDIAN_MS,
+    )
+    yield bench
+    if bench.launches:
+        device = device_profile(driver).split("|", 1)[0]
+        _startup_results.append((request.node.nodeid, device, bench.summary()))
+
+
+@pytest.fixture(scope="function")
+def app_state(request, driver):
+    """StateSeeder (utils/app_state.py) du test : met l'app directement dans un état nommé."""
+    seeder = StateSeeder(driver, strategy=request.config.getoption("--state-seeding"),
+                         current=getattr(request.node, "_reused_state", None))
+    yield seeder
+    for name, via, ms in seeder.seeded:
+        if via == "kept":
+            continue
+        request.node.user_properties.append(("seeded_state", f"{name} via {via} ({ms:.0f}ms)"))
+        _seeded_states.append((request.node.nodeid, name, via, ms))
+        _setup_costs.record_state(name, ms)
+
+
+@pytest.fixture(scope="function")
+def navigator(request, driver):
+    """Navigator (utils/screen_graph.py) : écran courant et go_to(écran) par le chemin le moins coûteux."""
+    nav = Navigator(driver)
+    yield nav
+    for origin, target, steps, ms in nav.trips:
+        route = " > ".join([origin] + [step[1] for step in steps])
+        request.node.user_properties.append(("navigation", f"{route} ({ms:.0f}ms)"))
+
+
+@pytest.fixture(scope="function")
+def logged_in(app_state):
+    """logged_in(user="standard_user") -> HomePage, page des produits, panier vide."""
+    return app_state.logged_in
+
+
+@pytest.fixture(scope="function")
+def cart_with(app_state):
+    """cart_with(items) -> HomePage, page des produits avec ces articles au panier."""
+    return app_state.cart_with
+
+
+@pytest.fixture(scope="function")
+def at_checkout_step(app_state):
+    """at_checkout_step(step, items=(0,)) -> CheckoutPage (1 = informations, 2 = aperçu, 3 = terminé)."""
+    return app_state.at_checkout_step
+
+
+def state_reuse(config):
+    """Ordre des tests et reprise de l'état de l'app entre tests marqués `state` (--state-order)."""
+    return config.getoption("--state-order") == "on"
+
+
+def reset_strategy(request):
+    """Stratégie de reset du test : marker @pytest.mark.reset(...) sinon --reset-strategy."""
+    marker = request.node.get_closest_marker("reset")
+    return marker.args[0] if marker and marker.args else request.config.getoption("--reset-strategy")
+
+
+@pytest.fixture(scope="function")
+def perf_runner(request, driver, driver_pool):
+    """PerfRunner (utils/perf_stats.py) réglé par les options --perf-*.
+
+    Avec --perf-device-timing on, chaque étape a aussi sa latence device "<étape>.device".
+
+    La première itération utilise `driver` ; les suivantes reprennent la session
+    du pool, remise à zéro avec la stratégie du test.
+    """
+    config = request.config
+    avd_id = config.getoption("--avd")
+    strategy = reset_strategy(request)
+
+    def acquire():
+        config._artifacts.drain()
+        session, *_ = driver_pool.acquire(avd_id, strategy)
+        command_timings.attach(session)
+        return session
+
+    return PerfRunner(
+        acquire,
+        driver=driver,
+        warmup=config.getoption("--perf-warmup"),
+        iterations=config.getoption("--perf-iterations"),
+        q=config.getoption("--perf-percentile"),
+        confidence=config.getoption("--perf-confidence"),
+        resamples=PERF_BOOTSTRAP_RESAMPLES,
+        seed=request.node.nodeid,
+        device_timing=config.getoption("--perf-device-timing") == "on",
+    )
 
 
 # --- pytest-html integrations: screenshots and metadata ---
@@ -77,32 +712,175 @@ def pytest_configure(config):
         config._metadata['App Activity'] = BASE_CAPS.get('appActivity', 'unknown')
         config._metadata['Platform'] = BASE_CAPS.get('platformName', 'Android')
         config._metadata['AVD Target'] = config.getoption("--avd") or "Auto (first available)"
+        config._metadata['Reset Strategy'] = config.getoption("--reset-strategy")
+        config._metadata['State Ordering'] = config.getoption("--state-order")
+        config._metadata['XPath Compile'] = config.getoption("--xpath-compile")
+        config._metadata['HTTP Pool Size'] = config.getoption("--http-pool-size")
+        config._metadata['Perf Iterations'] = (f"{config.getoption('--perf-warmup')} warm-up + "
+                                               f"{config.getoption('--perf-iterations')} measured, "
+                                               f"p{config.getoption('--perf-percentile')}")
+        if config.getoption("--shard"):
+            config._metadata['Shard'] = config.getoption("--shard")
     except Exception:
         pass
 
-    # Ensure reports/screenshots directory exists
+    # XPath des page objects envoyées en UiSelector quand elles se traduisent (utils/xpath_compiler.py)
+    xpath_compiler.enabled = config.getoption("--xpath-compile") == "on"
+
+    # Ensure reports directory exists
     try:
-        reports_dir = os.path.join(os.path.dirname(__file__), 'reports')
-        screenshots_dir = os.path.join(reports_dir, 'screenshots')
-        os.makedirs(screenshots_dir, exist_ok=True)
+        reports_dir = get_reports_dir(config)
+        os.makedirs(reports_dir, exist_ok=True)
+        command_timings.open(os.path.join(reports_dir, 'command_latency.jsonl'))
     except Exception:
         pass
 
+    # Capture des artefacts d'échec en arrière-plan (utils/artifacts.py), rangés dans le
+    # store adressé par contenu (utils/artifact_store.py)
+    store_dir = config.getoption("--artifact-store")
+    if not os.path.isabs(store_dir):
+        store_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), store_dir)
+    store = ArtifactStore(store_dir, max_bytes=ARTIFACT_RETENTION_BYTES, max_age_days=ARTIFACT_RETENTION_DAYS,
+                          image_max_width=ARTIFACT_IMAGE_MAX_WIDTH, recompress_images=ARTIFACT_RECOMPRESS_IMAGES,
+                          compress_text=ARTIFACT_COMPRESS_TEXT)
+    config._artifacts = ArtifactCollector(store, write_workers=ARTIFACT_WRITE_WORKERS,
+                                          max_pending=ARTIFACT_MAX_PENDING, log_lines=ARTIFACT_LOG_LINES)
+
 
 def pytest_html_report_title(report):
     report.title = "Rapport de tests – Swag Labs Mobile"
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix):
+    """Cache de sélecteurs (utils/locator_cache.py), XPath compilées (utils/xpath_compiler.py) et transport
+    HTTP (utils/connection.py) dans le rapport."""
+    stats = locator_registry.stats()
+    if stats:
+        rows = "".join(
+            f"<tr><td>{chain}</td><td>{values['hits']}</td><td>{values['misses']}</td></tr>"
+            for chain, values in stats.items()
+        )
+        postfix.append(
+            "<h3>Locator fallback cache</h3>"
+            "<table><tr><th>Chain</th><th>Hits</th><th>Misses</th></tr>" + rows + "</table>"
+        )
+    compiled = xpath_compiler.stats()
+    if compiled:
+        rows = "".join(
+            f"<tr><td>{html.escape(xpath)}</td><td>{html.escape(values['selector'] or 'kept as XPath')}</td>"
+            f"<td>{values['uses']}</td><td>{values['selector_ms']}</td><td>{values['xpath_ms']}</td>"
+            f"<td>{values['saved_ms']:.0f}</td></tr>"
+            for xpath, values in compiled.items() if values["uses"] or values["selector"] is None
+        )
+        checks = [values["checked_ms"] for values in compiled.values() if values["checked_ms"]]
+        postfix.append(
+            "<h3>XPath compiled to UiSelector</h3>"
+            "<table><tr><th>XPath</th><th>UiSelector</th><th>Lookups</th><th>UiSelector (ms)</th>"
+            "<th>XPath (ms)</th><th>Saved (ms)</th></tr>" + rows + "</table>"
+            f"<p>Verification: {len(checks)} XPath checked, {sum(checks):.0f} ms of extra lookups</p>"
+        )
+    transport = transport_stats()
+    if transport["requests"]:
+        postfix.append(
+            "<h3>Appium HTTP transport</h3>"
+            "<table><tr><th>Requests</th><th>New connections</th><th>Reused</th><th>Retries</th></tr>"
+            f"<tr><td>{transport['requests']}</td><td>{transport['new_connections']}</td>"
+            f"<td>{transport['reused']}</td><td>{transport['retries']}</td></tr></table>"
+        )
+    if _frame_metrics:
+        rows = "".join(
+            f"<tr><td>{m['test'].split('::')[-1]}</td><td>{m['name']}</td><td>{m['frames']}</td>"
+            f"<td>{m['janky_frames']} ({m['janky_percent']:.1f}%)</td><td>{m['p50']}</td><td>{m['p90']}</td>"
+            f"<td>{m['p95']}</td><td>{m['p99']}</td><td>{m['max_ms']:.1f}</td>"
+            f"<td>{' '.join(f'{ms}ms={n}' for ms, n in m['histogram'].items())}</td></tr>"
+            for m in _frame_metrics
+        )
+        postfix.append(
+            "<h3>Frame rendering</h3>"
+            "<table><tr><th>Test</th><th>Block</th><th>Frames</th><th>Janky</th><th>p50 (ms)</th>"
+            "<th>p90 (ms)</th><th>p95 (ms)</th><th>p99 (ms)</th><th>Max (ms)</th><th>Histogram</th></tr>"
+            + rows + "</table>"
+        )
+    if _startup_results:
+        rows = "".join(
+            f"<tr><td>{device}</td><td>{kind}</td><td>{s['n']}</td><td>{s['min']}</td><td>{s['median']}</td>"
+            f"<td>p{s['q']} {s['percentile']}</td><td>{s['max']}</td><td>{s['wait_median']}</td>"
+            f"<td>{s['mismatched']}</td></tr>"
+            for _, device, summary in _startup_results for kind, s in summary.items()
+        )
+        postfix.append(
+            "<h3>App startup (am start -W)</h3>"
+            "<table><tr><th>Device</th><th>Start</th><th>n</th><th>Min (ms)</th><th>Median (ms)</th>"
+            "<th>Percentile (ms)</th><th>Max (ms)</th><th>WaitTime median (ms)</th><th>Other launch state</th></tr>"
+            + rows + "</table>"
+        )
+    if _perf_comparisons:
+        rows = "".join(
+            f"<tr><td>{c['test'].split('::')[-1]}</td><td>{c['device']}</td><td>{c['app_version']}</td>"
+            f"<td>{c['step']}</td><td>{c['status']}</td><td>{describe_comparison(c)}</td></tr>"
+            for c in _perf_comparisons
+        )
+        postfix.append(
+            "<h3>Performance vs baseline</h3>"
+            "<table><tr><th>Test</th><th>Device</th><th>App version</th><th>Step</th><th>Status</th>"
+            "<th>Detail</th></tr>" + rows + "</table>"
+        )
+    for device in command_timings.devices():
+        postfix.append(f"<h3>WebDriver command latency – {device}</h3>"
+                       + latency_table(command_timings.by_command(device=device)))
+
+
+def latency_table(latencies):
+    """Table HTML commande / nombre / p50 / p95 / p99 / max (ms)."""
+    rows = "".join(
+        f"<tr><td>{command}</td><td>{v['count']}</td><td>{v['p50']}</td><td>{v['p95']}</td>"
+        f"<td>{v['p99']}</td><td>{v['max_ms']}</td><td>{v['total_ms']}</td></tr>"
+        for command, v in latencies.items()
+    )
+    return ("<table><tr><th>Command</th><th>Count</th><th>p50 (ms)</th><th>p95 (ms)</th>"
+            "<th>p99 (ms)</th><th>Max (ms)</th><th>Total (ms)</th></tr>" + rows + "</table>")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_header(cells):
+    cells.insert(2, "<th>Reset</th>")
+    cells.insert(3, "<th>In commands</th>")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_table_row(report, cells):
+    props = dict(getattr(report, "user_properties", []))
+    if "reused_state" in props:
+        cells.insert(2, f"<td>kept {props['reused_state']} (saved ~{props['setup_saved_ms']:.0f} ms)</td>")
+    elif "reset_strategy" in props:
+        cells.insert(2, f"<td>{props['reset_strategy']} ({props.get('reset_ms', 0):.0f} ms)</td>")
+    else:
+        cells.insert(2, "<td>-</td>")
+    if "command_ms" in props:
+        cells.insert(3, f"<td>{props['command_ms']:.0f} ms / {props['commands']} cmds</td>")
+    else:
+        cells.insert(3, "<td>-</td>")
     
 
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Capture screenshot on test failure and attach to pytest-html report.
+    """Capture screenshot, page source and logcat tail on test failure and link them in the report.
 
-    Saves files under `reports/screenshots/<testname>_<when>_<timestamp>.png`
-    and embeds the image in the HTML report for easy inspection.
+    Files are written in the background to the content-addressed artifact store
+    (`reports/artifacts/objects/...`); the HTML report links to the capture's entry
+    in `reports/artifacts/index.html` instead of inlining the image.
     """
     outcome = yield
     report = outcome.get_result()
 
+    if report.when == "call":
+        # lu par la fixture driver : l'état laissé par le test n'est repris que s'il a réussi
+        item._call_passed = report.passed
+        attach_command_latency(item, report)
+        attach_memory_samples(item, report)
+        attach_cpu_profile(item, report)
+
     # Only act for the actual test call or setup phase when it fails
     if report.when not in ("call", "setup"):
         return
@@ -121,48 +899,113 @@ def pytest_runtest_makereport(item, call):
         return
 
     try:
-        # Get screenshot as base64
-        screenshot_base64 = driver.get_screenshot_as_base64()
-
-        # Save organized file for archive
-        reports_dir = os.path.join(os.path.dirname(__file__), 'reports')
-        screenshots_dir = os.path.join(reports_dir, 'screenshots')
-        os.makedirs(screenshots_dir, exist_ok=True)
+        # Capture en arrière-plan (utils/artifacts.py) : le hook ne fait que la lancer
+        artifacts = item.config._artifacts
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_test_name = item.name.replace('/', '_').replace(' ', '_')
-        filename = f"{safe_test_name}_{report.when}_{timestamp}.png"
-        fpath = os.path.join(screenshots_dir, filename)
-        with open(fpath, 'wb') as fh:
-            fh.write(base64.b64decode(screenshot_base64))
+        capture_id = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{item.name}_{report.when}_{timestamp}")
+        link = artifacts.capture(driver, capture_id, test=item.nodeid)
 
-        # Attach to html report (inline image)
+        # Attach to html report (link into the store index, nothing inlined)
         extra = getattr(report, 'extra', [])
         try:
             from pytest_html import extras
-            # Try adding image as base64 string first (most compatible)
-            try:
-                extra.append(extras.image(screenshot_base64, mime_type='image/png'))
-            except Exception:
-                # Fallback: create an HTML img tag with data URI
-                try:
-                    img_tag = f'<img src="data:image/png;base64,{screenshot_base64}" alt="screenshot" style="max-width:100%; height:auto;"/>'
-                    extra.append(extras.html(img_tag))
-                except Exception:
-                    # Last-resort: attach raw bytes (older/newer pytest-html sometimes accepts bytes)
-                    try:
-                        img_bytes = base64.b64decode(screenshot_base64)
-                        extra.append(extras.image(img_bytes, mime_type='image/png'))
-                    except Exception:
-                        pass
-
-            # also add a file link for easy download from report directory
-            relpath = os.path.relpath(fpath, os.path.abspath(os.getcwd()))
-            relpath = relpath.replace('\\', '/')
-            extra.append(extras.url(relpath, name='Saved screenshot'))
+            extra.append(extras.url(report_link(item.config, os.path.join(artifacts.store.root, link)),
+                                    name='Failure artifacts'))
         except Exception:
             pass
         report.extra = extra
     except Exception:
-        # don't let screenshot capture break the test flow
+        # don't let artifact capture break the test flow
+        return
+
+
+def attach_memory_samples(item, report):
+    """Échantillons mémoire du test (fixture memory_sampler) : CSV dans reports/memory/, graphique
+    et pentes dans le rapport."""
+    samplers = [s for s in getattr(item, "_memory_samplers", []) if s.samples]
+    if not samplers:
         return
+    try:
+        from pytest_html import extras
+    except ImportError:
+        extras = None
+    memory_dir = os.path.join(get_reports_dir(item.config), "memory")
+    os.makedirs(memory_dir, exist_ok=True)
+    extra = getattr(report, 'extra', [])
+    for sampler in samplers:
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{item.name}_{sampler.name}")
+        path = sampler.write_csv(os.path.join(memory_dir, f"{name}.csv"))
+        report.user_properties.append(("memory", sampler.describe()))
+        if extras is None:
+            continue
+        rows = "".join(
+            f"<tr><td>{metric}</td><td>{t['first_kb']}</td><td>{t['last_kb']}</td>"
+            f"<td>{t['slope_kb']:+.1f}</td><td>{t['r2']:.2f}</td><td>{sampler.max_slope_kb.get(metric, '')}</td></tr>"
+            for metric, t in sampler.trends().items()
+        )
+        extra.append(extras.html(
+            f"<h4>Memory per cycle – {sampler.name}</h4>" + sampler.svg_chart()
+            + "<table><tr><th>Series</th><th>First (KB)</th><th>Last (KB)</th><th>Slope (KB/cycle)</th>"
+              "<th>R²</th><th>Max slope</th></tr>" + rows + "</table>"
+        ))
+        extra.append(extras.url(report_link(item.config, path), name=f'Memory CSV ({sampler.name})'))
+    report.extra = extra
+
+
+def attach_cpu_profile(item, report):
+    """Profil CPU du test (fixture cpu_sampler) : CPU-secondes par cycle et threads les plus chauds."""
+    samplers = [s for s in getattr(item, "_cpu_samplers", []) if len(s.samples)]
+    if not samplers:
+        return
+    try:
+        from pytest_html import extras
+    except ImportError:
+        return
+    extra = getattr(report, 'extra', [])
+    for sampler in samplers:
+        report.user_properties.append(("cpu", sampler.describe()))
+        cycles = "".join(
+            f"<tr><td>{cycle}</td><td>{cpu_s:.2f}</td><td>{share:.0%}</td></tr>"
+            for cycle, cpu_s, share in sampler.per_cycle()
+        )
+        threads = "".join(
+            f"<tr><td>{name}{' ⚠' if peak >= sampler.saturation else ''}</td><td>{tid}</td>"
+            f"<td>{cpu_s:.2f}</td><td>{peak:.0%}</td></tr>"
+            for name, tid, cpu_s, peak in sampler.hottest(CPU_HOT_THREADS)
+        )
+        section = f"<h4>App CPU – {sampler.name}</h4><p>{sampler.describe()}</p>"
+        if cycles:
+            section += ("<table><tr><th>Cycle</th><th>CPU (s)</th><th>Share of a core</th></tr>"
+                        + cycles + "</table>")
+        extra.append(extras.html(
+            section + "<table><tr><th>Thread</th><th>TID</th><th>CPU (s)</th><th>Peak (share of a core)</th></tr>"
+            + threads + "</table>"
+        ))
+    report.extra = extra
+
 
+def attach_command_latency(item, report):
+    """Temps passé dans les commandes WebDriver pendant le test (colonne + détail dans le rapport).
+
+    Le reste de la durée du test est du temps client : polling des waits, sleeps, parsing.
+    """
+    by_command = command_timings.by_command(test=item.nodeid)
+    if not by_command:
+        return
+    total_ms = sum(v["total_ms"] for v in by_command.values())
+    report.user_properties.append(("command_ms", round(total_ms, 1)))
+    report.user_properties.append(("commands", sum(v["count"] for v in by_command.values())))
+    try:
+        from pytest_html import extras
+    except ImportError:
+        return
+    methods = "".join(
+        f"<tr><td>{method}</td><td>{cost['commands']}</td><td>{cost['total_ms']}</td></tr>"
+        for method, cost in sorted(command_timings.by_method(item.nodeid).items(), key=lambda kv: -kv[1]["total_ms"])
+    )
+    section = (f"<p>{total_ms:.0f} ms in WebDriver commands out of {report.duration * 1000:.0f} ms</p>"
+               + latency_table(by_command)
+               + "<table><tr><th>Page-object method</th><th>Commands</th><th>Total (ms)</th></tr>" + methods + "</table>")
+    extra = getattr(report, 'extra', [])
+    extra.append(extras.html(section))
+    report.extra = extra
@@ -1,4 +1,12 @@
 from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, TimeoutException
+from utils.waits import Condition, wait_until, present, visible, clickable
+from utils.device import device_profile
+from utils.gestures import GestureBuilder
+from utils.locator_cache import registry
+from utils.scrolling import scroll_gesture, scroll_into_view_selector, ui_selector
+from utils.snapshot import get_snapshot
+from utils.xpath_compiler import compiler, is_single
 
 
 class BasePage:
@@ -6,113 +14,161 @@ class BasePage:
         self.driver = driver
 
 
+    def wait(self, condition, timeout=10, message=None):
+        """Attend une condition de utils.waits (present, visible, clickable, ...) et retourne son résultat."""
+        return wait_until(self.driver, condition, timeout=timeout, message=message)
+
+    def try_wait(self, condition, timeout=10):
+        """Comme wait(), mais retourne None au lieu de lever TimeoutException."""
+        try:
+            return self.wait(condition, timeout=timeout)
+        except TimeoutException:
+            return None
+
+    def snapshot(self, refresh=False):
+        """Hiérarchie UI parsée (utils.snapshot), réutilisée tant qu'aucune action n'a changé l'écran."""
+        return get_snapshot(self.driver, refresh=refresh)
+
+    def extract(self, by, value, refresh=True):
+        """text / content_desc / resource_id / class / bounds / enabled / selected de tous
+        les éléments qui correspondent, en un seul dump de la hiérarchie.
+
+        Par défaut le dump est refait (refresh=True) : les scrapers de listes tournent
+        souvent juste après une attente, pendant laquelle l'écran a pu finir de changer.
+        """
+        return self.snapshot(refresh=refresh).extract(by, value)
+
+    def locate(self, by, value):
+        """Locator à envoyer au serveur : une XPath vérifiée devient un UiSelector (utils.xpath_compiler).
+
+        N'envoie aucune commande : utilisable pour construire une condition d'attente.
+        """
+        return compiler.locate(self.driver, (by, value))
+
+    def find_elements(self, by, value):
+        return compiler.find_elements(self.driver, (by, value))
+
+    def find_element(self, by, value):
+        """Premier élément de find_elements() ; lève NoSuchElementException s'il n'y en a pas."""
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"Could not find element ({by}, {value})")
+        return elements[0]
+
+    def _wait_located(self, condition, by, value, timeout):
+        """Attend `condition(locator)` puis, l'élément trouvé, vérifie la traduction XPath -> UiSelector."""
+        el = self.wait(condition(self.locate(by, value)), timeout=timeout)
+        compiler.verify(self.driver, (by, value))
+        return el
+
     def find(self, by, value, timeout=10):
-        return self.driver.find_element(by, value)
+        return self._wait_located(present, by, value, timeout)
 
-    def click(self, by, value):
-        el = self.find(by, value)
+    def click(self, by, value, timeout=10):
+        el = self._wait_located(clickable, by, value, timeout)
         el.click()
 
-    def send_keys(self, by, value, text):
-        el = self.find(by, value)
+    def send_keys(self, by, value, text, timeout=10):
+        el = self._wait_located(visible, by, value, timeout)
         el.clear()
         el.send_keys(text)
 
-    def drag_and_drop(self, source_el, target_el, duration=800):
-        """Drag element `source_el` and drop it onto `target_el`.
+    def find_any(self, chain, candidates, timeout=0):
+        """Retourne les éléments du premier sélecteur de `candidates` qui matche ([] sinon).
 
-        Uses Appium mobile: dragGesture command via execute_script.
-        Both args can be WebElement objects or tuples (by, value).
+        `chain` nomme la chaîne de fallbacks dans le registre (utils.locator_cache) :
+        le sélecteur gagnant sur ce device / cette version de l'app passe en tête.
+        Seul le premier sélecteur est attendu pendant `timeout` ; les suivants ne
+        sont essayés qu'une fois, s'il n'a pas matché.
         """
-        import time
+        profile = device_profile(self.driver)
+        ordered = registry.order(profile, chain, candidates)
 
+        def first_match(locators):
+            def check(driver):
+                for locator in locators:
+                    try:
+                        elements = self.find_elements(*locator)
+                    except Exception:
+                        continue
+                    if elements:
+                        return locator, elements
+                return None
+            return Condition(f"any of {chain}", check)
+
+        found = self.try_wait(first_match(ordered[:1]), timeout=timeout) or first_match(ordered[1:])(self.driver)
+        if not found:
+            return []
+        locator, elements = found
+        registry.record(profile, chain, locator)
+        return elements
+
+    def drag_and_drop(self, source_el, target_el, duration=800):
+        """Drag element `source_el` and drop it onto `target_el` (centre to centre).
+
+        Both args can be WebElement objects or tuples (by, value). The press, hold,
+        move and release go out as one W3C actions request (utils/gestures.py),
+        which returns once the drop is done: no sleep needed afterwards.
+        """
         # Resolve if selectors were passed
         if isinstance(source_el, tuple) and len(source_el) >= 2:
             source_el = self.find(source_el[0], source_el[1])
         if isinstance(target_el, tuple) and len(target_el) >= 2:
             target_el = self.find(target_el[0], target_el[1])
 
-        # Get element locations
-        s_loc = source_el.location
-        t_loc = target_el.location
-
-        # Use mobile: dragGesture (Appium 2.0+)
         try:
-            self.driver.execute_script('mobile: dragGesture', {
-                'startX': int(s_loc['x']),
-                'startY': int(s_loc['y']),
-                'endX': int(t_loc['x']),
-                'endY': int(t_loc['y']),
-                'duration': duration
-            })
-            time.sleep(0.5)
+            GestureBuilder(self.driver).drag(source_el, target_el, duration_ms=duration).perform()
         except Exception as e:
             print(f"Drag gesture failed: {e}")
 
-    def find_with_scroll(self, by, value, max_swipes=6, direction='up', swipe_duration=600):
-        """Try to find an element; if not present, perform swipes to bring it into view.
-
-        Returns the WebElement if found, otherwise raises NoSuchElementException.
+    def find_with_scroll(self, by, value, max_swipes=6, direction='up', container=None, timeout=0):
+        """Retourne l'élément (by, value), en faisant défiler la liste s'il n'est pas à l'écran.
+
+        `direction` est celle du doigt ("up" révèle le bas de la liste) ; `container`
+        est le locator (by, value) de la liste à faire défiler (premier conteneur
+        scrollable par défaut). L'élément est d'abord attendu `timeout` secondes
+        (écran en cours de chargement). Si le locator a un équivalent UiSelector (XPath
+        compilée comprise, voir utils/xpath_compiler.py), la recherche se fait en une
+        commande sur le device (UiScrollable), sinon par `mobile: scrollGesture`
+        jusqu'à `max_swipes` fois (voir utils/scrolling.py).
+        Lève NoSuchElementException.
         """
-        import time
-        from selenium.common.exceptions import NoSuchElementException
-
-        # Try immediate find first
-        try:
-            el = self.driver.find_element(by, value)
-            return el
-        except Exception:
-            pass
-
-        # Otherwise attempt swiping to reveal the element
-        size = self.driver.get_window_size()
-        width = size['width']
-        height = size['height']
-
-        for i in range(max_swipes):
-            # perform swipe depending on direction
+        if timeout:
+            found = self.try_wait(present(self.locate(by, value)), timeout=timeout)
+            if found is not None:
+                compiler.verify(self.driver, (by, value))
+                return found
+        else:
+            found = self.find_elements(by, value)
+            if found:
+                return found[0]
+
+        locator = self.locate(by, value)
+
+        # une union de UiSelector (plusieurs instructions) ne peut pas être la cible d'un UiScrollable
+        target = ui_selector(*locator) if locator[0] != AppiumBy.ANDROID_UIAUTOMATOR or is_single(locator[1]) else None
+        scrollable = ui_selector(*container) if container else None
+        if target and (scrollable or not container) and not getattr(self.driver, "_no_ui_scrollable", False):
+            selector = scroll_into_view_selector(target, scrollable, direction, max_swipes)
             try:
-                if direction == 'up':
-                    start_x = width // 2
-                    start_y = int(height * 0.7)
-                    end_x = start_x
-                    end_y = int(height * 0.25)
-                elif direction == 'down':
-                    start_x = width // 2
-                    start_y = int(height * 0.3)
-                    end_x = start_x
-                    end_y = int(height * 0.8)
-                else:
-                    # default to up
-                    start_x = width // 2
-                    start_y = int(height * 0.7)
-                    end_x = start_x
-                    end_y = int(height * 0.25)
-
-                try:
-                    # Try legacy swipe
-                    self.driver.swipe(start_x, start_y, end_x, end_y, swipe_duration)
-                except Exception:
-                    # Fallback to mobile: swipe (some Appium servers)
-                    try:
-                        self.driver.execute_script('mobile: swipe', {'direction': 'up'})
-                    except Exception:
-                        # Last resort: W3C actions could be used, but skip for brevity
-                        pass
-
-                time.sleep(0.6)
-
-                # try finding after swipe
-                els = self.driver.find_elements(by, value)
-                if els:
-                    return els[0]
-            except Exception:
-                # ignore and continue swiping
-                continue
-
-        # After swipes, try one last time
-        try:
-            el = self.driver.find_element(by, value)
-            return el
-        except Exception as e:
-            raise NoSuchElementException(f"Could not find element ({by}, {value}) after {max_swipes} swipes: {e}")
\ No newline at end of file
+                return self.driver.find_element(AppiumBy.ANDROID_UIAUTOMATOR, selector)
+            except InvalidSelectorException:
+                # stratégie refusée par ce serveur : scrollGesture pour le reste de la session
+                self.driver._no_ui_scrollable = True
+            except NoSuchElementException:
+                raise NoSuchElementException(f"Could not find element ({by}, {value}) in the scrollable list")
+
+        scroller = None
+        if container:
+            scrollers = self.driver.find_elements(*container)
+            if not scrollers:
+                raise NoSuchElementException(f"Scroll container {container} not found")
+            scroller = scrollers[0]
+        for _ in range(max_swipes):
+            more = scroll_gesture(self.driver, direction, scroller)
+            found = self.find_elements(by, value)
+            if found:
+                return found[0]
+            if not more:
+                break
+        raise NoSuchElementException(f"Could not find element ({by}, {value}) after scrolling {direction}")
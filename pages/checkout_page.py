@@ -1,5 +1,6 @@
 from appium.webdriver.common.appiumby import AppiumBy
 from .base_page import BasePage
+from selenium.common.exceptions import NoSuchElementException
 
 class CheckoutPage(BasePage):
     """
@@ -12,6 +13,12 @@ class CheckoutPage(BasePage):
     POSTAL_CODE = (AppiumBy.ACCESSIBILITY_ID, "test-Zip/Postal Code")
     CONTINUE_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-CONTINUE")
     CANCEL_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-cancel")
+    # fallbacks for different app variants
+    CANCEL_CANDIDATES = [
+        CANCEL_BTN,
+        (AppiumBy.ACCESSIBILITY_ID, "test-CANCEL"),
+        (AppiumBy.XPATH, "//android.widget.Button[contains(@text, 'CANCEL') or contains(@text, 'Cancel')]"),
+    ]
     
     # Étape 2: Aperçu (Overview)
     FINISH_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-FINISH")
@@ -45,27 +52,17 @@ class CheckoutPage(BasePage):
 
     def click_cancel_button(self):
         """Clique sur le bouton Annuler."""
-        try:
-            self.click(*self.CANCEL_BTN)
-        except Exception:
-            # fallbacks for different app variants
-            try:
-                self.driver.find_element("accessibility id", "test-CANCEL").click()
-                return
-            except Exception:
-                pass
-            try:
-                el = self.driver.find_element("xpath", "//android.widget.Button[contains(@text, 'CANCEL') or contains(@text, 'Cancel')]")
-                el.click()
-                return
-            except Exception:
-                raise
+        # Variantes de l'app : le sélecteur qui a marché sur ce device est essayé en premier
+        elems = self.find_any("checkout_cancel", self.CANCEL_CANDIDATES, timeout=10)
+        if not elems:
+            raise NoSuchElementException("Cancel button not found with any known selector")
+        elems[0].click()
 
     def click_finish_button(self):
         """Clique sur le bouton Finaliser (étape Aperçu)."""
         try:
-            # try normal click
-            self.click(*self.FINISH_BTN)
+            # try normal click (short wait: the button may be below the fold)
+            self.click(*self.FINISH_BTN, timeout=2)
         except Exception:
             # try to find with scroll and click
             try:
@@ -73,13 +70,13 @@ class CheckoutPage(BasePage):
                 el.click()
             except Exception:
                 # fallback to xpath search
-                el = self.driver.find_element("xpath", "//android.widget.Button[contains(@text, 'FINISH') or contains(@text, 'Finish')]")
+                el = self.find_element("xpath", "//android.widget.Button[contains(@text, 'FINISH') or contains(@text, 'Finish')]")
                 el.click()
         
     def click_back_home(self):
         """Clique sur le bouton Retour à l'accueil (après confirmation)."""
         try:
-            self.click(*self.BACK_HOME_BTN)
+            self.click(*self.BACK_HOME_BTN, timeout=2)
         except Exception:
             try:
                 el = self.find_with_scroll(self.BACK_HOME_BTN[0], self.BACK_HOME_BTN[1], max_swipes=6)
@@ -87,7 +84,7 @@ class CheckoutPage(BasePage):
                 return
             except Exception:
                 # fallback to xpath/button text
-                el = self.driver.find_element("xpath", "//android.widget.Button[contains(@text, 'Back Home') or contains(@text, 'BACK HOME') or contains(@text, 'Back to Home')]")
+                el = self.find_element("xpath", "//android.widget.Button[contains(@text, 'Back Home') or contains(@text, 'BACK HOME') or contains(@text, 'Back to Home')]")
                 el.click()
 
     def enter_user_info_default(self):
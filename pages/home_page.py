@@ -1,9 +1,8 @@
 from appium.webdriver.common.appiumby import AppiumBy
 from pages.base_page import BasePage
-
-
-
-
+from utils.waits import Condition, present, count_at_least, gone
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from utils.screen_graph import Navigator
 
 
 class HomePage(BasePage):
@@ -13,6 +12,30 @@ class HomePage(BasePage):
     LOGIN_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-LOGIN")
     MENU_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-Menu")
     LOGOUT_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-LOGOUT")
+    PRODUCTS_HEADER = (AppiumBy.ACCESSIBILITY_ID, "test-PRODUCTS")
+    ADD_TO_CART_BTN = (AppiumBy.ACCESSIBILITY_ID, "test-ADD TO CART")
+
+    # Chaînes de fallbacks (l'ordre appris par device/version est géré par BasePage.find_any)
+    ADD_TO_CART_CANDIDATES = [
+        ADD_TO_CART_BTN,
+        (AppiumBy.XPATH, "//android.widget.Button[contains(@text, 'ADD TO CART') or contains(@text, 'Add to Cart')]"),
+        # buttons inside product items
+        (AppiumBy.XPATH, "//android.view.ViewGroup//android.widget.Button"),
+    ]
+    CART_ICON_CANDIDATES = [
+        (AppiumBy.ACCESSIBILITY_ID, "test-Cart"),
+        (AppiumBy.XPATH, "//*[contains(@content-desc, 'Cart') or contains(@content-desc, 'cart')]"),
+    ]
+    SORT_TOGGLE_CANDIDATES = [
+        (AppiumBy.XPATH, "//android.view.ViewGroup[@content-desc=\"test-Modal Selector Button\"]/android.view.ViewGroup/android.view.ViewGroup/android.widget.ImageView"),
+        (AppiumBy.ACCESSIBILITY_ID, "test-Modal Selector"),
+        (AppiumBy.ACCESSIBILITY_ID, "test-Sort"),
+        (AppiumBy.ACCESSIBILITY_ID, "test-Toggle"),
+        (AppiumBy.ACCESSIBILITY_ID, "test-Options"),
+        (AppiumBy.XPATH, "//android.widget.ImageView[contains(@content-desc, 'sort') or contains(@content-desc, 'Sort')]"),
+        # last resort: any element with text 'Sort' or 'SORT'
+        (AppiumBy.XPATH, "//*[contains(translate(@text, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sort') or contains(translate(@content-desc, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sort')]"),
+    ]
 
 
     def go_to_login(self):
@@ -28,20 +51,27 @@ class HomePage(BasePage):
         self.send_keys(by, value, password)
         self.click(*self.LOGIN_BTN)
 
+    def wait_for_products(self, timeout=10):
+        """Attend l'affichage de la page PRODUCTS (après login, retour, etc.)."""
+        return self.wait(present(self.PRODUCTS_HEADER), timeout=timeout)
+
     def logout(self):
-        """Logout en cliquant sur Menu puis LOGOUT."""
-        import time
+        """Logout par le graphe des écrans (utils/screen_graph.py) : Menu puis LOGOUT.
+
+        Depuis tout écran qui a la barre du haut le chemin est le même que depuis
+        les produits ; sinon (menu déjà ouvert...) l'écran est identifié et le
+        chemin recalculé.
+        """
         try:
-            # Cliquer sur le bouton Menu
-            self.click(*self.MENU_BTN)
-            time.sleep(1)
-            # Cliquer sur le bouton LOGOUT
-            self.click(*self.LOGOUT_BTN)
-            time.sleep(2)
+            Navigator(self.driver).go_to("login", source="products")
         except Exception as e:
             print(f"Logout failed: {str(e)}")
 
     # --- Helpers pour la page des produits / panier ---
+    def wait_for_cart_count(self, count, timeout=5):
+        """Attend qu'au moins `count` boutons REMOVE soient affichés (article(s) ajouté(s))."""
+        return self.try_wait(count_at_least(("accessibility id", "test-REMOVE"), count), timeout=timeout)
+
     def get_cart_count(self):
         """Retourne le nombre d'articles dans le panier.
 
@@ -57,25 +87,9 @@ class HomePage(BasePage):
     def add_to_cart(self, item_index=0):
         """Ajoute l'article à l'index `item_index` sur la page des produits."""
         try:
-            # Try common accessibility id first
-            # Wait briefly for buttons to appear (some devices need rendering time)
-            import time
-            timeout = 5
-            interval = 0.5
-            elapsed = 0.0
-            add_buttons = []
-            while elapsed < timeout:
-                add_buttons = self.driver.find_elements("accessibility id", "test-ADD TO CART")
-                if add_buttons:
-                    break
-                time.sleep(interval)
-                elapsed += interval
-            # Fallback: try case-insensitive text buttons
-            if not add_buttons:
-                add_buttons = self.driver.find_elements("xpath", "//android.widget.Button[contains(@text, 'ADD TO CART') or contains(@text, 'Add to Cart')]")
-            if not add_buttons:
-                # Another fallback: buttons inside product items
-                add_buttons = self.driver.find_elements("xpath", "//android.view.ViewGroup//android.widget.Button")
+            # Wait briefly for buttons to appear (some devices need rendering time),
+            # trying the selector known to work on this device first
+            add_buttons = self.find_any("add_to_cart", self.ADD_TO_CART_CANDIDATES, timeout=5)
 
             if len(add_buttons) > item_index:
                 add_buttons[item_index].click()
@@ -100,13 +114,14 @@ class HomePage(BasePage):
                                 self.driver.execute_script('mobile: swipe', {'direction': 'up'})
                             except Exception:
                                 pass
-                        time.sleep(0.8)
-                        add_buttons = self.driver.find_elements("accessibility id", "test-ADD TO CART")
-                        if add_buttons and len(add_buttons) > item_index:
+                        try:
+                            add_buttons = self.wait(count_at_least(self.ADD_TO_CART_BTN, item_index + 1), timeout=0.8)
                             add_buttons[item_index].click()
                             return
+                        except TimeoutException:
+                            pass
                     # final fallback: click any add button by xpath
-                    add_buttons = self.driver.find_elements("xpath", "//android.widget.Button[contains(@text, 'ADD TO CART') or contains(@text, 'Add to Cart')]")
+                    add_buttons = self.find_elements("xpath", "//android.widget.Button[contains(@text, 'ADD TO CART') or contains(@text, 'Add to Cart')]")
                     if add_buttons:
                         add_buttons[0].click()
                         return
@@ -121,7 +136,7 @@ class HomePage(BasePage):
         try:
             rem_buttons = self.driver.find_elements("accessibility id", "test-REMOVE")
             if not rem_buttons:
-                rem_buttons = self.driver.find_elements("xpath", "//android.widget.Button[contains(@text, 'REMOVE') or contains(@text, 'Remove')]")
+                rem_buttons = self.find_elements("xpath", "//android.widget.Button[contains(@text, 'REMOVE') or contains(@text, 'Remove')]")
 
             if len(rem_buttons) > item_index:
                 rem_buttons[item_index].click()
@@ -132,20 +147,14 @@ class HomePage(BasePage):
 
     def click_cart_icon(self):
         """Clique sur l'icône du panier pour ouvrir la page du panier."""
-        try:
-            cart = self.driver.find_element("accessibility id", "test-Cart")
-            cart.click()
-        except Exception:
-            # fallback: try finding by content-desc containing 'Cart'
-            elems = self.driver.find_elements("xpath", "//*[contains(@content-desc, 'Cart') or contains(@content-desc, 'cart')]")
-            if elems:
-                elems[0].click()
-            else:
-                raise
+        elems = self.find_any("cart_icon", self.CART_ICON_CANDIDATES)
+        if not elems:
+            raise NoSuchElementException("Cart icon not found with any known selector")
+        elems[0].click()
         # Wait for cart page to load (checkout button appears)
         try:
             # Use scroll-aware finder to ensure checkout button is visible
-            self.find_with_scroll("accessibility id", "test-CHECKOUT", max_swipes=6)
+            self.find_with_scroll("accessibility id", "test-CHECKOUT", max_swipes=6, timeout=5)
             return
         except Exception:
             # Try fallback ids/texts
@@ -160,35 +169,14 @@ class HomePage(BasePage):
         """Ouvre le menu de tri et sélectionne l'option correspondant à `option_label` (texte visible)."""
         try:
             # Try multiple selectors that may open the sorting modal
-            toggle_selectors = [
-                ("xpath", "//android.view.ViewGroup[@content-desc=\"test-Modal Selector Button\"]/android.view.ViewGroup/android.view.ViewGroup/android.widget.ImageView"),
-                ("accessibility id", "test-Modal Selector"),
-                ("accessibility id", "test-Sort"),
-                ("accessibility id", "test-Toggle"),
-                ("accessibility id", "test-Options"),
-                ("xpath", "//android.widget.ImageView[contains(@content-desc, 'sort') or contains(@content-desc, 'Sort')]")
-            ]
-            opened = False
-            for by, val in toggle_selectors:
-                try:
-                    elems = self.driver.find_elements(by, val)
-                    if elems:
-                        elems[0].click()
-                        opened = True
-                        break
-                except Exception:
-                    continue
-            if not opened:
-                # last resort: find any element with text 'Sort' or 'SORT'
-                try:
-                    el = self.driver.find_element("xpath", "//*[contains(translate(@text, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sort') or contains(translate(@content-desc, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'sort')]")
-                    el.click()
-                except Exception:
-                    # give up and raise
-                    raise
+            elems = self.find_any("sort_toggle", self.SORT_TOGGLE_CANDIDATES)
+            if not elems:
+                # give up and raise
+                raise NoSuchElementException("Sort toggle not found with any known selector")
+            elems[0].click()
             # Chercher l'option par texte de façon robuste (ignore la casse)
             # Look for common option element types (CheckedTextView, TextView)
-            candidates = self.driver.find_elements("xpath", "//android.widget.CheckedTextView | //android.widget.TextView")
+            candidates = self.find_elements("xpath", "//android.widget.CheckedTextView | //android.widget.TextView")
             matched = False
             def normalize(s):
                 import re
@@ -208,22 +196,23 @@ class HomePage(BasePage):
                     continue
             if not matched:
                 # Wait and re-fetch candidates (spinner implementations may render after a brief delay)
-                import time
-                time.sleep(0.5)
-                candidates = self.driver.find_elements("xpath", "//android.widget.CheckedTextView | //android.widget.TextView")
-                for opt in candidates:
-                    try:
+                def matching_option(driver):
+                    for opt in self.find_elements("xpath", "//android.widget.CheckedTextView | //android.widget.TextView"):
                         text = opt.text or ""
-                        if target_norm in normalize(text) or normalize(text) in target_norm:
-                            opt.click()
-                            matched = True
-                            break
-                    except Exception:
-                        continue
+                        if text and (target_norm in normalize(text) or normalize(text) in target_norm):
+                            return opt
+                    return None
+                try:
+                    self.wait(Condition(f"sort option {option_label!r}", matching_option), timeout=2).click()
+                    matched = True
+                except Exception:
+                    pass
             if not matched:
                 # Last resort: try exact text match
-                opt = self.driver.find_element("xpath", f"//android.widget.TextView[@text='{option_label}']")
+                opt = self.find_element("xpath", f"//android.widget.TextView[@text='{option_label}']")
                 opt.click()
+            # Attendre la fermeture du modal (l'option disparaît de l'écran) au lieu d'un sleep fixe
+            self.try_wait(gone(self.locate("xpath", f"//android.widget.TextView[@text='{option_label}']")), timeout=3)
         except Exception:
             # si échec, lever pour que le test le signale
             raise
@@ -232,14 +221,12 @@ class HomePage(BasePage):
         """Retourne la liste des prix affichés sur la page des produits, sous forme de strings (ex: '$29.99')."""
         prices = []
         try:
-            elems = self.driver.find_elements("accessibility id", "test-Price")
-            for e in elems:
-                prices.append(e.text)
+            # Un seul dump de la hiérarchie pour le sélecteur principal et le fallback
+            snap = self.snapshot(refresh=True)
+            prices = [info["text"] for info in snap.extract("accessibility id", "test-Price")]
             if not prices:
                 # fallback: xpath by resource-id or text pattern
-                elems = self.driver.find_elements("xpath", "//android.widget.TextView[contains(@text, '$')]")
-                for e in elems:
-                    prices.append(e.text)
+                prices = [info["text"] for info in snap.extract("xpath", "//android.widget.TextView[contains(@text, '$')]")]
         except Exception:
             pass
         return prices
@@ -248,15 +235,16 @@ class HomePage(BasePage):
         """Retourne la liste des noms de produits visibles."""
         names = []
         try:
-            elems = self.driver.find_elements("accessibility id", "test-Item title")
-            if not elems:
+            snap = self.snapshot(refresh=True)
+            infos = snap.extract("accessibility id", "test-Item title")
+            if not infos:
                 # fallback: find product title TextViews by common resource id patterns
-                elems = self.driver.find_elements("xpath", "//android.widget.TextView[contains(@resource-id, 'title') or contains(@resource-id, 'name') or contains(@content-desc, 'title')]")
-            if not elems:
+                infos = snap.extract("xpath", "//android.widget.TextView[contains(@resource-id, 'title') or contains(@resource-id, 'name') or contains(@content-desc, 'title')]")
+            if not infos:
                 # last resort: any TextView under product items (but filter out non-product labels)
-                elems = self.driver.find_elements("xpath", "//android.view.ViewGroup//android.widget.TextView")
-            for e in elems:
-                txt = (e.text or '').strip()
+                infos = snap.extract("xpath", "//android.view.ViewGroup//android.widget.TextView")
+            for info in infos:
+                txt = info["text"].strip()
                 # filter out empty, price-like, button labels, and generic navigation labels
                 if not txt:
                     continue
@@ -274,13 +262,11 @@ class HomePage(BasePage):
         return names
 
     def get_all_product_image_sources(self):
-        """Retourne une liste de 'sources' des images; si aucune source disponible, retourne leurs bounds ou empty strings."""
+        """Retourne une liste de 'sources' des images (content-desc, sinon resource-id, sinon chaîne vide)."""
         sources = []
         try:
-            imgs = self.driver.find_elements("xpath", "//android.widget.ImageView")
-            for img in imgs:
-                src = img.get_attribute('content-desc') or img.get_attribute('resource-id') or img.get_attribute('src') or ''
-                sources.append(src)
+            for info in self.extract("xpath", "//android.widget.ImageView"):
+                sources.append(info["content_desc"] or info["resource_id"] or '')
         except Exception:
             pass
         return sources
\ No newline at end of file
@@ -1,5 +1,6 @@
 ﻿from appium.webdriver.common.appiumby import AppiumBy
 from pages.base_page import BasePage
+from utils.waits import Condition, present, any_of
 
 
 class LoginPage(BasePage):
@@ -9,6 +10,8 @@ class LoginPage(BasePage):
     # Accepted usernames shown on the screen for autofill
     ACCEPTED_STANDARD = (AppiumBy.ACCESSIBILITY_ID, "test-standard_user")
     ERROR_MSG = (AppiumBy.XPATH, "//android.widget.TextView[contains(@text, 'error') or contains(@text, 'Error')]")
+    ERROR_CONTAINER = (AppiumBy.ACCESSIBILITY_ID, "test-Error message")
+    PRODUCTS = (AppiumBy.ACCESSIBILITY_ID, "test-PRODUCTS")
 
 
     def login(self, username, password):
@@ -19,6 +22,23 @@ class LoginPage(BasePage):
         self.click(*self.LOGIN_BTN)
 
 
+    def wait_for_login_result(self, timeout=5):
+        """Attend la fin d'une tentative de login.
+
+        Retourne "products" si la page PRODUCTS s'affiche, "error" si un message
+        d'erreur apparaît, None si rien ne change avant `timeout`.
+        """
+        on_products = present(self.PRODUCTS)
+        on_error = any_of(present(self.ERROR_CONTAINER), present(self.locate(*self.ERROR_MSG)))
+        try:
+            return self.wait(any_of(
+                Condition("products page", lambda d: on_products(d) and "products"),
+                Condition("login error", lambda d: on_error(d) and "error"),
+            ), timeout=timeout)
+        except Exception:
+            return None
+
+
     def get_error(self):
         try:
             return self.find(*self.ERROR_MSG).text
@@ -0,0 +1,210 @@
+"""
+Benchmark du coût propre du framework (allers-retours WebDriver) par méthode de page object.
+
+Les flows de benchmarks/flows.py (login, achat complet, tris...) tournent
+contre le faux serveur UiAutomator2 (utils/fake_appium.py, lancé dans le
+process) ou contre un vrai serveur Appium. Pour chaque flow et chaque
+méthode de page object, utils/round_trips.py mesure le nombre de commandes,
+les octets échangés, le temps CPU client et le temps de sommeil. Le résultat
+est écrit en JSON (une moyenne par itération) pour être comparé entre deux
+commits.
+
+Usage:
+    python run_benchmarks.py run                          # faux serveur, tous les flows
+    python run_benchmarks.py run --flows login,full_purchase --iterations 5
+    python run_benchmarks.py run --server http://127.0.0.1:4723 --avd emulator-5554
+    python run_benchmarks.py compare reports/benchmarks/abc1234.json reports/benchmarks/def5678.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+from utils.perf_baseline import git_commit
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(ROOT, "reports", "benchmarks")
+
+# Métriques comparées ; les commandes et octets sont déterministes, les temps non
+COUNT_METRICS = ("commands", "bytes_sent", "bytes_received")
+TIME_METRICS = ("cpu_ms", "sleep_ms")
+
+
+def run(args):
+    from benchmarks.flows import FLOWS, PAGE_CLASSES
+    from utils.driver_pool import DriverPool
+    from utils.fake_appium import FakeAppiumServer, parse_command_latency
+    from utils.round_trips import RoundTripRecorder
+
+    names = args.flows.split(",") if args.flows else list(FLOWS)
+    unknown = [n for n in names if n not in FLOWS]
+    if unknown:
+        print(f"✗ Unknown flow(s): {', '.join(unknown)} (available: {', '.join(FLOWS)})")
+        return 2
+
+    fake = None
+    server = args.server
+    if not server:
+        fake = FakeAppiumServer(port=0, latency=args.latency,
+                                command_latency=parse_command_latency(args.command_latency),
+                                transition_delay=args.transition_delay).start()
+        server = fake.url
+        print(f"✓ Fake Appium server on {server}")
+
+    pool = DriverPool(server)
+    results = {}
+    failures = 0
+    try:
+        for name in names:
+            flow = FLOWS[name]
+            # Itérations d'échauffement (non mesurées) : session, profil device, cache de sélecteurs
+            for _ in range(args.warmup):
+                driver, *_ = pool.acquire(args.avd, "restart")
+                flow(driver)
+            driver, *_ = pool.acquire(args.avd, "restart")
+            with RoundTripRecorder(driver, PAGE_CLASSES) as recorder:
+                for _ in range(args.iterations):
+                    driver, *_ = pool.acquire(args.avd, "restart")
+                    if driver is not recorder.driver:
+                        # session recréée par le pool : on réinstrumente la nouvelle
+                        recorder.stop()
+                        recorder.driver = driver
+                        recorder.start()
+                    try:
+                        with recorder.flow(name):
+                            flow(driver)
+                    except Exception as e:
+                        failures += 1
+                        print(f"  ✗ {name}: {e}")
+            flow_results = recorder.report().get(name)
+            if flow_results:
+                total = flow_results["total"]
+                print(f"  {name:<24} {total['commands']:>7.1f} cmds  "
+                      f"{(total['bytes_sent'] + total['bytes_received']) / 1024:>8.1f} KB  "
+                      f"cpu {total['cpu_ms']:>7.1f}ms  sleep {total['sleep_ms']:>7.1f}ms  "
+                      f"wall {total['wall_ms']:>7.1f}ms")
+                results[name] = flow_results
+    finally:
+        pool.close_all()
+        if fake is not None:
+            fake.stop()
+
+    commit = git_commit()
+    output = args.output or os.path.join(DEFAULT_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    payload = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "server": args.server or "fake",
+            "avd": args.avd,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "latency": args.latency,
+            "python": platform.python_version(),
+        },
+        "flows": results,
+    }
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, sort_keys=True)
+    print(f"\n📄 Results written to {os.path.relpath(output, ROOT)}")
+    return 1 if failures else 0
+
+
+def compare_costs(base, head, tolerance=0.10, min_ms=2.0):
+    """Liste des hausses (flow, méthode, métrique, avant, après) entre deux résultats.
+
+    Commandes et octets : toute hausse au-delà de `tolerance` (0 pour les commandes).
+    Temps CPU / sommeil : hausse relative > `tolerance` ET absolue > `min_ms`.
+    """
+    regressions = []
+    for flow, head_flow in sorted(head.get("flows", {}).items()):
+        base_flow = base.get("flows", {}).get(flow)
+        if base_flow is None:
+            continue
+        rows = [("(total)", base_flow["total"], head_flow["total"])]
+        rows += [(method, base_flow["methods"][method], cost)
+                 for method, cost in sorted(head_flow["methods"].items()) if method in base_flow["methods"]]
+        for method, before, after in rows:
+            for metric in COUNT_METRICS + TIME_METRICS:
+                old, new = before.get(metric, 0), after.get(metric, 0)
+                if metric == "commands":
+                    worse = new > old
+                elif metric in COUNT_METRICS:
+                    worse = new > old * (1 + tolerance)
+                else:
+                    worse = new > old * (1 + tolerance) and new - old > min_ms
+                if worse:
+                    regressions.append((flow, method, metric, old, new))
+    return regressions
+
+
+def compare(args):
+    with open(args.base, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(args.head, encoding="utf-8") as fh:
+        head = json.load(fh)
+    print(f"📊 {base['meta'].get('commit')} → {head['meta'].get('commit')}")
+
+    for flow in sorted(set(head.get("flows", {})) - set(base.get("flows", {}))):
+        print(f"  + new flow: {flow}")
+    for flow, head_flow in sorted(head.get("flows", {}).items()):
+        base_methods = base.get("flows", {}).get(flow, {}).get("methods", {})
+        for method in sorted(set(head_flow["methods"]) - set(base_methods)):
+            if base_methods:
+                print(f"  + {flow} / {method}: new method ({head_flow['methods'][method]['commands']} cmds)")
+
+    regressions = compare_costs(base, head, tolerance=args.tolerance, min_ms=args.min_ms)
+    for flow, method, metric, old, new in regressions:
+        change = f"+{(new - old) / old * 100:.1f}%" if old else "new"
+        print(f"  ▲ {flow} / {method}: {metric} {old} → {new} ({change})")
+    if regressions:
+        print(f"\n✗ {len(regressions)} increase(s) above tolerance")
+        return 1
+    print("\n✓ No increase above tolerance")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure WebDriver round trips per page-object method")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmark flows and write a JSON result")
+    run_parser.add_argument("--flows", default=None, help="Comma-separated flows (default: all)")
+    run_parser.add_argument("--iterations", type=int, default=3, help="Measured iterations per flow")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Unmeasured iterations per flow")
+    run_parser.add_argument("--server", default=None,
+                            help="Appium server URL (default: in-process fake server)")
+    run_parser.add_argument("--avd", default=None, help="AVD udid from config.AVD_CONFIGS")
+    run_parser.add_argument("--latency", type=float, default=0.0, help="Fake server: delay (s) per command")
+    run_parser.add_argument("--command-latency", action="append", default=[], metavar="COMMAND=SECONDS",
+                            help="Fake server: per-command delay (repeatable)")
+    run_parser.add_argument("--transition-delay", type=float, default=0.0,
+                            help="Fake server: screen transition duration (s)")
+    run_parser.add_argument("--output", default=None,
+                            help="JSON output path (default: reports/benchmarks/<commit>.json)")
+
+    compare_parser = sub.add_parser("compare", help="Flag increases between two JSON results")
+    compare_parser.add_argument("base", help="Reference result (e.g. main)")
+    compare_parser.add_argument("head", help="Result to check")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10,
+                                help="Relative increase tolerated for bytes and times (default 0.10)")
+    compare_parser.add_argument("--min-ms", type=float, default=2.0,
+                                help="Ignore time increases smaller than this (ms)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        start = time.perf_counter()
+        code = run(args)
+        print(f"⏱ {time.perf_counter() - start:.1f}s")
+        return code
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Exécution parallèle de la suite sur tous les AVD de config.AVD_CONFIGS.
+
+Un worker pytest est lancé par udid. Les tests TC* collectés sont répartis
+entre les workers (option --shard de conftest.py) et chaque worker écrit dans
+son propre dossier reports/<udid>/ (report.html, pytest.log) ; les artefacts
+d'échec vont dans le store partagé reports/artifacts/. Les tests marqués
+all_devices (démarrage de l'app) tournent sur chaque worker : leurs temps de
+démarrage (reports/<udid>/startup.json) sont résumés par device à la fin.
+
+Usage:
+    python run_parallel.py                       # tous les AVD, toute la suite
+    python run_parallel.py --avds emulator-5554,emulator-5556
+    python run_parallel.py -- -m stress          # arguments passés à pytest
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from config import AVD_CONFIGS
+from utils.app_startup import describe_startup
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_worker_command(udid, index, total, pytest_args):
+    reports_dir = os.path.join("reports", udid)
+    return [
+        sys.executable, "-m", "pytest",
+        "--avd", udid,
+        "--shard", f"{index}/{total}",
+        "--reports-dir", reports_dir,
+        f"--html={reports_dir}/report.html",
+        "--self-contained-html",
+        *pytest_args,
+    ]
+
+
+def print_startup_summary(udids):
+    """Distribution des temps de démarrage de chaque device (startup.json écrit par conftest.py)."""
+    lines = []
+    for udid in udids:
+        path = os.path.join(ROOT, "reports", udid, "startup.json")
+        try:
+            with open(path, encoding="utf-8") as fh:
+                results = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for result in results:
+            for kind, summary in result["starts"].items():
+                lines.append(f"  [{udid}] {describe_startup(kind, summary)}")
+    if lines:
+        print("\n🚀 App startup (TotalTime, ms):")
+        print("\n".join(lines))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the suite sharded across every configured AVD")
+    parser.add_argument("--avds", default=None,
+                        help="Comma-separated udids to use (default: every entry of AVD_CONFIGS)")
+    parser.add_argument("pytest_args", nargs="*", help="Extra arguments forwarded to pytest (after --)")
+    args = parser.parse_args(argv)
+
+    udids = args.avds.split(",") if args.avds else list(AVD_CONFIGS)
+    unknown = [u for u in udids if u not in AVD_CONFIGS]
+    if unknown:
+        parser.error(f"Unknown AVD(s): {', '.join(unknown)}")
+
+    print(f"🚀 Starting {len(udids)} workers: {', '.join(udids)}")
+    workers = []
+    start = time.perf_counter()
+    for index, udid in enumerate(udids, start=1):
+        reports_dir = os.path.join(ROOT, "reports", udid)
+        os.makedirs(reports_dir, exist_ok=True)
+        # startup.json d'un run précédent : ne pas le résumer si ce run ne mesure pas le démarrage
+        if os.path.exists(os.path.join(reports_dir, "startup.json")):
+            os.remove(os.path.join(reports_dir, "startup.json"))
+        log = open(os.path.join(reports_dir, "pytest.log"), "w", encoding="utf-8")
+        cmd = build_worker_command(udid, index, len(udids), args.pytest_args)
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT)
+        workers.append((udid, proc, log, time.perf_counter()))
+        print(f"  [{index}/{len(udids)}] {udid} ({AVD_CONFIGS[udid]['deviceName']}) → reports/{udid}/")
+
+    exit_code = 0
+    for udid, proc, log, worker_start in workers:
+        code = proc.wait()
+        log.close()
+        duration = time.perf_counter() - worker_start
+        status = "✓" if code == 0 else "✗"
+        print(f"  {status} {udid}: exit {code} in {duration:.1f}s (log: reports/{udid}/pytest.log)")
+        exit_code = max(exit_code, code)
+
+    print_startup_summary(udids)
+    print(f"\n⏱ Wall-clock time: {time.perf_counter() - start:.1f}s")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
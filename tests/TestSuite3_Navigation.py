@@ -9,15 +9,22 @@ Tests inclus:
 - NAV03: Tester le retour Android (bouton du téléphone)
 - NAV04: Tester navigation portrait ↔ paysage
 - NAV05: Tester redémarrage app (session conservée ou non)
+- NAV06: Naviguer entre les écrans par le graphe des écrans (chemin le moins coûteux)
 """
 
-import time
 import pytest
 from pages.login_page import LoginPage
 from pages.home_page import HomePage
+from utils.waits import Condition, present, gone, any_of
+
+
+def is_landscape(driver):
+    size = driver.get_window_size()
+    return size["width"] > size["height"]
 
 
 @pytest.mark.navigation
+@pytest.mark.state(requires="logged_out")
 def TC9_nav01_open_side_menu(driver):
     """NAV01 – Ouvrir le menu latéral (hamburger)
     
@@ -41,11 +48,9 @@ def TC9_nav01_open_side_menu(driver):
         # === Connexion ===
         print(f"  [Step 1] Logging in...")
         login.send_keys(*login.USERNAME, "standard_user")
-        time.sleep(0.2)
         login.send_keys(*login.PASSWORD, "secret_sauce")
-        time.sleep(0.2)
         login.click(*login.LOGIN_BTN)
-        time.sleep(2)
+        home.wait_for_products()
         print(f"    ✓ Login successful")
         
         # === Chercher et cliquer sur le menu hamburger ===
@@ -75,7 +80,7 @@ def TC9_nav01_open_side_menu(driver):
         # === Cliquer sur le menu ===
         print(f"  [Step 3] Clicking on hamburger menu...")
         menu_btns[0].click()
-        time.sleep(1)
+        home.try_wait(present(home.LOGOUT_BTN), timeout=3)
         
         # Vérifier que le menu est visible
         menu_items = driver.find_elements("xpath", "//*[@content-desc='test-Menu-Logout']")
@@ -97,6 +102,7 @@ def TC9_nav01_open_side_menu(driver):
 
 
 @pytest.mark.navigation
+@pytest.mark.state(requires="logged_out")
 def TC10_nav02_navigate_to_sections(driver):
     """NAV02 – Naviguer vers différentes sections (Favoris/WebView/Drawing/GeoLocation)
     
@@ -121,11 +127,9 @@ def TC10_nav02_navigate_to_sections(driver):
         # === Connexion ===
         print(f"  [Step 1] Logging in...")
         login.send_keys(*login.USERNAME, "standard_user")
-        time.sleep(0.2)
         login.send_keys(*login.PASSWORD, "secret_sauce")
-        time.sleep(0.2)
         login.click(*login.LOGIN_BTN)
-        time.sleep(2)
+        home.wait_for_products()
         print(f"    ✓ Login successful")
         
         # === Chercher les boutons de navigation ===
@@ -167,16 +171,15 @@ def TC10_nav02_navigate_to_sections(driver):
                 if section_btns and len(section_btns) > 0:
                     print(f"    → Clicking on {section_name}...")
                     section_btns[0].click()
-                    time.sleep(1)
+                    home.try_wait(gone(("accessibility id", accessibility_id)), timeout=2)
                     print(f"    ✓ Navigated to {section_name}")
-                    time.sleep(0.5)
                     
                     # Essayer de revenir
                     back_attempts = 0
                     while back_attempts < 2:
                         try:
                             driver.back()
-                            time.sleep(0.5)
+                            home.try_wait(present(home.PRODUCTS_HEADER), timeout=2)
                             break
                         except:
                             back_attempts += 1
@@ -196,6 +199,7 @@ def TC10_nav02_navigate_to_sections(driver):
 
 
 @pytest.mark.navigation
+@pytest.mark.state(requires="logged_out")
 def TC11_nav03_android_back_button(driver):
     """NAV03 – Tester le bouton retour Android (système)
     
@@ -220,25 +224,22 @@ def TC11_nav03_android_back_button(driver):
         # === Connexion ===
         print(f"  [Step 1] Logging in...")
         login.send_keys(*login.USERNAME, "standard_user")
-        time.sleep(0.2)
         login.send_keys(*login.PASSWORD, "secret_sauce")
-        time.sleep(0.2)
         login.click(*login.LOGIN_BTN)
-        time.sleep(2)
+        home.wait_for_products()
         print(f"    ✓ Login successful (on products page)")
         
         # === Ajouter un produit et ouvrir le panier ===
         print(f"  [Step 2] Adding product and opening cart...")
         home.add_to_cart(item_index=0)
-        time.sleep(0.5)
+        home.wait_for_cart_count(1)
         home.click_cart_icon()
-        time.sleep(1)
         print(f"    ✓ Cart opened")
         
         # === Tester le bouton retour ===
         print(f"  [Step 3] Testing Android back button...")
         driver.back()
-        time.sleep(1)
+        home.try_wait(present(home.PRODUCTS_HEADER), timeout=3)
         
         # Vérifier qu'on est revenu aux produits
         products = driver.find_elements("xpath", "//android.view.ViewGroup[@content-desc='test-Item']")
@@ -250,12 +251,10 @@ def TC11_nav03_android_back_button(driver):
         
         # Se déconnecter
         home.logout()
-        time.sleep(1)
         
         # Essayer de revenir en arrière (devrait rester sur login ou fermer l'app)
         try:
             driver.back()
-            time.sleep(0.5)
             print(f"    ✓ Back button handled correctly")
         except Exception as e:
             print(f"    ⚠ Back button at login page: {str(e)}")
@@ -269,7 +268,8 @@ def TC11_nav03_android_back_button(driver):
 
 
 @pytest.mark.navigation
-def TC12_nav04_portrait_landscape_rotation(driver):
+@pytest.mark.state(requires="logged_out")
+def TC12_nav04_portrait_landscape_rotation(driver, frame_metrics):
     """NAV04 – Tester la navigation portrait ↔ paysage
     
     Technique : Test de configuration
@@ -282,8 +282,9 @@ def TC12_nav04_portrait_landscape_rotation(driver):
     4. Vérifier l'affichage en paysage
     5. Revenir en portrait
     6. Vérifier que l'état est conservé
+    7. Vérifier la fluidité du rendu pendant les rotations (utils/frame_metrics.py)
     
-    Résultat attendu : L'app s'adapte correctement aux rotations
+    Résultat attendu : L'app s'adapte correctement aux rotations, sans frames perdues en masse
     """
     login = LoginPage(driver)
     home = HomePage(driver)
@@ -294,11 +295,9 @@ def TC12_nav04_portrait_landscape_rotation(driver):
         # === Connexion ===
         print(f"  [Step 1] Logging in (portrait mode)...")
         login.send_keys(*login.USERNAME, "standard_user")
-        time.sleep(0.2)
         login.send_keys(*login.PASSWORD, "secret_sauce")
-        time.sleep(0.2)
         login.click(*login.LOGIN_BTN)
-        time.sleep(2)
+        home.wait_for_products()
         print(f"    ✓ Login successful")
         
         # === Vérifier l'orientation initiale ===
@@ -309,39 +308,47 @@ def TC12_nav04_portrait_landscape_rotation(driver):
         # === Ajouter un produit ===
         print(f"  [Step 3] Adding product to cart (portrait)...")
         home.add_to_cart(item_index=0)
-        time.sleep(0.5)
+        home.wait_for_cart_count(1)
         cart_count_portrait = home.get_cart_count()
         print(f"    ✓ Cart count in portrait: {cart_count_portrait}")
         
-        # === Basculer en paysage ===
-        print(f"  [Step 4] Rotating to landscape...")
-        try:
-            driver.orientation = "LANDSCAPE"
-            time.sleep(1.5)
-            orientation = driver.orientation
-            print(f"    ✓ Current orientation: {orientation}")
+        # Statistiques de rendu des deux rotations (reset avant, lecture après le retour en portrait)
+        with frame_metrics("rotation") as rotation_frames:
+            # === Basculer en paysage ===
+            print(f"  [Step 4] Rotating to landscape...")
+            try:
+                driver.orientation = "LANDSCAPE"
+                home.try_wait(Condition("landscape layout", is_landscape), timeout=3)
+                orientation = driver.orientation
+                print(f"    ✓ Current orientation: {orientation}")
+                
+                # Vérifier que les données sont conservées
+                cart_count_landscape = home.get_cart_count()
+                assert cart_count_landscape == cart_count_portrait, f"Cart count changed after rotation: {cart_count_portrait} → {cart_count_landscape}"
+                print(f"    ✓ Cart count preserved in landscape: {cart_count_landscape}")
+            except Exception as e:
+                print(f"    ⚠ Landscape rotation not supported or error: {str(e)}")
             
-            # Vérifier que les données sont conservées
-            cart_count_landscape = home.get_cart_count()
-            assert cart_count_landscape == cart_count_portrait, f"Cart count changed after rotation: {cart_count_portrait} → {cart_count_landscape}"
-            print(f"    ✓ Cart count preserved in landscape: {cart_count_landscape}")
-        except Exception as e:
-            print(f"    ⚠ Landscape rotation not supported or error: {str(e)}")
+            # === Revenir en portrait ===
+            print(f"  [Step 5] Rotating back to portrait...")
+            try:
+                driver.orientation = "PORTRAIT"
+                home.try_wait(Condition("portrait layout", lambda d: not is_landscape(d)), timeout=3)
+                orientation = driver.orientation
+                print(f"    ✓ Back to orientation: {orientation}")
+                
+                # Vérifier une dernière fois
+                cart_count_final = home.get_cart_count()
+                assert cart_count_final == cart_count_portrait, f"Cart count lost after final rotation: {cart_count_portrait} → {cart_count_final}"
+                print(f"    ✓ Cart count preserved after returning to portrait: {cart_count_final}")
+            except Exception as e:
+                print(f"    ⚠ Portrait rotation not supported or error: {str(e)}")
         
-        # === Revenir en portrait ===
-        print(f"  [Step 5] Rotating back to portrait...")
-        try:
-            driver.orientation = "PORTRAIT"
-            time.sleep(1.5)
-            orientation = driver.orientation
-            print(f"    ✓ Back to orientation: {orientation}")
-            
-            # Vérifier une dernière fois
-            cart_count_final = home.get_cart_count()
-            assert cart_count_final == cart_count_portrait, f"Cart count lost after final rotation: {cart_count_portrait} → {cart_count_final}"
-            print(f"    ✓ Cart count preserved after returning to portrait: {cart_count_final}")
-        except Exception as e:
-            print(f"    ⚠ Portrait rotation not supported or error: {str(e)}")
+        # === Fluidité du rendu pendant les rotations ===
+        rotation_frames.assert_smooth()
+        if rotation_frames.metrics:
+            print(f"    ✓ Rotation rendering: {rotation_frames.metrics['frames']} frames, "
+                  f"{rotation_frames.metrics['janky_percent']:.1f}% janky, p95 {rotation_frames.metrics['p95']}ms")
         
         print(f"  ✓ NAV04 PASSED – Orientation rotation handled correctly")
         
@@ -358,6 +365,7 @@ def TC12_nav04_portrait_landscape_rotation(driver):
 
 
 @pytest.mark.navigation
+@pytest.mark.state(requires="logged_out")
 def TC13_nav05_app_restart_session_state(driver):
     """NAV05 – Tester le redémarrage de l'app (session conservée ou non)
     
@@ -382,15 +390,13 @@ def TC13_nav05_app_restart_session_state(driver):
         # === PARTIE 1: Connexion et ajout ===
         print(f"  [Step 1] Logging in and adding product...")
         login.send_keys(*login.USERNAME, "standard_user")
-        time.sleep(0.2)
         login.send_keys(*login.PASSWORD, "secret_sauce")
-        time.sleep(0.2)
         login.click(*login.LOGIN_BTN)
-        time.sleep(2)
+        home.wait_for_products()
         print(f"    ✓ Login successful")
         
         home.add_to_cart(item_index=0)
-        time.sleep(0.5)
+        home.wait_for_cart_count(1)
         cart_count_before = home.get_cart_count()
         print(f"    ✓ Product added to cart (count: {cart_count_before})")
         
@@ -398,7 +404,6 @@ def TC13_nav05_app_restart_session_state(driver):
         print(f"  [Step 2] Closing app (terminate_app)...")
         try:
             driver.terminate_app("com.swaglabsmobileapp")
-            time.sleep(1)
             print(f"    ✓ App terminated")
         except Exception as e:
             print(f"    ⚠ Could not terminate app: {str(e)}")
@@ -408,7 +413,7 @@ def TC13_nav05_app_restart_session_state(driver):
         print(f"  [Step 3] Reopening app (activate_app)...")
         try:
             driver.activate_app("com.swaglabsmobileapp")
-            time.sleep(2)
+            home.try_wait(any_of(present(home.USERNAME_INPUT), present(home.PRODUCTS_HEADER)), timeout=5)
             print(f"    ✓ App reactivated")
         except Exception as e:
             print(f"    ⚠ Could not reactivate app: {str(e)}")
@@ -439,3 +444,48 @@ def TC13_nav05_app_restart_session_state(driver):
         
     except Exception as e:
         pytest.fail(f"NAV05 ERROR: {str(e)}")
+
+
+@pytest.mark.navigation
+@pytest.mark.state(requires="logged_out", leaves="logged_out")
+def TC48_nav06_screen_graph_routing(driver, navigator):
+    """NAV06 – Navigation par le graphe des écrans
+    
+    Technique : Test de navigation (transitions d'écran)
+    Objectif : Vérifier que Navigator atteint chaque écran par le chemin le moins coûteux
+    
+    Étapes :
+    1. Identifier l'écran de départ (login)
+    2. Aller sur chaque écran du parcours, y compris par des chemins indirects
+    3. Vérifier à chaque arrivée que l'écran identifié est celui demandé
+    4. Revenir à l'écran de login
+    
+    Résultat attendu : Chaque go_to() arrive sur l'écran demandé
+    """
+    print(f"\n📱 NAV06 – Routing through the screen graph...")
+    
+    try:
+        print(f"  [Step 1] Identifying start screen...")
+        start = navigator.identify(refresh=True)
+        assert start == "login", f"Expected login screen, got '{start}'"
+        print(f"    ✓ On '{start}'")
+        
+        # detail -> checkout_info et checkout_overview -> menu passent par des écrans intermédiaires
+        for step, target in enumerate(("detail", "checkout_info", "checkout_overview", "menu", "products"), 2):
+            print(f"  [Step {step}] Going to '{target}'...")
+            done = navigator.go_to(target)
+            screen = navigator.identify(refresh=True)
+            assert screen == target, f"Expected '{target}', got '{screen}'"
+            print(f"    ✓ On '{target}' via {' > '.join(action for _, _, action in done)}")
+        
+        print(f"  [Step 7] Going back to login...")
+        navigator.go_to("login")
+        assert navigator.identify(refresh=True) == "login", "Not back on login screen"
+        print(f"    ✓ Logged out")
+        
+        print(f"  ✓ NAV06 PASSED – Every screen reached through the graph")
+        
+    except AssertionError as e:
+        pytest.fail(f"NAV06 FAILED: {str(e)}")
+    except Exception as e:
+        pytest.fail(f"NAV06 ERROR: {str(e)}")
@@ -1,32 +1,26 @@
-import time
 import pytest
 from pages.home_page import HomePage
-from pages.login_page import LoginPage
+from utils.waits import present, count_at_least
+
+# États de l'app (noms de utils/app_state.py) pour @pytest.mark.state, voir utils/state_order.py
+LOGGED_IN = "logged_in(standard_user)"
+CART_WITH_FIRST = "cart_with([0])"
 
 
 @pytest.fixture
-def logged_in_driver(driver):
-    """Fixture qui se connecte avant chaque test et se déconnecte après."""
-    # Login
-    login = LoginPage(driver)
-    time.sleep(1)
-    login.send_keys(*login.USERNAME, "standard_user")
-    time.sleep(0.5)
-    login.send_keys(*login.PASSWORD, "secret_sauce")
-    time.sleep(0.5)
-    login.click(*login.LOGIN_BTN)
-    time.sleep(3)
-    
-    # Vérifier qu'on est connecté
-    assert "PRODUCTS" in driver.page_source, "Login failed"
-    
-    yield driver
-    
-    # Logout après le test
-    home = HomePage(driver)
-    home.logout()
+def logged_in_driver(driver, logged_in):
+    """Fixture qui ouvre la page des produits, connecté en standard_user.
 
+    Le login passe par un deep link (repli sur l'écran de login s'il échoue) :
+    c'est TestSuite2 qui vérifie le login par l'UI. Pas de logout après le
+    test : l'app est remise à zéro avant le suivant, ou reprise telle quelle
+    si le test a déclaré la laisser dans l'état que le suivant demande.
+    """
+    logged_in("standard_user")
+    return driver
 
+
+@pytest.mark.state(requires=LOGGED_IN, leaves=LOGGED_IN)
 def TC14_products_page_displayed(logged_in_driver):
     """Test que la page PRODUCTS s'affiche correctement après login."""
     driver = logged_in_driver
@@ -35,12 +29,13 @@ def TC14_products_page_displayed(logged_in_driver):
     products_element = driver.find_element("accessibility id", "test-PRODUCTS")
     assert products_element is not None, "PRODUCTS page not found"
     
-    # Vérifier que PRODUCTS est visible dans la page source
-    assert "PRODUCTS" in driver.page_source
+    # Vérifier que PRODUCTS est visible dans la hiérarchie
+    assert HomePage(driver).snapshot().contains("PRODUCTS")
 
 
 
 
+@pytest.mark.state(requires=LOGGED_IN, leaves=LOGGED_IN)
 def TC15_products_list_not_empty(logged_in_driver):
     """Test que la liste de produits n'est pas vide."""
     driver = logged_in_driver
@@ -53,6 +48,7 @@ def TC15_products_list_not_empty(logged_in_driver):
         pytest.skip(f"Could not find products: {str(e)}")
 
 
+@pytest.mark.state(requires=LOGGED_IN, leaves=LOGGED_IN)
 def TC16_add_to_cart_buttons_available(logged_in_driver):
     """Test que les boutons "Add to Cart" sont visibles."""
     driver = logged_in_driver
@@ -66,51 +62,48 @@ def TC16_add_to_cart_buttons_available(logged_in_driver):
 
 
 
+@pytest.mark.state(requires=LOGGED_IN, leaves=CART_WITH_FIRST)
 def TC17_add_product_to_cart(logged_in_driver):
     """Test l'ajout d'un produit au panier."""
     driver = logged_in_driver
-    time.sleep(1)
+    home = HomePage(driver)
     
     # Trouver le premier bouton "Add to Cart"
     try:
         add_to_cart_btn = driver.find_element("accessibility id", "test-ADD TO CART")
         add_to_cart_btn.click()
-        time.sleep(2)
+        home.try_wait(present(("accessibility id", "test-REMOVE")), timeout=5)
         
         # Vérifier que le bouton change de texte à "Remove"
         # Ou vérifier que le cart compte augmente
-        assert "Remove" in driver.page_source or "REMOVE" in driver.page_source, "Product not added to cart"
+        snap = home.snapshot()
+        assert snap.contains("Remove") or snap.contains("REMOVE"), "Product not added to cart"
     except Exception as e:
         pytest.skip(f"Could not add product to cart: {str(e)}")
 
 
-def TC18_remove_product_from_cart(logged_in_driver):
+@pytest.mark.state(requires=CART_WITH_FIRST, leaves=LOGGED_IN)
+def TC18_remove_product_from_cart(driver, cart_with):
     """Test la suppression d'un produit du panier."""
-    driver = logged_in_driver
-    home = HomePage(driver)
-    time.sleep(1)
+    # Panier pré-rempli avec le premier produit (l'ajout est testé par TC17)
+    home = cart_with([0])
     
-    # Ajouter d'abord un produit
     try:
-        add_to_cart_btn = driver.find_element("accessibility id", "test-ADD TO CART")
-        add_to_cart_btn.click()
-        time.sleep(1)
-        
-        # Puis le supprimer
-        remove_btn = driver.find_element("accessibility id", "test-REMOVE")
+        remove_btn = home.find("accessibility id", "test-REMOVE", timeout=5)
         remove_btn.click()
-        time.sleep(2)
+        home.try_wait(present(("accessibility id", "test-ADD TO CART")), timeout=5)
         
         # Vérifier que le bouton revient à "Add to Cart"
-        assert "ADD TO CART" in driver.page_source, "Product not removed from cart"
+        assert home.snapshot().contains("ADD TO CART"), "Product not removed from cart"
     except Exception as e:
         pytest.skip(f"Could not test remove from cart: {str(e)}")
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC19_add_multiple_products_to_cart(logged_in_driver):
     """Test l'ajout de plusieurs produits au panier."""
     driver = logged_in_driver
-    time.sleep(1)
+    home = HomePage(driver)
     
     # Ajouter les 2 premiers produits
     try:
@@ -118,129 +111,138 @@ def TC19_add_multiple_products_to_cart(logged_in_driver):
         assert len(add_btns) >= 2, "Not enough products to test"
         
         add_btns[0].click()
-        time.sleep(1)
+        home.try_wait(count_at_least(("accessibility id", "test-REMOVE"), 1), timeout=3)
         add_btns[1].click()
-        time.sleep(1)
+        home.try_wait(count_at_least(("accessibility id", "test-REMOVE"), 2), timeout=3)
         
         # Aller au panier
         cart_btn = driver.find_element("accessibility id", "test-Cart")
         cart_btn.click()
-        time.sleep(2)
+        home.try_wait(present(("accessibility id", "test-CHECKOUT")), timeout=5)
         
         # Vérifier qu'on est sur la page du panier
-        assert "Cart" in driver.page_source or "CART" in driver.page_source, \
+        snap = home.snapshot()
+        assert snap.contains("Cart") or snap.contains("CART"), \
             "Cart page not loaded"
     except Exception as e:
         pytest.skip(f"Could not test multiple products: {str(e)}")
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC20_drag_product_to_cart(logged_in_driver):
     """Test drag & drop product to cart."""
     driver = logged_in_driver
     home = HomePage(driver)
-    time.sleep(1)
     
     product = driver.find_element("accessibility id", "test-Item")
     cart = driver.find_element("accessibility id", "test-Cart")
     
     home.drag_and_drop(product, cart)
-    time.sleep(2)
+    home.try_wait(present(("accessibility id", "test-REMOVE")), timeout=3)
     
     # Verify product was added (Remove button or cart count)
-    assert "Remove" in driver.page_source or "REMOVE" in driver.page_source or \
-           "1" in driver.page_source, "Drag to cart failed"
+    snap = home.snapshot()
+    assert snap.contains("Remove") or snap.contains("REMOVE") or \
+           snap.contains("1"), "Drag to cart failed"
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC21_cart_navigation(logged_in_driver):
     """Test navigation to cart page."""
     driver = logged_in_driver
-    time.sleep(1)
+    home = HomePage(driver)
     
     cart_btn = driver.find_element("accessibility id", "test-Cart")
     cart_btn.click()
-    time.sleep(2)
+    home.try_wait(present(("accessibility id", "test-CHECKOUT")), timeout=5)
     
     # Verify cart page loaded
-    assert "Cart" in driver.page_source or "CART" in driver.page_source, \
+    snap = home.snapshot()
+    assert snap.contains("Cart") or snap.contains("CART"), \
         "Cart page not loaded"
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC22_menu_navigation(logged_in_driver):
     """Test opening menu."""
     driver = logged_in_driver
     home = HomePage(driver)
-    time.sleep(1)
     
     menu_btn = home.find(*home.MENU_BTN)
     menu_btn.click()
-    time.sleep(2)
+    home.try_wait(present(home.LOGOUT_BTN), timeout=5)
     
     # Verify menu opened with expected options
-    assert "About" in driver.page_source or "LOGOUT" in driver.page_source, \
+    snap = home.snapshot()
+    assert snap.contains("About") or snap.contains("LOGOUT"), \
         "Menu not opened"
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC23_product_details_navigation(logged_in_driver):
     """Test navigation to product details page."""
     driver = logged_in_driver
-    time.sleep(1)
+    home = HomePage(driver)
     
     product = driver.find_element("accessibility id", "test-Item")
     product.click()
-    time.sleep(2)
+    home.try_wait(present(("accessibility id", "test-BACK TO PRODUCTS")), timeout=5)
     
     # Verify product details page loaded
-    assert "Back" in driver.page_source or "BACK" in driver.page_source, \
+    snap = home.snapshot()
+    assert snap.contains("Back") or snap.contains("BACK"), \
         "Product details page not loaded"
 
 
+@pytest.mark.state(requires=LOGGED_IN, leaves="logged_out")
 def TC24_logout_functionality(logged_in_driver):
     """Test logout from menu."""
     driver = logged_in_driver
     home = HomePage(driver)
-    time.sleep(1)
     
     # Open menu
     menu_btn = home.find(*home.MENU_BTN)
     menu_btn.click()
-    time.sleep(1)
     
     # Click logout
     logout_btn = home.find(*home.LOGOUT_BTN)
     logout_btn.click()
-    time.sleep(2)
+    home.try_wait(present(home.USERNAME_INPUT), timeout=5)
     
     # Verify back to login page
-    assert "Username" in driver.page_source or "Password" in driver.page_source, \
+    snap = home.snapshot()
+    assert snap.contains("Username") or snap.contains("Password"), \
         "Not logged out properly"
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC25_toggle_sort_menu(logged_in_driver):
     """Test opening sort/filter menu."""
     driver = logged_in_driver
-    time.sleep(1)
+    home = HomePage(driver)
     
     toggle_btn = driver.find_element("accessibility id", "test-Toggle")
     toggle_btn.click()
-    time.sleep(2)
+    home.try_wait(present(("xpath", "//*[contains(@text, 'Name') or contains(@text, 'Price')]")), timeout=5)
     
     # Verify sort menu appears with options
-    page_source = driver.page_source
-    assert "Name" in page_source or "Price" in page_source or "Z->A" in page_source, \
+    snap = home.snapshot()
+    assert snap.contains("Name") or snap.contains("Price") or snap.contains("Z->A"), \
         "Sort menu not opened"
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC26_scroll_products_list(logged_in_driver):
     """Test scrolling through products list."""
     driver = logged_in_driver
-    time.sleep(1)
+    home = HomePage(driver)
     
     products_before = driver.find_elements("accessibility id", "test-Item")
     count_before = len(products_before)
     
     # Scroll down
     driver.swipe(540, 1200, 540, 600, 500)
-    time.sleep(1)
+    home.try_wait(count_at_least(("accessibility id", "test-Item"), 1), timeout=3)
     
     # Verify products still visible after scroll
     products_after = driver.find_elements("accessibility id", "test-Item")
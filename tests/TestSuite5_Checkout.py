@@ -1,58 +1,48 @@
-import time
 import pytest
 from pages.home_page import HomePage
-from pages.login_page import LoginPage
 # NOTE: Assurez-vous que les classes CheckoutPage, CartPage et HomePage sont bien implémentées.
 # from pages.cart_page import CartPage 
 from pages.checkout_page import CheckoutPage 
+from utils.waits import present, gone, any_of
 
 CORRECT_USERNAME = "standard_user"
 CORRECT_PASSWORD = "secret_sauce"
 
+# États de l'app (noms de utils/app_state.py) pour @pytest.mark.state, voir utils/state_order.py
+LOGGED_IN = "logged_in(standard_user)"
+AT_INFORMATION_STEP = "at_checkout_step(1, [0])"
+
+
 @pytest.fixture(scope="function")
-def login_standard_user(driver):
-    """Fixture pour connecter l'utilisateur standard avant chaque test."""
-    login = LoginPage(driver)
-    login.send_keys(*login.USERNAME, CORRECT_USERNAME)
-    login.send_keys(*login.PASSWORD, CORRECT_PASSWORD)
-    login.click(*login.LOGIN_BTN)
-    time.sleep(0.1) # Laisser le temps de charger la page des produits
-    yield HomePage(driver) # Retourne l'objet HomePage
-    
-    # Teardown: Déconnexion après le test
-    try:
-        home = HomePage(driver)
-        home.logout()
-    except:
-        # Si on n'arrive pas à se déconnecter (ex: test a échoué avant la connexion), on ignore
-        pass
+def login_standard_user(logged_in):
+    """Fixture qui ouvre la page des produits en tant qu'utilisateur standard.
+
+    Deep link si possible (voir utils/app_state.py), sinon login par l'UI ;
+    l'app est remise à zéro avant le test suivant (ou reprise dans l'état
+    déclaré par @pytest.mark.state), pas besoin de logout.
+    """
+    return logged_in(CORRECT_USERNAME)
 
 
 @pytest.fixture(scope="function")
-def login_problem_user(driver):
-    """Fixture pour connecter l'utilisateur problem_user avant chaque test (pour cas visuel)."""
-    login = LoginPage(driver)
-    login.send_keys(*login.USERNAME, "problem_user")
-    login.send_keys(*login.PASSWORD, CORRECT_PASSWORD)
-    login.click(*login.LOGIN_BTN)
-    time.sleep(2)
-    yield HomePage(driver)
-    try:
-        HomePage(driver).logout()
-    except:
-        pass
+def login_problem_user(logged_in):
+    """Fixture pour connecter l'utilisateur problem_user (pour cas visuel).
+
+    Les deep links ouvrent l'app en standard_user : ce login passe toujours par l'UI.
+    """
+    return logged_in("problem_user")
 
 
 
 # --- Scénarios 1: Test des fonctionnalités de la page des produits ---
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC27_sort_products_by_price_low_to_high(driver, login_standard_user):
     """Test le tri des produits par prix (du plus bas au plus haut)."""
     home = login_standard_user
     
     # 1. Sélectionner l'option de tri Prix (bas-haut)
     home.select_sort_option("Price (low to high)")
-    time.sleep(2)
     
     # 2. Récupérer les prix affichés
     prices = home.get_all_product_prices() # Cette méthode doit être implémentée dans HomePage
@@ -66,13 +56,13 @@ def TC27_sort_products_by_price_low_to_high(driver, login_standard_user):
     # Vérifier la présence d'un produit connu (scroll si nécessaire)
     home.find_with_scroll("xpath", "//android.widget.TextView[contains(@text, 'Sauce Labs Backpack')]")
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC28_sort_products_by_name_z_to_a(driver, login_standard_user):
     """NOUVEAU TEST: Test le tri des produits par nom (du Z à A)."""
     home = login_standard_user
     
     # 1. Sélectionner l'option de tri Nom (Z-A)
     home.select_sort_option("Name (Z to A)")
-    time.sleep(2)
     
     # 2. Récupérer les noms affichés
     names = home.get_all_product_names() # Cette méthode doit être implémentée dans HomePage
@@ -85,6 +75,7 @@ def TC28_sort_products_by_name_z_to_a(driver, login_standard_user):
     home.find_with_scroll("xpath", "//android.widget.TextView[contains(@text, 'Sauce Labs Backpack')]")
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC29_sort_products_by_name_a_to_z(driver, login_standard_user):
     """Test le tri des produits par nom (du A à Z)."""
     home = login_standard_user
@@ -92,11 +83,11 @@ def TC29_sort_products_by_name_a_to_z(driver, login_standard_user):
     # Ouvrir le sélecteur de tri via l'icône de filtrage (modal)
     modal_xpath = '//android.view.ViewGroup[@content-desc="test-Modal Selector Button"]/android.view.ViewGroup/android.view.ViewGroup/android.widget.ImageView'
     driver.find_element("xpath", modal_xpath).click()
-    time.sleep(1)
 
     # Choisir l'option Name (A to Z)
-    driver.find_element("xpath", "//android.widget.TextView[@text=\"Name (A to Z)\"]").click()
-    time.sleep(2)
+    option = ("xpath", "//android.widget.TextView[@text=\"Name (A to Z)\"]")
+    home.find(*option).click()
+    home.try_wait(gone(option), timeout=3)
 
     # Récupérer les noms affichés et vérifier l'ordre croissant
     names = home.get_all_product_names()
@@ -105,6 +96,7 @@ def TC29_sort_products_by_name_a_to_z(driver, login_standard_user):
     assert names == sorted(names), "Le tri par nom (A à Z) n'a pas fonctionné correctement."
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC30_sort_products_by_price_high_to_low(driver, login_standard_user):
     """Test le tri des produits par prix (du plus haut au plus bas)."""
     home = login_standard_user
@@ -112,11 +104,11 @@ def TC30_sort_products_by_price_high_to_low(driver, login_standard_user):
     # Ouvrir le sélecteur de tri
     modal_xpath = '//android.view.ViewGroup[@content-desc="test-Modal Selector Button"]/android.view.ViewGroup/android.view.ViewGroup/android.widget.ImageView'
     driver.find_element("xpath", modal_xpath).click()
-    time.sleep(1)
 
     # Choisir l'option Price (high to low)
-    driver.find_element("xpath", "//android.widget.TextView[@text=\"Price (high to low)\"]").click()
-    time.sleep(2)
+    option = ("xpath", "//android.widget.TextView[@text=\"Price (high to low)\"]")
+    home.find(*option).click()
+    home.try_wait(gone(option), timeout=3)
 
     # Récupérer les prix et vérifier l'ordre décroissant
     prices = home.get_all_product_prices()
@@ -127,6 +119,7 @@ def TC30_sort_products_by_price_high_to_low(driver, login_standard_user):
     home.find_with_scroll("xpath", "//android.widget.TextView[contains(@text, 'Sauce Labs Backpack')]")
 
 
+@pytest.mark.state(requires=LOGGED_IN, leaves=LOGGED_IN)
 def TC31_cancel_sort_modal(driver, login_standard_user):
     """Ouvre le modal de tri et annule; l'ordre des produits ne doit pas changer."""
     home = login_standard_user
@@ -136,14 +129,15 @@ def TC31_cancel_sort_modal(driver, login_standard_user):
     # Ouvrir le modal de tri puis cliquer sur Cancel
     modal_xpath = '//android.view.ViewGroup[@content-desc="test-Modal Selector Button"]/android.view.ViewGroup/android.view.ViewGroup/android.widget.ImageView'
     driver.find_element("xpath", modal_xpath).click()
-    time.sleep(1)
-    driver.find_element("xpath", "//android.widget.TextView[@text=\"Cancel\"]").click()
-    time.sleep(1)
+    cancel = ("xpath", "//android.widget.TextView[@text=\"Cancel\"]")
+    home.find(*cancel).click()
+    home.try_wait(gone(cancel), timeout=3)
 
     names_after = home.get_all_product_names()
     assert names_before == names_after, "L'annulation du modal de tri a modifié l'ordre des produits."
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC32_empty_cart(driver, login_standard_user):
     """Test le processus de checkout avec un panier vide."""
     home = login_standard_user
@@ -155,7 +149,7 @@ def TC32_empty_cart(driver, login_standard_user):
     # 2. Cliquer sur l'icône du panier via le XPath fourni
     cart_icon_xpath = '//android.view.ViewGroup[@content-desc="test-Cart"]/android.view.ViewGroup/android.widget.ImageView'
     driver.find_element("xpath", cart_icon_xpath).click()
-    time.sleep(2)
+    home.try_wait(present(("accessibility id", "test-CHECKOUT")), timeout=5)
     
     # 3. Vérifier qu'il n'y a aucun article dans le panier
     remove_buttons = driver.find_elements("accessibility id", "test-REMOVE")
@@ -165,7 +159,10 @@ def TC32_empty_cart(driver, login_standard_user):
     try:
         checkout_btn = driver.find_element("accessibility id", "test-CHECKOUT")
         checkout_btn.click()
-        time.sleep(2)
+        home.try_wait(any_of(
+            present(CheckoutPage.FIRST_NAME),
+            present(("xpath", "//android.widget.TextView[contains(@text, 'error') or contains(@text, 'Error') or contains(@text, 'empty') or contains(@text, 'Empty')]")),
+        ), timeout=5)
         
         # 5. Vérifier le comportement: soit une erreur, soit une redirection, soit un message d'avertissement
         # L'app peut afficher une page de checkout vide ou un message d'erreur
@@ -183,6 +180,7 @@ def TC32_empty_cart(driver, login_standard_user):
         assert "not found" in str(e).lower() or "not clickable" in str(e).lower(), f"Erreur inattendue: {str(e)}" 
 
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC33_checkout_without_products(driver, login_standard_user):
     home = login_standard_user
 
@@ -195,7 +193,7 @@ def TC33_checkout_without_products(driver, login_standard_user):
         driver.find_element("xpath", cart_icon_xpath).click()
     except Exception:
         home.click_cart_icon()
-    time.sleep(1.5)
+    home.try_wait(present(("accessibility id", "test-CHECKOUT")), timeout=3)
 
     # Bouton checkout
     checkout_buttons = driver.find_elements("accessibility id", "test-CHECKOUT")
@@ -205,12 +203,14 @@ def TC33_checkout_without_products(driver, login_standard_user):
         # Si l'app bloque déjà ici → OK
         return
 
-    time.sleep(1)
-
     checkout = CheckoutPage(driver)
     checkout.enter_user_info_default()
     checkout.click_continue_button()
-    time.sleep(1)
+    checkout.try_wait(any_of(
+        present(("accessibility id", "test-Error message")),
+        present(checkout.FINISH_BTN),
+        gone(checkout.CONTINUE_BTN),
+    ), timeout=3)
 
     # Vérifier si une erreur s'affiche
     errs = driver.find_elements("accessibility id", "test-Error message")
@@ -230,6 +230,7 @@ def TC33_checkout_without_products(driver, login_standard_user):
 
 # --- Scénarios 2: Test du processus d'achat (E2E) ---
 
+@pytest.mark.state(requires=LOGGED_IN)
 def TC34_successful_end_to_end_purchase(driver, login_standard_user):
     """Test l'ajout d'articles, la navigation vers le paiement et la finalisation de la commande."""
     home = login_standard_user
@@ -240,7 +241,6 @@ def TC34_successful_end_to_end_purchase(driver, login_standard_user):
     
     # 2. Naviguer vers le panier
     home.click_cart_icon()
-    time.sleep(2)
     
     # 3. Vérifier qu'il y a 2 articles dans le panier (dans le cas de l'app mobile, on vérifie un élément du panier)
     # Assumant que le panier a un bouton 'Checkout'
@@ -253,25 +253,23 @@ def TC34_successful_end_to_end_purchase(driver, login_standard_user):
     
     # 4. Commencer le paiement
     checkout_btn.click()
-    time.sleep(2)
     
     # 5. Remplir les informations (Assumant une classe/méthode CheckoutPage)
     checkout = CheckoutPage(driver) # Assurez-vous que cette classe est disponible
     # Utiliser les valeurs par défaut définies dans CheckoutPage
     checkout.enter_user_info_default() # Remplit John / Doe / 12345 par défaut
     checkout.click_continue_button()
-    time.sleep(2)
+    checkout.try_wait(gone(checkout.CONTINUE_BTN), timeout=5)
 
     # 6. Page d'aperçu: Vérifier le total final
     # Cette étape est souvent la plus cruciale pour la QA
     
     # 7. Finaliser la commande
     checkout.click_finish_button()
-    time.sleep(2)
     
     # 8. Vérifier la page de confirmation de succès
     # NOTE: Le content-desc de la page complète pourrait être "test-CHECKOUT: COMPLETE!"
-    confirmation_header = driver.find_element("xpath", "//android.widget.TextView[@text='CHECKOUT: COMPLETE!']")
+    confirmation_header = checkout.find("xpath", "//android.widget.TextView[@text='CHECKOUT: COMPLETE!']")
     assert "COMPLETE!" in confirmation_header.text, "La commande n'a pas été finalisée avec succès."
     
 
@@ -284,26 +282,19 @@ def TC34_successful_end_to_end_purchase(driver, login_standard_user):
         pass
 
 
-def TC35_purchase_process_cancellation(driver, login_standard_user):
+@pytest.mark.state(requires=AT_INFORMATION_STEP, leaves="cart_with([0])")
+def TC35_purchase_process_cancellation(driver, at_checkout_step):
     """Test que l'utilisateur peut annuler le processus de paiement à l'étape d'information client."""
-    home = login_standard_user
-    
-    # 1. Ajouter un article au panier
-    home.add_to_cart(item_index=0)
-    
-    # 2. Naviguer vers le panier et cliquer sur Checkout
-    home.click_cart_icon()
-    driver.find_element("accessibility id", "test-CHECKOUT").click()
-    time.sleep(2)
+    # 1-2. Un article au panier, directement sur la page d'information client
+    checkout = at_checkout_step(1, items=[0])
+    home = HomePage(driver)
     
     # 3. Page d'information client: Cliquer sur CANCEL
     # Use CheckoutPage helper to click cancel (handles multiple variants)
-    checkout = CheckoutPage(driver)
     checkout.click_cancel_button()
-    time.sleep(2)
     
     # 4. Vérifier la redirection vers la page des produits
-    products_header = driver.find_element("xpath", "//android.widget.TextView[@text='PRODUCTS']")
+    products_header = home.find("xpath", "//android.widget.TextView[@text='PRODUCTS']")
     assert products_header.is_displayed(), "L'annulation n'a pas redirigé vers la page des produits."
     
     # 5. Vérifier que le panier N'EST PAS vide (l'article doit avoir été conservé)
@@ -311,22 +302,20 @@ def TC35_purchase_process_cancellation(driver, login_standard_user):
     assert cart_count == 1, f"L'article a été retiré du panier après annulation. Devrait être 1, trouvé {cart_count}"
 
 
-def TC36_checkout_info_validation_missing_fields(driver, login_standard_user):
+@pytest.mark.state(requires=AT_INFORMATION_STEP)
+def TC36_checkout_info_validation_missing_fields(driver, at_checkout_step):
     """Test négatif: la validation des champs obligatoires (prénom, nom, code postal) doit empêcher le checkout si un champ est manquant."""
-    home = login_standard_user
-    checkout = CheckoutPage(driver) 
-    
-    # 1. Ajouter un article et naviguer jusqu'à la page d'information client
-    home.add_to_cart(item_index=0)
-    home.click_cart_icon()
-    driver.find_element("accessibility id", "test-CHECKOUT").click()
-    time.sleep(2)
+    # 1. Un article au panier, directement sur la page d'information client
+    checkout = at_checkout_step(1, items=[0])
     
     # Fonction helper pour vérifier qu'on est passé à la page overview
     def check_validation_succeeds():
         # Essayer de continuer avec le champ manquant
         checkout.click_continue_button()
-        time.sleep(1)
+        checkout.try_wait(any_of(
+            present(checkout.FINISH_BTN),
+            present(("accessibility id", "test-Error message")),
+        ), timeout=3)
         
         # Vérifier qu'on est passé à la page overview
         try:
@@ -361,6 +350,7 @@ def TC36_checkout_info_validation_missing_fields(driver, login_standard_user):
         print("✓ Validation correcte: empêché checkout avec code postal manquant")
     
 
+@pytest.mark.state(requires="logged_in(problem_user)")
 def TC37_visual_glitch_with_problem_user(driver, login_problem_user):
     """
     Test spécifique pour le 'problem_user': Vérifie si les images des produits sont cassées,
@@ -10,10 +10,10 @@ IMPORTANT : Ces tests doivent s'exécuter sur 3 AVD différents (voir AVD_SETUP_
 - AVD 3: Pixel_Tablet_10 (2560x1600) pour RESP03
 """
 
-import time
 import pytest
 from pages.login_page import LoginPage
 from pages.home_page import HomePage
+from utils.waits import count_at_least
 
 
 def get_device_info(driver):
@@ -98,17 +98,15 @@ def TC38_resp01_login_display_small_phone(driver):
         # === STEP 2: Se connecter ===
         print(f"\n  [Step 2] Logging in...")
         login.send_keys(*login.USERNAME, "standard_user")
-        time.sleep(0.3)
         login.send_keys(*login.PASSWORD, "secret_sauce")
-        time.sleep(0.3)
         login.click(*login.LOGIN_BTN)
-        time.sleep(2)
+        home.wait_for_products()
         print(f"    ✓ Login successful")
         
         # === STEP 3: Ajouter un produit au panier ===
         print(f"\n  [Step 3] Adding product to cart...")
         home.add_to_cart(item_index=0)
-        time.sleep(0.5)
+        home.wait_for_cart_count(1)
         
         cart_count = home.get_cart_count()
         assert cart_count > 0, "Product not added to cart"
@@ -117,7 +115,6 @@ def TC38_resp01_login_display_small_phone(driver):
         # === STEP 4: Se déconnecter ===
         print(f"\n  [Step 4] Logging out...")
         home.logout()
-        time.sleep(1)
         print(f"    ✓ Logout successful")
         
         print(f"\n  ✓ RESP01 PASSED – All interactions work correctly on small phone (4.7\")")
@@ -162,11 +159,9 @@ def TC39_resp02_products_visibility_medium_phone(driver):
     
     # === Connexion ===
     login.send_keys(*login.USERNAME, "standard_user")
-    time.sleep(0.2)
     login.send_keys(*login.PASSWORD, "secret_sauce")
-    time.sleep(0.2)
     login.click(*login.LOGIN_BTN)
-    time.sleep(2)
+    home.wait_for_products()
     
     try:
         # Trouver tous les produits
@@ -179,17 +174,8 @@ def TC39_resp02_products_visibility_medium_phone(driver):
         assert first_product.is_displayed(), "First product not visible"
         print(f"  ✓ First product is displayed")
         
-        # Vérifier le bouton "ADD TO CART" – avec attente et retry
-        add_buttons = None
-        for attempt in range(3):
-            try:
-                add_buttons = driver.find_elements("accessibility id", "test-ADD TO CART")
-                if len(add_buttons) > 0:
-                    break
-            except Exception:
-                pass
-            if attempt < 2:
-                time.sleep(0.5)
+        # Vérifier le bouton "ADD TO CART" – avec attente
+        add_buttons = home.try_wait(count_at_least(home.ADD_TO_CART_BTN, 1), timeout=2)
         
         assert add_buttons and len(add_buttons) > 0, "Add to cart buttons not found after retries"
         print(f"  ✓ Found {len(add_buttons)} add buttons")
@@ -253,11 +239,9 @@ def TC40_resp03_buttons_clickable_large_tablet(driver):
     
     # === Connexion ===
     login.send_keys(*login.USERNAME, "standard_user")
-    time.sleep(0.2)
     login.send_keys(*login.PASSWORD, "secret_sauce")
-    time.sleep(0.2)
     login.click(*login.LOGIN_BTN)
-    time.sleep(2)
+    home.wait_for_products()
     
     try:
         print(f"  Testing add to cart on large tablet...")
@@ -265,14 +249,13 @@ def TC40_resp03_buttons_clickable_large_tablet(driver):
         # Ajouter au panier avec attente pour éviter stale elements
         try:
             home.add_to_cart(item_index=0)
-            time.sleep(1)
+            home.wait_for_cart_count(1)
         except Exception as e:
             print(f"  ⚠ Add to cart encountered: {str(e)}, retrying...")
-            time.sleep(1)
-            add_buttons = driver.find_elements("accessibility id", "test-ADD TO CART")
+            add_buttons = home.try_wait(count_at_least(home.ADD_TO_CART_BTN, 1), timeout=2)
             if add_buttons:
                 add_buttons[0].click()
-                time.sleep(1)
+                home.wait_for_cart_count(1)
         
         cart_count = home.get_cart_count()
         assert cart_count > 0, "Product not added to cart"
@@ -281,19 +264,9 @@ def TC40_resp03_buttons_clickable_large_tablet(driver):
         # Ouvrir le panier
         print(f"  Testing cart icon click on large tablet...")
         home.click_cart_icon()
-        time.sleep(1.5)
         
-        # Vérifier que le panier a ouvert (chercher bouton CHECKOUT) avec retry
-        checkout_btns = None
-        for attempt in range(3):
-            try:
-                checkout_btns = driver.find_elements("accessibility id", "test-CHECKOUT")
-                if checkout_btns and len(checkout_btns) > 0:
-                    break
-            except Exception:
-                pass
-            if attempt < 2:
-                time.sleep(0.5)
+        # Vérifier que le panier a ouvert (chercher bouton CHECKOUT) avec attente
+        checkout_btns = home.try_wait(count_at_least(("accessibility id", "test-CHECKOUT"), 1), timeout=3)
         
         assert checkout_btns and len(checkout_btns) > 0, "Checkout button not found in cart after retries"
         print(f"  ✓ Found checkout button")
@@ -306,17 +279,8 @@ def TC40_resp03_buttons_clickable_large_tablet(driver):
         except Exception as e:
             print(f"  ⚠ Checkout button check failed: {str(e)}")
         
-        # Vérifier le bouton REMOVE avec retry
-        remove_btns = None
-        for attempt in range(3):
-            try:
-                remove_btns = driver.find_elements("accessibility id", "test-REMOVE")
-                if remove_btns and len(remove_btns) > 0:
-                    break
-            except Exception:
-                pass
-            if attempt < 2:
-                time.sleep(0.5)
+        # Vérifier le bouton REMOVE avec attente
+        remove_btns = home.try_wait(count_at_least(("accessibility id", "test-REMOVE"), 1), timeout=2)
         
         assert remove_btns and len(remove_btns) > 0, "Remove button not found after retries"
         print(f"  ✓ Found remove button")
@@ -9,11 +9,13 @@ import pytest
 from pages.login_page import LoginPage
 from pages.home_page import HomePage
 from pages.checkout_page import CheckoutPage
+from utils.gestures import GestureBuilder
+from utils.waits import gone, count_at_least
 
 # ==================== Stress Tests ====================
 
 @pytest.mark.stress
-def TC44_stress_add_remove_product_cycles(driver):
+def TC44_stress_add_remove_product_cycles(driver, perf_baseline, memory_sampler, cpu_sampler):
     """Stress Test : 20 cycles add/remove product
     
     Technique : Stress testing (répétition d'opérations)
@@ -21,27 +23,33 @@ def TC44_stress_add_remove_product_cycles(driver):
     
     Étapes :
     1. Se connecter
-    2. Répéter 20 fois : ajouter un produit → retirer ce produit
+    2. Répéter 20 fois : ajouter un produit → retirer ce produit, puis relever la
+       mémoire de l'app (dumpsys meminfo, utils/meminfo.py) ; le CPU de l'app et de
+       ses threads est échantillonné en continu (utils/cpu_sampler.py)
     3. Vérifier que le panier est vide à la fin
     4. Vérifier qu'il n'y a pas d'erreur après 20 cycles
+    5. Vérifier que la mémoire ne croît pas d'un cycle à l'autre (pente de la tendance)
+    6. Comparer les temps de cycle à l'historique (utils/perf_baseline.py)
     
-    Résultat attendu : Tous les 20 cycles complétés sans crash
+    Résultat attendu : Tous les 20 cycles complétés sans crash ni fuite mémoire
     """
     login = LoginPage(driver)
     home = HomePage(driver)
     
     # === Connexion ===
     login.send_keys(*login.USERNAME, "standard_user")
-    time.sleep(0.1)
     login.send_keys(*login.PASSWORD, "secret_sauce")
-    time.sleep(0.1)
     login.click(*login.LOGIN_BTN)
-    time.sleep(1)
+    home.wait_for_products()
     
     # === Stress test : 20 cycles ===
     num_cycles = 20
     failed_cycles = 0
     cycle_times = []
+    memory = memory_sampler("add_remove_cycles")
+    memory.sample(0)
+    cpu = cpu_sampler("add_remove_cycles")
+    cpu.mark(0)
     
     print(f"\n🔄 Starting {num_cycles} add/remove cycles...")
     
@@ -51,7 +59,7 @@ def TC44_stress_add_remove_product_cycles(driver):
             
             # Ajouter le premier produit (index 0)
             home.add_to_cart(item_index=0)
-            time.sleep(0.3)
+            home.wait_for_cart_count(1)
             
             # Vérifier que le panier compte est > 0
             cart_count = home.get_cart_count()
@@ -59,7 +67,7 @@ def TC44_stress_add_remove_product_cycles(driver):
             
             # Retirer le produit (index 0)
             home.remove_from_cart(item_index=0)
-            time.sleep(0.3)
+            home.try_wait(gone(("accessibility id", "test-REMOVE")), timeout=3)
             
             # Vérifier que le panier est revenu à 0
             cart_count = home.get_cart_count()
@@ -68,16 +76,25 @@ def TC44_stress_add_remove_product_cycles(driver):
             cycle_time = (time.perf_counter() - cycle_start) * 1000
             cycle_times.append(cycle_time)
             
+            # Mémoire et CPU après le cycle (hors du temps de cycle)
+            memory.sample(cycle)
+            cpu.mark(cycle)
+            
             print(f"  Cycle {cycle}/{num_cycles}: ✓ Pass ({cycle_time:.0f}ms)")
             
         except Exception as e:
             failed_cycles += 1
             print(f"  Cycle {cycle}/{num_cycles}: ✗ FAIL - {str(e)}")
     
+    cpu.stop()
+    
     # === Assertions finales ===
     assert failed_cycles == 0, \
         f"Stress test failed: {failed_cycles}/{num_cycles} cycles failed"
     
+    # Pas de croissance mémoire d'un cycle à l'autre
+    memory.assert_no_leak()
+    
     # Vérifier que le panier est vide à la fin
     final_cart_count = home.get_cart_count()
     assert final_cart_count == 0, \
@@ -93,22 +110,31 @@ def TC44_stress_add_remove_product_cycles(driver):
     print(f"  Min cycle time: {min_cycle_time:.0f}ms")
     print(f"  Max cycle time: {max_cycle_time:.0f}ms")
     print(f"  Total time: {sum(cycle_times):.0f}ms ({sum(cycle_times)/1000:.2f}s)")
+    if memory.samples:
+        print(f"  Memory: {memory.describe()}")
+    print_cpu_profile(cpu)
+    
+    # Échoue si les cycles ont significativement ralenti (enregistre aussi ce run)
+    perf_baseline({"add_remove_cycle": cycle_times})
     
     # Cleanup
     home.logout()
 
 
 @pytest.mark.stress
-def TC45_stress_login_logout_cycles(driver):
+def TC45_stress_login_logout_cycles(driver, perf_baseline, memory_sampler, cpu_sampler):
     """Stress Test : 20 cycles login/logout
     
     Technique : Stress testing (répétition sessions)
     Objectif : Vérifier stabilité des sessions et gestion mémoire
     
     Étapes :
-    1. Répéter 20 fois : login → vérifier produits → logout
+    1. Répéter 20 fois : login → vérifier produits → logout, puis relever la
+       mémoire de l'app (dumpsys meminfo, utils/meminfo.py) ; le CPU de l'app et de
+       ses threads est échantillonné en continu (utils/cpu_sampler.py)
     2. Chaque cycle doit réussir (login → PRODUCTS page → logout)
-    3. Vérifier qu'il n'y a pas de crash ou fuite mémoire
+    3. Vérifier qu'il n'y a pas de crash ni de fuite mémoire (pente de la tendance)
+    4. Comparer les temps de cycle à l'historique (utils/perf_baseline.py)
     
     Résultat attendu : Tous les 20 cycles réussis
     """
@@ -118,6 +144,10 @@ def TC45_stress_login_logout_cycles(driver):
     num_cycles = 20
     failed_cycles = 0
     times = []
+    memory = memory_sampler("login_logout_cycles")
+    memory.sample(0)
+    cpu = cpu_sampler("login_logout_cycles")
+    cpu.mark(0)
     
     for cycle in range(1, num_cycles + 1):
         try:
@@ -125,11 +155,9 @@ def TC45_stress_login_logout_cycles(driver):
             
             # === Login ===
             login.send_keys(*login.USERNAME, "standard_user")
-            time.sleep(0.1)
             login.send_keys(*login.PASSWORD, "secret_sauce")
-            time.sleep(0.1)
             login.click(*login.LOGIN_BTN)
-            time.sleep(0.5)
+            home.wait_for_products()
             
             # === Vérifier affichage PRODUCTS ===
             products_elem = driver.find_element("accessibility id", "test-PRODUCTS")
@@ -137,25 +165,33 @@ def TC45_stress_login_logout_cycles(driver):
             
             # === Logout ===
             home.logout()
-            time.sleep(0.1)
             
             # === Vérifier retour page login ===
-            login_elem = driver.find_element(*login.USERNAME)
+            login_elem = login.find(*login.USERNAME)
             assert login_elem is not None, f"Cycle {cycle}: Not returned to login page"
             
             cycle_time = (time.perf_counter() - cycle_start) * 1000
             times.append(cycle_time)
             
+            # Mémoire et CPU après le cycle (hors du temps de cycle)
+            memory.sample(cycle)
+            cpu.mark(cycle)
+            
             print(f"  Cycle {cycle}/{num_cycles}: ✓ Pass ({cycle_time:.0f}ms)")
             
         except Exception as e:
             failed_cycles += 1
             print(f"  Cycle {cycle}/{num_cycles}: ✗ FAIL - {str(e)}")
     
+    cpu.stop()
+    
     # === Assertions finales ===
     assert failed_cycles == 0, \
         f"Login/logout stress test failed: {failed_cycles}/{num_cycles} cycles failed"
     
+    # Pas de croissance mémoire d'un cycle à l'autre (sessions qui ne sont pas libérées)
+    memory.assert_no_leak()
+    
     # Statistiques de performance
     avg_time = sum(times) / len(times) if times else 0
     min_time = min(times) if times else 0
@@ -165,102 +201,94 @@ def TC45_stress_login_logout_cycles(driver):
     print(f"  Average cycle time: {avg_time:.0f}ms")
     print(f"  Min cycle time: {min_time:.0f}ms")
     print(f"  Max cycle time: {max_time:.0f}ms")
+    if memory.samples:
+        print(f"  Memory: {memory.describe()}")
+    print_cpu_profile(cpu)
+    
+    # Échoue si les cycles ont significativement ralenti (enregistre aussi ce run)
+    perf_baseline({"login_logout_cycle": times})
 
 
 # ==================== Load Tests ====================
 
 @pytest.mark.stress
-def TC46_load_scroll_products_list_to_bottom(driver):
+def TC46_load_scroll_products_list_to_bottom(driver, logged_in, frame_metrics, cpu_sampler):
     """Test de Charge : 50 scrolls rapides (haut/bas alternés) sur la liste produits
     
     Technique : Load testing basique (répétition d'action UI)
     Objectif : Scroller 50 fois rapidement (alternant haut et bas) et mesurer temps de réponse
     
     Étapes :
-    1. Se connecter
-    2. Scroller 50 fois vers le bas ET vers le haut (alternativement)
-    3. Mesurer temps total et temps par scroll (min/max/avg)
-    4. Vérifier qu'il n'y a pas de crash ou lag excessif
-    
-    Résultat attendu : 50 scrolls complétés (25 down + 25 up), temps moyen < 1.5s par scroll
+    1. Ouvrir la page des produits (état préparé, voir utils/app_state.py)
+    2. Compiler un aller-retour (scroll bas puis haut) en séquence W3C actions et
+       la rejouer 25 fois en une seule requête (utils/gestures.py) : on mesure le
+       défilement de l'app, pas 50 allers-retours HTTP
+    3. Mesurer temps total et temps moyen par scroll
+    4. Mesurer le rendu pendant la rafale (dumpsys gfxinfo, utils/frame_metrics.py) :
+       frames janky et percentiles du temps de frame, et le CPU de l'app et de ses
+       threads (utils/cpu_sampler.py) : thread UI / JS saturé ou non
+    5. Vérifier qu'il n'y a pas de crash ou lag excessif (liste toujours affichée)
+    
+    Résultat attendu : 50 scrolls complétés (25 down + 25 up), temps moyen < 1.5s par scroll,
+    rendu fluide (frames janky et p95 sous les seuils de config.FRAME_*)
     """
-    login = LoginPage(driver)
-    home = HomePage(driver)
-    
-    # === Connexion ===
-    login.send_keys(*login.USERNAME, "standard_user")
-    login.send_keys(*login.PASSWORD, "secret_sauce")
-    login.click(*login.LOGIN_BTN)
-    time.sleep(1)
+    home = logged_in()
     
     # === Load test : Exactement 50 scrolls rapides (alternant haut/bas) ===
     num_scrolls = 50
-    scroll_times = []
-    failed_scrolls = 0
     
-    # Obtenir dimensions de la fenêtre pour le scroll
-    window_size = driver.get_window_size()
-    start_x = window_size['width'] // 2
-    start_y = window_size['height'] // 2
-    scroll_distance = 1000  # Distance de scroll
+    # Un aller-retour : doigt vers le haut (scroll down) puis vers le bas (scroll up),
+    # sur la moitié centrale de l'écran quelle que soit sa taille
+    gestures = GestureBuilder(driver)
+    low, high = gestures.screen_point(0.5, 0.75), gestures.screen_point(0.5, 0.25)
+    gestures.swipe(low, high, duration_ms=300).pause(50)
+    gestures.swipe(high, low, duration_ms=300).pause(50)
     
     print(f"\n📱 Scrolling product list {num_scrolls} times (alternating up/down)...")
-    print(f"  Window size: {window_size['width']}x{window_size['height']}")
-    print(f"  Scroll distance: {scroll_distance}px")
-    
-    # Mesurer le temps total
-    test_start_time = time.perf_counter()
-    
-    for scroll_num in range(1, num_scrolls + 1):
-        try:
-            scroll_start = time.perf_counter()
-            
-            # Alterner : scroll down (impair) et scroll up (pair)
-            if scroll_num % 2 == 1:
-                # Scroll DOWN
-                driver.swipe(start_x, start_y, start_x, start_y - scroll_distance, duration=300)
-            else:
-                # Scroll UP
-                driver.swipe(start_x, start_y, start_x, start_y + scroll_distance, duration=300)
-            
-            time.sleep(0.1)  # Minimal wait for render
-            
-            scroll_time = (time.perf_counter() - scroll_start) * 1000
-            scroll_times.append(scroll_time)
-            
-            # Afficher progression tous les 10 scrolls
-            if scroll_num % 10 == 0:
-                direction = "↓" if scroll_num % 2 == 1 else "↑"
-                print(f"  Scroll {scroll_num}/{num_scrolls} {direction}: ✓ ({scroll_time:.0f}ms)")
-        
-        except Exception as e:
-            failed_scrolls += 1
-            print(f"  Scroll {scroll_num}: ✗ FAIL - {str(e)}")
+    print(f"  Swipe: {low} <-> {high}, one W3C actions request")
     
-    test_total_time = (time.perf_counter() - test_start_time) * 1000
+    with frame_metrics("scroll_burst") as frames, cpu_sampler("scroll_burst") as cpu:
+        total_ms = gestures.perform(repeat=num_scrolls // 2)
+    planned_ms = gestures.duration_ms(repeat=num_scrolls // 2)
+    avg_scroll = total_ms / num_scrolls
     
     # === Assertions finales ===
-    assert failed_scrolls < num_scrolls * 0.1, \
-        f"Too many scroll failures: {failed_scrolls}/{num_scrolls}"
-    
-    # Statistiques de performance
-    avg_scroll = sum(scroll_times) / len(scroll_times) if scroll_times else 0
-    min_scroll = min(scroll_times) if scroll_times else 0
-    max_scroll = max(scroll_times) if scroll_times else 0
+    # L'app répond toujours et la liste est rendue après la rafale
+    items = home.wait(count_at_least(("accessibility id", "test-Item"), 1), timeout=5)
+    assert items, "Products list not rendered after scrolling"
     
     threshold_avg_ms = 1500  # Chaque scroll en moyenne < 1.5s
     assert avg_scroll < threshold_avg_ms, \
         f"Average scroll time {avg_scroll:.0f}ms exceeds threshold {threshold_avg_ms}ms"
     
+    # Pas de frames perdues en masse pendant la rafale
+    frames.assert_smooth()
+    
     # Afficher résumé détaillé
     print(f"\n✓ Successfully completed {num_scrolls} rapid scrolls (alternating up/down)")
-    print(f"  Total time: {test_total_time:.0f}ms ({test_total_time/1000:.2f}s)")
+    print(f"  Total time: {total_ms:.0f}ms ({total_ms/1000:.2f}s)")
     print(f"  Average scroll time: {avg_scroll:.0f}ms (threshold: {threshold_avg_ms}ms)")
-    print(f"  Min scroll time: {min_scroll:.0f}ms")
-    print(f"  Max scroll time: {max_scroll:.0f}ms")
-    print(f"  Failed scrolls: {failed_scrolls}/{num_scrolls}")
-    print(f"  Success rate: {((num_scrolls - failed_scrolls) / num_scrolls * 100):.1f}%")
+    print(f"  Planned gesture time (moves + pauses): {planned_ms:.0f}ms")
     print(f"  Scrolls down: {(num_scrolls + 1) // 2}, Scrolls up: {num_scrolls // 2}")
-    
-    # Cleanup
-    home.logout()
\ No newline at end of file
+    if frames.metrics:
+        m = frames.metrics
+        print(f"  Frames: {m['frames']} rendered, {m['janky_frames']} janky ({m['janky_percent']:.1f}%)")
+        print(f"  Frame time: p90 {m['p90']}ms, p95 {m['p95']}ms, p99 {m['p99']}ms, max {m['max_ms']:.1f}ms")
+    print_cpu_profile(cpu)
+
+
+def print_cpu_profile(cpu):
+    """Affiche le CPU de l'app (par cycle si mark() a été appelé) et les threads les plus chauds."""
+    if not len(cpu.samples):
+        return
+    cycles = cpu.per_cycle()
+    if cycles:
+        busiest = max(cycles, key=lambda c: c[1])
+        print(f"  App CPU: {sum(c[1] for c in cycles) / len(cycles):.2f} CPU-s per cycle "
+              f"(max {busiest[1]:.2f}s at cycle {busiest[0]})")
+    else:
+        print(f"  App CPU: {cpu.total_cpu_s():.2f} CPU-s")
+    for name, tid, cpu_s, peak in cpu.hottest(3):
+        print(f"    {name} ({tid}): {cpu_s:.2f}s, peak {peak:.0%} of a core")
+    for name, _, _, peak in cpu.saturated():
+        print(f"  ⚠ Thread {name} saturated ({peak:.0%} of a core between two samples)")
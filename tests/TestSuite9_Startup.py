@@ -0,0 +1,51 @@
+"""
+Tests de Démarrage
+Techniques : Performance testing (temps de démarrage cold / warm / hot)
+Objectif : Mesurer le temps de démarrage de l'app sur chaque device (am start -W)
+"""
+
+import pytest
+from utils.app_startup import describe_startup
+
+# ==================== Startup Tests ====================
+
+@pytest.mark.startup
+@pytest.mark.all_devices
+@pytest.mark.parametrize("kind", ["cold", "warm", "hot"])
+def TC47_startup_time(startup_benchmark, perf_baseline, kind):
+    """Test de Démarrage : distribution du temps de démarrage cold / warm / hot
+    
+    Technique : Test de performance (mesure système, plusieurs itérations)
+    Objectif : Mesurer le temps avant que l'utilisateur voie l'app, pour chaque type
+               de démarrage et chaque device (marqueur all_devices : run_parallel.py
+               l'exécute sur chaque AVD de config.AVD_CONFIGS)
+    
+    Étapes (répétées --startup-iterations fois, après un démarrage d'échauffement) :
+    1. Préparer le démarrage (utils/app_startup.py) :
+       - cold : process tué (am force-stop)
+       - warm : app en arrière-plan, activité recréée (am start --activity-clear-task)
+       - hot : app en arrière-plan, activité ramenée au premier plan
+    2. Lancer l'activité principale avec `am start -W` et relever TotalTime / WaitTime
+    3. Vérifier que le LaunchState rapporté par le système correspond au type demandé
+    4. Comparer la distribution à l'historique du device (utils/perf_baseline.py)
+    
+    Résultat attendu : médiane de TotalTime sous les seuils d'Android vitals
+    (config.STARTUP_MAX_MEDIAN_MS) et pas de ralentissement significatif
+    """
+    print(f"\n🚀 Measuring {startup_benchmark.iterations} {kind} starts of {startup_benchmark.component}...")
+    try:
+        startup_benchmark.run((kind,))
+    except RuntimeError as e:
+        pytest.skip(f"Cannot launch the app through the device shell: {e}")
+    
+    for launch in startup_benchmark.mismatched.get(kind, []):
+        print(f"  ⚠ {kind} start reported as {launch['launch_state']} ({launch['total_ms']}ms), not counted")
+    
+    # Médiane sous le seuil (un démarrage lent isolé ne fait pas échouer)
+    startup_benchmark.assert_fast(kind)
+    summary = startup_benchmark.summary()[kind]
+    print(f"  {describe_startup(kind, summary)}")
+    
+    # Échoue si le démarrage a significativement ralenti (enregistre aussi ce run)
+    perf_baseline(startup_benchmark.steps())
+    print(f"✓ {kind.capitalize()} start: median {summary['median']}ms, p{summary['q']} {summary['percentile']:.0f}ms")
@@ -0,0 +1,190 @@
+"""
+Temps de démarrage de l'app (cold, warm, hot) mesurés par `am start -W`.
+
+`terminate_app` + `activate_app` redémarrent l'app sans rien mesurer.
+`am start -W` attend que la première frame de l'activité soit affichée et
+rapporte les temps mesurés par le système :
+
+- TotalTime : du lancement de l'intent à l'affichage de l'activité (le temps
+  de démarrage vu par l'utilisateur, celui du logcat "Displayed") ;
+- WaitTime : TotalTime plus le traitement de l'intent par le système ;
+- LaunchState (Android 10+) : COLD, WARM ou HOT, d'après l'état réel du
+  process et de l'activité.
+
+Chaque type de démarrage a sa préparation :
+
+- cold : `am force-stop <package>` (process tué) ;
+- warm : app mise en arrière-plan (HOME) puis `am start --activity-clear-task` :
+  l'activité existante est détruite et recréée dans le process encore vivant ;
+- hot : app mise en arrière-plan (HOME) puis `am start` : l'activité existante
+  revient au premier plan.
+
+Quand le LaunchState rapporté ne correspond pas au type demandé (le système
+a tué le process en arrière-plan, par exemple), la mesure est gardée à part.
+
+    bench = StartupBenchmark(driver, iterations=10)
+    bench.run()                         # cold, warm, hot
+    print(bench.report())
+    perf_baseline(bench.steps())        # {"cold_start": [ms, ...], "cold_start.wait": [...], ...}
+"""
+
+import random
+import statistics
+
+from utils.device import APP_ACTIVITY, APP_PACKAGE, adb_shell
+from utils.perf_stats import describe
+
+
+START_KINDS = ("cold", "warm", "hot")
+# préparation (commandes shell avant la mesure) et options de `am start` de chaque type
+PREPARE = {
+    "cold": (("am", "force-stop", "{package}"),),
+    "warm": (("input", "keyevent", "KEYCODE_HOME"),),
+    "hot": (("input", "keyevent", "KEYCODE_HOME"),),
+}
+START_FLAGS = {"cold": (), "warm": ("--activity-clear-task",), "hot": ()}
+# clés de la sortie de `am start -W` ("TotalTime: 712") -> champ du résultat
+AM_START_FIELDS = {"Status": "status", "LaunchState": "launch_state", "Activity": "activity",
+                   "TotalTime": "total_ms", "WaitTime": "wait_ms", "ThisTime": "this_ms"}
+
+
+def parse_am_start(output):
+    """Champs de la sortie de `am start -W` : status, launch_state, activity, total_ms, wait_ms, this_ms.
+
+    `error` contient la ligne "Error: ..." si l'activité n'a pas pu être lancée.
+    """
+    result = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition(":")
+        key, value = key.strip(), value.strip()
+        if key == "Error":
+            result["error"] = value
+        elif sep and key in AM_START_FIELDS:
+            field = AM_START_FIELDS[key]
+            if field.endswith("_ms"):
+                result[field] = int(value) if value.isdigit() else None
+            else:
+                # "LaunchState: UNKNOWN (0)" -> "UNKNOWN"
+                result[field] = value.split()[0] if value else ""
+    return result
+
+
+def component(package=APP_PACKAGE, activity=APP_ACTIVITY):
+    """Composant `package/activité` pour `am start -n` (activité relative ".X" ou complète)."""
+    return activity if "/" in activity else f"{package}/{activity}"
+
+
+class StartupBenchmark:
+    """`warmup` + `iterations` démarrages de chaque type ; mesures dans `launches` {type: [dict]}.
+
+    `max_median_ms` : {type: ms} au-delà duquel assert_fast() échoue sur la médiane de TotalTime.
+    """
+
+    def __init__(self, driver, package=APP_PACKAGE, activity=APP_ACTIVITY, iterations=10, warmup=1,
+                 q=95, confidence=0.95, resamples=2000, seed=None, max_median_ms=None):
+        if iterations < 1:
+            raise ValueError("iterations must be >= 1")
+        self.driver = driver
+        self.package = package
+        self.component = component(package, activity)
+        self.iterations = iterations
+        self.warmup = warmup
+        self.q = q
+        self.confidence = confidence
+        self.resamples = resamples
+        self.seed = seed
+        self.max_median_ms = dict(max_median_ms or {})
+        self.launches = {}
+        # mesures dont le LaunchState ne correspond pas au type demandé
+        self.mismatched = {}
+
+    def _running(self):
+        return bool(adb_shell(self.driver, "pidof", self.package).split())
+
+    def start(self, kind):
+        """Prépare puis mesure un démarrage `kind` ; lève RuntimeError si l'activité ne démarre pas."""
+        if kind not in START_KINDS:
+            raise ValueError(f"Unknown start kind '{kind}' (expected one of {START_KINDS})")
+        if kind != "cold" and not self._running():
+            # warm / hot supposent un process vivant
+            adb_shell(self.driver, "am", "start", "-W", "-n", self.component)
+        for command in PREPARE[kind]:
+            adb_shell(self.driver, *(arg.format(package=self.package) for arg in command))
+        output = adb_shell(self.driver, "am", "start", "-W", *START_FLAGS[kind], "-n", self.component)
+        launch = parse_am_start(output)
+        if launch.get("error") or launch.get("status") != "ok" or launch.get("wait_ms") is None:
+            raise RuntimeError(f"am start {self.component} failed: {launch.get('error') or output.strip()}")
+        # avant Android 10, pas de TotalTime ni de LaunchState : ThisTime est le temps de l'activité
+        if launch.get("total_ms") is None:
+            launch["total_ms"] = launch.get("this_ms") or launch["wait_ms"]
+        launch["kind"] = kind
+        return launch
+
+    def run(self, kinds=START_KINDS):
+        """Mesure `warmup` + `iterations` démarrages de chaque type ; retourne `launches`."""
+        for kind in kinds:
+            for iteration in range(self.warmup + self.iterations):
+                launch = self.start(kind)
+                if iteration < self.warmup:
+                    continue
+                state = launch.get("launch_state")
+                if state and state != kind.upper():
+                    self.mismatched.setdefault(kind, []).append(launch)
+                else:
+                    self.launches.setdefault(kind, []).append(launch)
+        return self.launches
+
+    def totals(self, kind):
+        return [launch["total_ms"] for launch in self.launches.get(kind, [])]
+
+    def waits(self, kind):
+        return [launch["wait_ms"] for launch in self.launches.get(kind, [])]
+
+    def steps(self):
+        """Durées {"<type>_start": TotalTime, "<type>_start.wait": WaitTime} pour perf_baseline."""
+        steps = {}
+        for kind in self.launches:
+            steps[f"{kind}_start"] = self.totals(kind)
+            steps[f"{kind}_start.wait"] = self.waits(kind)
+        return steps
+
+    def stats(self, kind):
+        """Distribution de TotalTime du type : describe() de utils/perf_stats.py (n, médiane, p<q>, IC...)."""
+        return describe(self.totals(kind), self.q, self.confidence, self.resamples, random.Random(self.seed))
+
+    def summary(self):
+        """{type: {"n", "min", "median", "q", "percentile", "percentile_ci", "max", "mean", "wait_median",
+        "mismatched"}} en ms, sérialisable en JSON."""
+        summary = {}
+        for kind in self.launches:
+            s = self.stats(kind)
+            low, high = s[f"p{self.q}_ci"]
+            summary[kind] = {
+                "n": s["n"], "min": s["min"], "median": s["median"], "q": self.q,
+                "percentile": round(s[f"p{self.q}"], 1), "percentile_ci": [round(low, 1), round(high, 1)],
+                "max": s["max"], "mean": round(s["mean"], 1), "wait_median": statistics.median(self.waits(kind)),
+                "mismatched": len(self.mismatched.get(kind, [])),
+            }
+        return summary
+
+    def assert_fast(self, kind):
+        """Échoue si aucun démarrage `kind` n'a été mesuré ou si sa médiane dépasse max_median_ms[kind]."""
+        mismatched = len(self.mismatched.get(kind, []))
+        assert self.launches.get(kind), \
+            f"No {kind} start measured ({mismatched} launches reported another launch state)"
+        summary = self.summary()[kind]
+        limit = self.max_median_ms.get(kind)
+        assert limit is None or summary["median"] < limit, \
+            f"Median {kind} start {summary['median']}ms exceeds {limit}ms ({describe_startup(kind, summary)})"
+
+    def report(self):
+        """Une ligne par type de démarrage (TotalTime, ms)."""
+        return "\n".join(describe_startup(kind, s) for kind, s in self.summary().items())
+
+
+def describe_startup(kind, s):
+    """Une ligne : distribution de TotalTime d'un type de démarrage (entrée de StartupBenchmark.summary())."""
+    low, high = s["percentile_ci"]
+    mismatched = f", {s['mismatched']} launches not {kind.upper()}" if s["mismatched"] else ""
+    return (f"{kind}: n={s['n']} min {s['min']} median {s['median']} p{s['q']} {s['percentile']:.0f} "
+            f"({low:.0f}-{high:.0f}) max {s['max']}, WaitTime median {s['wait_median']}{mismatched}")
@@ -0,0 +1,169 @@
+"""
+Mise en place directe d'un état de l'app (connecté, panier rempli, étape du checkout).
+
+La plupart des tests des suites 4 et 5 ne vérifient pas le login ni l'ajout
+au panier : ils en ont seulement besoin comme point de départ. Refaire ces
+écrans par l'UI à chaque test coûte une dizaine de commandes WebDriver et
+plusieurs transitions. L'app Swag Labs accepte des deep links qui ouvrent
+directement un écran, panier compris :
+
+    swaglabs://swag-overview/0,1       produits, panier = articles 0 et 1
+    swaglabs://personal-info/0         checkout, étape "Your information"
+    swaglabs://checkout-overview/0     checkout, étape "Overview"
+    swaglabs://complete/               commande terminée
+
+Le deep link est envoyé par `mobile: deepLink`, sinon par un intent VIEW
+(`am start`) ; si l'écran attendu n'apparaît pas, l'app est redémarrée et
+l'état est construit par l'UI. Les deep links ouvrent l'app en tant que
+standard_user : les autres utilisateurs passent toujours par l'écran de login.
+Les tests qui vérifient le login ou le panier gardent leur parcours UI.
+
+Quand le test précédent a laissé l'app dans l'état demandé (`current`, voir
+utils/state_order.py), la mise en place est sautée et notée "kept".
+"""
+
+import time
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+from pages.checkout_page import CheckoutPage
+from pages.home_page import HomePage
+from pages.login_page import LoginPage
+from utils.device import APP_PACKAGE, adb_shell
+from utils.waits import present
+
+
+SEEDING_STRATEGIES = ("deep_link", "ui")
+
+DEEP_LINK_SCHEME = "swaglabs"
+# utilisateur sous lequel l'app s'ouvre quand on y entre par un deep link
+DEEP_LINK_USER = "standard_user"
+PASSWORD = "secret_sauce"
+
+# route du deep link -> élément qui prouve que l'écran est affiché
+SCREENS = {
+    "swag-overview": HomePage.PRODUCTS_HEADER,
+    "personal-info": CheckoutPage.FIRST_NAME,
+    "checkout-overview": (AppiumBy.ACCESSIBILITY_ID, "test-CHECKOUT: OVERVIEW"),
+    "complete": (AppiumBy.ACCESSIBILITY_ID, "test-CHECKOUT: COMPLETE!"),
+}
+
+# étape du checkout -> route du deep link
+CHECKOUT_STEPS = {1: "personal-info", 2: "checkout-overview", 3: "complete"}
+
+
+def deep_link_url(route, items=()):
+    """swaglabs://<route>/<ids séparés par des virgules>"""
+    return f"{DEEP_LINK_SCHEME}://{route}/{','.join(str(i) for i in items)}"
+
+
+def open_deep_link(driver, url, package=APP_PACKAGE):
+    """Ouvre `url` dans l'app : `mobile: deepLink`, sinon intent VIEW via `am start -W`."""
+    try:
+        driver.execute_script("mobile: deepLink", {"url": url, "package": package})
+    except Exception as appium_error:
+        try:
+            adb_shell(driver, "am", "start", "-W", "-a", "android.intent.action.VIEW", "-d", url, package)
+        except RuntimeError as adb_error:
+            raise RuntimeError(f"deep link '{url}' failed: {appium_error}") from adb_error
+
+
+class StateSeeder:
+    """Met l'app dans un état nommé, par deep link si possible, par l'UI sinon.
+
+    Chaque mise en place est notée dans `seeded` : (état, "deep_link", "ui" ou "kept", durée en ms).
+    `current` : état dans lequel l'app se trouve déjà (le premier état demandé qui lui correspond
+    n'est pas refait).
+    """
+
+    def __init__(self, driver, strategy="deep_link", timeout=10, current=None):
+        if strategy not in SEEDING_STRATEGIES:
+            raise ValueError(f"Unknown seeding strategy '{strategy}' (expected one of {SEEDING_STRATEGIES})")
+        self.driver = driver
+        self.strategy = strategy
+        self.timeout = timeout
+        self.seeded = []
+        self.current = current
+
+    # --- états ---
+    def logged_in(self, user=DEEP_LINK_USER):
+        """Page des produits, connecté en tant que `user`, panier vide. Retourne la HomePage."""
+        self._seed(f"logged_in({user})", "swag-overview", (), user, lambda: self._login_ui(user))
+        return HomePage(self.driver)
+
+    def cart_with(self, items, user=DEEP_LINK_USER):
+        """Page des produits avec les articles `items` (index dans la liste non triée) dans le panier."""
+        items = sorted(set(items))
+        self._seed(f"cart_with({items})", "swag-overview", items, user, lambda: self._cart_ui(user, items))
+        return HomePage(self.driver)
+
+    def at_checkout_step(self, step, items=(0,), user=DEEP_LINK_USER):
+        """Checkout à l'étape `step` (1 = informations, 2 = aperçu, 3 = terminé) avec `items` au panier."""
+        if step not in CHECKOUT_STEPS:
+            raise ValueError(f"Unknown checkout step {step} (expected one of {sorted(CHECKOUT_STEPS)})")
+        items = sorted(set(items))
+        # la commande terminée vide le panier : pas d'ids dans le lien
+        link_items = items if step < 3 else ()
+        self._seed(f"at_checkout_step({step}, {items})", CHECKOUT_STEPS[step], link_items, user,
+                   lambda: self._checkout_ui(user, items, step))
+        return CheckoutPage(self.driver)
+
+    # --- mécanique ---
+    def _seed(self, name, route, items, user, ui_flow):
+        current, self.current = self.current, None
+        if name == current:
+            self.seeded.append((name, "kept", 0.0))
+            print(f"🌱 {name} kept from the previous test")
+            return
+        start = time.perf_counter()
+        via = "ui"
+        if self.strategy == "deep_link" and user == DEEP_LINK_USER:
+            url = deep_link_url(route, items)
+            try:
+                open_deep_link(self.driver, url)
+                HomePage(self.driver).wait(present(SCREENS[route]), timeout=self.timeout)
+                via = "deep_link"
+            except Exception as e:
+                print(f"⚠ Deep link {url} failed ({e.__class__.__name__}), seeding {name} through the UI")
+                self._restart_app()
+        if via == "ui":
+            ui_flow()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.seeded.append((name, via, elapsed))
+        print(f"🌱 {name} via {via} ({elapsed:.0f}ms)")
+
+    def _restart_app(self):
+        # repart de l'écran de login quel que soit l'écran où le deep link a laissé l'app
+        self.driver.terminate_app(APP_PACKAGE)
+        self.driver.activate_app(APP_PACKAGE)
+
+    def _login_ui(self, user):
+        login = LoginPage(self.driver)
+        login.login(user, PASSWORD)
+        result = login.wait_for_login_result(timeout=self.timeout)
+        if result != "products":
+            raise RuntimeError(f"UI login as '{user}' failed (result: {result})")
+
+    def _cart_ui(self, user, items):
+        self._login_ui(user)
+        home = HomePage(self.driver)
+        # un article ajouté perd son bouton ADD TO CART : les suivants remontent d'un rang
+        for added, item in enumerate(items):
+            home.add_to_cart(item_index=item - added)
+            if not home.wait_for_cart_count(added + 1):
+                raise RuntimeError(f"Could not add item {item} to the cart through the UI")
+
+    def _checkout_ui(self, user, items, step):
+        self._cart_ui(user, items)
+        home = HomePage(self.driver)
+        home.click_cart_icon()
+        checkout = CheckoutPage(self.driver)
+        checkout.click("accessibility id", "test-CHECKOUT")
+        checkout.wait(present(SCREENS["personal-info"]), timeout=self.timeout)
+        if step >= 2:
+            checkout.enter_user_info_default()
+            checkout.click_continue_button()
+            checkout.wait(present(SCREENS["checkout-overview"]), timeout=self.timeout)
+        if step >= 3:
+            checkout.click_finish_button()
+            checkout.wait(present(SCREENS["complete"]), timeout=self.timeout)
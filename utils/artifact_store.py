@@ -0,0 +1,264 @@
+"""
+Stockage des artefacts d'échec adressé par contenu, avec compression et rétention.
+
+Un même écran en échec capturé à chaque nightly ne doit être stocké qu'une
+fois : chaque fichier est rangé sous son hash SHA-256
+(`objects/ab/abcdef....png`), une capture identique réutilise l'objet
+existant. Avant le hash :
+
+- les PNG sont recompressés sans perte (flux IDAT re-zippé au niveau 9) et,
+  si `image_max_width` est réglé et que Pillow est installé, réduits ;
+- les textes (page source, logcat) sont gzippés si `compress_text`.
+
+`index.jsonl` garde une ligne par artefact capturé (capture, test, type,
+hash, taille) ; `index.html`, régénéré à la fermeture, les présente par
+capture avec une ancre par capture : c'est là que pointe le rapport HTML.
+
+La rétention supprime les objets plus vieux que `max_age_days` (date de
+dernière utilisation) puis les plus anciens jusqu'à repasser sous
+`max_bytes`, et retire de l'index les lignes qui pointaient dessus.
+
+Les workers de run_parallel.py partagent le même store : l'écriture d'un
+objet, les ajouts à l'index, la rétention et la régénération de index.html
+se font sous un verrou de fichier (`.lock`, flock) en plus du verrou du
+process.
+"""
+
+import contextlib
+import datetime
+import gzip
+import hashlib
+import html
+import io
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    # pas de flock (Windows) : verrou du process seulement
+    fcntl = None
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TEXT_EXTENSIONS = (".xml", ".txt", ".log")
+
+
+def _png_chunks(data):
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def _png_chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF)
+
+
+def recompress_png(data):
+    """Re-zippe le flux d'image d'un PNG au niveau 9 (sans perte) ; retourne l'original si pas plus petit."""
+    if not data.startswith(PNG_SIGNATURE):
+        return data
+    try:
+        chunks = list(_png_chunks(data))
+        stream = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    except (zlib.error, struct.error):
+        return data
+    packed = zlib.compress(stream, 9)
+    out, written = [PNG_SIGNATURE], False
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            if not written:
+                out.append(_png_chunk(b"IDAT", packed))
+                written = True
+            continue
+        out.append(_png_chunk(kind, body))
+    result = b"".join(out)
+    return result if len(result) < len(data) else data
+
+
+def downscale_png(data, max_width):
+    """Réduit l'image à `max_width` px de large (Pillow, optionnel) ; retourne l'original sinon."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.width <= max_width:
+            return data
+        image.thumbnail((max_width, max_width * image.height // image.width))
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True)
+        return out.getvalue()
+    except Exception:
+        return data
+
+
+class ArtifactStore:
+    """Objets adressés par contenu sous `root`, avec index et politique de rétention."""
+
+    def __init__(self, root, max_bytes=None, max_age_days=None, image_max_width=None,
+                 recompress_images=True, compress_text=True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.image_max_width = image_max_width
+        self.recompress_images = recompress_images
+        self.compress_text = compress_text
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.html_path = os.path.join(root, "index.html")
+        self.lock_path = os.path.join(root, ".lock")
+        self.stats = {"stored": 0, "deduplicated": 0, "bytes_in": 0, "bytes_stored": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusion entre threads du process et entre processus qui partagent `root`."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # --- écriture ---
+    def _prepare(self, data, extension):
+        if extension == ".png":
+            if self.image_max_width:
+                data = downscale_png(data, self.image_max_width)
+            if self.recompress_images:
+                data = recompress_png(data)
+        elif extension in TEXT_EXTENSIONS and self.compress_text:
+            # mtime=0 : même contenu -> mêmes octets -> même hash
+            data = gzip.compress(data, compresslevel=9, mtime=0)
+            extension += ".gz"
+        return data, extension
+
+    def put(self, data, extension, capture, kind, test=None):
+        """Stocke `data` (dédoublonné) et l'ajoute à l'index ; retourne le chemin relatif de l'objet."""
+        original_size = len(data)
+        data, extension = self._prepare(data, extension)
+        digest = hashlib.sha256(data).hexdigest()
+        relpath = f"objects/{digest[:2]}/{digest}{extension}"
+        path = os.path.join(self.root, relpath)
+        entry = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "capture": capture, "test": test, "kind": kind,
+            "sha256": digest, "path": relpath, "bytes": len(data), "original_bytes": original_size,
+        }
+        # sous verrou : la rétention d'un autre worker ne peut ni supprimer l'objet entre le test
+        # d'existence et utime(), ni réécrire l'index pendant l'ajout de la ligne
+        with self._locked():
+            if os.path.exists(path):
+                # déjà stocké : on rafraîchit sa date pour la rétention
+                os.utime(path)
+                counter = "deduplicated"
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+                counter = "stored"
+            with open(self.index_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+            self.stats[counter] += 1
+            self.stats["bytes_in"] += original_size
+            if counter == "stored":
+                self.stats["bytes_stored"] += len(data)
+        return relpath
+
+    def link(self, capture):
+        """Chemin (relatif à `root`) de l'entrée de la capture dans l'index HTML."""
+        return f"index.html#{capture}"
+
+    # --- index et rétention ---
+    def entries(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as fh:
+                return [json.loads(line) for line in fh if line.strip()]
+        except OSError:
+            return []
+
+    def _objects(self):
+        objects = []
+        for directory, _, files in os.walk(os.path.join(self.root, "objects")):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                objects.append((st.st_mtime, st.st_size, path))
+        return sorted(objects)
+
+    def prune(self):
+        """Applique la rétention (âge puis taille) et nettoie l'index ; retourne le nombre d'objets supprimés."""
+        with self._locked():
+            return self._prune()
+
+    def _prune(self):
+        objects = self._objects()
+        removed = set()
+        if self.max_age_days is not None:
+            limit = time.time() - self.max_age_days * 86400
+            removed.update(path for mtime, _, path in objects if mtime < limit)
+        if self.max_bytes is not None:
+            total = sum(size for _, size, path in objects if path not in removed)
+            for _, size, path in objects:
+                if total <= self.max_bytes:
+                    break
+                if path not in removed:
+                    removed.add(path)
+                    total -= size
+        for path in removed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if removed:
+            kept = [e for e in self.entries() if os.path.join(self.root, e["path"]) not in removed]
+            with open(self.index_path, "w", encoding="utf-8") as fh:
+                fh.writelines(json.dumps(e) + "\n" for e in kept)
+        return len(removed)
+
+    def write_html(self):
+        """Régénère index.html : une section par capture (ancre = id de la capture)."""
+        with self._locked():
+            entries = self.entries()
+        captures = {}
+        for entry in entries:
+            captures.setdefault(entry["capture"], []).append(entry)
+        sections = []
+        for capture, items in sorted(captures.items(), key=lambda kv: kv[1][0]["time"], reverse=True):
+            links = []
+            for e in items:
+                href = html.escape(e["path"])
+                if e["kind"] == "screenshot":
+                    links.append(f'<a href="{href}"><img src="{href}" style="max-height:480px"/></a>')
+                else:
+                    links.append(f'<a href="{href}">{html.escape(e["kind"])}</a> ({e["bytes"]} bytes)')
+            sections.append(
+                f'<section id="{html.escape(capture)}"><h3>{html.escape(items[0].get("test") or capture)}</h3>'
+                f'<p>{html.escape(items[0]["time"])} – {html.escape(capture)}</p>'
+                + "<br/>".join(links) + "</section>"
+            )
+        with self._locked():
+            # fichier temporaire puis rename : un autre worker ne lit jamais un index à moitié écrit
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Failure artifacts</title></head>"
+                         "<body><h1>Failure artifacts</h1>" + "\n".join(sections) + "</body></html>")
+            os.replace(tmp, self.html_path)
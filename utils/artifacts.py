@@ -0,0 +1,102 @@
+"""
+Capture des artefacts d'échec (capture d'écran, page source, fin du logcat) hors du chemin critique.
+
+`capture(driver, capture_id, test)` lance les trois récupérations en parallèle
+dans des threads et retourne tout de suite le lien vers la capture dans
+l'index du store (utils.artifact_store) : le hook pytest n'attend ni le
+serveur Appium, ni le décodage, ni le disque. Les écritures dans le store
+passent par un petit pool de workers ; le nombre d'artefacts récupérés mais
+pas encore écrits est borné (`max_pending`) pour ne pas garder tous les PNG
+d'un run qui échoue en mémoire.
+
+Les récupérations doivent être finies avant que l'app soit remise à zéro pour
+le test suivant, sinon on capturerait le mauvais écran : `drain()` les attend
+(les écritures disque, elles, continuent en arrière-plan). `close()` attend
+tout, en fin de session.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils.device import adb_shell
+
+
+def fetch_screenshot(driver, log_lines):
+    return driver.get_screenshot_as_png()
+
+
+def fetch_page_source(driver, log_lines):
+    return driver.page_source.encode("utf-8")
+
+
+def fetch_logcat(driver, log_lines):
+    # `logcat -d` ne vide pas le buffer (getLog le viderait : la capture suivante n'aurait plus rien)
+    return adb_shell(driver, "logcat", "-d", "-v", "threadtime", "-t", log_lines).encode("utf-8")
+
+
+# type d'artefact -> (extension, fonction de récupération)
+ARTIFACT_KINDS = {
+    "screenshot": (".png", fetch_screenshot),
+    "page_source": (".xml", fetch_page_source),
+    "logcat": (".log", fetch_logcat),
+}
+
+
+class ArtifactCollector:
+    """Récupère les artefacts en parallèle et les range dans `store` avec un pool de workers borné."""
+
+    def __init__(self, store, write_workers=2, max_pending=8, log_lines=200):
+        self.store = store
+        self.log_lines = log_lines
+        self._fetchers = ThreadPoolExecutor(max_workers=len(ARTIFACT_KINDS), thread_name_prefix="artifact-fetch")
+        self._writers = ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix="artifact-write")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._fetches = []
+        self._writes = []
+        self.errors = []
+
+    def capture(self, driver, capture, test=None):
+        """Lance la capture et retourne le lien (relatif au store) de son entrée dans l'index."""
+        for kind, (extension, fetch) in ARTIFACT_KINDS.items():
+            future = self._fetchers.submit(self._fetch, kind, extension, fetch, driver, capture, test)
+            with self._lock:
+                self._fetches.append(future)
+        return self.store.link(capture)
+
+    def _fetch(self, kind, extension, fetch, driver, capture, test):
+        try:
+            data = fetch(driver, self.log_lines)
+        except Exception as e:
+            with self._lock:
+                self.errors.append(f"{capture}: {kind} capture failed ({e.__class__.__name__})")
+            return
+        # bloque ce thread (pas le test) tant que trop d'artefacts attendent le disque
+        self._slots.acquire()
+        future = self._writers.submit(self._write, data, extension, capture, kind, test)
+        with self._lock:
+            self._writes.append(future)
+
+    def _write(self, data, extension, capture, kind, test):
+        try:
+            self.store.put(data, extension, capture, kind, test=test)
+        except OSError as e:
+            with self._lock:
+                self.errors.append(f"{capture}: {kind} write failed ({e})")
+        finally:
+            self._slots.release()
+
+    def drain(self, timeout=None):
+        """Attend la fin des récupérations en cours (à appeler avant de remettre l'app à zéro)."""
+        with self._lock:
+            pending, self._fetches = self._fetches, []
+        wait(pending, timeout=timeout)
+
+    def close(self):
+        """Attend les récupérations puis les écritures, et arrête les pools."""
+        self.drain()
+        self._fetchers.shutdown(wait=True)
+        with self._lock:
+            pending, self._writes = self._writes, []
+        wait(pending)
+        self._writers.shutdown(wait=True)
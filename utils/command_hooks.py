@@ -0,0 +1,102 @@
+"""
+Point d'extension unique autour des commandes WebDriver d'une session.
+
+install(driver) remplace `driver.execute` (au niveau de l'instance) par une
+version qui notifie des listeners après chaque commande. Les WebElement
+passent eux aussi par `driver.execute`, donc toutes les commandes sont vues :
+findElement, clickElement, getPageSource, actions, executeScript...
+
+Un listener est un callable `listener(driver, command, params, elapsed, error)`
+appelé après la commande (error vaut None si elle a réussi).
+
+Les commandes envoyées dans un bloc `unobserved()` ne sont pas notifiées :
+un échantillonneur en arrière-plan (utils/cpu_sampler.py) lit le device sans
+compter dans les commandes du test ni invalider les snapshots.
+"""
+
+import contextlib
+import threading
+import time
+
+
+# Commandes qui peuvent modifier l'écran : elles invalident les snapshots de hiérarchie
+MUTATING_COMMANDS = {
+    "clickElement", "sendKeysToElement", "clearElement", "clear",
+    "actions", "w3cExecuteScript", "w3cExecuteScriptAsync",
+    "goBack", "setScreenOrientation", "activateApp", "terminateApp", "background",
+    "pressKeyCode", "longPressKeyCode", "keyEvent", "hideKeyboard",
+    "installApp", "removeApp", "newSession", "quit",
+}
+
+# Stratégie de localisation UiAutomator : ses sélecteurs UiScrollable font défiler l'écran
+UIAUTOMATOR = "-android uiautomator"
+FIND_COMMANDS = {"findElement", "findElements", "findChildElement", "findChildElements"}
+
+# blocs unobserved() actifs, par thread
+_local = threading.local()
+
+
+def mutates(command, params):
+    """True si la commande peut modifier l'écran (y compris une recherche UiScrollable.scrollIntoView)."""
+    if command in MUTATING_COMMANDS:
+        return True
+    params = params or {}
+    return (command in FIND_COMMANDS and params.get("using") == UIAUTOMATOR
+            and "UiScrollable" in str(params.get("value", "")))
+
+
+def install(driver):
+    """Installe le hook sur `driver` (idempotent) et retourne la liste des listeners."""
+    listeners = getattr(driver, "_command_listeners", None)
+    if listeners is not None:
+        return listeners
+
+    listeners = []
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        if getattr(_local, "unobserved", 0):
+            return original_execute(driver_command, params)
+        start = time.perf_counter()
+        error = None
+        try:
+            return original_execute(driver_command, params)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in list(listeners):
+                try:
+                    listener(driver, driver_command, params, elapsed, error)
+                except Exception:
+                    # un listener ne doit jamais casser la commande
+                    pass
+
+    driver._command_listeners = listeners
+    driver.execute = execute
+    return listeners
+
+
+@contextlib.contextmanager
+def unobserved():
+    """Les commandes envoyées par le thread courant dans ce bloc ne notifient pas les listeners."""
+    _local.unobserved = getattr(_local, "unobserved", 0) + 1
+    try:
+        yield
+    finally:
+        _local.unobserved -= 1
+
+
+def add_listener(driver, listener):
+    """Abonne `listener` aux commandes de `driver` (une seule fois par listener)."""
+    listeners = install(driver)
+    if listener not in listeners:
+        listeners.append(listener)
+    return listener
+
+
+def remove_listener(driver, listener):
+    listeners = getattr(driver, "_command_listeners", None) or []
+    if listener in listeners:
+        listeners.remove(listener)
@@ -0,0 +1,157 @@
+"""
+Latence de chaque commande WebDriver, par test, par device et par méthode de page object.
+
+Le registre `timings` s'abonne aux commandes du driver (utils.command_hooks).
+Pour chaque commande (findElement, clickElement, getPageSource, actions...)
+il note sa durée, le test en cours, le device, et la méthode de page object
+qui l'a envoyée : la plus externe de la pile d'appels, c'est-à-dire celle
+que le test a appelée (ex. "HomePage.add_to_cart" plutôt que "BasePage.find").
+
+Chaque commande est écrite dans un fichier JSONL au fil de l'eau ; les
+percentiles (p50, p95, p99) par type de commande sont calculés à la demande,
+par test ou par device. En comparant le temps passé dans les commandes à la
+durée du test, on voit si un budget (ex. les 3000 ms de TC42) part dans
+l'app / le serveur ou dans notre propre polling.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+
+from utils import command_hooks
+
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages") + os.sep
+
+# Méthode attribuée aux commandes envoyées hors des page objects (directement par le test)
+OUTSIDE = "(test)"
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, q):
+    """Percentile `q` (0-100) par interpolation linéaire d'une liste déjà triée."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(values):
+    """{"count", "total_ms", "max_ms", "p50", "p95", "p99"} d'une liste de durées (ms)."""
+    ordered = sorted(values)
+    stats = {"count": len(ordered), "total_ms": round(sum(ordered), 1),
+             "max_ms": round(ordered[-1], 1) if ordered else 0.0}
+    for q in PERCENTILES:
+        stats[f"p{q}"] = round(percentile(ordered, q), 1)
+    return stats
+
+
+def page_method(frame):
+    """Méthode de page object la plus externe de la pile ("Classe.méthode"), ou OUTSIDE."""
+    found = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(PAGES_DIR):
+            found = getattr(code, "co_qualname", code.co_name)
+        frame = frame.f_back
+    return found or OUTSIDE
+
+
+class CommandTimings:
+    """Collecte la durée des commandes WebDriver et en tire des percentiles.
+
+    Les agrégats sont tenus au fil des commandes : par test (détail par commande
+    et par méthode, libéré par `end_test()`, après le rapport de la phase call)
+    et par device (durées seules, pour les percentiles de fin de session). Les
+    échantillons complets ne vivent que dans le fichier JSONL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tests = {}
+        self._devices = {}
+        self._sink = None
+        self.test = None
+        self.device = None
+
+    def open(self, path):
+        """Écrit désormais chaque commande dans `path` (JSONL, une ligne par commande)."""
+        self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._sink = open(path, "w", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+    def attach(self, driver):
+        """Abonne le registre aux commandes de `driver` (idempotent)."""
+        command_hooks.add_listener(driver, self._on_command)
+
+    def start_test(self, test, device):
+        self.test, self.device = test, device
+
+    def end_test(self):
+        """Fin du test : son détail est oublié, son rapport est déjà construit (les percentiles par device restent)."""
+        with self._lock:
+            self._tests.pop(self.test, None)
+        self.test = self.device = None
+
+    def _on_command(self, driver, command, params, elapsed, error):
+        sample = {
+            "ts": round(time.time() - elapsed, 6),
+            "test": self.test,
+            "device": self.device,
+            "command": command,
+            "method": page_method(sys._getframe(1)),
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "error": type(error).__name__ if error is not None else None,
+        }
+        elapsed_ms = sample["elapsed_ms"]
+        with self._lock:
+            self._devices.setdefault(sample["device"], {}).setdefault(command, array("d")).append(elapsed_ms)
+            if sample["test"] is not None:
+                bucket = self._tests.setdefault(sample["test"], {"commands": {}, "methods": {}})
+                bucket["commands"].setdefault(command, []).append(elapsed_ms)
+                cost = bucket["methods"].setdefault(sample["method"], {"commands": 0, "total_ms": 0.0})
+                cost["commands"] += 1
+                cost["total_ms"] += elapsed_ms
+            if self._sink is not None:
+                self._sink.write(json.dumps(sample) + "\n")
+
+    def by_command(self, test=None, device=None):
+        """{commande: summarize(...)} des commandes du test / device (toute la session si None)."""
+        with self._lock:
+            if test is not None:
+                grouped = self._tests.get(test, {}).get("commands", {})
+                grouped = {command: list(values) for command, values in grouped.items()}
+            else:
+                grouped = {}
+                for name, commands in self._devices.items():
+                    if device is not None and name != device:
+                        continue
+                    for command, values in commands.items():
+                        grouped.setdefault(command, []).extend(values)
+        return {command: summarize(values) for command, values in sorted(grouped.items())}
+
+    def by_method(self, test):
+        """{méthode de page object: {"commands", "total_ms"}} des commandes d'un test."""
+        with self._lock:
+            methods = self._tests.get(test, {}).get("methods", {})
+            return {method: {"commands": cost["commands"], "total_ms": round(cost["total_ms"], 1)}
+                    for method, cost in methods.items()}
+
+    def devices(self):
+        with self._lock:
+            return sorted(d for d in self._devices if d is not None)
+
+
+timings = CommandTimings()
@@ -0,0 +1,157 @@
+"""
+Transport HTTP partagé et réglable entre le client Appium et le serveur.
+
+Par défaut chaque `webdriver.Remote` crée sa propre RemoteConnection avec
+une PoolManager urllib3 d'une seule connexion par hôte et sans timeout. Sous
+charge (plusieurs sessions, threads de capture, serveur distant) ça donne des
+connexions TCP/TLS rouvertes sans arrêt ("Connection pool is full,
+discarding connection") et des commandes qui peuvent bloquer indéfiniment.
+
+PooledAppiumConnection remplace ce transport :
+
+- une seule PoolManager keep-alive pour tout le process, taille réglable
+  (config.HTTP_POOL_SIZE, --http-pool-size), bloquante quand elle est pleine
+  au lieu d'ouvrir des connexions jetables ;
+- un timeout de lecture par commande (config.HTTP_COMMAND_TIMEOUTS) ;
+- des retries sur erreur de socket transitoire : erreurs de connexion pour
+  toutes les commandes (la requête n'est jamais partie), erreurs de lecture
+  seulement pour les commandes idempotentes (GET, find*) — un click rejoué
+  pourrait cliquer deux fois ;
+- des compteurs : requêtes, nouvelles connexions, réutilisations, retries.
+"""
+
+import threading
+
+import urllib3
+from urllib3.util.retry import Retry
+from appium.webdriver.appium_connection import AppiumConnection
+from appium.webdriver.client_config import AppiumClientConfig
+
+from config import HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT, HTTP_COMMAND_TIMEOUTS
+
+
+# Commandes POST sans effet de bord sur l'app : on peut les rejouer après une erreur de lecture
+IDEMPOTENT_POST_COMMANDS = {
+    "findElement", "findElements", "findChildElement", "findChildElements", "setTimeouts",
+}
+
+_local = threading.local()
+_lock = threading.Lock()
+_managers = {}
+_stats = {"requests": 0, "checkouts": 0, "new_connections": 0, "retries": 0}
+
+
+def _bump(counter, n=1):
+    with _lock:
+        _stats[counter] += n
+
+
+def transport_stats():
+    """Compteurs du process : requêtes, nouvelles connexions, réutilisations, retries."""
+    with _lock:
+        stats = dict(_stats)
+    # chaque tentative (retries compris) prend une connexion dans la pool : neuve ou réutilisée
+    stats["reused"] = max(stats.pop("checkouts") - stats["new_connections"], 0)
+    return stats
+
+
+class _CountingRetry(Retry):
+    def increment(self, *args, **kwargs):
+        _bump("retries")
+        return super().increment(*args, **kwargs)
+
+
+class _CountingHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    def _get_conn(self, timeout=None):
+        _bump("checkouts")
+        return super()._get_conn(timeout)
+
+    def _new_conn(self):
+        _bump("new_connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    def _get_conn(self, timeout=None):
+        _bump("checkouts")
+        return super()._get_conn(timeout)
+
+    def _new_conn(self):
+        _bump("new_connections")
+        return super()._new_conn()
+
+
+class _CommandPoolManager(urllib3.PoolManager):
+    """PoolManager qui applique le timeout / les retries de la commande en cours du thread."""
+
+    def __init__(self, pool_size, retries, connect_timeout, default_timeout, command_timeouts, **kwargs):
+        super().__init__(num_pools=8, maxsize=pool_size, block=True, **kwargs)
+        self.pool_classes_by_scheme = {"http": _CountingHTTPConnectionPool, "https": _CountingHTTPSConnectionPool}
+        self.retries_count = retries
+        self.connect_timeout = connect_timeout
+        self.default_timeout = default_timeout
+        self.command_timeouts = dict(command_timeouts)
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        command = getattr(_local, "command", None)
+        read_timeout = self.command_timeouts.get(command, self.default_timeout)
+        kw["timeout"] = urllib3.Timeout(connect=self.connect_timeout, read=read_timeout)
+        kw["pool_timeout"] = read_timeout
+        idempotent = method == "GET" or command in IDEMPOTENT_POST_COMMANDS
+        kw["retries"] = _CountingRetry(
+            total=self.retries_count,
+            connect=self.retries_count,
+            read=self.retries_count if idempotent else 0,
+            other=0,
+            status=0,
+            allowed_methods=None,
+            backoff_factor=0.1,
+            raise_on_redirect=False,
+            raise_on_status=False,
+        )
+        _bump("requests")
+        return super().urlopen(method, url, redirect=redirect, **kw)
+
+
+def shared_pool_manager(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES):
+    """PoolManager commune à toutes les sessions du process (une par réglage taille/retries)."""
+    key = (pool_size, retries)
+    with _lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _CommandPoolManager(pool_size, retries, HTTP_CONNECT_TIMEOUT, HTTP_TIMEOUT, HTTP_COMMAND_TIMEOUTS)
+            _managers[key] = manager
+    return manager
+
+
+def close_shared_pools():
+    """Ferme toutes les connexions keep-alive (fin de session pytest)."""
+    with _lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.clear()
+
+
+class PooledAppiumConnection(AppiumConnection):
+    """AppiumConnection branchée sur la PoolManager partagée du process."""
+
+    def __init__(self, server, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES):
+        self._pool_size = pool_size
+        self._retries = retries
+        super().__init__(client_config=AppiumClientConfig(remote_server_addr=server, keep_alive=True, timeout=HTTP_TIMEOUT))
+
+    def _get_connection_manager(self):
+        return shared_pool_manager(self._pool_size, self._retries)
+
+    def execute(self, command, params):
+        previous = getattr(_local, "command", None)
+        _local.command = command
+        try:
+            return super().execute(command, params)
+        finally:
+            _local.command = previous
+
+    def close(self):
+        # la pool est partagée entre les sessions : quit() ne doit pas la vider
+        pass
@@ -0,0 +1,275 @@
+"""
+CPU de l'app et de ses threads, échantillonné en arrière-plan pendant un test de stress.
+
+Un test de stress qui passe ne dit pas si le thread JS (mqt_js) ou le thread
+UI de l'app tournait à 100 % d'un coeur. CpuSampler lit, à intervalle fixe
+et dans un thread à part, les compteurs du noyau pour le process de l'app et
+chacun de ses threads, en une seule commande shell :
+
+    cat /proc/uptime /proc/<pid>/stat /proc/<pid>/task/*/stat
+
+(utime et stime, en ticks de 10 ms). Les fenêtres de pic sont mesurées avec
+/proc/uptime, lu par la même commande : l'horloge de l'hôte compterait aussi la
+gigue de l'aller-retour shell, et un thread semblerait dépasser 100 % d'un coeur.
+Un pic reste borné à un coeur (les ticks et l'uptime sont arrondis à 10 ms). Les échantillons du process sont rangés
+dans un RingBuffer de taille fixe, adossé à un array('d') : 4 flottants par
+échantillon, les plus anciens écrasés, aucune allocation par échantillon. Pour
+chaque thread on ne garde que le cumul et le pic d'utilisation (part d'un
+coeur) sur des fenêtres d'au moins `interval` secondes.
+
+Les commandes de l'échantillonneur passent hors des listeners
+(command_hooks.unobserved) : elles ne comptent pas dans les commandes du test
+et n'invalident pas les snapshots.
+
+    cpu = cpu_sampler("add_remove_cycles")        # fixture, voir conftest.py
+    cpu.mark(0)
+    for cycle in range(1, 21):
+        ...
+        cpu.mark(cycle)                           # CPU-secondes du cycle
+    cpu.stop()
+    print(cpu.describe())                         # threads les plus chauds, saturation
+
+Sans accès shell (ou app pas lancée), l'échantillonneur ne démarre pas et
+les résultats sont vides.
+"""
+
+import threading
+import time
+from array import array
+
+from utils.command_hooks import unobserved
+from utils.device import APP_PACKAGE, adb_shell
+
+
+# ticks par seconde de /proc/<pid>/stat (USER_HZ, 100 sur Android)
+CLK_TCK = 100
+# champs utime et stime d'une ligne stat, comptés après le ")" du nom
+UTIME_FIELD, STIME_FIELD = 11, 12
+# part d'un coeur au-delà de laquelle un thread est considéré saturé
+SATURATION = 0.9
+# fenêtre minimale (s) du calcul de pic pour le dernier échantillon : 10 ticks, erreur de 10 % au plus
+MIN_PEAK_WINDOW = 0.1
+
+SAMPLE_FIELDS = ("t", "cpu_s", "utime_s", "stime_s")
+
+
+class RingBuffer:
+    """Enregistrements de `width` flottants dans un array('d') de taille fixe (les plus anciens écrasés)."""
+
+    def __init__(self, capacity, width):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.width = width
+        self._data = array("d", bytes(8 * capacity * width))
+        self._next = 0
+        self._count = 0
+
+    def append(self, *values):
+        if len(values) != self.width:
+            raise ValueError(f"expected {self.width} values, got {len(values)}")
+        offset = self._next * self.width
+        self._data[offset:offset + self.width] = array("d", values)
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Enregistrements (tuples), du plus ancien au plus récent."""
+        start = (self._next - self._count) % self.capacity
+        for i in range(self._count):
+            offset = ((start + i) % self.capacity) * self.width
+            yield tuple(self._data[offset:offset + self.width])
+
+
+def parse_stat(line):
+    """(tid, nom, ticks utime, ticks stime) d'une ligne /proc/.../stat ; None si illisible.
+
+    Le nom est entre parenthèses et peut contenir espaces et parenthèses : on coupe au dernier ")".
+    """
+    head, sep, tail = line.rpartition(")")
+    if not sep or "(" not in head:
+        return None
+    tid, _, name = head.partition("(")
+    fields = tail.split()
+    if not tid.strip().isdigit() or len(fields) <= STIME_FIELD:
+        return None
+    return int(tid), name, int(fields[UTIME_FIELD]), int(fields[STIME_FIELD])
+
+
+def parse_uptime(line):
+    """Secondes depuis le démarrage du device (premier champ de /proc/uptime), None si illisible."""
+    try:
+        return float(line.split()[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def app_pid(driver, package=APP_PACKAGE):
+    """PID du process de l'app (`pidof`), None s'il ne tourne pas."""
+    output = adb_shell(driver, "pidof", package).split()
+    return int(output[0]) if output and output[0].isdigit() else None
+
+
+class CpuSampler:
+    """Échantillonne le CPU de l'app toutes les `interval` secondes dans un thread d'arrière-plan."""
+
+    def __init__(self, driver, name="cpu", package=APP_PACKAGE, interval=0.5, capacity=2400,
+                 saturation=SATURATION):
+        self.driver = driver
+        self.name = name
+        self.package = package
+        self.interval = interval
+        self.saturation = saturation
+        self.samples = RingBuffer(capacity, len(SAMPLE_FIELDS))
+        # tid -> [nom, ticks au premier échantillon, derniers ticks, pic d'utilisation (part d'un coeur),
+        #         ticks au début de la fenêtre de mesure du pic]
+        self.threads = {}
+        # (cycle, instant, CPU-secondes cumulées du process) à chaque mark()
+        self.marks = []
+        self.error = None
+        self.pid = None
+        # début de la fenêtre de mesure du pic : au moins `interval` secondes, sinon un tick de
+        # 10 ms entre deux mark() rapprochés ressemblerait à plusieurs coeurs
+        self._window_start = None
+        self._lock = threading.Lock()
+        # un échantillon à la fois (mark() du test et thread d'arrière-plan) : la lecture du device et
+        # la mise à jour des fenêtres restent dans l'ordre ; réentrant pour le redémarrage de l'app
+        self._sampling = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- cycle de vie ---
+    def start(self):
+        """Repère le process de l'app et lance l'échantillonnage ; ne fait rien sans accès shell."""
+        try:
+            with unobserved():
+                self.pid = app_pid(self.driver, self.package)
+        except RuntimeError as e:
+            self.error = e
+        if self.pid is None:
+            self.error = self.error or RuntimeError(f"{self.package} is not running")
+            print(f"⚠ CPU sampling unavailable for '{self.name}' ({self.error})")
+            return self
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name=f"cpu-sampler-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête l'échantillonnage (un dernier échantillon est pris)."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.sample(final=True)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                # session fermée, device perdu : on garde ce qui a été mesuré
+                self.error = e
+                return
+
+    # --- mesure ---
+    def sample(self, final=False):
+        """Un échantillon (process et threads) ; retourne les CPU-secondes cumulées du process.
+
+        `final` : dernier échantillon, la fenêtre de pic en cours est close même plus courte que `interval`.
+        """
+        if self.pid is None:
+            return None
+        with self._sampling:
+            return self._sample(final)
+
+    def _sample(self, final):
+        with unobserved():
+            output = adb_shell(self.driver, "cat", "/proc/uptime",
+                               f"/proc/{self.pid}/stat", f"/proc/{self.pid}/task/*/stat")
+            now = time.monotonic()
+            rows = [line for line in output.splitlines() if line.strip()]
+            uptime = parse_uptime(rows[0]) if rows else None
+            lines = [parse_stat(line) for line in rows[1:]]
+            if not lines or lines[0] is None or lines[0][0] != self.pid:
+                # l'app a redémarré : nouveau process, les compteurs repartent de zéro
+                pid = app_pid(self.driver, self.package)
+                if pid is None or pid == self.pid:
+                    return None
+                with self._lock:
+                    self.pid, self._window_start, self.threads = pid, None, {}
+                return self._sample(final)
+        # instant de la lecture côté device, l'hôte seulement si /proc/uptime est illisible
+        device_now = uptime if uptime is not None else now
+        _, _, utime, stime = lines[0]
+        cpu_s = (utime + stime) / CLK_TCK
+        with self._lock:
+            if self._window_start is None:
+                self._window_start = device_now
+            window = device_now - self._window_start
+            closed = window >= (MIN_PEAK_WINDOW if final else self.interval)
+            for entry in lines[1:]:
+                if entry is None:
+                    continue
+                tid, name, t_utime, t_stime = entry
+                ticks = t_utime + t_stime
+                thread = self.threads.setdefault(tid, [name, ticks, ticks, 0.0, ticks])
+                thread[2] = ticks
+                if closed:
+                    thread[3] = max(thread[3], min(1.0, (ticks - thread[4]) / CLK_TCK / window))
+                    thread[4] = ticks
+            if closed:
+                self._window_start = device_now
+            self.samples.append(now, cpu_s, utime / CLK_TCK, stime / CLK_TCK)
+        return cpu_s
+
+    def mark(self, cycle):
+        """Fin du cycle `cycle` (ou début pour le premier) : échantillon immédiat, noté pour per_cycle()."""
+        cpu_s = self.sample()
+        if cpu_s is not None:
+            with self._lock:
+                self.marks.append((cycle, time.monotonic(), cpu_s))
+        return cpu_s
+
+    # --- résultats ---
+    def per_cycle(self):
+        """[(cycle, CPU-secondes, part d'un coeur)] entre deux mark() consécutifs."""
+        with self._lock:
+            marks = list(self.marks)
+        return [(cycle, cpu - prev_cpu, (cpu - prev_cpu) / (t - prev_t) if t > prev_t else 0.0)
+                for (_, prev_t, prev_cpu), (cycle, t, cpu) in zip(marks, marks[1:])]
+
+    def total_cpu_s(self):
+        """CPU-secondes du process entre le premier et le dernier échantillon."""
+        with self._lock:
+            records = list(self.samples)
+        return records[-1][1] - records[0][1] if len(records) > 1 else 0.0
+
+    def hottest(self, n=5):
+        """[(nom, tid, CPU-secondes, pic en part d'un coeur)] des `n` threads qui ont le plus consommé."""
+        with self._lock:
+            threads = [(name, tid, (last - first) / CLK_TCK, peak)
+                       for tid, (name, first, last, peak, _) in self.threads.items()]
+        return sorted(threads, key=lambda t: -t[2])[:n]
+
+    def saturated(self):
+        """Threads dont l'utilisation a atteint le seuil de saturation sur une fenêtre d'au moins `interval`."""
+        return [t for t in self.hottest(len(self.threads)) if t[3] >= self.saturation]
+
+    def describe(self, n=3):
+        """Une ligne : CPU total, moyenne par cycle et threads les plus chauds."""
+        cycles = self.per_cycle()
+        per_cycle = f", {sum(c[1] for c in cycles) / len(cycles):.2f} CPU-s/cycle" if cycles else ""
+        threads = ", ".join(f"{name} {cpu:.2f}s (peak {peak:.0%})" for name, _, cpu, peak in self.hottest(n))
+        return f"{self.name}: {self.total_cpu_s():.2f} CPU-s over {len(self.samples)} samples{per_cycle}; {threads}"
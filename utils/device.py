@@ -0,0 +1,89 @@
+"""
+Helpers bas niveau pour parler au device Android sous-jacent.
+
+Les commandes shell passent d'abord par `mobile: shell` (nécessite
+`appium --allow-insecure adb_shell`), puis retombent sur l'exécutable `adb`
+local quand le serveur Appium refuse la commande.
+"""
+
+import shutil
+import subprocess
+
+from config import BASE_CAPS
+
+
+APP_PACKAGE = BASE_CAPS["appPackage"]
+APP_ACTIVITY = BASE_CAPS["appActivity"]
+
+
+def device_udid(driver):
+    """Retourne l'udid du device de la session (ou None si inconnu)."""
+    caps = getattr(driver, "capabilities", None) or {}
+    return caps.get("udid") or caps.get("deviceUDID") or caps.get("appium:udid")
+
+
+def adb_shell(driver, command, *args, timeout=20):
+    """Exécute `command args...` dans le shell du device et retourne stdout.
+
+    Lève RuntimeError si aucune des deux voies (Appium, adb local) n'aboutit.
+    """
+    try:
+        output = driver.execute_script("mobile: shell", {
+            "command": command,
+            "args": [str(a) for a in args],
+            "timeout": int(timeout * 1000),
+        })
+        if isinstance(output, dict):
+            output = output.get("stdout", "")
+        return output or ""
+    except Exception as appium_error:
+        adb = shutil.which("adb")
+        if not adb:
+            raise RuntimeError(f"adb shell '{command}' failed: {appium_error}") from appium_error
+        cmd = [adb]
+        udid = device_udid(driver)
+        if udid:
+            cmd += ["-s", udid]
+        cmd += ["shell", command, *[str(a) for a in args]]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except Exception as adb_error:
+            raise RuntimeError(f"adb shell '{command}' failed: {adb_error}") from adb_error
+        if result.returncode != 0:
+            raise RuntimeError(f"adb shell '{command}' failed: {result.stderr.strip()}")
+        return result.stdout
+
+
+def clear_app_data(driver, package=APP_PACKAGE):
+    """Efface les données de l'app (équivalent `pm clear`)."""
+    try:
+        driver.execute_script("mobile: clearApp", {"appId": package})
+    except Exception:
+        adb_shell(driver, "pm", "clear", package)
+
+
+def app_version(driver, package=APP_PACKAGE):
+    """versionName de l'app installée (via `dumpsys package`), "unknown" si indisponible."""
+    try:
+        output = adb_shell(driver, "dumpsys", "package", package)
+    except Exception:
+        return "unknown"
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("versionName="):
+            return line.split("=", 1)[1]
+    return "unknown"
+
+
+def device_profile(driver):
+    """Identifiant "device|version de l'app" de la session, calculé une seule fois par driver."""
+    profile = getattr(driver, "_device_profile", None)
+    if profile is None:
+        caps = getattr(driver, "capabilities", None) or {}
+        device = device_udid(driver) or caps.get("deviceName") or "default"
+        profile = f"{device}|{app_version(driver)}"
+        try:
+            driver._device_profile = profile
+        except Exception:
+            pass
+    return profile
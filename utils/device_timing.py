@@ -0,0 +1,249 @@
+"""
+Temps de transition mesurés par le device (gfxinfo framestats, logcat), pas depuis l'hôte.
+
+Chronométrer un clic puis l'attente d'un élément depuis l'hôte mesure aussi
+les allers-retours HTTP, la latence de UiAutomator et le pas de polling du
+wait. Le device horodate lui-même ce qui compte :
+
+- `dumpsys gfxinfo <package> framestats` : pour les 120 dernières frames,
+  le traitement de l'entrée (HandleInputStart, et InputEventId non nul
+  quand la frame traite un tap, Android 12+) et la fin du rendu
+  (FrameCompleted), en ns de CLOCK_MONOTONIC du device ;
+- le logcat `ActivityTaskManager: Displayed <activité>: +1s234ms` : temps
+  de lancement d'une activité mesuré par le système. Il est lu par
+  `logcat -d` dans le shell du device, qui ne vide pas le buffer (getLog le
+  viderait, et la capture d'artefacts d'échec n'aurait plus la fin du logcat) :
+  begin() note l'horodatage de la dernière ligne, end() ne garde que les
+  lignes postérieures.
+
+Pour rattacher les frames à une étape, les instants de l'hôte sont convertis
+en temps du device. La synchronisation reprend la méthode NTP : plusieurs
+lectures de /proc/uptime, chacune encadrée par deux lectures de
+time.monotonic(), et on garde celle dont l'aller-retour est le plus court.
+/proc/uptime compte aussi la veille (CLOCK_BOOTTIME) : l'écart avec
+CLOCK_MONOTONIC est corrigé par l'en-tête de gfxinfo (Realtime - Uptime).
+La synchronisation est mémorisée par session et refaite au bout d'une minute.
+
+La latence d'une étape va du premier tap traité pendant l'étape à la fin de
+la dernière frame rendue. Elle est calculée entièrement avec les horloges du
+device : l'erreur de synchronisation ne joue que sur le choix des frames.
+
+    timer = TransitionTimer(driver)
+    timer.begin()
+    checkout.click_finish_button()
+    checkout.try_wait(present(...), timeout=5)
+    transition = timer.end("order_completion")   # {"latency_ms": ..., "from": "input", ...}
+"""
+
+import re
+import time
+
+from utils.device import APP_PACKAGE, adb_shell
+
+
+# lectures de /proc/uptime par synchronisation, ancienneté (s) avant de resynchroniser
+CLOCK_SYNC_SAMPLES = 5
+CLOCK_SYNC_MAX_AGE = 60.0
+# /proc/uptime est tronqué au centième de seconde
+UPTIME_RESOLUTION = 0.01
+
+# taille de l'historique de frames de gfxinfo : une étape plus longue en perd le début
+FRAMESTATS_FRAMES = 120
+
+PROFILEDATA = "---PROFILEDATA---"
+DISPLAYED = re.compile(r"Displayed (\S+): \+(?:(\d+)s)?(\d+)ms")
+GFXINFO_CLOCKS = re.compile(r"Uptime: (\d+) Realtime: (\d+)")
+# `logcat -v epoch` : "1700000000.123  1234  1250 I ActivityTaskManager: Displayed ..."
+LOGCAT_EPOCH = re.compile(r"^\s*(\d+\.\d+)\s")
+# tag des lignes Displayed : ActivityTaskManager depuis Android 10, ActivityManager avant
+DISPLAYED_TAGS = ("ActivityTaskManager:I", "ActivityManager:I")
+
+
+class ClockSync:
+    """Correspondance entre time.monotonic() de l'hôte et CLOCK_MONOTONIC du device."""
+
+    def __init__(self, driver, samples=CLOCK_SYNC_SAMPLES):
+        self.driver = driver
+        self.samples = samples
+        # CLOCK_BOOTTIME du device - time.monotonic() de l'hôte (s)
+        self.offset = 0.0
+        # erreur maximale de la correspondance (s)
+        self.error = 0.0
+        # temps passé en veille par le device (CLOCK_BOOTTIME - CLOCK_MONOTONIC, s)
+        self.asleep = 0.0
+        self.synced_at = None
+
+    def sync(self):
+        """Mesure le décalage sur l'aller-retour le plus court. Lève RuntimeError sans accès shell."""
+        best = None
+        for _ in range(self.samples):
+            before = time.monotonic()
+            output = adb_shell(self.driver, "cat", "/proc/uptime")
+            after = time.monotonic()
+            # le device a lu son horloge entre before et after, au milieu en moyenne
+            uptime = float(output.split()[0]) + UPTIME_RESOLUTION / 2
+            if best is None or after - before < best[0]:
+                best = (after - before, uptime - (before + after) / 2)
+        round_trip, self.offset = best
+        self.error = round_trip / 2 + UPTIME_RESOLUTION / 2
+        self.synced_at = time.monotonic()
+        return self
+
+    def stale(self, max_age=CLOCK_SYNC_MAX_AGE):
+        return self.synced_at is None or time.monotonic() - self.synced_at > max_age
+
+    def observe_gfxinfo(self, output):
+        """Met à jour le temps de veille d'après l'en-tête `Uptime: ... Realtime: ...` de gfxinfo."""
+        match = GFXINFO_CLOCKS.search(output)
+        if match:
+            uptime_ms, realtime_ms = (int(v) for v in match.groups())
+            self.asleep = (realtime_ms - uptime_ms) / 1000
+
+    def to_device_ns(self, host_time):
+        """Instant time.monotonic() de l'hôte -> CLOCK_MONOTONIC du device (ns)."""
+        return int((host_time + self.offset - self.asleep) * 1e9)
+
+    def to_host(self, device_ns):
+        """Instant CLOCK_MONOTONIC du device (ns) -> time.monotonic() de l'hôte."""
+        return device_ns / 1e9 - self.offset + self.asleep
+
+
+def clock_sync(driver):
+    """ClockSync de la session, synchronisée une fois par minute au plus."""
+    clock = getattr(driver, "_clock_sync", None)
+    if clock is None:
+        clock = ClockSync(driver)
+        driver._clock_sync = clock
+    if clock.stale():
+        clock.sync()
+    return clock
+
+
+def parse_framestats(output):
+    """Frames de la section PROFILEDATA de gfxinfo : dicts colonne -> entier, les plus anciennes d'abord.
+
+    Les colonnes sont lues dans l'en-tête (elles varient selon la version d'Android) ; les
+    lignes sans IntendedVsync (frames abandonnées) sont ignorées.
+    """
+    sections = output.split(PROFILEDATA)
+    if len(sections) < 3:
+        return []
+    lines = [line.strip().rstrip(",") for line in sections[1].strip().splitlines() if line.strip()]
+    if not lines:
+        return []
+    columns = lines[0].split(",")
+    frames = []
+    for line in lines[1:]:
+        values = line.split(",")
+        if len(values) != len(columns):
+            continue
+        frame = dict(zip(columns, (int(v) for v in values)))
+        if frame.get("IntendedVsync"):
+            frames.append(frame)
+    frames.sort(key=lambda f: f["IntendedVsync"])
+    return frames
+
+
+def read_frames(driver, package=APP_PACKAGE):
+    """(sortie brute, frames) de `dumpsys gfxinfo <package> framestats`."""
+    output = adb_shell(driver, "dumpsys", "gfxinfo", package, "framestats")
+    return output, parse_framestats(output)
+
+
+def parse_displayed(messages):
+    """[(composant, ms)] des lignes `Displayed <composant>: +[Ns]Nms` du logcat."""
+    displayed = []
+    for message in messages:
+        match = DISPLAYED.search(message)
+        if match:
+            component, seconds, ms = match.groups()
+            displayed.append((component, int(seconds or 0) * 1000 + int(ms)))
+    return displayed
+
+
+def read_logcat(driver, since=None, last=None):
+    """(horodatage de la dernière ligne lue, lignes) des tags de DISPLAYED_TAGS, sans vider le buffer.
+
+    `since` : ne garde que les lignes strictement postérieures (horodatage epoch du device) ;
+    `last` : seulement les `last` dernières lignes.
+    """
+    args = ["-d", "-v", "epoch"]
+    if since is not None:
+        args += ["-T", f"{since:.3f}"]
+    if last is not None:
+        args += ["-t", last]
+    output = adb_shell(driver, "logcat", *args, "-s", *DISPLAYED_TAGS)
+    mark, lines = since, []
+    for line in output.splitlines():
+        match = LOGCAT_EPOCH.match(line)
+        if not match:
+            continue
+        stamp = float(match.group(1))
+        if since is not None and stamp <= since:
+            continue
+        mark = stamp if mark is None else max(mark, stamp)
+        lines.append(line)
+    return mark, lines
+
+
+def read_displayed(driver, since=None):
+    """(repère pour la lecture suivante, [(composant, ms)]) des lignes Displayed postérieures à `since`."""
+    mark, lines = read_logcat(driver, since)
+    return mark, parse_displayed(lines)
+
+
+class TransitionTimer:
+    """Latence tap -> rendu de chaque étape d'un scénario, d'après les horodatages du device.
+
+    `end()` retourne un dict : latency_ms (None si rien n'a été rendu), from ("input" si le
+    point de départ est le HandleInputStart du premier tap de l'étape, "step_start" si c'est le
+    début de l'étape converti en temps device : pas d'InputEventId avant Android 12, ou début de
+    l'étape sorti de l'historique de 120 frames), frames, displayed_ms et truncated.
+    """
+
+    def __init__(self, driver, package=APP_PACKAGE):
+        self.driver = driver
+        self.package = package
+        self.clock = clock_sync(driver)
+        self.transitions = []
+        self._start = None
+        self._logcat_mark = None
+
+    def begin(self):
+        """Début d'une étape : à appeler juste avant l'action mesurée."""
+        if self.clock.stale():
+            self.clock.sync()
+        # repère dans le logcat : les lignes Displayed lues par end() appartiennent à l'étape
+        self._logcat_mark, _ = read_logcat(self.driver, last=1)
+        self._start = time.monotonic()
+
+    def end(self, name):
+        """Fin de l'étape `name` : lit les frames et le logcat, retourne (et garde) la transition."""
+        if self._start is None:
+            raise RuntimeError("TransitionTimer.end() called without begin()")
+        output, frames = read_frames(self.driver, self.package)
+        _, displayed = read_displayed(self.driver, since=self._logcat_mark)
+        self.clock.observe_gfxinfo(output)
+        start_ns = self.clock.to_device_ns(self._start)
+        # une frame lancée un peu avant le début estimé peut quand même traiter le tap
+        window = [f for f in frames if f["IntendedVsync"] >= start_ns - self.clock.error * 1e9]
+        truncated = len(frames) >= FRAMESTATS_FRAMES and bool(window) and window[0] is frames[0]
+        tap = next((f for f in window if f.get("InputEventId")), None)
+        if tap is not None and not truncated:
+            origin, from_ns = "input", tap["HandleInputStart"]
+        else:
+            origin, from_ns = "step_start", start_ns
+        latency = None
+        if window:
+            latency = max(0.0, (max(f["FrameCompleted"] for f in window) - from_ns) / 1e6)
+        transition = {
+            "step": name,
+            "latency_ms": latency,
+            "from": origin,
+            "frames": len(window),
+            "displayed_ms": max((ms for _, ms in displayed), default=None),
+            "truncated": truncated,
+        }
+        self.transitions.append(transition)
+        self._start = None
+        return transition
@@ -0,0 +1,138 @@
+"""
+Pool de sessions Appium réutilisées entre les tests.
+
+Une session par device est créée à la demande puis conservée pour toute la
+session pytest. Entre deux tests, l'état de l'app est restauré avec une
+stratégie de reset :
+
+- "restart"     : terminate_app + activate_app (le plus rapide)
+- "clear"       : `pm clear` du package puis activate_app (données effacées)
+- "new_session" : quit + nouvelle session Appium (le plus sûr, le plus lent)
+
+Le pool retient aussi l'état dans lequel le dernier test a laissé l'app
+(utils/state_order.py) : un test qui demande exactement cet état reprend la
+session sans reset.
+"""
+
+import time
+
+from appium import webdriver
+from appium.options.android import UiAutomator2Options
+
+from config import BASE_CAPS, AVD_CONFIGS, HTTP_POOL_SIZE
+from utils.connection import PooledAppiumConnection
+from utils.device import APP_PACKAGE, clear_app_data
+from utils import command_hooks
+
+
+RESET_STRATEGIES = ("restart", "clear", "new_session")
+# état de l'app juste après un reset, quelle que soit la stratégie : écran de login
+RESET_STATE = "logged_out"
+
+
+def build_caps(avd_id=None):
+    """Construit les capabilities pour l'AVD demandé (ou le device par défaut)."""
+    caps = {**BASE_CAPS}
+    if avd_id and avd_id in AVD_CONFIGS:
+        caps.update(AVD_CONFIGS[avd_id])
+    return caps
+
+
+def build_options(caps):
+    """Convertit un dict de capabilities en UiAutomator2Options."""
+    options = UiAutomator2Options()
+    options.platform_name = caps["platformName"]
+    options.automation_name = caps["automationName"]
+
+    if "deviceName" in caps:
+        options.device_name = caps["deviceName"]
+    if "udid" in caps:
+        options.udid = caps["udid"]
+    if "systemPort" in caps:
+        options.system_port = caps["systemPort"]
+
+    options.app = caps["app"]
+    options.app_package = caps["appPackage"]
+    options.app_activity = caps["appActivity"]
+    options.new_command_timeout = caps.get("newCommandTimeout", 300)
+    return options
+
+
+class DriverPool:
+    """Garde une session Appium vivante par device et la remet à zéro entre les tests."""
+
+    def __init__(self, server, pool_size=HTTP_POOL_SIZE):
+        self.server = server
+        self.pool_size = pool_size
+        self._sessions = {}
+        # clé du device -> état connu de l'app (None : inconnu)
+        self._states = {}
+
+    def _create(self, key, caps):
+        # transport keep-alive partagé par toutes les sessions du process (utils/connection.py)
+        executor = PooledAppiumConnection(self.server, pool_size=self.pool_size)
+        driver = webdriver.Remote(executor, options=build_options(caps))
+        command_hooks.install(driver)
+        self._sessions[key] = (driver, caps)
+        return driver
+
+    def acquire(self, avd_id=None, strategy="restart", keep=None):
+        """Retourne (driver, caps, stratégie exécutée, durée du reset en ms).
+
+        Si `keep` est l'état connu de l'app, la session est rendue telle quelle ("kept", 0 ms).
+        """
+        if strategy not in RESET_STRATEGIES:
+            raise ValueError(f"Unknown reset strategy '{strategy}' (expected one of {RESET_STRATEGIES})")
+
+        key = avd_id or "default"
+        if key not in self._sessions:
+            start = time.perf_counter()
+            driver = self._create(key, build_caps(avd_id))
+            self._states[key] = RESET_STATE
+            return driver, self._sessions[key][1], "new_session", (time.perf_counter() - start) * 1000
+
+        driver, caps = self._sessions[key]
+        if keep is not None and self._states.get(key) == keep:
+            return driver, caps, "kept", 0.0
+        self._states[key] = None
+        start = time.perf_counter()
+        try:
+            driver = self._reset(key, driver, caps, strategy)
+        except Exception as e:
+            # Session morte ou reset impossible : on repart d'une session neuve
+            print(f"\n⚠ Reset '{strategy}' failed ({e}), falling back to a new session")
+            strategy = "new_session"
+            self._discard(key)
+            driver = self._create(key, caps)
+        self._states[key] = RESET_STATE
+        return driver, caps, strategy, (time.perf_counter() - start) * 1000
+
+    def set_state(self, avd_id, state):
+        """Note l'état dans lequel le test qui se termine laisse l'app (None : inconnu)."""
+        self._states[avd_id or "default"] = state
+
+    def _reset(self, key, driver, caps, strategy):
+        package = caps.get("appPackage", APP_PACKAGE)
+        if strategy == "restart":
+            driver.terminate_app(package)
+            driver.activate_app(package)
+        elif strategy == "clear":
+            clear_app_data(driver, package)
+            driver.activate_app(package)
+        else:
+            self._discard(key)
+            driver = self._create(key, caps)
+        return driver
+
+    def _discard(self, key):
+        driver, _ = self._sessions.pop(key, (None, None))
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def close_all(self):
+        """Ferme toutes les sessions du pool (fin de session pytest)."""
+        for key in list(self._sessions):
+            self._discard(key)
@@ -0,0 +1,1851 @@
+"""
+Faux serveur Appium/UiAutomator2 qui simule l'app Swag Labs, sans device.
+
+Il implémente le sous-ensemble du protocole W3C/Appium utilisé par pages/*.py
+et tests/*.py (sessions, find/click/send_keys, page source, actions W3C,
+orientation, back, scripts `mobile:`...). Derrière, une machine à états
+reproduit les écrans de l'app avec les mêmes accessibility ids que l'APK :
+login, produits, détail, menu, tri, panier, checkout (infos, aperçu) et
+confirmation. La hiérarchie est rendue en XML comme UiAutomator2 (bounds,
+classes Android, seuls les noeuds visibles à l'écran) et les XPath sont
+évalués avec lxml ; les sélecteurs `-android uiautomator` (UiSelector,
+UiScrollable.scrollIntoView) sont interprétés sur la même hiérarchie.
+
+Il sert à mesurer le coût propre du framework (nombre de commandes, waits,
+parsing...) et à faire tourner la suite sur une machine sans émulateur :
+
+    python utils/fake_appium.py --port 4723 --latency 0.02 \\
+        --command-latency getPageSource=0.15 --transition-delay 0.3
+    APPIUM_SERVER=http://127.0.0.1:4723 pytest
+
+Latence : `--latency` s'applique à chaque commande, `--command-latency`
+la surcharge par commande (noms des commandes Selenium : findElement,
+clickElement, getPageSource, actions, w3cExecuteScript...).
+`--xpath-latency` s'ajoute aux recherches XPath, que UiAutomator2 évalue
+sur un dump de toute la hiérarchie (les UiSelector n'en ont pas besoin).
+`--transition-delay` simule l'animation d'un changement d'écran : pendant ce
+délai la hiérarchie est vide, comme pendant un vrai chargement.
+
+Les frames rendues (taps, saisie, transitions, scrolls ; une par vsync à
+60 Hz) sont exposées par `dumpsys gfxinfo <package> [framestats|reset]`
+via `mobile: shell`, horodatées avec time.monotonic comme `/proc/uptime` ;
+`--jank-rate 0.05` fait dépasser le budget d'un vsync à 5 % des frames.
+`dumpsys meminfo <package>` rend la mémoire du process ; `--leak-kb 200`
+y simule une fuite de 200 KB de Java heap par tap. `pidof <package>` et
+`cat /proc/<pid>/stat /proc/<pid>/task/*/stat` donnent le temps CPU du
+process et de ses threads (main, mqt_js, RenderThread...), qui croît avec
+les taps, les frames et les changements d'écran. `am start -W`, `am force-stop`
+et `input keyevent` (HOME, BACK) simulent les démarrages cold / warm / hot.
+`logcat -d [-v epoch|threadtime] [-t N] [-T <epoch>] [-s tag:niveau...]` lit
+le logcat sans le vider (getLog, lui, le vide).
+"""
+
+import argparse
+import base64
+import collections
+import contextlib
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from lxml import etree
+
+
+APP_PACKAGE = "com.swaglabsmobileapp"
+LAUNCHER_PACKAGE = "com.google.android.apps.nexuslauncher"
+APP_VERSION = "2.7.1"
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+MAIN_ACTIVITY = f"{APP_PACKAGE}/.MainActivity"
+APP_PID = 4242
+# ligne de logcat stockée au format threadtime : "MM-DD HH:MM:SS.mmm  pid  tid niveau tag: message"
+LOGCAT_LINE = re.compile(r"^\S+ \S+\s+(?P<pid>\d+)\s+(?P<tid>\d+) (?P<level>\w) (?P<tag>[^:]+): (?P<message>.*)$")
+
+# Résolution naturelle des AVD de config.AVD_CONFIGS, d'après le deviceName demandé
+SCREEN_SIZES = {
+    "Pixel_4_7_Small": (720, 1280),
+    "Pixel_6_4_Medium": (1080, 2400),
+    "Pixel_Tablet_10": (2560, 1600),
+}
+DEFAULT_SCREEN_SIZE = (1080, 2400)
+
+# Catalogue de l'app (nom, prix, description)
+PRODUCTS = [
+    ("Sauce Labs Backpack", 29.99, "carry.allTheThings() with the sleek, streamlined Sly Pack."),
+    ("Sauce Labs Bike Light", 9.99, "A red light isn't the desired state in testing but it sure helps when riding your bike at night."),
+    ("Sauce Labs Bolt T-Shirt", 15.99, "Get your testing superhero on with the Sauce Labs bolt T-shirt."),
+    ("Sauce Labs Fleece Jacket", 49.99, "It's not every day that you come across a midweight quarter-zip fleece jacket."),
+    ("Sauce Labs Onesie", 7.99, "Rib snap infant onesie for the junior automation engineer in development."),
+    ("Test.allTheThings() T-Shirt (Red)", 15.99, "This classic Sauce Labs t-shirt is perfect to wear when cozying up to your keyboard."),
+]
+
+SORT_OPTIONS = {
+    "Name (A to Z)": (lambda pid: PRODUCTS[pid][0], False),
+    "Name (Z to A)": (lambda pid: PRODUCTS[pid][0], True),
+    "Price (low to high)": (lambda pid: (PRODUCTS[pid][1], pid), False),
+    "Price (high to low)": (lambda pid: (PRODUCTS[pid][1], -pid), True),
+}
+
+USERS = ("standard_user", "locked_out_user", "problem_user")
+PASSWORD = "secret_sauce"
+
+MENU_ITEMS = ("ALL ITEMS", "WEBVIEW", "QR CODE SCANNER", "GEO LOCATION", "DRAWING", "ABOUT", "LOGOUT", "RESET APP STATE")
+
+FRAME = "android.widget.FrameLayout"
+GROUP = "android.view.ViewGroup"
+SCROLL = "android.widget.ScrollView"
+TEXT = "android.widget.TextView"
+EDIT = "android.widget.EditText"
+IMAGE = "android.widget.ImageView"
+
+# Un geste plus court que ça (en px) est un tap
+TAP_DISTANCE = 15
+
+# Rendu à 60 Hz : une frame par vsync tant que l'écran change, chacune rendue en FRAME_WORK_NS
+VSYNC_NS = 16_666_667
+FRAME_WORK_NS = 6_000_000
+# frame "janky" (--jank-rate) : rendue en plus d'un intervalle de vsync
+JANK_WORK_NS = 28_000_000
+# frames rendues par un tap sans changement d'écran (effet de pression), par un scroll
+TAP_FRAMES = 2
+SCROLL_FRAMES = 12
+# relayout complet de l'écran après une rotation
+ROTATION_FRAMES = 20
+
+# TotalTime de `am start -W` (ms, moyenne et écart-type) selon l'état du process et de l'activité,
+# pour l'écran de référence (1080x2400) ; un écran plus grand démarre un peu plus lentement
+START_TIMES_MS = {"COLD": (650, 60), "WARM": (280, 30), "HOT": (90, 12)}
+# composants acceptés par `am start -n`
+MAIN_COMPONENTS = (MAIN_ACTIVITY, f"{APP_PACKAGE}/{APP_PACKAGE}.MainActivity")
+# dumpsys gfxinfo framestats ne garde que les 120 dernières frames
+FRAMESTATS_FRAMES = 120
+FRAMESTATS_COLUMNS = (
+    "Flags", "FrameTimelineVsyncId", "IntendedVsync", "Vsync", "InputEventId", "HandleInputStart",
+    "AnimationStart", "PerformTraversalsStart", "DrawStart", "FrameDeadline", "FrameInterval",
+    "FrameStartTime", "SyncQueued", "SyncStart", "IssueDrawCommandsStart", "SwapBuffers",
+    "FrameCompleted", "DequeueBufferDuration", "QueueBufferDuration", "GpuCompleted",
+    "SwapBuffersCompleted", "DisplayPresentTime", "CommandSubmissionCompleted",
+)
+# instant de la phase de la frame, en fraction de FRAME_WORK_NS après le vsync
+FRAME_PHASES = {
+    "HandleInputStart": 0.05, "AnimationStart": 0.1, "PerformTraversalsStart": 0.2, "DrawStart": 0.3,
+    "SyncQueued": 0.5, "SyncStart": 0.55, "IssueDrawCommandsStart": 0.6, "SwapBuffers": 0.9,
+    "GpuCompleted": 0.95, "SwapBuffersCompleted": 0.97, "CommandSubmissionCompleted": 0.92,
+}
+# Mémoire du process (KB, section "App Summary" de dumpsys meminfo) au lancement ;
+# la Java heap varie entre deux GC et retient --leak-kb par tap
+MEMINFO_BASE_KB = {
+    "Java Heap": 14_200, "Native Heap": 21_800, "Code": 38_400, "Stack": 1_100,
+    "Graphics": 9_600, "Private Other": 3_900, "System": 7_300,
+}
+GC_CHURN_KB = 1024
+
+# Threads du process (tid, nom) et leur coût CPU en ticks de 10 ms (/proc/<pid>/task/<tid>/stat) :
+# ticks par seconde de vie, par tap, par frame rendue et par changement d'écran
+CLK_TCK = 100
+APP_THREADS = (
+    (APP_PID, "swaglabsmobileapp", {"idle": 0.5, "tap": 2, "frame": 0.1, "transition": 3}),
+    (APP_PID + 12, "mqt_js", {"idle": 0.2, "tap": 4, "frame": 0, "transition": 6}),
+    (APP_PID + 13, "mqt_native_modu", {"idle": 0.1, "tap": 1, "frame": 0, "transition": 1}),
+    (APP_PID + 21, "RenderThread", {"idle": 0, "tap": 0, "frame": 0.5, "transition": 0}),
+    (APP_PID + 5, "HeapTaskDaemon", {"idle": 0.05, "tap": 0.2, "frame": 0, "transition": 0.5}),
+    (APP_PID + 30, "OkHttp Dispatch", {"idle": 0, "tap": 0, "frame": 0, "transition": 0.2}),
+)
+
+# bornes (ms) des buckets de l'histogramme de dumpsys gfxinfo
+GFXINFO_BUCKETS = (list(range(5, 33)) + list(range(34, 50, 2)) + list(range(53, 134, 4))
+                   + list(range(150, 5000, 50)))
+
+
+class W3CError(Exception):
+    """Erreur renvoyée au client au format W3C ({"value": {"error", "message"}})."""
+
+    def __init__(self, status, error, message):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+
+
+def no_such_element(using, value):
+    return W3CError(404, "no such element", f"An element could not be located on the page using the given search parameters ({using}={value!r})")
+
+
+def stale_element(eid):
+    return W3CError(404, "stale element reference", f"The element '{eid}' does not exist in DOM anymore")
+
+
+def _png(width=36, height=64, rgb=(226, 35, 26)):
+    """PNG uni minimal (capture d'écran factice)."""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+    row = b"\x00" + bytes(rgb) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+SCREENSHOT_B64 = base64.b64encode(_png()).decode("ascii")
+
+
+def element_id(key):
+    """Element id stable (et sûr dans une URL) dérivé de la clé d'un noeud."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+def parse_bounds(bounds):
+    x1, y1, x2, y2 = (int(v) for v in re.findall(r"-?\d+", bounds))
+    return x1, y1, x2, y2
+
+
+# --- Sélecteurs UiAutomator (-android uiautomator) ----------------------------
+
+UIAUTOMATOR = "-android uiautomator"
+
+_UI_NEW = re.compile(r"\s*new\s+(UiSelector|UiScrollable)\s*\(")
+_UI_METHOD = re.compile(r"\s*\.\s*(\w+)\s*\(")
+_UI_LITERAL = re.compile(r'\s*("(?:[^"\\]|\\.)*"|-?\d+|true|false)')
+
+# méthode UiSelector -> (attribut, comparaison)
+_UI_ATTRIBUTES = {
+    "text": ("text", "eq"), "textContains": ("text", "contains"),
+    "textStartsWith": ("text", "startswith"), "textMatches": ("text", "matches"),
+    "description": ("content-desc", "eq"), "descriptionContains": ("content-desc", "contains"),
+    "descriptionStartsWith": ("content-desc", "startswith"), "descriptionMatches": ("content-desc", "matches"),
+    "className": ("class", "eq"), "classNameMatches": ("class", "matches"),
+    "resourceId": ("resource-id", "eq"), "resourceIdMatches": ("resource-id", "matches"),
+    "index": ("index", "eq"),
+}
+_UI_FLAGS = {
+    "scrollable": "scrollable", "clickable": "clickable", "enabled": "enabled", "focusable": "focusable",
+    "focused": "focused", "selected": "selected", "checked": "checked", "checkable": "checkable",
+    "longClickable": "long-clickable",
+}
+
+
+class UiSelectorParser:
+    """Analyse `new UiSelector().text("x")...` / `new UiScrollable(...).scrollIntoView(...)`.
+
+    Résultat : {"type": "UiSelector" | "UiScrollable", "args": [...], "calls": [(méthode, [args])]}.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message):
+        return W3CError(400, "invalid selector", f"Invalid UiSelector '{self.text}': {message} at position {self.pos}")
+
+    def parse(self):
+        expr = self.expr()
+        rest = self.text[self.pos:].strip()
+        if rest not in ("", ";"):
+            raise self.error("unexpected trailing text")
+        return expr
+
+    def parse_statements(self):
+        """Instructions séparées par `;` (UiAutomator2 renvoie l'union de leurs résultats)."""
+        statements = [self.expr()]
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos].isspace():
+                self.pos += 1
+            if not self.text.startswith(";", self.pos):
+                break
+            self.pos += 1
+            if not self.text[self.pos:].strip():
+                break
+            statements.append(self.expr())
+        if self.text[self.pos:].strip():
+            raise self.error("unexpected trailing text")
+        return statements
+
+    def expr(self):
+        match = _UI_NEW.match(self.text, self.pos)
+        if not match:
+            raise self.error("expected 'new UiSelector(' or 'new UiScrollable('")
+        self.pos = match.end()
+        node = {"type": match.group(1), "args": self.args(), "calls": []}
+        while True:
+            match = _UI_METHOD.match(self.text, self.pos)
+            if not match:
+                return node
+            self.pos = match.end()
+            node["calls"].append((match.group(1), self.args()))
+
+    def args(self):
+        """Arguments jusqu'à la parenthèse fermante (déjà après la parenthèse ouvrante)."""
+        args = []
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos].isspace():
+                self.pos += 1
+            if self.text.startswith(")", self.pos):
+                self.pos += 1
+                return args
+            if args:
+                if not self.text.startswith(",", self.pos):
+                    raise self.error("expected ',' or ')'")
+                self.pos += 1
+            args.append(self.value())
+
+    def value(self):
+        if _UI_NEW.match(self.text, self.pos):
+            return self.expr()
+        match = _UI_LITERAL.match(self.text, self.pos)
+        if not match:
+            raise self.error("expected a string, number, boolean or selector")
+        self.pos = match.end()
+        literal = match.group(1)
+        if literal in ("true", "false"):
+            return literal == "true"
+        return json.loads(literal)
+
+
+def _ui_matches(el, calls):
+    for name, args in calls:
+        if name in _UI_ATTRIBUTES:
+            attribute, how = _UI_ATTRIBUTES[name]
+            actual, expected = el.get(attribute, ""), str(args[0])
+            if how == "eq" and actual != expected:
+                return False
+            if how == "contains" and expected not in actual:
+                return False
+            if how == "startswith" and not actual.startswith(expected):
+                return False
+            if how == "matches" and not re.fullmatch(expected, actual):
+                return False
+        elif name in _UI_FLAGS:
+            if (el.get(_UI_FLAGS[name]) == "true") != bool(args[0]):
+                return False
+    return True
+
+
+def ui_select(root, selector):
+    """Noeuds sous `root` qui correspondent à un UiSelector analysé, dans l'ordre du document."""
+    if selector.get("type") != "UiSelector":
+        raise W3CError(400, "invalid selector", "Expected a UiSelector")
+    own, child, instance = [], None, None
+    for name, args in selector["calls"]:
+        if name == "childSelector":
+            child = args[0]
+        elif name == "instance":
+            instance = int(args[0])
+        elif name in _UI_ATTRIBUTES or name in _UI_FLAGS:
+            own.append((name, args))
+        else:
+            raise W3CError(400, "invalid selector", f"UiSelector.{name}() is not supported")
+    found = [el for el in root.iter() if el is not root and _ui_matches(el, own)]
+    if child is not None:
+        found = [c for el in found for c in ui_select(el, child)]
+    if instance is not None:
+        found = found[instance:instance + 1]
+    return found
+
+
+# --- Rendu de la hiérarchie ---------------------------------------------------
+
+class Hierarchy:
+    """Hiérarchie rendue pour un état de l'app : arbre lxml + clés stables des éléments.
+
+    La clé d'un élément ("item/3/add", "input/username"...) donne son element
+    id côté client : tant que le noeud existe dans le rendu courant, l'élément
+    reste valide ; sinon le client reçoit une "stale element reference".
+    """
+
+    def __init__(self, width, height, package=APP_PACKAGE, rotation=0):
+        self.width = width
+        self.height = height
+        self.package = package
+        self.root = etree.Element("hierarchy", index="0", **{"class": "hierarchy"},
+                                  rotation=str(rotation), width=str(width), height=str(height))
+        self.nodes = {}
+        self.keys = {}
+        self.elements = {}
+        self.handlers = {}
+        self.inputs = {}
+        self.max_scroll = 0
+        self._clip = [(0, 0, width, height)]
+        self._source = None
+
+    @contextlib.contextmanager
+    def clip(self, rect):
+        x1, y1, x2, y2 = self._clip[-1]
+        self._clip.append((max(x1, rect[0]), max(y1, rect[1]), min(x2, rect[2]), min(y2, rect[3])))
+        try:
+            yield
+        finally:
+            self._clip.pop()
+
+    def add(self, parent, cls, rect, key=None, text="", desc="", on_click=None,
+            scrollable=False, password=False, field=None):
+        """Ajoute un noeud visible (coupé à la zone visible courante) ; None s'il est hors écran."""
+        if parent is None:
+            return None
+        cx1, cy1, cx2, cy2 = self._clip[-1]
+        x1, y1 = int(max(rect[0], cx1)), int(max(rect[1], cy1))
+        x2, y2 = int(min(rect[2], cx2)), int(min(rect[3], cy2))
+        if x2 <= x1 or y2 <= y1:
+            return None
+        index = len(parent)
+        if key is None:
+            key = f"{self.keys.get(parent, 'root')}/{index}"
+        clickable = on_click is not None or cls == EDIT
+        el = etree.SubElement(parent, cls)
+        for name, value in (
+            ("index", str(index)), ("package", self.package), ("class", cls), ("text", text),
+            ("content-desc", desc), ("checkable", "false"), ("checked", "false"),
+            ("clickable", str(clickable).lower()), ("enabled", "true"),
+            ("focusable", str(clickable).lower()), ("focused", "false"), ("long-clickable", "false"),
+            ("password", str(password).lower()), ("scrollable", str(scrollable).lower()),
+            ("selected", "false"), ("bounds", f"[{x1},{y1}][{x2},{y2}]"), ("displayed", "true"),
+            ("resource-id", ""),
+        ):
+            el.set(name, value)
+        self.nodes[key] = el
+        self.keys[el] = key
+        self.elements[element_id(key)] = el
+        if on_click is not None:
+            self.handlers[key] = on_click
+        if field is not None:
+            self.inputs[key] = field
+        return el
+
+    def source(self):
+        if self._source is None:
+            self._source = etree.tostring(self.root, encoding="UTF-8", xml_declaration=True,
+                                          standalone=True, pretty_print=True).decode("utf-8")
+        return self._source
+
+    def handler_for(self, el):
+        """Handler de clic de l'élément ou du premier ancêtre cliquable (comme un vrai tap)."""
+        while el is not None:
+            key = self.keys.get(el)
+            if key in self.handlers:
+                return self.handlers[key]
+            el = el.getparent()
+        return None
+
+    def element_at(self, x, y):
+        """Plus petit élément cliquable contenant le point (x, y)."""
+        best, best_area = None, None
+        for key in self.handlers:
+            x1, y1, x2, y2 = parse_bounds(self.nodes[key].get("bounds"))
+            if x1 <= x < x2 and y1 <= y < y2:
+                area = (x2 - x1) * (y2 - y1)
+                if best_area is None or area < best_area:
+                    best, best_area = self.nodes[key], area
+        return best
+
+    def key_at(self, x, y, prefix):
+        """Clé du premier noeud dont la clé commence par `prefix` et qui contient (x, y)."""
+        for key, el in self.nodes.items():
+            if key.startswith(prefix):
+                x1, y1, x2, y2 = parse_bounds(el.get("bounds"))
+                if x1 <= x < x2 and y1 <= y < y2:
+                    return key
+        return None
+
+
+class Column:
+    """Contenu vertical d'une ScrollView : chaque row() avance d'une hauteur donnée."""
+
+    def __init__(self, view, rect, offset):
+        self.view = view
+        self.x1, self.top, self.x2, self.bottom = rect
+        self.y = self.top - offset
+        self.height = 0
+
+    def row(self, height):
+        rect = (self.x1, self.y, self.x2, self.y + height)
+        self.y += height
+        self.height += height
+        return rect
+
+    def max_scroll(self):
+        return max(0, int(self.height - (self.bottom - self.top)))
+
+
+def inset(rect, left=0.0, top=0.0, right=1.0, bottom=1.0):
+    """Sous-rectangle exprimé en fractions du rectangle parent."""
+    x1, y1, x2, y2 = rect
+    w, h = x2 - x1, y2 - y1
+    return (x1 + w * left, y1 + h * top, x1 + w * right, y1 + h * bottom)
+
+
+# --- Machine à états de l'app -------------------------------------------------
+
+class SwagLabsApp:
+    """État de l'app Swag Labs sur un device simulé et rendu de ses écrans."""
+
+    def __init__(self, width, height, transition_delay=0.0, jank_rate=0.0, leak_kb=0):
+        self.portrait_size = (width, height)
+        self.orientation = "PORTRAIT"
+        self.transition_delay = transition_delay
+        self.jank_rate = jank_rate
+        self.leak_kb = leak_kb
+        self._jank_credit = 0.0
+        self.version = 0
+        self.running = False
+        self.foreground = False
+        self._cache = None
+        # logcat du device : survit aux redémarrages de l'app, lu (et vidé) par getLog
+        self.logcat = collections.deque(maxlen=5000)
+        self.launch()
+
+    # --- cycle de vie ---
+    def _reset_process_state(self):
+        self.user = None
+        self.cart = []
+        self.sort = "Name (A to Z)"
+        self.grid = True
+        self.screen = "login"
+        self.history = []
+        self.offsets = {}
+        self.detail = None
+        self.menu_open = False
+        self.sort_open = False
+        self.error = None
+        self.fields = {"username": "", "password": "", "first_name": "", "last_name": "", "postal_code": ""}
+        self.ready_at = 0.0
+        # frames rendues par le process (vsync -> [id de l'événement d'entrée traité ou 0, durée en ns])
+        self.frames = {}
+        self.frames_since = time.monotonic_ns()
+        self.input_events = 0
+        self.taps = 0
+        self.frames_drawn = 0
+        self.transitions = 0
+        self.started_at = time.monotonic()
+        # ticks servis par thread (voir proc_stat) et instant du dernier calcul
+        self.cpu_served = {}
+        self.cpu_clock = self.started_at
+
+    def log(self, level, tag, message, pid=APP_PID):
+        """Ajoute une ligne au logcat, au format `threadtime` d'Android."""
+        now = time.time()
+        stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+        self.logcat.append({"timestamp": int(now * 1000), "level": "ALL",
+                            "message": f"{stamp} {pid:5d} {pid:5d} {level} {tag}: {message}"})
+
+    def launch(self, displayed_ms=None):
+        """Démarre le process de l'app (écran de login, état vierge)."""
+        self._reset_process_state()
+        self.running = True
+        self.foreground = True
+        self.log("I", "ActivityTaskManager", f"START u0 {{flg=0x10200000 cmp={MAIN_ACTIVITY}}}", pid=512)
+        self._transition()
+        if displayed_ms is None:
+            displayed_ms = int(self.transition_delay * 1000) + 350
+        self.log("I", "ActivityTaskManager", f"Displayed {MAIN_ACTIVITY}: +{displayed_ms}ms", pid=512)
+
+    def terminate(self):
+        was_running = self.running
+        self.running = False
+        self.foreground = False
+        if was_running:
+            self.log("I", "ActivityManager", f"Force stopping {APP_PACKAGE} appid=10123 user=0: from pid 512", pid=512)
+        self._touch()
+        return was_running
+
+    def activate(self):
+        if not self.running:
+            self.launch()
+        elif not self.foreground:
+            self.foreground = True
+            self._touch()
+
+    def start_activity(self, clear_task=False):
+        """`am start -W` de l'activité principale : (LaunchState, TotalTime en ms).
+
+        COLD sans process, WARM avec `--activity-clear-task` (activité recréée dans le process),
+        HOT si l'app était en arrière-plan ; ("UNKNOWN", None) si elle est déjà au premier plan.
+        """
+        if not self.running:
+            state = "COLD"
+        elif clear_task:
+            state = "WARM"
+        elif not self.foreground:
+            state = "HOT"
+        else:
+            return "UNKNOWN", None
+        mean, stdev = START_TIMES_MS[state]
+        width, height = self.portrait_size
+        scale = (width * height / (DEFAULT_SCREEN_SIZE[0] * DEFAULT_SCREEN_SIZE[1])) ** 0.25
+        total_ms = max(1, int(random.gauss(mean, stdev) * scale))
+        if state != "HOT":
+            total_ms += int(self.transition_delay * 1000)
+        if state == "COLD":
+            self.launch(displayed_ms=total_ms)
+            return state, total_ms
+        self.foreground = True
+        if state == "WARM":
+            # nouvelle instance de l'activité : la pile d'écrans repart de la racine
+            self.history, self.detail = [], None
+            self.menu_open = self.sort_open = False
+            self.screen = "products" if self.user else "login"
+            self._transition()
+            self.log("I", "ActivityTaskManager", f"Displayed {MAIN_ACTIVITY}: +{total_ms}ms", pid=512)
+        else:
+            self.draw(frames=TAP_FRAMES)
+            self._touch()
+        return state, total_ms
+
+    def press_home(self):
+        """Touche HOME : l'app passe en arrière-plan, process et activité conservés."""
+        if self.running and self.foreground:
+            self.foreground = False
+            self._touch()
+
+    def clear_data(self):
+        """`pm clear` : données effacées et process tué."""
+        self._reset_process_state()
+        self.running = False
+        self.foreground = False
+        self._touch()
+
+    def app_state(self):
+        if not self.running:
+            return 1
+        return 4 if self.foreground else 3
+
+    def _touch(self):
+        self.version += 1
+
+    def _transition(self):
+        self.ready_at = time.monotonic() + self.transition_delay
+        self.log("I", "ReactNativeJS", f"Navigated to {self.screen}")
+        self.transitions += 1
+        self.draw(until=self.ready_at)
+        self._touch()
+
+    # --- rendu des frames (dumpsys gfxinfo) ---
+    def draw(self, frames=1, until=None, input_event=False):
+        """Programme des frames à partir du prochain vsync : `frames` frames, ou jusqu'à `until`
+        (time.monotonic) ; la première traite un événement d'entrée si `input_event`."""
+        now = time.monotonic_ns()
+        vsync = now - now % VSYNC_NS + VSYNC_NS
+        last = vsync + (frames - 1) * VSYNC_NS
+        if until is not None:
+            last = max(last, int(until * 1e9))
+        if input_event:
+            self.input_events += 1
+        event = self.input_events if input_event else 0
+        while vsync <= last:
+            # deux animations qui se chevauchent partagent les mêmes frames
+            frame = self.frames.get(vsync)
+            if frame is None:
+                frame = self.frames[vsync] = [0, self._frame_work()]
+                self.frames_drawn += 1
+            frame[0] = frame[0] or event
+            event = 0
+            vsync += VSYNC_NS
+        # assez pour les statistiques depuis le dernier reset (framestats ne montre que les 120 dernières)
+        while len(self.frames) > 10_000:
+            del self.frames[next(iter(self.frames))]
+
+    def _frame_work(self):
+        """Durée de rendu d'une nouvelle frame : une sur 1/jank_rate dépasse le budget du vsync."""
+        self._jank_credit += self.jank_rate
+        if self._jank_credit >= 1:
+            self._jank_credit -= 1
+            return JANK_WORK_NS
+        return FRAME_WORK_NS
+
+    def rendered_frames(self):
+        """Frames terminées : [(vsync, id de l'événement d'entrée, durée en ns)], les plus anciennes d'abord."""
+        now = time.monotonic_ns()
+        return sorted((vsync, event, work) for vsync, (event, work) in self.frames.items()
+                      if vsync + work <= now)
+
+    def gfxinfo(self, framestats=False):
+        """Sortie de `dumpsys gfxinfo <package> [framestats]` : statistiques depuis le dernier
+        reset et, avec framestats, horodatages (ns, CLOCK_MONOTONIC) des 120 dernières frames."""
+        frames = self.rendered_frames()
+        durations = sorted(work / 1e6 for _, _, work in frames)
+        histogram = {bucket: 0 for bucket in GFXINFO_BUCKETS}
+        for ms in durations:
+            bucket = next((b for b in GFXINFO_BUCKETS if ms <= b), GFXINFO_BUCKETS[-1])
+            histogram[bucket] += 1
+        janky = sum(1 for ms in durations if ms > VSYNC_NS / 1e6)
+
+        def pct(q):
+            if not durations:
+                return 0
+            return math.ceil(durations[min(len(durations) - 1, int(len(durations) * q / 100))])
+
+        lines = [
+            "Applications Graphics Acceleration Info:",
+            f"Uptime: {int(time.monotonic() * 1000)} Realtime: {int(time.monotonic() * 1000)}",
+            "",
+            f"** Graphics info for pid {APP_PID} [{APP_PACKAGE}] **",
+            "",
+            f"Stats since: {self.frames_since}ns",
+            f"Total frames rendered: {len(frames)}",
+            f"Janky frames: {janky} ({janky * 100 / len(frames) if frames else 0:.2f}%)",
+            *(f"{q}th percentile: {pct(q)}ms" for q in (50, 90, 95, 99)),
+            "Number Missed Vsync: 0",
+            "Number High input latency: 0",
+            f"Number Slow UI thread: {janky}",
+            "Number Slow bitmap uploads: 0",
+            "Number Slow issue draw commands: 0",
+            "Number Frame deadline missed: 0",
+            "HISTOGRAM: " + " ".join(f"{b}ms={n}" for b, n in histogram.items()),
+        ]
+        if framestats:
+            lines += ["", "---PROFILEDATA---", ",".join(FRAMESTATS_COLUMNS) + ","]
+            for vsync, event, work in frames[-FRAMESTATS_FRAMES:]:
+                row = dict.fromkeys(FRAMESTATS_COLUMNS, 0)
+                row.update({name: vsync + int(work * at) for name, at in FRAME_PHASES.items()})
+                row.update(FrameTimelineVsyncId=vsync // VSYNC_NS, IntendedVsync=vsync, Vsync=vsync,
+                           InputEventId=event, FrameDeadline=vsync + VSYNC_NS, FrameInterval=VSYNC_NS,
+                           FrameStartTime=vsync, FrameCompleted=vsync + work,
+                           DisplayPresentTime=vsync + VSYNC_NS)
+                lines.append(",".join(str(row[name]) for name in FRAMESTATS_COLUMNS) + ",")
+            lines.append("---PROFILEDATA---")
+        return "\n".join(lines) + "\n"
+
+    def meminfo(self):
+        """Sortie de `dumpsys meminfo <package>` (section App Summary, KB)."""
+        rows = dict(MEMINFO_BASE_KB)
+        # objets alloués puis collectés : dents de scie déterministes
+        rows["Java Heap"] += self.taps * self.leak_kb + (self.version * 613) % GC_CHURN_KB
+        rows["Graphics"] += 2_400 if self.orientation == "LANDSCAPE" else 0
+        total = sum(rows.values())
+        lines = [
+            "Applications Memory Usage (in Kilobytes):",
+            f"Uptime: {int(time.monotonic() * 1000)} Realtime: {int(time.monotonic() * 1000)}",
+            "",
+            f"** MEMINFO in pid {APP_PID} [{APP_PACKAGE}] **",
+            "",
+            " App Summary",
+            "                       Pss(KB)                        Rss(KB)",
+            "                        ------                         ------",
+            *(f"{label + ':':>21}{kb:>9}{kb * 2:>31}" for label, kb in rows.items()),
+            "",
+            f"           TOTAL PSS:{total:>9}            TOTAL RSS:{total * 2:>9}       TOTAL SWAP PSS:       0",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def proc_stat(self, tid=None):
+        """Ligne de /proc/<pid>/stat (tid=None) ou /proc/<pid>/task/<tid>/stat ; None si inconnu.
+
+        Le travail demandé à chaque thread est servi à un coeur au plus : un thread trop
+        sollicité prend du retard et plafonne à 100 %, comme sur un vrai device.
+        """
+        now = time.monotonic()
+        elapsed, self.cpu_clock = now - self.cpu_clock, now
+        alive = now - self.started_at
+        ticks = {}
+        for thread_id, name, cost in APP_THREADS:
+            demand = (cost["idle"] * alive + cost["tap"] * self.taps + cost["frame"] * self.frames_drawn
+                      + cost["transition"] * self.transitions)
+            served = min(demand, self.cpu_served.get(thread_id, 0.0) + elapsed * CLK_TCK)
+            self.cpu_served[thread_id] = served
+            ticks[thread_id] = (name, int(served))
+        if tid is None:
+            tid, name, total = APP_PID, APP_THREADS[0][1], sum(t for _, t in ticks.values())
+        elif tid in ticks:
+            name, total = ticks[tid]
+        else:
+            return None
+        utime, stime = total - total // 5, total // 5
+        start = int((self.started_at - 5) * CLK_TCK)
+        return (f"{tid} ({name}) S 312 312 0 0 -1 1077952832 25000 0 120 0 {utime} {stime} 0 0 "
+                f"10 -10 {len(APP_THREADS)} 0 {start} 1621094400 26000")
+
+    def reset_frames(self):
+        self.frames = {}
+        self.frames_since = time.monotonic_ns()
+
+    @property
+    def size(self):
+        w, h = self.portrait_size
+        return (h, w) if self.orientation == "LANDSCAPE" else (w, h)
+
+    def set_orientation(self, orientation):
+        orientation = orientation.upper()
+        if orientation not in ("PORTRAIT", "LANDSCAPE"):
+            raise W3CError(400, "invalid argument", f"Unknown orientation '{orientation}'")
+        self.orientation = orientation
+        self.draw(ROTATION_FRAMES)
+        self._touch()
+
+    # --- navigation ---
+    def go(self, screen, detail=None):
+        self.history.append(self.screen)
+        self.screen = screen
+        self.detail = detail
+        self.offsets[screen] = 0
+        self.error = None
+        self.menu_open = False
+        self._transition()
+
+    def home(self):
+        """Retour à la liste des produits, pile de navigation vidée."""
+        self.history = []
+        self.screen = "products"
+        self.offsets["products"] = 0
+        self.error = None
+        self.menu_open = False
+        self._transition()
+
+    def back(self):
+        if not (self.running and self.foreground):
+            return
+        if self.sort_open:
+            self.sort_open = False
+        elif self.menu_open:
+            self.menu_open = False
+        elif self.history:
+            self.screen = self.history.pop()
+            self.error = None
+            self._transition()
+            return
+        else:
+            # dernier écran : l'app passe en arrière-plan
+            self.foreground = False
+        self._touch()
+
+    # --- actions des écrans ---
+    def login(self):
+        username, password = self.fields["username"], self.fields["password"]
+        if not username:
+            self.error = "Username is required"
+        elif not password:
+            self.error = "Password is required"
+        elif username not in USERS or password != PASSWORD:
+            self.error = "Username and password do not match any user in this service."
+        elif username == "locked_out_user":
+            self.error = "Sorry, this user has been locked out."
+        else:
+            self.user = username
+            self.fields["username"] = self.fields["password"] = ""
+            self.home()
+            return
+        self._touch()
+
+    def autofill(self, username):
+        self.fields["username"] = username
+        self.fields["password"] = PASSWORD
+        self._touch()
+
+    def logout(self):
+        self.user = None
+        self.history = []
+        self.screen = "login"
+        self.menu_open = False
+        self.error = None
+        self._transition()
+
+    def toggle_cart(self, pid):
+        if pid in self.cart:
+            self.cart.remove(pid)
+        else:
+            self.cart.append(pid)
+        self._touch()
+
+    def choose_sort(self, option):
+        if option in SORT_OPTIONS:
+            self.sort = option
+        self.sort_open = False
+        self._touch()
+
+    def open_sort(self):
+        self.sort_open = True
+        self._touch()
+
+    def open_menu(self):
+        self.menu_open = True
+        self._touch()
+
+    def menu_action(self, label):
+        self.menu_open = False
+        if label == "LOGOUT":
+            self.logout()
+            return
+        if label == "ALL ITEMS":
+            self.home()
+            return
+        if label == "RESET APP STATE":
+            self.cart = []
+        self._touch()
+
+    def toggle_grid(self):
+        self.grid = not self.grid
+        self._touch()
+
+    def continue_checkout(self):
+        for field, label in (("first_name", "First Name"), ("last_name", "Last Name"), ("postal_code", "Postal Code")):
+            if not self.fields[field]:
+                self.error = f"{label} is required"
+                self._touch()
+                return
+        self.go("checkout_overview")
+
+    def finish(self):
+        self.cart = []
+        self.go("complete")
+
+    def open_link(self, url):
+        """Deep link swaglabs://<écran>/<ids produits> (comme `mobile: deepLink`)."""
+        parsed = urlparse(url)
+        if parsed.scheme != "swaglabs":
+            raise W3CError(400, "invalid argument", f"Unsupported deep link '{url}'")
+        route = parsed.netloc
+        ids = [int(p) for p in parsed.path.strip("/").split(",") if p.strip().isdigit()]
+        if not self.running:
+            self.launch()
+        self.foreground = True
+        self.user = self.user or "standard_user"
+        self.sort_open = self.menu_open = False
+        if route == "swag-item":
+            self.home()
+            self.go("detail", detail=ids[0] if ids else 0)
+            return
+        if route in ("swag-overview", "cart", "personal-info", "checkout-overview"):
+            self.cart = [pid for pid in ids if 0 <= pid < len(PRODUCTS)]
+        self.home()
+        if route in ("cart", "personal-info", "checkout-overview"):
+            self.go("cart")
+        if route in ("personal-info", "checkout-overview"):
+            self.go("checkout_info")
+        if route == "checkout-overview":
+            self.fields.update(first_name="John", last_name="Doe", postal_code="12345")
+            self.go("checkout_overview")
+        if route == "complete":
+            self.cart = []
+            self.go("complete")
+
+    # --- gestes ---
+    def gesture(self, start, end):
+        """Geste tactile de `start` à `end` : tap, drag d'un produit vers le panier ou scroll."""
+        hierarchy = self.render()
+        (sx, sy), (ex, ey) = start, end
+        if math.hypot(ex - sx, ey - sy) < TAP_DISTANCE:
+            el = hierarchy.element_at(sx, sy)
+            if el is not None:
+                self.click(hierarchy, el)
+            return
+        item = hierarchy.key_at(sx, sy, "item/") if self.screen == "products" else None
+        if item and hierarchy.key_at(ex, ey, "header/cart"):
+            pid = int(item.split("/")[1])
+            if pid not in self.cart:
+                self.cart.append(pid)
+                self._touch()
+            self.draw(TAP_FRAMES, input_event=True)
+            return
+        self.scroll(sy - ey)
+
+    def scroll(self, delta):
+        """Fait défiler le contenu de `delta` px (positif = vers le bas). Retourne True si ça a bougé."""
+        hierarchy = self.render()
+        before = self.offsets.get(self.screen, 0)
+        after = max(0, min(hierarchy.max_scroll, before + int(delta)))
+        if after != before:
+            self.offsets[self.screen] = after
+            self.draw(SCROLL_FRAMES, input_event=True)
+            self._touch()
+        return after != before
+
+    def can_scroll(self, direction):
+        offset = self.offsets.get(self.screen, 0)
+        if direction == "down":
+            return offset < self.render().max_scroll
+        return offset > 0
+
+    def click(self, hierarchy, el):
+        key = hierarchy.keys.get(el, "")
+        if self.menu_open and not key.startswith("menu"):
+            # le tiroir ouvert intercepte le tap
+            self.menu_open = False
+            self._touch()
+            return
+        handler = hierarchy.handler_for(el)
+        if handler is not None:
+            handler()
+        if self.running and self.foreground:
+            self.taps += 1
+            self.draw(TAP_FRAMES, input_event=True)
+
+    def type_text(self, hierarchy, el, text, clear=False):
+        field = hierarchy.inputs.get(hierarchy.keys.get(el))
+        if field is None:
+            raise W3CError(400, "invalid element state", "Cannot set the element text: it is not an editable field")
+        self.fields[field] = "" if clear else self.fields[field] + text
+        self.draw(input_event=True)
+        self._touch()
+
+    # --- rendu ---
+    def render(self):
+        """Hiérarchie de l'écran courant (mise en cache tant que l'état ne change pas)."""
+        loading = self.running and self.foreground and time.monotonic() < self.ready_at
+        cache_key = (self.version, loading)
+        if self._cache is not None and self._cache[0] == cache_key:
+            return self._cache[1]
+        width, height = self.size
+        rotation = 1 if self.orientation == "LANDSCAPE" else 0
+        if not (self.running and self.foreground):
+            hierarchy = Hierarchy(width, height, package=LAUNCHER_PACKAGE, rotation=rotation)
+            frame = hierarchy.add(hierarchy.root, FRAME, (0, 0, width, height), key="launcher")
+            hierarchy.add(frame, TEXT, (width * 0.4, height * 0.4, width * 0.6, height * 0.45),
+                          key="launcher/swaglabs", text="Swag Labs", desc="Swag Labs", on_click=self.activate)
+        else:
+            hierarchy = Hierarchy(width, height, rotation=rotation)
+            frame = hierarchy.add(hierarchy.root, FRAME, (0, 0, width, height), key="app")
+            if not loading:
+                content = hierarchy.add(frame, GROUP, (0, 0, width, height), key="content")
+                if self.sort_open:
+                    self._render_sort_modal(hierarchy, content, width, height)
+                else:
+                    getattr(self, f"_render_{self.screen}")(hierarchy, content, width, height)
+                    if self.menu_open:
+                        self._render_menu(hierarchy, content, width, height)
+        self._cache = (cache_key, hierarchy)
+        return hierarchy
+
+    def _header(self, h, parent, width, height):
+        """Barre du haut (menu, logo, panier) ; retourne l'ordonnée de son bas."""
+        top, bottom = height * 0.03, height * 0.10
+        bar = h.add(parent, GROUP, (0, top, width, bottom), key="header")
+        menu = h.add(bar, GROUP, (0, top, width * 0.15, bottom), key="header/menu", desc="test-Menu", on_click=self.open_menu)
+        wrap = h.add(menu, GROUP, inset((0, top, width * 0.15, bottom), 0.2, 0.2, 0.8, 0.8))
+        h.add(wrap, IMAGE, inset((0, top, width * 0.15, bottom), 0.25, 0.25, 0.75, 0.75))
+        h.add(bar, IMAGE, (width * 0.3, top, width * 0.7, bottom), key="header/logo")
+        cart_rect = (width * 0.85, top, width, bottom)
+        cart = h.add(bar, GROUP, cart_rect, key="header/cart", desc="test-Cart", on_click=lambda: self.go("cart"))
+        wrap = h.add(cart, GROUP, inset(cart_rect, 0.1, 0.1, 0.9, 0.9))
+        h.add(wrap, IMAGE, inset(cart_rect, 0.2, 0.2, 0.8, 0.8))
+        if self.cart:
+            h.add(wrap, TEXT, inset(cart_rect, 0.6, 0.1, 0.9, 0.4), text=str(len(self.cart)))
+        return bottom
+
+    def _title(self, h, parent, width, top, height, text):
+        bottom = top + height * 0.06
+        bar = h.add(parent, GROUP, (0, top, width, bottom), key=f"title/{self.screen}")
+        h.add(bar, TEXT, (width * 0.05, top, width * 0.6, bottom), text=text)
+        return bar, bottom
+
+    def _column(self, h, parent, rect, desc):
+        offset = self.offsets.get(self.screen, 0)
+        view = h.add(parent, SCROLL, rect, key=f"scroll/{self.screen}", desc=desc, scrollable=True)
+        return Column(h.add(view, GROUP, rect, key=f"scroll/{self.screen}/content"), rect, offset)
+
+    def _button(self, h, parent, rect, key, label, on_click, desc=None):
+        btn = h.add(parent, GROUP, rect, key=key, desc=desc or f"test-{label}", on_click=on_click)
+        h.add(btn, TEXT, inset(rect, 0.1, 0.2, 0.9, 0.8), text=label)
+        return btn
+
+    def _field(self, h, parent, rect, field, hint, password=False):
+        value = self.fields[field]
+        text = ("•" * len(value) if password else value) if value else hint
+        h.add(parent, EDIT, rect, key=f"input/{field}", text=text, desc=f"test-{hint}",
+              password=password, field=field)
+
+    def _error(self, h, parent, rect):
+        box = h.add(parent, GROUP, rect, key="error", desc="test-Error message")
+        h.add(box, TEXT, inset(rect, 0.05, 0.1, 0.95, 0.9), text=self.error)
+
+    def _render_login(self, h, parent, width, height):
+        top = height * 0.03
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-Login")
+            h.add(col.view, IMAGE, inset(col.row(height * 0.2), 0.2, 0.1, 0.8, 0.9), key="login/logo")
+            self._field(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "username", "Username")
+            self._field(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "password", "Password", password=True)
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "login/submit", "LOGIN", self.login)
+            if self.error:
+                self._error(h, col.view, inset(col.row(height * 0.07), 0.05, 0.1, 0.95, 0.9))
+            h.add(col.view, TEXT, col.row(height * 0.08), key="login/hint",
+                  text="The currently accepted usernames for this application are (tap to autofill):")
+            for username in USERS:
+                self._button(h, col.view, inset(col.row(height * 0.05), 0.05, 0, 0.6, 1), f"login/user/{username}",
+                             username, lambda u=username: self.autofill(u))
+            h.add(col.view, TEXT, col.row(height * 0.05), key="login/password-hint", text="And the password for all users is:")
+            self._button(h, col.view, inset(col.row(height * 0.05), 0.05, 0, 0.6, 1), "login/password", PASSWORD,
+                         lambda: self.autofill(self.fields["username"] or "standard_user"))
+            h.max_scroll = col.max_scroll()
+
+    def _sorted_products(self):
+        key, reverse = SORT_OPTIONS[self.sort]
+        return sorted(range(len(PRODUCTS)), key=key, reverse=reverse)
+
+    def _product_tile(self, h, parent, rect, pid):
+        name, price, _ = PRODUCTS[pid]
+        item = h.add(parent, GROUP, rect, key=f"item/{pid}", desc="test-Item",
+                     on_click=lambda: self.go("detail", detail=pid))
+        h.add(item, IMAGE, inset(rect, 0.05, 0.03, 0.95, 0.55), key=f"item/{pid}/image")
+        h.add(item, TEXT, inset(rect, 0.05, 0.57, 0.95, 0.67), key=f"item/{pid}/title", text=name, desc="test-Item title")
+        h.add(item, TEXT, inset(rect, 0.05, 0.69, 0.6, 0.77), key=f"item/{pid}/price", text=f"${price:.2f}", desc="test-Price")
+        in_cart = pid in self.cart
+        self._button(h, item, inset(rect, 0.05, 0.80, 0.95, 0.95), f"item/{pid}/{'remove' if in_cart else 'add'}",
+                     "REMOVE" if in_cart else "ADD TO CART", lambda: self.toggle_cart(pid))
+
+    def _render_products(self, h, parent, width, height):
+        top = self._header(h, parent, width, height)
+        bar, top = self._title(h, parent, width, top, height, "PRODUCTS")
+        toggle_rect = (width * 0.65, top - height * 0.06, width * 0.8, top)
+        toggle = h.add(bar, GROUP, toggle_rect, key="products/toggle", desc="test-Toggle", on_click=self.toggle_grid)
+        h.add(toggle, IMAGE, inset(toggle_rect, 0.2, 0.2, 0.8, 0.8))
+        sort_rect = (width * 0.82, top - height * 0.06, width * 0.97, top)
+        sort = h.add(bar, GROUP, sort_rect, key="products/sort", desc="test-Modal Selector Button", on_click=self.open_sort)
+        wrap = h.add(sort, GROUP, inset(sort_rect, 0.1, 0.1, 0.9, 0.9))
+        inner = h.add(wrap, GROUP, inset(sort_rect, 0.15, 0.15, 0.85, 0.85))
+        h.add(inner, IMAGE, inset(sort_rect, 0.2, 0.2, 0.8, 0.8))
+
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-PRODUCTS")
+            columns = 2 if self.grid else 1
+            row_height = min(width * 0.85, (height - top) * 0.55) if self.grid else (height - top) * 0.3
+            products = self._sorted_products()
+            for start in range(0, len(products), columns):
+                row = col.row(row_height)
+                for offset, pid in enumerate(products[start:start + columns]):
+                    self._product_tile(h, col.view, inset(row, offset / columns, 0, (offset + 1) / columns, 1), pid)
+            h.add(col.view, TEXT, col.row(height * 0.08), key="products/footer",
+                  text="© 2025 Sauce Labs. All Rights Reserved.")
+            h.max_scroll = col.max_scroll()
+
+    def _render_detail(self, h, parent, width, height):
+        pid = self.detail or 0
+        name, price, description = PRODUCTS[pid]
+        top = self._header(h, parent, width, height)
+        back_rect = (0, top, width, top + height * 0.06)
+        self._button(h, parent, inset(back_rect, 0.03, 0.1, 0.5, 0.9), "detail/back", "BACK TO PRODUCTS", self.back)
+        top = back_rect[3]
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-Inventory item page")
+            h.add(col.view, IMAGE, inset(col.row(height * 0.4), 0.1, 0.05, 0.9, 0.95), key=f"detail/{pid}/image")
+            desc_rect = col.row(height * 0.15)
+            box = h.add(col.view, GROUP, desc_rect, key=f"detail/{pid}/description", desc="test-Description")
+            h.add(box, TEXT, inset(desc_rect, 0.05, 0, 0.95, 0.3), text=name)
+            h.add(box, TEXT, inset(desc_rect, 0.05, 0.35, 0.95, 1), text=description)
+            h.add(col.view, TEXT, inset(col.row(height * 0.06), 0.05, 0, 0.5, 1), key=f"detail/{pid}/price",
+                  text=f"${price:.2f}", desc="test-Price")
+            in_cart = pid in self.cart
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9),
+                         f"detail/{pid}/{'remove' if in_cart else 'add'}", "REMOVE" if in_cart else "ADD TO CART",
+                         lambda: self.toggle_cart(pid))
+            h.max_scroll = col.max_scroll()
+
+    def _cart_rows(self, h, col, height, removable):
+        for pid in self.cart:
+            name, price, description = PRODUCTS[pid]
+            rect = col.row(height * 0.2)
+            item = h.add(col.view, GROUP, rect, key=f"cart/{pid}", desc="test-Item")
+            amount = h.add(item, GROUP, inset(rect, 0.02, 0.05, 0.12, 0.3), desc="test-Amount")
+            h.add(amount, TEXT, inset(rect, 0.04, 0.08, 0.1, 0.27), text="1")
+            box = h.add(item, GROUP, inset(rect, 0.15, 0.05, 0.95, 0.6), desc="test-Description")
+            h.add(box, TEXT, inset(rect, 0.15, 0.05, 0.95, 0.2), text=name)
+            h.add(box, TEXT, inset(rect, 0.15, 0.22, 0.95, 0.6), text=description)
+            h.add(item, TEXT, inset(rect, 0.15, 0.62, 0.5, 0.75), text=f"${price:.2f}", desc="test-Price")
+            if removable:
+                self._button(h, item, inset(rect, 0.5, 0.78, 0.95, 0.95), f"cart/{pid}/remove", "REMOVE",
+                             lambda p=pid: self.toggle_cart(p))
+
+    def _render_cart(self, h, parent, width, height):
+        top = self._header(h, parent, width, height)
+        _, top = self._title(h, parent, width, top, height, "YOUR CART")
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-Cart Content")
+            labels = col.row(height * 0.04)
+            h.add(col.view, TEXT, inset(labels, 0.02, 0, 0.15, 1), text="QTY")
+            h.add(col.view, TEXT, inset(labels, 0.15, 0, 0.6, 1), text="DESCRIPTION")
+            self._cart_rows(h, col, height, removable=True)
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "cart/continue",
+                         "CONTINUE SHOPPING", self.home)
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "cart/checkout",
+                         "CHECKOUT", lambda: self.go("checkout_info"))
+            h.max_scroll = col.max_scroll()
+
+    def _render_checkout_info(self, h, parent, width, height):
+        top = self._header(h, parent, width, height)
+        _, top = self._title(h, parent, width, top, height, "CHECKOUT: INFORMATION")
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-Checkout: Your Info")
+            for field, hint in (("first_name", "First Name"), ("last_name", "Last Name"), ("postal_code", "Zip/Postal Code")):
+                self._field(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), field, hint)
+            if self.error:
+                self._error(h, col.view, inset(col.row(height * 0.07), 0.05, 0.1, 0.95, 0.9))
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "checkout_info/cancel",
+                         "CANCEL", self.home)
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "checkout_info/continue",
+                         "CONTINUE", self.continue_checkout)
+            h.max_scroll = col.max_scroll()
+
+    def _render_checkout_overview(self, h, parent, width, height):
+        top = self._header(h, parent, width, height)
+        _, top = self._title(h, parent, width, top, height, "CHECKOUT: OVERVIEW")
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-CHECKOUT: OVERVIEW")
+            self._cart_rows(h, col, height, removable=False)
+            item_total = sum(PRODUCTS[pid][1] for pid in self.cart)
+            tax = round(item_total * 0.08, 2)
+            for text in ("Payment Information:", "SauceCard #31337", "Shipping Information:",
+                         "FREE PONY EXPRESS DELIVERY!", f"Item total: ${item_total:.2f}", f"Tax: ${tax:.2f}",
+                         f"Total: ${item_total + tax:.2f}"):
+                h.add(col.view, TEXT, inset(col.row(height * 0.035), 0.05, 0, 0.95, 1), text=text)
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "checkout_overview/cancel",
+                         "CANCEL", self.home)
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "checkout_overview/finish",
+                         "FINISH", self.finish)
+            h.max_scroll = col.max_scroll()
+
+    def _render_complete(self, h, parent, width, height):
+        top = self._header(h, parent, width, height)
+        _, top = self._title(h, parent, width, top, height, "CHECKOUT: COMPLETE!")
+        with h.clip((0, top, width, height)):
+            col = self._column(h, parent, (0, top, width, height), "test-CHECKOUT: COMPLETE!")
+            h.add(col.view, TEXT, inset(col.row(height * 0.06), 0.05, 0, 0.95, 1), text="THANK YOU FOR YOU ORDER")
+            h.add(col.view, TEXT, inset(col.row(height * 0.1), 0.05, 0, 0.95, 1),
+                  text="Your order has been dispatched, and will arrive just as fast as the pony can get there!")
+            h.add(col.view, IMAGE, inset(col.row(height * 0.25), 0.2, 0, 0.8, 1), key="complete/pony")
+            self._button(h, col.view, inset(col.row(height * 0.08), 0.05, 0.1, 0.95, 0.9), "complete/home",
+                         "BACK HOME", self.home)
+            h.max_scroll = col.max_scroll()
+
+    def _render_menu(self, h, parent, width, height):
+        rect = (0, 0, width * 0.8, height)
+        drawer = h.add(parent, GROUP, rect, key="menu")
+        close_rect = (width * 0.65, height * 0.03, width * 0.78, height * 0.09)
+        close = h.add(drawer, GROUP, close_rect, key="menu/close", desc="test-Close", on_click=self.back)
+        h.add(close, IMAGE, inset(close_rect, 0.2, 0.2, 0.8, 0.8))
+        y = height * 0.12
+        for label in MENU_ITEMS:
+            item_rect = (width * 0.05, y, width * 0.75, y + height * 0.06)
+            self._button(h, drawer, item_rect, f"menu/{label.lower().replace(' ', '_')}", label,
+                         lambda l=label: self.menu_action(l))
+            y += height * 0.07
+
+    def _render_sort_modal(self, h, parent, width, height):
+        rect = (width * 0.05, height * 0.5, width * 0.95, height * 0.95)
+        modal = h.add(parent, GROUP, rect, key="sort")
+        h.add(modal, TEXT, inset(rect, 0.05, 0, 0.95, 0.12), text="Sort items by:")
+        y = 0.14
+        for option in list(SORT_OPTIONS) + ["Cancel"]:
+            self._button(h, modal, inset(rect, 0.05, y, 0.95, y + 0.13), f"sort/{option}", option,
+                         lambda o=option: self.choose_sort(o), desc="")
+            y += 0.16
+
+
+# --- Sessions et commandes ----------------------------------------------------
+
+class FakeSession:
+    def __init__(self, capabilities, transition_delay=0.0, jank_rate=0.0, leak_kb=0):
+        self.id = str(uuid.uuid4())
+        self.capabilities = capabilities
+        size = SCREEN_SIZES.get(capabilities.get("deviceName"), DEFAULT_SCREEN_SIZE)
+        self.app = SwagLabsApp(*size, transition_delay=transition_delay, jank_rate=jank_rate, leak_kb=leak_kb)
+        self.lock = threading.Lock()
+
+    # --- éléments ---
+    def resolve(self, eid):
+        hierarchy = self.app.render()
+        el = hierarchy.elements.get(eid)
+        if el is None:
+            raise stale_element(eid)
+        return hierarchy, el
+
+    def find(self, using, value, scope=None):
+        hierarchy = self.app.render()
+        root = hierarchy.root
+        if scope is not None:
+            hierarchy, root = self.resolve(scope)
+        prefix = "." if scope is not None else ""
+        try:
+            if using == "accessibility id":
+                found = root.xpath(f"{prefix}//*[@content-desc=$v]", v=value)
+            elif using == "id":
+                found = root.xpath(f"{prefix}//*[@resource-id=$v or substring-after(@resource-id, ':id/')=$v]", v=value)
+            elif using == "class name":
+                found = root.xpath(f"{prefix}//*[@class=$v]", v=value)
+            elif using == "xpath":
+                found = root.xpath(value)
+            elif using == UIAUTOMATOR:
+                hierarchy, found = self.ui_automator(value, root if scope is not None else None)
+            else:
+                raise W3CError(400, "invalid selector", f"Locator Strategy '{using}' is not supported for this session")
+        except etree.XPathError as e:
+            raise W3CError(400, "invalid selector", f"Invalid XPath expression '{value}': {e}")
+        if not isinstance(found, list):
+            found = []
+        ids = [element_id(hierarchy.keys[el]) for el in found if isinstance(el, etree._Element) and el in hierarchy.keys]
+        return [{ELEMENT_KEY: eid, "ELEMENT": eid} for eid in ids]
+
+    def ui_automator(self, value, scope=None):
+        """Résout un sélecteur `-android uiautomator` ; retourne (hiérarchie, noeuds).
+
+        Plusieurs instructions séparées par `;` : union de leurs résultats, dans l'ordre des
+        instructions et sans doublon.
+        """
+        statements = UiSelectorParser(value).parse_statements()
+        if len(statements) == 1:
+            return self.ui_statement(statements[0], scope)
+        hierarchy, found = self.app.render(), []
+        for statement in statements:
+            hierarchy, nodes = self.ui_statement(statement, scope)
+            found += [node for node in nodes if node not in found]
+        return hierarchy, found
+
+    def ui_statement(self, selector, scope=None):
+        hierarchy = self.app.render()
+        if selector["type"] == "UiSelector":
+            return hierarchy, ui_select(scope if scope is not None else hierarchy.root, selector)
+        if not selector["args"]:
+            raise W3CError(400, "invalid selector", "UiScrollable needs a UiSelector argument")
+        container, target, max_swipes, horizontal = selector["args"][0], None, 30, False
+        for name, args in selector["calls"]:
+            if name == "scrollIntoView":
+                target = args[0]
+            elif name == "scrollTextIntoView":
+                target = {"type": "UiSelector", "args": [], "calls": [("text", args)]}
+            elif name == "setMaxSearchSwipes":
+                max_swipes = int(args[0])
+            elif name in ("setAsHorizontalList", "setAsVerticalList"):
+                horizontal = name == "setAsHorizontalList"
+            else:
+                raise W3CError(400, "invalid selector", f"UiScrollable.{name}() is not supported")
+        if target is None:
+            return hierarchy, ui_select(hierarchy.root, container)
+        return self.scroll_into_view(container, target, max_swipes, horizontal)
+
+    def scroll_into_view(self, container, target, max_swipes, horizontal):
+        """UiScrollable.scrollIntoView : cible déjà visible, sinon retour au début puis défilement vers l'avant."""
+        app = self.app
+        hierarchy = app.render()
+        found = ui_select(hierarchy.root, target)
+        scrollables = ui_select(hierarchy.root, container)
+        if found or not scrollables or horizontal:
+            # l'app n'a pas de liste horizontale
+            return hierarchy, found
+        _, y1, _, y2 = parse_bounds(scrollables[0].get("bounds"))
+        swipes = 0
+        if app.scroll(-app.offsets.get(app.screen, 0)):
+            hierarchy = app.render()
+            found = ui_select(hierarchy.root, target)
+        while not found and swipes < max_swipes and app.scroll((y2 - y1) * 0.8):
+            swipes += 1
+            hierarchy = app.render()
+            found = ui_select(hierarchy.root, target)
+        return hierarchy, found
+
+    def attribute(self, eid, name):
+        _, el = self.resolve(eid)
+        aliases = {"contentDescription": "content-desc", "content-desc": "content-desc", "name": "content-desc",
+                   "resourceId": "resource-id", "resource-id": "resource-id", "className": "class"}
+        return el.get(aliases.get(name, name))
+
+    def rect(self, eid):
+        _, el = self.resolve(eid)
+        x1, y1, x2, y2 = parse_bounds(el.get("bounds"))
+        return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+
+    def center(self, eid):
+        rect = self.rect(eid)
+        return rect["x"] + rect["width"] // 2, rect["y"] + rect["height"] // 2
+
+    # --- gestes W3C ---
+    def perform_actions(self, sources):
+        gestures = []
+        for source in sources:
+            if source.get("type") != "pointer":
+                continue
+            x = y = 0
+            down = None
+            for action in source.get("actions", []):
+                kind = action.get("type")
+                if kind == "pointerMove":
+                    origin = action.get("origin", "viewport")
+                    dx, dy = int(action.get("x", 0)), int(action.get("y", 0))
+                    if isinstance(origin, dict):
+                        cx, cy = self.center(origin.get(ELEMENT_KEY) or origin.get("ELEMENT"))
+                        x, y = cx + dx, cy + dy
+                    elif origin == "pointer":
+                        x, y = x + dx, y + dy
+                    else:
+                        x, y = dx, dy
+                elif kind == "pointerDown":
+                    down = (x, y)
+                elif kind == "pointerUp" and down is not None:
+                    gestures.append((down, (x, y)))
+                    down = None
+        for start, end in gestures:
+            self.app.gesture(start, end)
+
+    def area(self, params):
+        """Zone visée par un geste `mobile:` (elementId ou left/top/width/height), écran entier sinon."""
+        if params.get("elementId"):
+            rect = self.rect(params["elementId"])
+            return rect["x"], rect["y"], rect["width"], rect["height"]
+        if "width" in params and "height" in params:
+            return params.get("left", 0), params.get("top", 0), params["width"], params["height"]
+        width, height = self.app.size
+        return 0, 0, width, height
+
+    # --- scripts mobile: ---
+    def mobile(self, name, params):
+        app = self.app
+        if name == "shell":
+            return self.shell(params.get("command", ""), [str(a) for a in params.get("args", [])])
+        if name in ("terminateApp", "activateApp", "clearApp", "queryAppState"):
+            package = params.get("appId") or params.get("bundleId")
+            if package != APP_PACKAGE:
+                raise W3CError(500, "unknown error", f"The application '{package}' is not installed on the device")
+            if name == "terminateApp":
+                return app.terminate()
+            if name == "activateApp":
+                return app.activate()
+            if name == "clearApp":
+                return app.clear_data()
+            return app.app_state()
+        if name == "deepLink":
+            return app.open_link(params.get("url", ""))
+        if name in ("swipeGesture", "swipe", "scrollGesture"):
+            left, top, width, height = self.area(params)
+            direction = params.get("direction", "up").lower()
+            distance = float(params.get("percent", 0.75 if name != "scrollGesture" else 1.0))
+            vertical = height * distance
+            if name == "scrollGesture":
+                # scrollGesture parle du contenu : "down" révèle ce qui est en bas
+                moved = app.scroll(vertical if direction == "down" else -vertical if direction == "up" else 0)
+                return moved and app.can_scroll(direction)
+            # swipe parle du doigt : "up" fait défiler le contenu vers le bas
+            app.scroll(vertical if direction == "up" else -vertical if direction == "down" else 0)
+            return None
+        if name == "dragGesture":
+            if params.get("elementId"):
+                start = self.center(params["elementId"])
+            else:
+                start = (int(params.get("startX", 0)), int(params.get("startY", 0)))
+            app.gesture(start, (int(params.get("endX", 0)), int(params.get("endY", 0))))
+            return None
+        if name in ("clickGesture", "doubleClickGesture", "longClickGesture"):
+            if params.get("elementId"):
+                point = self.center(params["elementId"])
+            else:
+                point = (int(params.get("x", 0)), int(params.get("y", 0)))
+            app.gesture(point, point)
+            return None
+        if name == "getDeviceTime":
+            # format moment.js : seul "x" (epoch en ms) est interprété, sinon ISO 8601
+            if params.get("format") == "x":
+                return str(int(time.time() * 1000))
+            return time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        if name == "hideKeyboard":
+            return True
+        if name == "isKeyboardShown":
+            return False
+        if name == "pressKey":
+            if int(params.get("keycode", 0)) == 4:
+                app.back()
+            return None
+        raise W3CError(404, "unknown method", f"Unknown mobile command 'mobile: {name}'")
+
+    def shell(self, command, args):
+        """Quelques commandes shell utiles au framework (le reste renvoie une sortie vide)."""
+        if command == "dumpsys" and args[:1] == ["package"]:
+            return f"Packages:\n  Package [{APP_PACKAGE}]:\n    versionCode=271 minSdk=21 targetSdk=30\n    versionName={APP_VERSION}\n"
+        if command == "dumpsys" and args[:1] == ["gfxinfo"]:
+            if args[1:2] != [APP_PACKAGE] or not self.app.running:
+                return "No process found for: " + " ".join(args[1:2]) + "\n"
+            if args[2:3] == ["reset"]:
+                self.app.reset_frames()
+                return ""
+            return self.app.gfxinfo(framestats=args[2:3] == ["framestats"])
+        if command == "dumpsys" and args[:1] == ["meminfo"]:
+            if args[1:2] != [APP_PACKAGE] or not self.app.running:
+                return "No process found for: " + " ".join(args[1:2]) + "\n"
+            return self.app.meminfo()
+        if command == "pidof":
+            return f"{APP_PID}\n" if args == [APP_PACKAGE] and self.app.running else ""
+        if command == "cat" and args and all(a == "/proc/uptime" or (a.startswith("/proc/") and a.endswith("/stat"))
+                                             for a in args):
+            # fichiers lus dans l'ordre des arguments, comme le vrai cat
+            output = ""
+            for path in args:
+                if path == "/proc/uptime":
+                    uptime = time.monotonic()
+                    output += f"{uptime:.2f} {uptime * 3.5:.2f}\n"
+                else:
+                    output += self._proc_stats([path])
+            return output
+        if command == "am" and args[:1] == ["force-stop"]:
+            if args[1:2] == [APP_PACKAGE]:
+                self.app.terminate()
+            return ""
+        if command == "am" and args[:1] == ["start"]:
+            return self._am_start(args[1:])
+        if command == "input" and args[:1] == ["keyevent"]:
+            if args[1:2] in (["KEYCODE_HOME"], ["3"]):
+                self.app.press_home()
+            elif args[1:2] in (["KEYCODE_BACK"], ["4"]):
+                self.app.back()
+            return ""
+        if command == "logcat" and "-d" in args:
+            return self._logcat_dump(args)
+        if command == "pm" and args[:1] == ["clear"]:
+            if args[1:2] == [APP_PACKAGE]:
+                self.app.clear_data()
+            return "Success\n"
+        return ""
+
+    def _logcat_dump(self, args):
+        """`logcat -d` : copie du buffer filtrée (-s tags, -T depuis, -t dernières lignes), format epoch ou threadtime."""
+        def value(flag):
+            return args[args.index(flag) + 1] if flag in args[:-1] else None
+        tags = {t.split(":")[0] for t in args[args.index("-s") + 1:]} if "-s" in args else None
+        since = float(value("-T")) if value("-T") else None
+        lines = []
+        for entry in list(self.app.logcat):
+            match = LOGCAT_LINE.match(entry["message"])
+            if not match or (tags is not None and match.group("tag") not in tags):
+                continue
+            stamp = entry["timestamp"] / 1000
+            if since is not None and stamp < since:
+                continue
+            if value("-v") != "epoch":
+                lines.append(entry["message"])
+                continue
+            lines.append(f"{stamp:.3f} {match.group('pid')} {match.group('tid')} "
+                         f"{match.group('level')} {match.group('tag')}: {match.group('message')}")
+        if value("-t"):
+            lines = lines[-int(value("-t")):]
+        return "".join(line + "\n" for line in lines)
+
+    def _am_start(self, args):
+        """`am start [-W] [-S] [--activity-clear-task] -n <composant>`, sortie au format d'Android 12."""
+        target = args[args.index("-n") + 1] if "-n" in args[:-1] else None
+        if target not in MAIN_COMPONENTS:
+            return f"Error: Activity class {{{target}}} does not exist.\n"
+        if "-S" in args:
+            self.app.terminate()
+        state, total_ms = self.app.start_activity(clear_task="--activity-clear-task" in args)
+        lines = [f"Starting: Intent {{ cmp={MAIN_ACTIVITY} }}"]
+        if "-W" not in args:
+            return lines[0] + "\n"
+        if total_ms is None:
+            lines += ["Warning: Activity not started, intent has been delivered to currently "
+                      "running top-most instance.", "Status: ok", "LaunchState: UNKNOWN (0)", f"Activity: {MAIN_ACTIVITY}", "WaitTime: 2"]
+        else:
+            lines += ["Status: ok", f"LaunchState: {state}", f"Activity: {MAIN_ACTIVITY}",
+                      f"TotalTime: {total_ms}", f"WaitTime: {total_ms + random.randint(3, 12)}"]
+        return "\n".join(lines + ["Complete"]) + "\n"
+
+    def _proc_stats(self, paths):
+        """`cat /proc/<pid>/stat /proc/<pid>/task/*/stat` (le shell du device développe le *)."""
+        lines = []
+        for path in paths:
+            parts = path.strip("/").split("/")
+            if not self.app.running or parts[1] != str(APP_PID):
+                continue
+            if len(parts) == 3:
+                lines.append(self.app.proc_stat())
+            elif parts[3] == "*":
+                lines += [self.app.proc_stat(tid) for tid, _, _ in APP_THREADS]
+            elif parts[3].isdigit():
+                lines.append(self.app.proc_stat(int(parts[3])))
+        return "".join(line + "\n" for line in lines if line)
+
+
+def _script(session, params):
+    script = params.get("script", "")
+    args = params.get("args") or [{}]
+    match = re.match(r"\s*mobile:\s*(\w+)\s*$", script)
+    if not match:
+        raise W3CError(500, "unsupported operation", "Executing JavaScript is not supported by UiAutomator2 sessions")
+    options = args[0] if args and isinstance(args[0], dict) else {}
+    return session.mobile(match.group(1), options)
+
+
+def _new_session(server, params):
+    caps = {}
+    w3c = params.get("capabilities") or {}
+    first = (w3c.get("firstMatch") or [{}])[0]
+    for name, value in {**w3c.get("alwaysMatch", {}), **first}.items():
+        caps[name.split(":", 1)[-1]] = value
+    session = FakeSession(caps, transition_delay=server.transition_delay, jank_rate=server.jank_rate,
+                          leak_kb=server.leak_kb)
+    if caps.get("udid"):
+        caps.setdefault("deviceUDID", caps["udid"])
+    width, height = session.app.size
+    caps.setdefault("deviceScreenSize", f"{width}x{height}")
+    server.sessions[session.id] = session
+    return {"sessionId": session.id, "capabilities": caps}
+
+
+def _text(session, eid):
+    hierarchy, el = session.resolve(eid)
+    return el.get("text", "")
+
+
+def _send_keys(session, params, eid):
+    hierarchy, el = session.resolve(eid)
+    text = params.get("text")
+    if text is None:
+        text = "".join(params.get("value", []))
+    session.app.type_text(hierarchy, el, text)
+
+
+def _clear(session, eid):
+    hierarchy, el = session.resolve(eid)
+    session.app.type_text(hierarchy, el, "", clear=True)
+
+
+def _click(session, eid):
+    hierarchy, el = session.resolve(eid)
+    session.app.click(hierarchy, el)
+
+
+def _get_log(session, params):
+    """Entrées de log depuis la dernière lecture (comme `driver.get_log(type)`)."""
+    log_type = params.get("type")
+    if log_type == "logcat":
+        entries = list(session.app.logcat)
+        session.app.logcat.clear()
+        return entries
+    if log_type == "server":
+        return []
+    raise W3CError(400, "invalid argument", f"Unsupported log type '{log_type}'")
+
+
+def _press_keycode(session, params):
+    if int(params.get("keycode", 0)) == 4:
+        session.app.back()
+
+
+def _window_rect(session):
+    width, height = session.app.size
+    return {"x": 0, "y": 0, "width": width, "height": height}
+
+
+# (méthode, chemin, nom de la commande, handler(session, params, *groupes)).
+# Les noms reprennent ceux des commandes Selenium/Appium (cf. utils.command_hooks).
+_ROUTES = [
+    ("GET", r"/session/([^/]+)", "getCapabilities", lambda s, p: s.capabilities),
+    ("POST", r"/session/([^/]+)/timeouts", "setTimeouts", lambda s, p: None),
+    ("GET", r"/session/([^/]+)/source", "getPageSource", lambda s, p: s.app.render().source()),
+    ("GET", r"/session/([^/]+)/screenshot", "screenshot", lambda s, p: SCREENSHOT_B64),
+    ("GET", r"/session/([^/]+)/window/rect", "getWindowRect", lambda s, p: _window_rect(s)),
+    ("GET", r"/session/([^/]+)/window/current/size", "getWindowSize", lambda s, p: _window_rect(s)),
+    ("GET", r"/session/([^/]+)/orientation", "getScreenOrientation", lambda s, p: s.app.orientation),
+    ("POST", r"/session/([^/]+)/orientation", "setScreenOrientation", lambda s, p: s.app.set_orientation(p.get("orientation", ""))),
+    ("POST", r"/session/([^/]+)/back", "goBack", lambda s, p: s.app.back()),
+    ("POST", r"/session/([^/]+)/element", "findElement", None),
+    ("POST", r"/session/([^/]+)/elements", "findElements", lambda s, p: s.find(p.get("using"), p.get("value"))),
+    ("POST", r"/session/([^/]+)/element/([^/]+)/element", "findChildElement", None),
+    ("POST", r"/session/([^/]+)/element/([^/]+)/elements", "findChildElements", lambda s, p, e: s.find(p.get("using"), p.get("value"), scope=e)),
+    ("POST", r"/session/([^/]+)/element/([^/]+)/click", "clickElement", lambda s, p, e: _click(s, e)),
+    ("POST", r"/session/([^/]+)/element/([^/]+)/value", "sendKeysToElement", lambda s, p, e: _send_keys(s, p, e)),
+    ("POST", r"/session/([^/]+)/element/([^/]+)/clear", "clearElement", lambda s, p, e: _clear(s, e)),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/text", "getElementText", lambda s, p, e: _text(s, e)),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/displayed", "isElementDisplayed", lambda s, p, e: bool(s.resolve(e))),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/enabled", "isElementEnabled", lambda s, p, e: s.attribute(e, "enabled") == "true"),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/selected", "isElementSelected", lambda s, p, e: s.attribute(e, "selected") == "true"),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/rect", "getElementRect", lambda s, p, e: s.rect(e)),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/name", "getElementTagName", lambda s, p, e: s.attribute(e, "class")),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/attribute/([^/]+)", "getElementAttribute", lambda s, p, e, n: s.attribute(e, n)),
+    ("GET", r"/session/([^/]+)/element/([^/]+)/screenshot", "elementScreenshot", lambda s, p, e: SCREENSHOT_B64),
+    ("POST", r"/session/([^/]+)/se/log", "getLog", _get_log),
+    ("GET", r"/session/([^/]+)/se/log/types", "getAvailableLogTypes", lambda s, p: ["logcat", "server"]),
+    ("POST", r"/session/([^/]+)/actions", "actions", lambda s, p: s.perform_actions(p.get("actions", []))),
+    ("DELETE", r"/session/([^/]+)/actions", "clearActionState", lambda s, p: None),
+    ("POST", r"/session/([^/]+)/execute/sync", "w3cExecuteScript", _script),
+    ("POST", r"/session/([^/]+)/execute/async", "w3cExecuteScriptAsync", _script),
+    ("POST", r"/session/([^/]+)/appium/device/terminate_app", "terminateApp", lambda s, p: s.mobile("terminateApp", p)),
+    ("POST", r"/session/([^/]+)/appium/device/activate_app", "activateApp", lambda s, p: s.mobile("activateApp", p)),
+    ("POST", r"/session/([^/]+)/appium/device/app_state", "queryAppState", lambda s, p: s.mobile("queryAppState", p)),
+    ("POST", r"/session/([^/]+)/appium/device/press_keycode", "pressKeyCode", _press_keycode),
+    ("POST", r"/session/([^/]+)/appium/device/hide_keyboard", "hideKeyboard", lambda s, p: None),
+    ("GET", r"/session/([^/]+)/appium/device/is_keyboard_shown", "isKeyboardShown", lambda s, p: False),
+]
+_ROUTES = [(method, re.compile(pattern + "$"), command, handler) for method, pattern, command, handler in _ROUTES]
+
+
+def _find_one(session, params, scope=None):
+    found = session.find(params.get("using"), params.get("value"), scope=scope)
+    if not found:
+        raise no_such_element(params.get("using"), params.get("value"))
+    return found[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeAppium/1.0"
+    # en-têtes et corps partent en deux écritures : sans ça, Nagle + ACK retardé ajoutent ~40ms par commande
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, value):
+        body = json.dumps({"value": value}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        path = urlparse(self.path).path.rstrip("/")
+        if path.startswith("/wd/hub"):
+            path = path[len("/wd/hub"):]
+        server = self.server
+        start = time.perf_counter()
+        try:
+            params = json.loads(raw) if raw else {}
+            value = self._route(method, path, params)
+            status = 200
+        except W3CError as e:
+            status, value = e.status, {"error": e.error, "message": e.message, "stacktrace": ""}
+        except Exception as e:
+            status, value = 500, {"error": "unknown error", "message": f"{type(e).__name__}: {e}", "stacktrace": ""}
+        self._reply(status, value)
+        if server.verbose:
+            print(f"{method} {path} -> {status} ({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+    def _route(self, method, path, params):
+        server = self.server
+        if method == "GET" and path == "/status":
+            server.count("getStatus")
+            return {"ready": True, "message": "Fake UiAutomator2 server is ready", "build": {"version": "fake"}}
+        if method == "POST" and path == "/session":
+            server.count("newSession")
+            server.pause("newSession")
+            with server.lock:
+                return _new_session(server, params)
+        for route_method, pattern, command, handler in _ROUTES:
+            match = pattern.match(path)
+            if route_method != method or not match:
+                continue
+            session_id, *groups = match.groups()
+            server.count(command)
+            server.pause(command)
+            if command.startswith("find") and (params or {}).get("using") == "xpath" and server.xpath_latency > 0:
+                time.sleep(server.xpath_latency)
+            session = server.sessions.get(session_id)
+            if session is None:
+                raise W3CError(404, "invalid session id", f"A session is either terminated or not started ({session_id})")
+            with session.lock:
+                if command == "findElement":
+                    return _find_one(session, params)
+                if command == "findChildElement":
+                    return _find_one(session, params, scope=groups[0])
+                return handler(session, params, *groups)
+        if method == "DELETE" and re.match(r"/session/[^/]+$", path):
+            server.count("quit")
+            server.sessions.pop(path.rsplit("/", 1)[1], None)
+            return None
+        raise W3CError(404, "unknown command", f"The requested resource could not be found ({method} {path})")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class FakeAppiumServer(ThreadingHTTPServer):
+    """Serveur HTTP du faux Appium ; `start()` le lance dans un thread (tests, benchmarks)."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=4723, latency=0.0, command_latency=None,
+                 transition_delay=0.0, jank_rate=0.0, leak_kb=0, xpath_latency=0.0, verbose=False):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.xpath_latency = xpath_latency
+        self.command_latency = dict(command_latency or {})
+        self.transition_delay = transition_delay
+        self.jank_rate = jank_rate
+        self.leak_kb = leak_kb
+        self.verbose = verbose
+        self.sessions = {}
+        self.commands = {}
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, command):
+        with self.lock:
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+    def pause(self, command):
+        delay = self.command_latency.get(command, self.latency)
+        if delay > 0:
+            time.sleep(delay)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-appium", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def parse_command_latency(values):
+    """["getPageSource=0.2", "findElements=0.05"] -> {"getPageSource": 0.2, ...}"""
+    latency = {}
+    for value in values or []:
+        for part in value.split(","):
+            if not part.strip():
+                continue
+            name, _, seconds = part.partition("=")
+            try:
+                latency[name.strip()] = float(seconds)
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"expected command=seconds, got '{part}'")
+    return latency
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake UiAutomator2 server simulating the Swag Labs app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4723)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay (s) added to every command")
+    parser.add_argument("--command-latency", action="append", default=[], metavar="COMMAND=SECONDS",
+                        help="Per-command delay, e.g. getPageSource=0.2 (repeatable or comma-separated)")
+    parser.add_argument("--xpath-latency", type=float, default=0.0,
+                        help="Extra delay (s) of XPath lookups (hierarchy dump done by UiAutomator2)")
+    parser.add_argument("--transition-delay", type=float, default=0.0,
+                        help="Seconds during which a new screen is still loading (empty hierarchy)")
+    parser.add_argument("--jank-rate", type=float, default=0.0,
+                        help="Fraction of rendered frames that miss their vsync deadline (dumpsys gfxinfo)")
+    parser.add_argument("--leak-kb", type=int, default=0,
+                        help="KB of Java heap retained by every tap (dumpsys meminfo)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = FakeAppiumServer(args.host, args.port, latency=args.latency,
+                              command_latency=parse_command_latency(args.command_latency),
+                              transition_delay=args.transition_delay, jank_rate=args.jank_rate,
+                              leak_kb=args.leak_kb, xpath_latency=args.xpath_latency, verbose=args.verbose)
+    print(f"✓ Fake Appium server listening on {server.url} (latency {args.latency * 1000:.0f}ms, "
+          f"transition {args.transition_delay * 1000:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Verrou de fichier entre les processus pytest qui partagent un cache.
+
+Les workers de run_parallel.py lisent et réécrivent les mêmes caches JSON à la
+racine du projet (.locator_cache.json, .xpath_selectors.json...). Chacun
+enregistre en fin de session : sans verrou, le dernier à écrire efface ce que
+les autres ont appris. `file_lock(path)` prend un flock exclusif sur
+`<path>.lock` ; la sauvegarde relit le fichier, fusionne et réécrit dans la
+section verrouillée.
+
+    with self._lock, file_lock(self.path):
+        on_disk = read_json(self.path)
+        ...  # fusion
+        write_json(self.path, merged)
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    # pas de flock (Windows) : pas d'exclusion entre processus
+    fcntl = None
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Verrou exclusif entre processus sur `path` (fichier `<path>.lock`)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def read_json(path, default=None):
+    """Contenu JSON de `path`, `default` ({} par défaut) s'il est absent ou illisible."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def write_json(path, data):
+    """Écrit `data` dans un fichier temporaire puis le renomme : un lecteur ne voit jamais un JSON tronqué."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+    os.replace(tmp, path)
@@ -0,0 +1,215 @@
+"""
+Fluidité du rendu d'un bloc de gestes (frames, jank), lue dans dumpsys gfxinfo.
+
+Un temps de swipe mesuré depuis l'hôte ne dit rien des frames perdues.
+FrameCollector remet à zéro les statistiques de rendu de l'app
+(`dumpsys gfxinfo <package> reset`) avant le bloc et les lit après
+(`dumpsys gfxinfo <package> framestats`), une fois le rendu terminé : un
+fling ou le relayout d'une rotation dessinent encore après la réponse de la
+commande, on attend donc que le nombre de frames ne bouge plus.
+
+- le résumé couvre toutes les frames depuis le reset : nombre de frames,
+  frames "janky" (hors délai), percentiles 50/90/95/99 et histogramme des
+  temps de frame (buckets de 1 ms jusqu'à 32 ms), compteurs par cause ;
+- PROFILEDATA détaille les 120 dernières frames : temps exact de chacune
+  (FrameCompleted - IntendedVsync), d'où la frame la plus lente. Les frames
+  avec Flags non nul (premier rendu d'une fenêtre, etc.) sont ignorées,
+  comme le recommande la documentation Android.
+
+    with frame_metrics("scroll_burst") as frames:     # fixture, voir conftest.py
+        gestures.perform(repeat=25)
+    frames.assert_smooth()          # seuils de config.FRAME_*, surchargeables par argument
+
+Sans accès shell au device, le bloc s'exécute quand même et les métriques
+valent None : les assertions de fluidité sont alors ignorées.
+"""
+
+import re
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from utils.device import APP_PACKAGE, adb_shell
+from utils.device_timing import parse_framestats
+from utils.waits import Condition, wait_until
+
+
+# budget d'une frame à 60 Hz, quand framestats ne donne pas FrameDeadline
+FRAME_BUDGET_MS = 1000 / 60
+PERCENTILES = (50, 90, 95, 99)
+# attente max (s) de la fin du rendu avant de lire les frames
+SETTLE_TIMEOUT = 3
+
+SUMMARY_COUNTERS = {
+    "Total frames rendered": "frames",
+    "Janky frames": "janky_frames",
+    "Number Missed Vsync": "missed_vsync",
+    "Number High input latency": "high_input_latency",
+    "Number Slow UI thread": "slow_ui_thread",
+    "Number Slow bitmap uploads": "slow_bitmap_uploads",
+    "Number Slow issue draw commands": "slow_draw_commands",
+    "Number Frame deadline missed": "deadline_missed",
+}
+COUNTER_LINE = re.compile(r"^\s*(" + "|".join(re.escape(k) for k in SUMMARY_COUNTERS) + r"): (\d+)", re.M)
+# "90th percentile: 12ms" (pas les "90th gpu percentile" d'Android 10+)
+PERCENTILE_LINE = re.compile(r"^\s*(\d+)th percentile: (\d+)ms", re.M)
+HISTOGRAM_LINE = re.compile(r"^\s*HISTOGRAM: (.*)$", re.M)
+
+
+def parse_summary(output):
+    """Résumé de gfxinfo : compteurs, percentiles {q: ms} et histogramme {ms: frames}.
+
+    Seule la première occurrence de chaque ligne compte : c'est le total du process,
+    les suivantes détaillent les fenêtres.
+    """
+    summary = {"percentiles": {}, "histogram": {}}
+    for label, value in COUNTER_LINE.findall(output):
+        summary.setdefault(SUMMARY_COUNTERS[label], int(value))
+    for q, ms in PERCENTILE_LINE.findall(output):
+        summary["percentiles"].setdefault(int(q), int(ms))
+    match = HISTOGRAM_LINE.search(output)
+    if match:
+        for bucket in match.group(1).split():
+            ms, _, count = bucket.partition("ms=")
+            if ms.isdigit() and count.isdigit():
+                summary["histogram"][int(ms)] = int(count)
+    return summary
+
+
+def histogram_percentile(histogram, q):
+    """Percentile `q` d'un histogramme {ms: frames} : borne du bucket qui l'atteint (comme gfxinfo)."""
+    total = sum(histogram.values())
+    if not total:
+        return 0
+    threshold = total * q / 100
+    seen = 0
+    for ms in sorted(histogram):
+        seen += histogram[ms]
+        if seen >= threshold:
+            return ms
+    return max(histogram)
+
+
+def frame_times(frames):
+    """[(temps de frame en ms, janky)] des frames sans Flags de PROFILEDATA."""
+    times = []
+    for frame in frames:
+        if frame.get("Flags", 0) != 0 or not frame.get("FrameCompleted"):
+            continue
+        ms = (frame["FrameCompleted"] - frame["IntendedVsync"]) / 1e6
+        deadline = frame.get("FrameDeadline")
+        budget = (deadline - frame["IntendedVsync"]) / 1e6 if deadline else FRAME_BUDGET_MS
+        times.append((ms, ms > budget))
+    return times
+
+
+def frame_metrics(output, name="frames", duration_s=None):
+    """Métriques de fluidité d'une sortie `dumpsys gfxinfo <package> framestats`."""
+    summary = parse_summary(output)
+    times = frame_times(parse_framestats(output))
+    histogram = summary["histogram"]
+    total = summary.get("frames", len(times))
+    janky = summary.get("janky_frames", sum(1 for _, slow in times if slow))
+    metrics = {
+        "name": name,
+        "frames": total,
+        "janky_frames": janky,
+        "janky_percent": janky * 100 / total if total else 0.0,
+        "max_ms": max((ms for ms, _ in times), default=0.0),
+        "histogram": {ms: n for ms, n in sorted(histogram.items()) if n},
+        "fps": total / duration_s if duration_s else None,
+    }
+    for q in PERCENTILES:
+        metrics[f"p{q}"] = summary["percentiles"].get(q, histogram_percentile(histogram, q))
+    for key in ("missed_vsync", "high_input_latency", "slow_ui_thread", "deadline_missed"):
+        metrics[key] = summary.get(key, 0)
+    return metrics
+
+
+def rendering_idle(package=APP_PACKAGE):
+    """Condition : le nombre de frames rendues n'a pas bougé depuis l'évaluation précédente."""
+    counts = []
+
+    def check(driver):
+        counts.append(parse_summary(adb_shell(driver, "dumpsys", "gfxinfo", package)).get("frames"))
+        return len(counts) > 1 and counts[-1] == counts[-2]
+    return Condition("rendering idle", check)
+
+
+def describe_metrics(metrics):
+    """Une ligne : frames, jank, percentiles et frame la plus lente."""
+    return (f"{metrics['name']}: {metrics['frames']} frames, {metrics['janky_frames']} janky "
+            f"({metrics['janky_percent']:.1f}%), p50 {metrics['p50']}ms, p90 {metrics['p90']}ms, "
+            f"p95 {metrics['p95']}ms, p99 {metrics['p99']}ms, max {metrics['max_ms']:.1f}ms")
+
+
+class FrameCollector:
+    """Statistiques de rendu de l'app sur un bloc `with` ; résultat dans `metrics` (None sans accès shell).
+
+    Les seuils donnés ici sont ceux d'`assert_smooth()` appelé sans argument (None = pas de seuil).
+    """
+
+    def __init__(self, driver, name="frames", package=APP_PACKAGE, max_janky_percent=None,
+                 max_p95_ms=None, max_p99_ms=None):
+        self.driver = driver
+        self.name = name
+        self.package = package
+        self.thresholds = {"max_janky_percent": max_janky_percent, "max_p95_ms": max_p95_ms,
+                           "max_p99_ms": max_p99_ms}
+        self.metrics = None
+        self.error = None
+        self._start = None
+
+    def __enter__(self):
+        try:
+            adb_shell(self.driver, "dumpsys", "gfxinfo", self.package, "reset")
+        except RuntimeError as e:
+            self.error = e
+            print(f"⚠ Frame metrics unavailable for '{self.name}' ({e})")
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self.error is None:
+            self.collect()
+        return False
+
+    def collect(self, settle_timeout=SETTLE_TIMEOUT):
+        """Attend la fin du rendu, lit les frames rendues depuis le début du bloc et calcule les métriques."""
+        duration = time.monotonic() - self._start
+        try:
+            try:
+                wait_until(self.driver, rendering_idle(self.package), timeout=settle_timeout)
+            except TimeoutException:
+                # animation continue : on mesure ce qui a été rendu jusque-là
+                pass
+            output = adb_shell(self.driver, "dumpsys", "gfxinfo", self.package, "framestats")
+        except RuntimeError as e:
+            self.error = e
+            print(f"⚠ Frame metrics unavailable for '{self.name}' ({e})")
+            return None
+        self.metrics = frame_metrics(output, self.name, duration)
+        return self.metrics
+
+    def assert_smooth(self, **thresholds):
+        """Échoue si le bloc a trop de frames janky ou des percentiles de frame trop hauts.
+
+        Arguments : max_janky_percent, max_p95_ms, max_p99_ms (défaut : ceux du constructeur).
+        """
+        if self.metrics is None:
+            return
+        unknown = set(thresholds) - set(self.thresholds)
+        if unknown:
+            raise TypeError(f"Unknown thresholds {sorted(unknown)} (expected {sorted(self.thresholds)})")
+        limits = {**self.thresholds, **thresholds}
+        max_janky_percent, max_p95_ms, max_p99_ms = (
+            limits["max_janky_percent"], limits["max_p95_ms"], limits["max_p99_ms"])
+        m = self.metrics
+        problems = []
+        if max_janky_percent is not None and m["janky_percent"] > max_janky_percent:
+            problems.append(f"{m['janky_percent']:.1f}% janky frames > {max_janky_percent}%")
+        if max_p95_ms is not None and m["p95"] > max_p95_ms:
+            problems.append(f"p95 frame time {m['p95']}ms > {max_p95_ms}ms")
+        if max_p99_ms is not None and m["p99"] > max_p99_ms:
+            problems.append(f"p99 frame time {m['p99']}ms > {max_p99_ms}ms")
+        assert not problems, f"{self.name}: rendering not smooth ({', '.join(problems)}; {describe_metrics(m)})"
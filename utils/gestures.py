@@ -0,0 +1,140 @@
+"""
+Gestes tactiles compilés en une seule requête W3C actions.
+
+`driver.swipe()` ou `mobile: dragGesture` coûtent un aller-retour HTTP par
+geste, et les tests ajoutaient une pause fixe après chacun. GestureBuilder
+enchaîne taps, appuis longs, swipes, drags et pauses dans la séquence
+d'actions d'un seul doigt, envoyée en une requête ; le serveur la joue d'un
+bout à l'autre et ne répond qu'à la fin, il n'y a donc rien à attendre.
+
+Les cibles sont des points (x, y) de l'écran, des WebElement (leur centre) ou
+des locators (by, value). Les coordonnées sont résolues à la construction :
+chaque élément coûte un seul getElementRect (mis en cache dans le builder) et
+la séquence compilée ne contient plus que des coordonnées d'écran, ce qui
+permet de la rejouer N fois sans nouvelle requête.
+
+    gestures = GestureBuilder(driver)
+    gestures.swipe((540, 1600), (540, 600)).pause(50).swipe((540, 600), (540, 1600))
+    gestures.perform(repeat=25)       # 50 swipes, une requête
+
+    GestureBuilder(driver).drag(product, cart).perform()
+"""
+
+import time
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+
+from utils.scrolling import viewport
+
+
+# un pointerDown + pointerUp immédiat n'est pas toujours vu comme un tap
+TAP_HOLD_MS = 50
+LONG_PRESS_MS = 1000
+SWIPE_MS = 300
+# appui avant de déplacer : laisse à l'app le temps de « saisir » l'élément
+DRAG_HOLD_MS = 400
+DRAG_MS = 800
+
+
+class GestureBuilder:
+    """Séquence de gestes d'un doigt (pointer "touch"), jouée en une requête W3C actions."""
+
+    def __init__(self, driver, pointer="finger"):
+        self.driver = driver
+        self.pointer = pointer
+        self._actions = []
+        self._rects = {}
+
+    # --- résolution des cibles ---
+    def _rect(self, element):
+        rect = self._rects.get(element.id)
+        if rect is None:
+            rect = element.rect
+            self._rects[element.id] = rect
+        return rect
+
+    def point(self, target, fx=0.5, fy=0.5):
+        """Coordonnées d'écran de `target` : (x, y), WebElement ou locator ; pour un élément,
+        point à (fx, fy) de sa largeur / hauteur (le centre par défaut)."""
+        if isinstance(target, WebElement):
+            element = target
+        elif isinstance(target, tuple) and len(target) == 2 and isinstance(target[0], str):
+            element = self.driver.find_element(*target)
+        else:
+            x, y = target
+            return int(x), int(y)
+        rect = self._rect(element)
+        return int(rect["x"] + rect["width"] * fx), int(rect["y"] + rect["height"] * fy)
+
+    def screen_point(self, fx, fy):
+        """Point à (fx, fy) de l'écran (taille mise en cache par session, voir utils/scrolling.py)."""
+        left, top, width, height = viewport(self.driver)
+        return int(left + width * fx), int(top + height * fy)
+
+    # --- primitives ---
+    def _move(self, point, duration_ms=0):
+        x, y = point
+        self._actions.append({"type": "pointerMove", "duration": int(duration_ms),
+                              "x": x, "y": y, "origin": "viewport"})
+
+    def _down(self):
+        self._actions.append({"type": "pointerDown", "button": 0})
+
+    def _up(self):
+        self._actions.append({"type": "pointerUp", "button": 0})
+
+    def pause(self, ms):
+        if ms > 0:
+            self._actions.append({"type": "pause", "duration": int(ms)})
+        return self
+
+    # --- gestes ---
+    def tap(self, target, hold_ms=TAP_HOLD_MS):
+        self._move(self.point(target))
+        self._down()
+        self.pause(hold_ms)
+        self._up()
+        return self
+
+    def long_press(self, target, hold_ms=LONG_PRESS_MS):
+        return self.tap(target, hold_ms=hold_ms)
+
+    def swipe(self, start, end, duration_ms=SWIPE_MS):
+        """Glisse le doigt de `start` à `end` (directions du doigt, comme driver.swipe)."""
+        self._move(self.point(start))
+        self._down()
+        self._move(self.point(end), duration_ms)
+        self._up()
+        return self
+
+    def drag(self, source, target, duration_ms=DRAG_MS, hold_ms=DRAG_HOLD_MS):
+        """Appuie sur `source`, attend `hold_ms`, glisse jusqu'à `target` et relâche."""
+        self._move(self.point(source))
+        self._down()
+        self.pause(hold_ms)
+        self._move(self.point(target), duration_ms)
+        self._up()
+        return self
+
+    # --- exécution ---
+    def compile(self, repeat=1):
+        """Payload de la commande W3C actions, séquence répétée `repeat` fois."""
+        return {"actions": [{
+            "type": "pointer",
+            "id": self.pointer,
+            "parameters": {"pointerType": "touch"},
+            "actions": self._actions * repeat,
+        }]}
+
+    def duration_ms(self, repeat=1):
+        """Durée prévue des gestes (pauses et déplacements), hors latence du serveur."""
+        return sum(a.get("duration", 0) for a in self._actions) * repeat
+
+    def perform(self, repeat=1):
+        """Joue la séquence `repeat` fois en une requête ; retourne la durée mesurée en ms."""
+        if not self._actions:
+            return 0.0
+        start = time.perf_counter()
+        self.driver.execute(Command.W3C_ACTIONS, self.compile(repeat))
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,126 @@
+"""
+Registre des sélecteurs de secours, appris d'un run à l'autre.
+
+Plusieurs méthodes des page objects essaient une chaîne de sélecteurs dans un
+ordre fixe (variantes de l'app, ids qui changent selon la version...). Chaque
+essai raté coûte un aller-retour WebDriver. Le registre mémorise, par profil
+"device|version de l'app", quel sélecteur de chaque chaîne a réellement
+trouvé l'élément, l'enregistre dans .locator_cache.json et le fait passer en
+premier aux runs suivants.
+
+Quand le gagnant ne matche plus, la chaîne est reprise dans l'ordre d'origine
+et le sélecteur qui matche devient le gagnant. Un sélecteur générique (XPath
+sans prédicat, qui matche n'importe quel élément du bon type) n'est jamais
+promu : il peut matcher une fois par accident et ne serait plus jamais rétrogradé.
+
+Les workers de run_parallel.py partagent le fichier : la sauvegarde relit le
+fichier sous verrou (utils.file_lock) et n'y reporte que les chaînes apprises
+ou oubliées par ce process.
+
+Hit  : le gagnant connu a matché directement.
+Miss : pas de gagnant connu, ou il a fallu un autre sélecteur de la chaîne.
+"""
+
+import os
+import threading
+
+from utils.file_lock import file_lock, read_json, write_json
+
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".locator_cache.json")
+
+
+def locator_key(locator):
+    by, value = locator[0], locator[1]
+    return f"{by}::{value}"
+
+
+def is_generic(locator):
+    """XPath purement structurelle (aucun prédicat) : matche le premier élément venu du bon type."""
+    by, value = locator[0], locator[1]
+    return by == "xpath" and "[" not in value
+
+
+class LocatorRegistry:
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._winners = {}
+        self._stats = {}
+        # (profil, chaîne) -> gagnant appris (None : oublié) depuis la dernière sauvegarde
+        self._changes = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        self._winners = read_json(self.path)
+
+    def winner(self, profile, chain):
+        """Clé "by::value" du sélecteur gagnant connu pour cette chaîne, ou None."""
+        return self._winners.get(profile, {}).get(chain)
+
+    def promoted(self, profile, chain, candidates):
+        """Candidat gagnant connu s'il n'est pas déjà le premier de la chaîne, sinon None."""
+        winner = self.winner(profile, chain)
+        if winner is None or winner == locator_key(candidates[0]):
+            return None
+        for candidate in candidates:
+            if locator_key(candidate) == winner and not is_generic(candidate):
+                return candidate
+        return None
+
+    def order(self, profile, chain, candidates):
+        """Retourne les candidats avec le gagnant connu en tête (ordre d'origine sinon)."""
+        known = self.promoted(profile, chain, candidates)
+        if known is None:
+            return list(candidates)
+        return [known] + [c for c in candidates if c is not known]
+
+    def record(self, profile, chain, locator):
+        """Enregistre le sélecteur qui a matché et met à jour les stats hit/miss.
+
+        Un sélecteur générique n'est pas promu : le gagnant connu (qui n'a pas
+        matché cette fois) est oublié et la chaîne retrouve son ordre d'origine.
+        """
+        key = locator_key(locator)
+        with self._lock:
+            winners = self._winners.setdefault(profile, {})
+            known = winners.get(chain)
+            hit = known == key
+            stats = self._stats.setdefault(chain, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+            if is_generic(locator):
+                if known is not None:
+                    del winners[chain]
+                    self._changes[(profile, chain)] = None
+                    self._dirty = True
+            elif not hit:
+                winners[chain] = key
+                self._changes[(profile, chain)] = key
+                self._dirty = True
+        return hit
+
+    def stats(self):
+        """{chaîne: {"hits": n, "misses": n}} pour le run courant."""
+        return {chain: dict(values) for chain, values in sorted(self._stats.items())}
+
+    def save(self):
+        """Reporte les changements de ce process dans le fichier, relu sous verrou (autres workers)."""
+        if not self._dirty:
+            return
+        with self._lock, file_lock(self.path):
+            winners = read_json(self.path)
+            for (profile, chain), key in self._changes.items():
+                if key is None:
+                    winners.get(profile, {}).pop(chain, None)
+                else:
+                    winners.setdefault(profile, {})[chain] = key
+            winners = {profile: chains for profile, chains in winners.items() if chains}
+            write_json(self.path, winners)
+            self._winners = winners
+            self._changes.clear()
+            self._dirty = False
+
+
+# Registre partagé par tous les page objects du process pytest
+registry = LocatorRegistry()
@@ -0,0 +1,181 @@
+"""
+Mémoire de l'app échantillonnée à chaque cycle d'un test de stress, avec tendance.
+
+Compter les cycles en échec ne détecte pas une fuite : l'app peut survivre
+à 20 cycles en grossissant à chaque fois. MemorySampler lit
+`dumpsys meminfo <package>` (section "App Summary", en KB) après chaque
+cycle : PSS total, Java heap, native heap, graphics, plus code, stack,
+system et private other.
+
+En fin de test, une droite des moindres carrés est ajustée sur chaque série
+(KB en fonction du numéro de cycle). Les premiers cycles sont exclus de
+l'ajustement : caches, JIT et images se remplissent au début sans que ce soit
+une fuite. `assert_no_leak()` échoue si la pente d'une série dépasse son seuil
+(config.MEMORY_MAX_SLOPE_KB, KB par cycle). Les échantillons s'exportent en
+CSV et en petit graphique SVG pour le rapport HTML.
+
+    memory = memory_sampler("add_remove_cycles")   # fixture, voir conftest.py
+    for cycle in range(1, 21):
+        ...
+        memory.sample(cycle)
+    memory.assert_no_leak()
+
+Sans accès shell au device, sample() ne fait rien et les assertions sont ignorées.
+"""
+
+import csv
+import re
+import statistics
+import time
+
+from utils.device import APP_PACKAGE, adb_shell
+
+
+# séries suivies (lignes de "App Summary") ; les quatre premières ont un seuil de pente
+SUMMARY_ROWS = {
+    "Java Heap": "java_heap",
+    "Native Heap": "native_heap",
+    "Code": "code",
+    "Stack": "stack",
+    "Graphics": "graphics",
+    "Private Other": "private_other",
+    "System": "system",
+}
+TRACKED = ("pss", "java_heap", "native_heap", "graphics")
+COLUMNS = ("pss", "java_heap", "native_heap", "graphics", "code", "stack", "private_other", "system")
+
+SUMMARY_LINE = re.compile(r"^\s*(" + "|".join(re.escape(k) for k in SUMMARY_ROWS) + r"):\s+(\d+)", re.M)
+# "TOTAL PSS:  18096  TOTAL RSS: ..." (Android 10+) ou "TOTAL:  18096" (avant)
+TOTAL_LINE = re.compile(r"^\s*TOTAL(?: PSS)?:\s+(\d+)", re.M)
+
+CHART_COLORS = {"pss": "#1f77b4", "java_heap": "#d62728", "native_heap": "#2ca02c", "graphics": "#9467bd"}
+
+
+def parse_meminfo(output):
+    """{série: KB} de la section "App Summary" de `dumpsys meminfo <package>` ({} si absente)."""
+    _, found, summary = output.partition("App Summary")
+    if not found:
+        return {}
+    values = {}
+    for label, kb in SUMMARY_LINE.findall(summary):
+        values.setdefault(SUMMARY_ROWS[label], int(kb))
+    match = TOTAL_LINE.search(summary)
+    if match:
+        values["pss"] = int(match.group(1))
+    return values
+
+
+def linear_fit(xs, ys):
+    """Droite des moindres carrés y = slope * x + intercept : (slope, intercept, r²)."""
+    if len(xs) < 2:
+        return 0.0, (ys[0] if ys else 0.0), 0.0
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    slope = sxy / sxx if sxx else 0.0
+    r2 = sxy * sxy / (sxx * syy) if sxx and syy else 0.0
+    return slope, mean_y - slope * mean_x, r2
+
+
+class MemorySampler:
+    """Échantillons de mémoire de l'app, un par cycle, et leur tendance.
+
+    `max_slope_kb` : {série: KB par cycle} au-delà duquel assert_no_leak() échoue ;
+    `warmup` : nombre de premiers échantillons exclus de l'ajustement.
+    """
+
+    def __init__(self, driver, name="memory", package=APP_PACKAGE, max_slope_kb=None, warmup=3):
+        self.driver = driver
+        self.name = name
+        self.package = package
+        self.max_slope_kb = dict(max_slope_kb or {})
+        self.warmup = warmup
+        self.samples = []
+        self.error = None
+        self._start = time.monotonic()
+
+    def sample(self, cycle):
+        """Lit la mémoire de l'app après le cycle `cycle` ; retourne l'échantillon (None sans accès shell)."""
+        if self.error is not None:
+            return None
+        try:
+            values = parse_meminfo(adb_shell(self.driver, "dumpsys", "meminfo", self.package))
+        except RuntimeError as e:
+            self.error = e
+            print(f"⚠ Memory sampling unavailable for '{self.name}' ({e})")
+            return None
+        if "pss" not in values:
+            # app pas (encore) lancée : pas de process à mesurer
+            return None
+        entry = {"cycle": cycle, "elapsed_s": round(time.monotonic() - self._start, 3), **values}
+        self.samples.append(entry)
+        return entry
+
+    def trends(self):
+        """{série: {"slope_kb", "r2", "first_kb", "last_kb", "n"}} sur les échantillons après l'échauffement."""
+        fitted = self.samples[self.warmup:] if len(self.samples) > self.warmup + 1 else self.samples
+        result = {}
+        for metric in TRACKED:
+            points = [(s["cycle"], s[metric]) for s in fitted if metric in s]
+            if not points:
+                continue
+            xs, ys = zip(*points)
+            slope, _, r2 = linear_fit(xs, ys)
+            result[metric] = {"slope_kb": slope, "r2": r2, "first_kb": ys[0], "last_kb": ys[-1], "n": len(points)}
+        return result
+
+    def leaks(self):
+        """Séries dont la pente dépasse le seuil : [(série, pente, seuil)]."""
+        leaks = []
+        for metric, trend in self.trends().items():
+            limit = self.max_slope_kb.get(metric)
+            if limit is not None and trend["n"] >= 3 and trend["slope_kb"] > limit:
+                leaks.append((metric, trend["slope_kb"], limit))
+        return leaks
+
+    def assert_no_leak(self):
+        """Échoue si la mémoire d'une série croît de plus de son seuil par cycle."""
+        leaks = self.leaks()
+        assert not leaks, f"{self.name}: memory grows every cycle (" + ", ".join(
+            f"{metric} +{slope:.0f} KB/cycle > {limit} KB" for metric, slope, limit in leaks) + ")"
+
+    def describe(self):
+        """Une ligne : pente et évolution de chaque série."""
+        return f"{self.name}: " + ", ".join(
+            f"{metric} {t['first_kb'] / 1024:.1f}->{t['last_kb'] / 1024:.1f} MB ({t['slope_kb']:+.0f} KB/cycle)"
+            for metric, t in self.trends().items())
+
+    def write_csv(self, path):
+        """Écrit un échantillon par ligne (cycle, secondes depuis le début, KB par série)."""
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(("cycle", "elapsed_s") + tuple(f"{c}_kb" for c in COLUMNS))
+            for s in self.samples:
+                writer.writerow((s["cycle"], s["elapsed_s"]) + tuple(s.get(c, "") for c in COLUMNS))
+        return path
+
+    def svg_chart(self, width=480, height=160):
+        """Courbes des séries suivies (MB par cycle), en SVG autonome pour le rapport HTML."""
+        if len(self.samples) < 2:
+            return ""
+        cycles = [s["cycle"] for s in self.samples]
+        values = [s[m] for s in self.samples for m in TRACKED if m in s]
+        low, high = min(values), max(values)
+        span_x, span_y = (max(cycles) - min(cycles)) or 1, (high - low) or 1
+        pad = 24
+
+        def point(cycle, kb):
+            x = pad + (cycle - min(cycles)) / span_x * (width - 2 * pad)
+            y = height - pad - (kb - low) / span_y * (height - 2 * pad)
+            return f"{x:.1f},{y:.1f}"
+
+        lines = []
+        for i, metric in enumerate(TRACKED):
+            points = " ".join(point(s["cycle"], s[metric]) for s in self.samples if metric in s)
+            lines.append(f'<polyline fill="none" stroke="{CHART_COLORS[metric]}" stroke-width="1.5" points="{points}"/>'
+                         f'<text x="{pad + i * 110}" y="14" font-size="11" fill="{CHART_COLORS[metric]}">{metric}</text>')
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">'
+                f'<rect width="{width}" height="{height}" fill="white" stroke="#ccc"/>' + "".join(lines)
+                + f'<text x="{pad}" y="{height - 6}" font-size="10">cycle {min(cycles)}-{max(cycles)}, '
+                  f'{low / 1024:.1f}-{high / 1024:.1f} MB</text></svg>')
@@ -0,0 +1,177 @@
+"""
+Historique des mesures de performance et détection des régressions.
+
+Chaque run enregistre les durées de ses étapes (TC43 "login", "add_products"...,
+cycles de TC44 / TC45) dans une base SQLite locale, avec le profil du device,
+la version de l'app et le commit git. Pour vérifier un run, on le compare à
+un baseline glissant : les échantillons des `window` derniers runs du même
+test sur le même device, toutes versions de l'app et tous commits confondus
+(une nouvelle version plus lente doit être comparée aux précédentes), sans
+régression signalée. La version de l'app sert au rapport et au filtrage.
+Un ralentissement est signalé quand il est à la fois statistiquement
+significatif (test t de Welch unilatéral, p < alpha), supérieur à
+`min_slowdown` en relatif et à `min_slowdown_ms` en absolu : avec beaucoup
+d'échantillons, un écart de 1 % (ou de 0,4 ms sur une étape de 2 ms) finit
+par être « significatif » sans intérêt pratique.
+
+Tant que le baseline a moins de `min_samples` échantillons, l'étape est
+comparée à son budget (`budgets`, ms sur le percentile `q`) : "over budget"
+le fait échouer comme une régression. Sans budget, elle est seulement
+enregistrée ("no baseline").
+"""
+
+import datetime
+import os
+import sqlite3
+import statistics
+import subprocess
+import threading
+
+from utils.command_timing import percentile
+from utils.perf_stats import welch_test
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    test TEXT NOT NULL,
+    device TEXT NOT NULL,
+    app_version TEXT NOT NULL,
+    git_commit TEXT NOT NULL,
+    regressed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    step TEXT NOT NULL,
+    value_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (test, device, app_version, id);
+CREATE INDEX IF NOT EXISTS runs_device ON runs (test, device, id);
+CREATE INDEX IF NOT EXISTS samples_run ON samples (run_id, step);
+"""
+
+
+def git_commit():
+    """Hash court du commit courant (suffixe "-dirty" si l'arbre est modifié), "unknown" hors git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except Exception:
+        return "unknown"
+
+
+# statuts qui font échouer le test et écartent le run des baselines suivants
+FAILING = ("regression", "over budget")
+
+
+class BaselineStore:
+    """Base SQLite des durées d'étapes, une ligne `runs` par test exécuté.
+
+    Les runs enregistrés par ce store le sont sous `commit` (commit courant par défaut).
+    `budgets` : {étape: ms} vérifiés sur le percentile `q` tant qu'il n'y a pas de baseline.
+    """
+
+    def __init__(self, path, commit=None, window=10, min_samples=5, alpha=0.01, min_slowdown=0.10,
+                 min_slowdown_ms=0.0, budgets=None, q=95):
+        self.path = path
+        self.commit = commit or git_commit()
+        self.window = window
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self.min_slowdown = min_slowdown
+        self.min_slowdown_ms = min_slowdown_ms
+        self.budgets = budgets or {}
+        self.q = q
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # timeout : les workers de run_parallel.py écrivent dans la même base
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def record(self, test, device, app_version, steps, regressed=False):
+        """Enregistre les durées {étape: [ms, ...]} d'un run et retourne son id."""
+        created = datetime.datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (created, test, device, app_version, git_commit, regressed) VALUES (?, ?, ?, ?, ?, ?)",
+                (created, test, device, app_version, self.commit, int(regressed)),
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO samples (run_id, step, value_ms) VALUES (?, ?, ?)",
+                [(run_id, step, float(ms)) for step, values in steps.items() for ms in values],
+            )
+        return run_id
+
+    def baseline(self, test, device, step, app_version=None):
+        """Échantillons de l'étape dans les `window` derniers runs sans régression du test sur ce device.
+
+        Toutes versions de l'app confondues, sauf si `app_version` est donné.
+        """
+        query = "SELECT id FROM runs WHERE test = ? AND device = ? AND regressed = 0"
+        params = [test, device]
+        if app_version is not None:
+            query += " AND app_version = ?"
+            params.append(app_version)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT s.value_ms FROM samples s
+                WHERE s.step = ? AND s.run_id IN ({query} ORDER BY id DESC LIMIT ?)
+                """,
+                [step] + params + [self.window],
+            ).fetchall()
+        return [value for (value,) in rows]
+
+    def compare(self, test, device, app_version, steps):
+        """Compare chaque étape à son baseline ; une entrée par étape (voir le docstring du module)."""
+        comparisons = []
+        for step, values in steps.items():
+            base = self.baseline(test, device, step)
+            entry = {
+                "test": test, "device": device, "app_version": app_version, "step": step,
+                "n": len(values), "mean": statistics.fmean(values) if values else 0.0,
+                "base_n": len(base), "base_mean": statistics.fmean(base) if base else None,
+                "slowdown": None, "p": None, "status": "no baseline",
+                "q": self.q, "budget_ms": None, "value_ms": None,
+            }
+            if len(base) >= self.min_samples and len(values) >= 2:
+                _, _, p = welch_test(values, base)
+                slowdown = entry["mean"] / entry["base_mean"] - 1 if entry["base_mean"] else 0.0
+                entry.update(slowdown=slowdown, p=p)
+                slower = slowdown > self.min_slowdown and entry["mean"] - entry["base_mean"] > self.min_slowdown_ms
+                entry["status"] = "regression" if p < self.alpha and slower else "ok"
+            elif step in self.budgets and values:
+                value = percentile(sorted(values), self.q)
+                entry.update(budget_ms=self.budgets[step], value_ms=value)
+                entry["status"] = "over budget" if value > self.budgets[step] else "within budget"
+            comparisons.append(entry)
+        return comparisons
+
+    def check(self, test, device, app_version, steps):
+        """Compare puis enregistre le run (marqué s'il a échoué) ; retourne les comparaisons."""
+        comparisons = self.compare(test, device, app_version, steps)
+        regressed = any(c["status"] in FAILING for c in comparisons)
+        self.record(test, device, app_version, steps, regressed=regressed)
+        return comparisons
+
+
+def describe_comparison(entry):
+    """Ligne lisible d'une comparaison d'étape."""
+    if entry["status"] == "no baseline":
+        return f"{entry['step']}: {entry['mean']:.1f}ms (no baseline yet, {entry['base_n']} samples)"
+    if entry["budget_ms"] is not None:
+        return (f"{entry['step']}: p{entry['q']} {entry['value_ms']:.1f}ms vs {entry['budget_ms']}ms budget "
+                f"(no baseline yet, {entry['base_n']} samples) {entry['status']}")
+    return (f"{entry['step']}: {entry['mean']:.1f}ms vs {entry['base_mean']:.1f}ms baseline "
+            f"({entry['slowdown']:+.1%}, p={entry['p']:.4f}, n={entry['n']}/{entry['base_n']}) {entry['status']}")
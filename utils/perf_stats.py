@@ -0,0 +1,225 @@
+"""
+Mesures de performance sur plusieurs itérations, avec statistiques par étape.
+
+Une seule mesure comparée à un seuil fixe échoue au moindre à-coup de
+l'émulateur. PerfRunner exécute un scénario plusieurs fois (itérations
+d'échauffement non mesurées, puis N itérations mesurées, l'app remise à zéro
+entre chaque), chronomètre ses étapes et calcule pour chacune : moyenne,
+médiane, écart-type, percentile choisi et intervalles de confiance bootstrap.
+Les séries d'échantillons sont comparées au baseline glissant du device
+(utils/perf_baseline.py), pas à un seuil fixe.
+
+    def scenario(driver, step):
+        login = LoginPage(driver)
+        with step("login"):
+            login.login("standard_user", "secret_sauce")
+
+    result = perf_runner.run(scenario)
+    print(result.report())
+    perf_baseline(result.steps)
+
+Avec `device_timing`, chaque étape est aussi mesurée côté device
+(utils/device_timing.py) et enregistrée sous "<étape>.device" : latence du
+tap au rendu de la dernière frame, sans les allers-retours HTTP ni le
+polling des waits. Les lectures du device se font hors des chronomètres et
+sont retirées du total.
+"""
+
+import contextlib
+import math
+import random
+import statistics
+import time
+
+from utils.command_timing import percentile
+from utils.device_timing import TransitionTimer
+
+
+TOTAL = "total"
+DEVICE_SUFFIX = ".device"
+
+
+def bootstrap_ci(values, statistic, confidence=0.95, resamples=2000, rng=None):
+    """Intervalle de confiance bootstrap (percentile) de `statistic(values)` : (bas, haut)."""
+    if len(values) < 2:
+        value = statistic(values) if values else 0.0
+        return value, value
+    rng = rng or random.Random()
+    n = len(values)
+    estimates = sorted(statistic([values[rng.randrange(n)] for _ in range(n)]) for _ in range(resamples))
+    alpha = (1 - confidence) / 2 * 100
+    return percentile(estimates, alpha), percentile(estimates, 100 - alpha)
+
+
+def describe(values, q=95, confidence=0.95, resamples=2000, rng=None):
+    """Statistiques d'une série de durées (ms) : n, min, max, mean, median, stdev, p<q>
+    et intervalles de confiance bootstrap de la moyenne et du percentile."""
+    ordered = sorted(values)
+    stats = {
+        "n": len(ordered),
+        "min": ordered[0] if ordered else 0.0,
+        "max": ordered[-1] if ordered else 0.0,
+        "mean": statistics.fmean(ordered) if ordered else 0.0,
+        "median": statistics.median(ordered) if ordered else 0.0,
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        f"p{q}": percentile(ordered, q),
+    }
+    stats["mean_ci"] = bootstrap_ci(ordered, statistics.fmean, confidence, resamples, rng)
+    stats[f"p{q}_ci"] = bootstrap_ci(ordered, lambda v: percentile(sorted(v), q), confidence, resamples, rng)
+    return stats
+
+
+def _betacf(a, b, x, max_iter=200, eps=3e-14):
+    """Fraction continue de la bêta incomplète (Numerical Recipes, méthode de Lentz)."""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        for num in (m * (b - m) * x / ((a + m2 - 1) * (a + m2)),
+                    -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))):
+            d = 1 + num * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + num / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1) < eps:
+            break
+    return h
+
+
+def betainc(a, b, x):
+    """Fonction bêta incomplète régularisée I_x(a, b)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+
+def welch_test(current, baseline):
+    """Test t de Welch unilatéral « current est plus lent que baseline ».
+
+    Retourne (t, degrés de liberté, p-value). Pas d'hypothèse d'égalité des
+    variances : le baseline agrège plusieurs runs, sa dispersion diffère.
+    """
+    n1, n2 = len(current), len(baseline)
+    if n1 < 2 or n2 < 2:
+        raise ValueError("welch_test needs at least 2 samples on each side")
+    v1, v2 = statistics.variance(current) / n1, statistics.variance(baseline) / n2
+    diff = statistics.fmean(current) - statistics.fmean(baseline)
+    if v1 + v2 == 0:
+        return (math.inf if diff > 0 else -math.inf if diff < 0 else 0.0), n1 + n2 - 2, (0.0 if diff > 0 else 1.0)
+    t = diff / math.sqrt(v1 + v2)
+    df = (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+    tail = 0.5 * betainc(df / 2, 0.5, df / (df + t * t))
+    return t, df, tail if t > 0 else 1 - tail
+
+
+class PerfResult:
+    """Durées (ms) de chaque étape sur les itérations mesurées."""
+
+    def __init__(self, steps, q=95, confidence=0.95, resamples=2000, seed=None):
+        self.steps = steps
+        self.q = q
+        self.confidence = confidence
+        self.resamples = resamples
+        self.seed = seed
+
+    def stats(self, step):
+        rng = random.Random(self.seed)
+        return describe(self.steps[step], self.q, self.confidence, self.resamples, rng)
+
+    def value(self, step):
+        """Percentile choisi (ms) de l'étape."""
+        return percentile(sorted(self.steps[step]), self.q)
+
+    def report(self):
+        """Tableau texte : une ligne par étape."""
+        p = f"p{self.q}"
+        lines = [f"{'step':<28} {'n':>3} {'mean':>9} {'median':>9} {p:>9} {'stdev':>8}  "
+                 f"{'mean CI':>19}  {p + ' CI':>19}"]
+        for step in self.steps:
+            s = self.stats(step)
+            lines.append(
+                f"{step:<28} {s['n']:>3} {s['mean']:>9.1f} {s['median']:>9.1f} {s[p]:>9.1f} {s['stdev']:>8.1f}  "
+                f"{s['mean_ci'][0]:>9.1f}-{s['mean_ci'][1]:<9.1f}  {s[p + '_ci'][0]:>9.1f}-{s[p + '_ci'][1]:<9.1f}"
+            )
+        return "\n".join(lines)
+
+
+class PerfRunner:
+    """Exécute un scénario `warmup` + `iterations` fois en remettant l'app à zéro entre chaque.
+
+    `acquire()` retourne un driver dont l'app vient d'être remise à zéro (pool de
+    sessions) ; `driver` est celui de la première itération, déjà remis à zéro.
+    """
+
+    def __init__(self, acquire, driver=None, warmup=1, iterations=5, q=95, confidence=0.95,
+                 resamples=2000, seed=None, device_timing=False):
+        if iterations < 1:
+            raise ValueError("iterations must be >= 1")
+        self.acquire = acquire
+        self.driver = driver
+        self.warmup = warmup
+        self.iterations = iterations
+        self.q = q
+        self.confidence = confidence
+        self.resamples = resamples
+        self.seed = seed
+        self.device_timing = device_timing
+
+    def _timer(self, driver):
+        if not self.device_timing:
+            return None
+        try:
+            return TransitionTimer(driver)
+        except (RuntimeError, ValueError) as e:
+            # pas d'accès shell (appium sans --allow-insecure adb_shell ni adb local)
+            print(f"⚠ Device-side timing unavailable ({e}), host timings only")
+            self.device_timing = False
+            return None
+
+    def run(self, scenario):
+        """Exécute `scenario(driver, step)` et retourne un PerfResult.
+
+        `step(name)` est un context manager qui chronomètre son bloc ; la durée
+        totale de chaque itération est enregistrée sous "total".
+        """
+        steps = {}
+        for iteration in range(self.warmup + self.iterations):
+            measured = iteration >= self.warmup
+            driver = self.driver if iteration == 0 and self.driver is not None else self.acquire()
+            timer = self._timer(driver)
+            timings = {}
+            # temps passé à lire le device entre les étapes, retiré du total
+            overhead = [0.0]
+
+            @contextlib.contextmanager
+            def step(name):
+                if timer is not None:
+                    begin = time.perf_counter()
+                    timer.begin()
+                    overhead[0] += time.perf_counter() - begin
+                start = time.perf_counter()
+                yield
+                end = time.perf_counter()
+                timings[name] = timings.get(name, 0.0) + (end - start) * 1000
+                if timer is not None:
+                    latency = timer.end(name)["latency_ms"]
+                    if latency is not None:
+                        key = name + DEVICE_SUFFIX
+                        timings[key] = timings.get(key, 0.0) + latency
+                    overhead[0] += time.perf_counter() - end
+
+            start = time.perf_counter()
+            scenario(driver, step)
+            timings[TOTAL] = (time.perf_counter() - start - overhead[0]) * 1000
+            if measured:
+                for name, ms in timings.items():
+                    steps.setdefault(name, []).append(ms)
+        return PerfResult(steps, self.q, self.confidence, self.resamples, self.seed)
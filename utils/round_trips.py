@@ -0,0 +1,204 @@
+"""
+Comptabilité des allers-retours WebDriver par méthode de page object.
+
+RoundTripRecorder instrumente un driver et des classes de page objects le
+temps d'un enregistrement. Pour chaque méthode (nom qualifié, ex.
+"HomePage.add_to_cart", "BasePage.find_with_scroll") il mesure :
+
+- calls          : nombre d'appels
+- commands       : commandes WebDriver envoyées (et leur détail par type)
+- bytes_sent / bytes_received : octets des corps HTTP échangés avec le serveur
+- cpu_ms         : temps CPU du thread client (time.thread_time)
+- sleep_ms       : temps passé dans time.sleep (polling des waits...)
+- wall_ms        : durée réelle
+
+Les coûts sont inclusifs : une commande envoyée par BasePage.find_any
+pendant HomePage.add_to_cart compte pour les deux méthodes.
+
+    with RoundTripRecorder(driver, [LoginPage, HomePage]) as rec:
+        with rec.flow("login"):
+            LoginPage(driver).login("standard_user", "secret_sauce")
+    rec.report()
+"""
+
+import contextlib
+import functools
+import threading
+import time
+
+from utils import command_hooks
+
+
+OUTSIDE = "(outside page objects)"
+
+
+def _blank_cost():
+    return {"calls": 0, "commands": 0, "bytes_sent": 0, "bytes_received": 0,
+            "cpu_ms": 0.0, "sleep_ms": 0.0, "wall_ms": 0.0, "by_command": {}}
+
+
+def _payload_size(data):
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    return len(data)
+
+
+class RoundTripRecorder:
+    """Mesure le coût en commandes / octets / CPU / sommeil de chaque méthode de page object."""
+
+    def __init__(self, driver, page_classes):
+        self.driver = driver
+        self.page_classes = list(page_classes)
+        self.flows = {}
+        self._flow = None
+        self._stack = []
+        self._pending = [0, 0]
+        self._thread = None
+        self._patched = []
+
+    # --- installation ---
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.get_ident()
+        command_hooks.add_listener(self.driver, self._on_command)
+        self._wrap_transport()
+        self._patch(time, "sleep", self._sleep_wrapper(time.sleep))
+        seen = set()
+        for cls in self.page_classes:
+            for klass in cls.__mro__:
+                if klass is object or klass in seen:
+                    continue
+                seen.add(klass)
+                for name, attr in list(vars(klass).items()):
+                    if callable(attr) and not name.startswith("__") and not isinstance(attr, (staticmethod, classmethod, type)):
+                        self._patch(klass, name, self._method_wrapper(attr))
+
+    def stop(self):
+        command_hooks.remove_listener(self.driver, self._on_command)
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def _patch(self, owner, name, replacement):
+        self._patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _wrap_transport(self):
+        """Compte les octets des requêtes HTTP de la connexion (keep-alive) du driver."""
+        conn = getattr(self.driver.command_executor, "_conn", None)
+        if conn is None:
+            return
+        original = conn.request
+        pending = self._pending
+
+        def request(method, url, body=None, **kwargs):
+            response = original(method, url, body=body, **kwargs)
+            pending[0] += _payload_size(body)
+            pending[1] += _payload_size(response.data)
+            return response
+
+        self._patch(conn, "request", request)
+
+    # --- attribution ---
+    def _owners(self):
+        """Total du flow courant + méthodes (dédoublonnées) de la pile ; [] hors d'un flow."""
+        if self._flow is None:
+            return []
+        costs = self.flows[self._flow]
+        names = dict.fromkeys(self._stack) or {OUTSIDE: None}
+        return [costs["total"]] + [costs["methods"].setdefault(name, _blank_cost()) for name in names]
+
+    def _on_command(self, driver, command, params, elapsed, error):
+        if threading.get_ident() != self._thread:
+            return
+        sent, received = self._pending
+        self._pending[0] = self._pending[1] = 0
+        for cost in self._owners():
+            cost["commands"] += 1
+            cost["bytes_sent"] += sent
+            cost["bytes_received"] += received
+            cost["by_command"][command] = cost["by_command"].get(command, 0) + 1
+
+    def _sleep_wrapper(self, original):
+        recorder = self
+
+        def sleep(seconds):
+            start = time.perf_counter()
+            try:
+                original(seconds)
+            finally:
+                if threading.get_ident() == recorder._thread:
+                    slept = (time.perf_counter() - start) * 1000
+                    for cost in recorder._owners():
+                        cost["sleep_ms"] += slept
+        return sleep
+
+    def _method_wrapper(self, func):
+        recorder = self
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if recorder._flow is None or threading.get_ident() != recorder._thread or name in recorder._stack:
+                # hors flow, autre thread ou appel récursif (déjà compté par l'appel englobant)
+                return func(*args, **kwargs)
+            recorder._stack.append(name)
+            cpu, wall = time.thread_time(), time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder._stack.pop()
+                cost = recorder.flows[recorder._flow]["methods"].setdefault(name, _blank_cost())
+                cost["calls"] += 1
+                cost["cpu_ms"] += (time.thread_time() - cpu) * 1000
+                cost["wall_ms"] += (time.perf_counter() - wall) * 1000
+        return wrapper
+
+    @contextlib.contextmanager
+    def flow(self, name):
+        """Attribue tout ce qui se passe dans le bloc au flow `name` (cumulé sur les itérations)."""
+        previous, self._flow = self._flow, name
+        self._pending[0] = self._pending[1] = 0
+        costs = self.flows.setdefault(name, {"total": _blank_cost(), "methods": {}})
+        cpu, wall = time.thread_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            costs["total"]["calls"] += 1
+            costs["total"]["cpu_ms"] += (time.thread_time() - cpu) * 1000
+            costs["total"]["wall_ms"] += (time.perf_counter() - wall) * 1000
+            self._flow = previous
+
+    def report(self):
+        """Coûts moyens par exécution de chaque flow : {flow: {"total": {...}, "methods": {...}}}."""
+        result = {}
+        for flow, costs in self.flows.items():
+            runs = max(costs["total"]["calls"], 1)
+            result[flow] = {
+                "iterations": costs["total"]["calls"],
+                "total": _per_run(costs["total"], runs, keep_calls=False),
+                "methods": {name: _per_run(cost, runs) for name, cost in sorted(costs["methods"].items())},
+            }
+        return result
+
+
+def _per_run(cost, runs, keep_calls=True):
+    averaged = {}
+    for key, value in cost.items():
+        if key == "calls" and not keep_calls:
+            continue
+        if key == "by_command":
+            averaged[key] = {cmd: round(n / runs, 2) for cmd, n in sorted(value.items())}
+        elif isinstance(value, float):
+            averaged[key] = round(value / runs, 3)
+        else:
+            averaged[key] = round(value / runs, 2)
+    return averaged
@@ -0,0 +1,324 @@
+"""
+Graphe des écrans de l'app et navigation par le chemin le moins coûteux.
+
+Les tests atteignent un écran par des séquences écrites en dur (menu puis
+LOGOUT, `driver.back()` en boucle, logout puis login...). Navigator connaît
+les écrans de l'app et les transitions entre eux :
+
+- identify() reconnaît l'écran courant à quelques accessibility ids clés
+  (FINGERPRINTS), évalués sur le snapshot de la hiérarchie (utils/snapshot.py) :
+  un seul dump, aucun s'il est encore valide ;
+- go_to(écran) calcule le chemin le moins coûteux (Dijkstra) sur les
+  transitions de TRANSITIONS et l'exécute. Chaque transition attend l'arrivée
+  sur l'écran suivant ; si elle n'arrive pas, l'écran courant est identifié et
+  le chemin recalculé.
+
+Le coût d'une transition est sa durée mesurée (moyenne glissante par profil
+"device|version de l'app", gardée d'un run à l'autre dans
+.screen_graph_costs.json), l'estimation de TRANSITIONS tant qu'elle n'a
+jamais été mesurée. Les workers de run_parallel.py partagent le fichier :
+chacun y rejoue ses mesures du run, sous verrou (utils.file_lock), sur les
+moyennes relues au moment de sauvegarder.
+
+    nav = Navigator(driver)
+    nav.go_to("checkout_info")        # login -> products -> cart -> checkout_info
+    nav.go_to("login")                # menu -> LOGOUT
+"""
+
+import heapq
+import os
+import threading
+import time
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from pages.base_page import BasePage
+from pages.checkout_page import CheckoutPage
+from pages.login_page import LoginPage
+from utils.device import device_profile
+from utils.file_lock import file_lock, read_json, write_json
+from utils.waits import gone, present
+
+
+COSTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".screen_graph_costs.json")
+
+DEFAULT_USER = "standard_user"
+PASSWORD = "secret_sauce"
+
+# écran -> accessibility ids qui l'identifient, testés dans cet ordre : le menu recouvre
+# l'écran d'où il a été ouvert, il passe donc avant les autres
+FINGERPRINTS = (
+    ("menu", ("test-Close", "test-LOGOUT")),
+    ("login", ("test-Username", "test-LOGIN")),
+    ("complete", ("test-CHECKOUT: COMPLETE!",)),
+    ("checkout_overview", ("test-CHECKOUT: OVERVIEW",)),
+    ("checkout_info", ("test-First Name",)),
+    ("cart", ("test-Cart Content",)),
+    ("detail", ("test-BACK TO PRODUCTS",)),
+    ("products", ("test-PRODUCTS",)),
+)
+SCREENS = tuple(screen for screen, _ in FINGERPRINTS)
+_IDS = dict(FINGERPRINTS)
+_KEY_IDS = {accessibility_id for _, ids in FINGERPRINTS for accessibility_id in ids}
+
+# écrans avec la barre du haut (bouton menu, icône du panier)
+HEADER_SCREENS = ("products", "detail", "cart", "checkout_info", "checkout_overview", "complete")
+
+# (départ, arrivée, action, coût estimé en ms tant que la transition n'a pas été mesurée)
+TRANSITIONS = (
+    ("login", "products", "login", 2500),
+    ("products", "detail", "open_item", 800),
+    ("detail", "products", "back_to_products", 800),
+    ("cart", "products", "continue_shopping", 1000),
+    ("cart", "checkout_info", "checkout", 1000),
+    ("checkout_info", "products", "cancel", 1000),
+    ("checkout_info", "checkout_overview", "fill_and_continue", 2500),
+    ("checkout_overview", "products", "cancel", 1000),
+    ("checkout_overview", "complete", "finish", 1000),
+    ("complete", "products", "back_home", 1000),
+    ("menu", "products", "all_items", 800),
+    ("menu", "login", "logout", 1000),
+) + tuple((screen, "menu", "open_menu", 600) for screen in HEADER_SCREENS) \
+  + tuple((screen, "cart", "open_cart", 800) for screen in HEADER_SCREENS if screen != "cart")
+
+_ESTIMATES = {(start, end): estimate for start, end, _, estimate in TRANSITIONS}
+
+# poids d'une nouvelle mesure dans la moyenne glissante : au moins 1/WINDOW
+COST_WINDOW = 20
+
+
+def _updated(entry, ms):
+    """[moyenne glissante, nombre de mesures] après la mesure `ms`."""
+    mean, count = entry or (0.0, 0)
+    count += 1
+    mean += (ms - mean) / min(count, COST_WINDOW)
+    return [round(mean, 1), count]
+
+
+class EdgeCosts:
+    """Durées mesurées des transitions, par profil "device|version", gardées dans .screen_graph_costs.json."""
+
+    def __init__(self, path=COSTS_PATH):
+        self.path = path
+        self._costs = {}
+        self._run = {}
+        # (profil, "départ>arrivée") -> mesures pas encore sauvegardées
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        self._costs = read_json(self.path)
+
+    def cost(self, profile, source, target, default):
+        """Durée moyenne mesurée de la transition (ms).
+
+        Jamais mesurée : `default`, mis à l'échelle du profil (rapport moyen mesure / estimation
+        des transitions déjà mesurées) pour rester comparable aux transitions mesurées.
+        """
+        measured = self._costs.get(profile, {})
+        entry = measured.get(f"{source}>{target}")
+        if entry:
+            return entry[0]
+        ratios = [mean / _ESTIMATES[tuple(key.split(">"))]
+                  for key, (mean, _) in measured.items() if tuple(key.split(">")) in _ESTIMATES]
+        return default * sum(ratios) / len(ratios) if ratios else default
+
+    def record(self, profile, source, target, ms):
+        key = f"{source}>{target}"
+        with self._lock:
+            measured = self._costs.setdefault(profile, {})
+            measured[key] = _updated(measured.get(key), ms)
+            self._run.setdefault(key, []).append(ms)
+            self._pending.setdefault((profile, key), []).append(ms)
+
+    def stats(self):
+        """{"départ>arrivée": {"count": n, "mean_ms": ms}} des transitions faites pendant le run."""
+        with self._lock:
+            return {key: {"count": len(values), "mean_ms": round(sum(values) / len(values), 1)}
+                    for key, values in sorted(self._run.items())}
+
+    def save(self):
+        """Rejoue les mesures de ce process sur le fichier relu sous verrou (moyennes des autres workers)."""
+        if not self._pending:
+            return
+        with self._lock, file_lock(self.path):
+            costs = read_json(self.path)
+            for (profile, key), durations in self._pending.items():
+                measured = costs.setdefault(profile, {})
+                for ms in durations:
+                    measured[key] = _updated(measured.get(key), ms)
+            write_json(self.path, costs)
+            self._costs = costs
+            self._pending.clear()
+
+
+# Coûts partagés par tous les Navigator du process pytest
+costs = EdgeCosts()
+
+
+def shortest_path(source, target, cost):
+    """Transitions [(départ, arrivée, action)] du chemin le moins coûteux, None s'il n'y en a pas.
+
+    `cost(départ, arrivée, estimation)` donne le coût d'une transition ; à coût égal, le chemin
+    qui a le moins de transitions.
+    """
+    edges = {}
+    for start, end, action, estimate in TRANSITIONS:
+        edges.setdefault(start, []).append((end, action, estimate))
+    best = {source: (0.0, 0)}
+    previous = {}
+    queue = [(0.0, 0, source)]
+    while queue:
+        total, steps, screen = heapq.heappop(queue)
+        if screen == target:
+            break
+        if (total, steps) > best[screen]:
+            continue
+        for end, action, estimate in edges.get(screen, ()):
+            candidate = (total + cost(screen, end, estimate), steps + 1)
+            if end not in best or candidate < best[end]:
+                best[end] = candidate
+                previous[end] = (screen, action)
+                heapq.heappush(queue, (*candidate, end))
+    if target not in best:
+        return None
+    path = []
+    screen = target
+    while screen != source:
+        start, action = previous[screen]
+        path.append((start, screen, action))
+        screen = start
+    return path[::-1]
+
+
+class Navigator:
+    """Reconnaît l'écran courant et y mène par le chemin le moins coûteux.
+
+    `user` / `password` : compte utilisé par la transition login -> products.
+    Chaque go_to() est noté dans `trips` : (départ, arrivée, transitions faites, durée en ms).
+    """
+
+    def __init__(self, driver, user=DEFAULT_USER, password=PASSWORD, timeout=10, costs=costs):
+        self.driver = driver
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.costs = costs
+        self.page = BasePage(driver)
+        self.trips = []
+
+    # --- écran courant ---
+    def identify(self, refresh=False):
+        """Écran courant d'après FINGERPRINTS, None s'il n'est pas dans le graphe (WebView, autre app...)."""
+        snapshot = self.page.snapshot(refresh=refresh)
+        shown = {desc for desc in snapshot.xpath("//@content-desc") if desc in _KEY_IDS}
+        for screen, ids in FINGERPRINTS:
+            if all(accessibility_id in shown for accessibility_id in ids):
+                return screen
+        return None
+
+    # --- itinéraire ---
+    def route(self, target, source):
+        """Transitions [(départ, arrivée, action)] du chemin le moins coûteux de `source` à `target`."""
+        if target not in SCREENS:
+            raise ValueError(f"Unknown screen '{target}' (expected one of {SCREENS})")
+        profile = device_profile(self.driver)
+        path = shortest_path(source, target,
+                             lambda start, end, estimate: self.costs.cost(profile, start, end, estimate))
+        if path is None:
+            raise RuntimeError(f"No transition path from '{source}' to '{target}'")
+        return path
+
+    def go_to(self, target, source=None, max_replans=2):
+        """Mène à l'écran `target` ; retourne les transitions faites.
+
+        `source` : écran de départ supposé (évite l'identification). Si une transition n'arrive
+        pas à destination, l'écran courant est identifié et le chemin recalculé, au plus
+        `max_replans` fois. Lève RuntimeError si l'écran courant est inconnu ou si une transition
+        partie d'un écran identifié est restée sans effet.
+        """
+        start = time.perf_counter()
+        screen = source or self.identify()
+        origin, done = screen, []
+        assumed = source is not None
+        for attempt in range(max_replans + 1):
+            if screen is None:
+                raise RuntimeError(f"Cannot reach '{target}': current screen is not in the screen graph")
+            step = None
+            try:
+                for step in self.route(target, screen):
+                    self._traverse(*step)
+                    done.append(step)
+                    screen = step[1]
+                break
+            except (TimeoutException, NoSuchElementException) as e:
+                screen = self.identify(refresh=True)
+                if screen == target:
+                    break
+                # écran de départ supposé à tort (menu déjà ouvert...) : on repart de l'écran identifié
+                if attempt == max_replans or (screen == step[0] and not (assumed and not done)):
+                    raise RuntimeError(f"Could not reach '{target}': {step[2]} failed on '{screen}' ({e})") from e
+                assumed = False
+                print(f"  ↪ Route to '{target}' interrupted ({step[2]}), now on '{screen}', replanning")
+        self.trips.append((origin, target, done, (time.perf_counter() - start) * 1000))
+        return done
+
+    def _traverse(self, source, target, action):
+        begin = time.perf_counter()
+        getattr(self, f"_{action}")()
+        arrived = present((AppiumBy.ACCESSIBILITY_ID, _IDS[target][0]))
+        if target != "menu":
+            # le menu recouvre l'écran d'où il a été ouvert : ses ids restent affichés dessous
+            arrived = arrived & gone((AppiumBy.ACCESSIBILITY_ID, _IDS[source][0]))
+        self.page.wait(arrived, timeout=self.timeout)
+        self.costs.record(device_profile(self.driver), source, target, (time.perf_counter() - begin) * 1000)
+
+    # --- actions des transitions ---
+    def _tap(self, accessibility_id, scroll=False):
+        if scroll:
+            self.page.find_with_scroll(AppiumBy.ACCESSIBILITY_ID, accessibility_id, timeout=self.timeout).click()
+        else:
+            self.page.click(AppiumBy.ACCESSIBILITY_ID, accessibility_id, timeout=self.timeout)
+
+    def _login(self):
+        LoginPage(self.driver).login(self.user, self.password)
+
+    def _open_item(self):
+        self._tap("test-Item")
+
+    def _back_to_products(self):
+        self._tap("test-BACK TO PRODUCTS")
+
+    def _continue_shopping(self):
+        self._tap("test-CONTINUE SHOPPING", scroll=True)
+
+    def _checkout(self):
+        self._tap("test-CHECKOUT", scroll=True)
+
+    def _cancel(self):
+        CheckoutPage(self.driver).click_cancel_button()
+
+    def _fill_and_continue(self):
+        checkout = CheckoutPage(self.driver)
+        checkout.enter_user_info_default()
+        checkout.click_continue_button()
+
+    def _finish(self):
+        CheckoutPage(self.driver).click_finish_button()
+
+    def _back_home(self):
+        CheckoutPage(self.driver).click_back_home()
+
+    def _open_menu(self):
+        self._tap("test-Menu")
+
+    def _open_cart(self):
+        self._tap("test-Cart")
+
+    def _all_items(self):
+        self._tap("test-ALL ITEMS")
+
+    def _logout(self):
+        self._tap("test-LOGOUT")
@@ -0,0 +1,97 @@
+"""
+Recherche d'un élément hors de l'écran, en faisant défiler la liste côté device.
+
+Le chemin rapide est une seule commande : un sélecteur UiAutomator
+`new UiScrollable(<conteneur>).scrollIntoView(<cible>)` fait défiler le
+conteneur sur le device jusqu'à trouver la cible (UiScrollable repart du
+début de la liste puis avance). Il n'existe que pour les locators
+exprimables en UiSelector (accessibility id, id, class name, -android
+uiautomator) et pour les serveurs qui acceptent la stratégie.
+
+Sinon, boucle de `mobile: scrollGesture` : chaque geste retourne si le
+conteneur peut encore défiler, ce qui arrête la recherche en bout de liste
+sans geste inutile. Pas de pause fixe entre deux gestes : scrollGesture
+attend la fin du défilement avant de répondre.
+
+Les directions sont celles du doigt, comme `driver.swipe` : "up" révèle le
+bas de la liste. La taille de l'écran (zone du geste sans conteneur) est
+mémorisée par session et oubliée quand l'orientation change.
+"""
+
+import json
+
+from utils.command_hooks import UIAUTOMATOR, add_listener
+
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+# direction du doigt -> direction du contenu pour mobile: scrollGesture
+CONTENT_DIRECTION = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
+# stratégie de localisation -> méthode UiSelector équivalente
+UI_SELECTOR_METHODS = {
+    "accessibility id": "description",
+    "id": "resourceId",
+    "class name": "className",
+}
+
+# part de la zone du geste parcourue par un scrollGesture
+SCROLL_PERCENT = 0.75
+
+
+def java_string(value):
+    """Littéral de chaîne Java (les sélecteurs UiAutomator sont du code Java interprété)."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def ui_selector(by, value):
+    """Expression `new UiSelector()...` équivalente au locator, None si la stratégie n'a pas d'équivalent."""
+    if by == UIAUTOMATOR:
+        return value
+    method = UI_SELECTOR_METHODS.get(by)
+    if method is None:
+        return None
+    return f"new UiSelector().{method}({java_string(value)})"
+
+
+def scroll_into_view_selector(target, container=None, direction="up", max_swipes=6):
+    """Sélecteur UiScrollable qui fait défiler `container` (1er conteneur scrollable par défaut)
+    jusqu'à la cible ; listes horizontales pour les directions left / right."""
+    scrollable = container or "new UiSelector().scrollable(true)"
+    horizontal = ".setAsHorizontalList()" if direction in ("left", "right") else ""
+    return (f"new UiScrollable({scrollable}){horizontal}.setMaxSearchSwipes({int(max_swipes)})"
+            f".scrollIntoView({target})")
+
+
+def _forget_viewport(driver, command, params, elapsed, error):
+    if command == "setScreenOrientation":
+        driver._viewport = None
+
+
+def viewport(driver):
+    """(left, top, width, height) de l'écran, demandé une fois par session et par orientation."""
+    add_listener(driver, _forget_viewport)
+    cached = getattr(driver, "_viewport", None)
+    if cached is None:
+        size = driver.get_window_size()
+        cached = (0, 0, size["width"], size["height"])
+        driver._viewport = cached
+    return cached
+
+
+def scroll_gesture(driver, direction="up", container=None, percent=SCROLL_PERCENT):
+    """Un `mobile: scrollGesture` dans `container` (WebElement) ou au centre de l'écran.
+
+    Retourne True si le conteneur peut encore défiler dans cette direction.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown scroll direction '{direction}' (expected one of {DIRECTIONS})")
+    params = {"direction": CONTENT_DIRECTION[direction], "percent": percent}
+    if container is not None:
+        params["elementId"] = container.id
+    else:
+        # marges : un geste qui part du bord ouvre les barres système
+        left, top, width, height = viewport(driver)
+        params.update(left=left + width // 10, top=top + height // 5,
+                      width=width * 8 // 10, height=height * 6 // 10)
+    return bool(driver.execute_script("mobile: scrollGesture", params))
@@ -0,0 +1,111 @@
+"""
+Snapshots de la hiérarchie UI évalués localement.
+
+Un appel à `driver.page_source` télécharge et sérialise toute la hiérarchie.
+Au lieu de le rappeler pour chaque vérification, on le récupère une fois par
+état d'écran, on le parse avec lxml, et les recherches (XPath, accessibility
+id, texte, sous-chaîne) tournent ensuite en local en quelques microsecondes.
+
+Le snapshot est invalidé automatiquement dès qu'une commande qui peut changer
+l'écran passe par le driver (click, send_keys, actions, back, executeScript...,
+voir utils.command_hooks.mutates).
+
+    snap = get_snapshot(driver)
+    assert snap.contains("PRODUCTS")
+    assert snap.by_accessibility_id("test-Item")
+"""
+
+import re
+
+from lxml import etree
+
+from utils.command_hooks import add_listener, mutates
+
+
+_BOUNDS = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def parse_bounds(bounds):
+    """"[x1,y1][x2,y2]" -> (x1, y1, x2, y2), None si absent ou illisible."""
+    match = _BOUNDS.match(bounds or "")
+    return tuple(int(v) for v in match.groups()) if match else None
+
+
+def element_info(node):
+    """Attributs utiles d'un noeud de la hiérarchie, sous forme de dict."""
+    return {
+        "text": node.get("text", ""),
+        "content_desc": node.get("content-desc", ""),
+        "resource_id": node.get("resource-id", ""),
+        "class": node.get("class") or node.tag,
+        "bounds": parse_bounds(node.get("bounds")),
+        "enabled": node.get("enabled") == "true",
+        "selected": node.get("selected") == "true",
+    }
+
+
+class Snapshot:
+    """Hiérarchie UI figée à un instant donné."""
+
+    def __init__(self, source):
+        self.source = source
+        self._lower = None
+        self.tree = etree.fromstring(source.encode("utf-8"))
+
+    @property
+    def lower_source(self):
+        if self._lower is None:
+            self._lower = self.source.lower()
+        return self._lower
+
+    def contains(self, text, ignore_case=False):
+        """Équivalent de `text in driver.page_source`, sans aller-retour."""
+        if ignore_case:
+            return text.lower() in self.lower_source
+        return text in self.source
+
+    def xpath(self, expression, **variables):
+        """Évalue une expression XPath sur la hiérarchie (variables lxml : $name)."""
+        return self.tree.xpath(expression, **variables)
+
+    def by_accessibility_id(self, accessibility_id):
+        return self.tree.xpath("//*[@content-desc=$v]", v=accessibility_id)
+
+    def by_text(self, text, exact=True):
+        if exact:
+            return self.tree.xpath("//*[@text=$v]", v=text)
+        return self.tree.xpath("//*[contains(@text, $v)]", v=text)
+
+    def find_all(self, by, value):
+        """Même stratégie de localisation que driver.find_elements, résolue localement."""
+        if by == "accessibility id":
+            return self.by_accessibility_id(value)
+        if by == "xpath":
+            return self.tree.xpath(value)
+        if by == "id":
+            return self.tree.xpath("//*[@resource-id=$v]", v=value)
+        if by == "class name":
+            return self.tree.xpath("//*[@class=$v]", v=value)
+        raise ValueError(f"Locator strategy '{by}' is not supported by snapshots")
+
+    def exists(self, by, value):
+        return bool(self.find_all(by, value))
+
+    def extract(self, by, value):
+        """Attributs (element_info) de chaque élément qui correspond, dans l'ordre du document."""
+        return [element_info(node) for node in self.find_all(by, value)]
+
+
+def _invalidate_on_mutation(driver, command, params, elapsed, error):
+    if mutates(command, params):
+        driver._snapshot = None
+
+
+def get_snapshot(driver, refresh=False):
+    """Snapshot de l'écran courant, retéléchargé seulement si l'UI a pu changer."""
+    add_listener(driver, _invalidate_on_mutation)
+    snapshot = getattr(driver, "_snapshot", None)
+    if snapshot is None or refresh:
+        snapshot = Snapshot(driver.page_source)
+        driver._snapshot = snapshot
+    return snapshot
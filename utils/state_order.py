@@ -0,0 +1,106 @@
+"""
+Ordre des tests d'après l'état de l'app qu'ils demandent et celui qu'ils laissent.
+
+Beaucoup de tests des suites 3, 4 et 5 partent du même état (écran de login,
+page des produits connecté, panier rempli) et le reconstruisent à chaque fois :
+reset de l'app puis login. Un test déclare son point de départ et, s'il est
+sûr, l'état dans lequel il laisse l'app :
+
+    @pytest.mark.state(requires="logged_in(standard_user)", leaves="cart_with([0])")
+    def TC17_add_product_to_cart(logged_in_driver):
+        ...
+
+Les noms d'état sont ceux de StateSeeder (utils/app_state.py) :
+"logged_in(<user>)", "cart_with([0, 1])", "at_checkout_step(1, [0])", plus
+"logged_out" (RESET_STATE de utils/driver_pool.py : écran de login juste après un reset).
+
+À la collecte, order_by_state() range ces tests pour que chacun démarre autant
+que possible dans l'état laissé par le précédent. Pendant le run, la fixture
+driver ne remet pas l'app à zéro si l'état laissé par le test précédent (s'il
+a réussi) est celui demandé, et le StateSeeder ne refait pas la mise en place.
+SetupCosts estime le temps ainsi gagné à partir des resets et mises en place
+réellement mesurés pendant le run.
+"""
+
+
+def state_marker(item):
+    """(requires, leaves) du marker @pytest.mark.state du test ; (None, None) sans marker.
+
+    `leaves` vaut None quand le test ne garantit pas l'état où il laisse l'app.
+    """
+    marker = item.get_closest_marker("state")
+    if marker is None:
+        return None, None
+    return marker.kwargs.get("requires"), marker.kwargs.get("leaves")
+
+
+def order_by_state(items, initial=None):
+    """Nouvel ordre des tests : les tests marqués `state` sont enchaînés pour partager l'état de l'app.
+
+    Glouton, à partir de l'état `initial` : parmi les tests qui démarrent dans l'état courant,
+    d'abord ceux qui le laissent intact, puis ceux qui laissent un état demandé par un test
+    restant, puis les autres ; à égalité l'ordre de collecte. Quand aucun test ne démarre dans
+    l'état courant (reset nécessaire), on repart de l'état demandé par le premier test restant qui
+    laisse un état demandé par un test restant, sinon par le premier test restant. Les tests
+    marqués prennent la place du premier d'entre eux, les autres gardent leur ordre.
+    """
+    marked = [item for item in items if item.get_closest_marker("state")]
+    if len(marked) < 2:
+        return list(items)
+    markers = {item: state_marker(item) for item in marked}
+    remaining = list(marked)
+    scheduled = []
+    state = initial
+    while remaining:
+        wanted = {markers[item][0] for item in remaining} - {None}
+
+        def rank(item):
+            leaves = markers[item][1]
+            if leaves is not None and leaves == state:
+                return 0
+            return 1 if leaves in wanted else 2
+        ready = [item for item in remaining if state is not None and markers[item][0] == state]
+        if not ready:
+            # reset : on repart du premier test qui ouvre une chaîne, sinon du premier test restant
+            chainable = [item for item in remaining if rank(item) < 2]
+            state = markers[(chainable or remaining)[0]][0]
+            ready = [item for item in remaining if markers[item][0] == state]
+        chosen = min(ready, key=rank)
+        remaining.remove(chosen)
+        scheduled.append(chosen)
+        state = markers[chosen][1]
+
+    first = items.index(marked[0])
+    rest = [item for item in items if item not in markers]
+    return rest[:first] + scheduled + rest[first:]
+
+
+class SetupCosts:
+    """Coûts moyens de mise en place observés pendant le run : reset par stratégie, état par nom."""
+
+    def __init__(self):
+        self._resets = {}
+        self._states = {}
+
+    @staticmethod
+    def _add(table, key, ms):
+        total, count = table.get(key, (0.0, 0))
+        table[key] = (total + ms, count + 1)
+
+    @staticmethod
+    def _average(table, key):
+        total, count = table.get(key, (0.0, 0))
+        return total / count if count else 0.0
+
+    def record_reset(self, strategy, ms):
+        self._add(self._resets, strategy, ms)
+
+    def record_state(self, name, ms):
+        self._add(self._states, name, ms)
+
+    def saved(self, strategy, state):
+        """Temps (ms) qu'aurait coûté le reset `strategy` suivi de la mise en place de `state`.
+
+        0 pour une partie jamais mesurée pendant le run : l'estimation reste un minimum.
+        """
+        return self._average(self._resets, strategy) + self._average(self._states, state)
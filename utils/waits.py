@@ -0,0 +1,146 @@
+"""
+Moteur d'attente explicite utilisé par BasePage.
+
+Une condition est un callable `condition(driver)` qui retourne une valeur
+"vraie" (l'élément, la liste d'éléments, True...) quand elle est satisfaite,
+ou une valeur fausse sinon. Les conditions se composent avec `&` / `|` ou
+avec all_of() / any_of() :
+
+    page.wait(visible(LOGIN_BTN) | present(ERROR_MSG), timeout=5)
+
+wait_until() interroge la condition avec un intervalle adaptatif : très court
+au début (l'app répond souvent en quelques dizaines de ms), puis de plus en
+plus long pour ne pas saturer le serveur Appium quand l'écran tarde.
+"""
+
+import time
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+
+# Intervalle de polling : 50ms au départ, x1.5 à chaque essai, plafonné à 500ms
+INITIAL_INTERVAL = 0.05
+MAX_INTERVAL = 0.5
+BACKOFF = 1.5
+
+# Exceptions qui signifient "pas encore" pendant l'évaluation d'une condition
+_TRANSIENT = (NoSuchElementException, StaleElementReferenceException)
+
+
+class Condition:
+    """Condition d'attente nommée (le nom apparaît dans le message de timeout)."""
+
+    def __init__(self, description, check):
+        self.description = description
+        self._check = check
+
+    def __call__(self, driver):
+        try:
+            return self._check(driver)
+        except _TRANSIENT:
+            return False
+
+    def __and__(self, other):
+        return all_of(self, other)
+
+    def __or__(self, other):
+        return any_of(self, other)
+
+    def __repr__(self):
+        return f"<Condition {self.description}>"
+
+
+def _first(driver, locator):
+    elements = driver.find_elements(*locator)
+    return elements[0] if elements else None
+
+
+def present(locator):
+    """L'élément existe dans la hiérarchie. Retourne l'élément."""
+    return Condition(f"present{locator}", lambda d: _first(d, locator))
+
+
+def visible(locator):
+    """L'élément existe et est affiché. Retourne l'élément."""
+    def check(driver):
+        el = _first(driver, locator)
+        return el if el is not None and el.is_displayed() else None
+    return Condition(f"visible{locator}", check)
+
+
+def clickable(locator):
+    """L'élément est affiché et activé. Retourne l'élément."""
+    def check(driver):
+        el = _first(driver, locator)
+        return el if el is not None and el.is_displayed() and el.is_enabled() else None
+    return Condition(f"clickable{locator}", check)
+
+
+def text_equals(locator, text):
+    """Le texte de l'élément vaut exactement `text`. Retourne l'élément."""
+    def check(driver):
+        el = _first(driver, locator)
+        return el if el is not None and el.text == text else None
+    return Condition(f"text_equals{locator}=={text!r}", check)
+
+
+def count_at_least(locator, count):
+    """Au moins `count` éléments correspondent. Retourne la liste."""
+    def check(driver):
+        elements = driver.find_elements(*locator)
+        return elements if len(elements) >= count else None
+    return Condition(f"count_at_least{locator}>={count}", check)
+
+
+def gone(locator):
+    """Plus aucun élément ne correspond. Retourne True."""
+    return Condition(f"gone{locator}", lambda d: not d.find_elements(*locator))
+
+
+def all_of(*conditions):
+    """Toutes les conditions sont vraies. Retourne la liste des résultats."""
+    def check(driver):
+        results = []
+        for condition in conditions:
+            result = condition(driver)
+            if not result:
+                return None
+            results.append(result)
+        return results
+    return Condition(" & ".join(c.description for c in conditions), check)
+
+
+def any_of(*conditions):
+    """Au moins une condition est vraie. Retourne le premier résultat vrai."""
+    def check(driver):
+        for condition in conditions:
+            result = condition(driver)
+            if result:
+                return result
+        return None
+    return Condition(" | ".join(c.description for c in conditions), check)
+
+
+def wait_until(driver, condition, timeout=10, message=None):
+    """Attend que `condition` soit vraie et retourne son résultat.
+
+    La condition est évaluée au moins une fois, même avec timeout=0.
+    Lève TimeoutException si elle n'est pas satisfaite à temps.
+    """
+    deadline = time.monotonic() + timeout
+    interval = INITIAL_INTERVAL
+    while True:
+        result = condition(driver)
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+        interval = min(interval * BACKOFF, MAX_INTERVAL)
+    description = getattr(condition, "description", repr(condition))
+    raise TimeoutException(message or f"Timed out after {timeout}s waiting for {description}")
@@ -0,0 +1,446 @@
+"""
+Compilation des XPath des page objects en sélecteurs UiAutomator (UiSelector).
+
+Sur UiAutomator2, chaque recherche XPath sérialise toute la hiérarchie côté
+serveur avant d'évaluer l'expression, alors qu'un `-android uiautomator`
+(UiSelector) est évalué directement sur les noeuds d'accessibilité. La plupart
+des XPath de secours des page objects n'utilisent que des prédicats qu'un
+UiSelector sait exprimer :
+
+    //android.widget.Button[contains(@text, 'CANCEL') or contains(@text, 'Cancel')]
+    -> new UiSelector().className("android.widget.Button").textMatches("(?s)(?:.*CANCEL.*|.*Cancel.*)")
+
+compile_xpath() traduit le sous-ensemble suivant, None pour tout le reste
+(axes `/`, positions, not(), fonctions non listées...) :
+
+- `//classe` ou `//*`, `//A//B` (childSelector : descendants) ;
+- `@text`, `@content-desc`, `@class`, `@resource-id` comparés par `=`,
+  contains(), starts-with(), y compris sur translate(@attr, 'ABC...', 'abc...')
+  (regex insensible à la casse) ;
+- `and` entre attributs différents, `or` (regex à alternatives sur un même
+  attribut, sinon une instruction UiSelector par attribut) et l'union `|`
+  (instructions séparées par `;`, dont le serveur renvoie l'union).
+
+CompiledLocators.locate() remplace un locator XPath par son UiSelector une fois
+la traduction vérifiée pour le profil "device|version de l'app" : à la première
+recherche XPath qui trouve des éléments, le UiSelector est cherché aussi et les
+deux formes chronométrées ; s'il ne trouve pas le même nombre d'éléments, la
+XPath est gardée. Une union compilée en plusieurs instructions rend ses
+éléments dans l'ordre des instructions, pas dans l'ordre du document : pour
+celles-là, les éléments doivent aussi être les mêmes et dans le même ordre
+(ids des éléments), sinon un code qui prend le premier match changerait
+d'élément. Le résultat est gardé dans .xpath_selectors.json pour les
+runs suivants ; les workers de run_parallel.py y fusionnent leurs résultats
+sous verrou (utils.file_lock). Les recherches UiSelector sont chronométrées par un listener de
+commandes ; le temps gagné est (durée XPath - durée UiSelector) x recherches,
+le coût des vérifications faites pendant le run est compté à part.
+"""
+
+import os
+import re
+import threading
+import time
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import InvalidSelectorException
+
+from utils.command_hooks import UIAUTOMATOR, add_listener, unobserved
+from utils.device import device_profile
+from utils.file_lock import file_lock, read_json, write_json
+from utils.scrolling import java_string
+
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".xpath_selectors.json")
+
+_TOKEN = re.compile(r"""\s*(?:(//|/|\||\[|\]|\(|\)|,|=)|('[^']*'|"[^"]*")|(@[\w-]+)|(\*|[A-Za-z_][\w.$-]*))""")
+
+# attribut XPath -> méthodes UiSelector (égalité, contains, starts-with, regex)
+_METHODS = {
+    "text": ("text", "textContains", "textStartsWith", "textMatches"),
+    "content-desc": ("description", "descriptionContains", "descriptionStartsWith", "descriptionMatches"),
+    "class": ("className", None, None, "classNameMatches"),
+    "resource-id": ("resourceId", None, None, "resourceIdMatches"),
+}
+_NAME = re.compile(r"\*|[A-Za-z_][\w.$-]*")
+_HOW = {"eq": 0, "contains": 1, "starts-with": 2}
+
+_UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# caractères spéciaux des regex Java (textMatches & co. utilisent java.util.regex)
+_REGEX_SPECIAL = re.compile(r"([\\.\[\]{}()*+?^$|])")
+
+
+class _Unsupported(Exception):
+    """XPath hors du sous-ensemble traduisible en UiSelector."""
+
+
+class _Parser:
+    """XPath -> [chemin] ; chemin = [(classe ou None, [[terme, ...], ...])] (alternatives de conjonctions).
+
+    Terme : (attribut, "eq" | "contains" | "starts-with", valeur, insensible à la casse).
+    """
+
+    def __init__(self, xpath):
+        self.tokens = []
+        pos = 0
+        while pos < len(xpath):
+            match = _TOKEN.match(xpath, pos)
+            if not match:
+                if xpath[pos:].strip():
+                    raise _Unsupported(xpath[pos:])
+                break
+            self.tokens.append(next(group for group in match.groups() if group is not None))
+            pos = match.end()
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise _Unsupported(f"expected {expected!r}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        paths = [self.path()]
+        while self.peek() == "|":
+            self.take()
+            paths.append(self.path())
+        if self.peek() is not None:
+            raise _Unsupported(self.peek())
+        return paths
+
+    def path(self):
+        steps = []
+        while self.peek() == "//":
+            self.take()
+            name = self.take()
+            if not _NAME.fullmatch(name) or name in ("or", "and"):
+                raise _Unsupported(name)
+            alternatives = [[]]
+            while self.peek() == "[":
+                self.take()
+                predicate = self.disjunction()
+                self.take("]")
+                if len(alternatives) > 1 and len(predicate) > 1:
+                    raise _Unsupported("several predicates with 'or'")
+                alternatives = [left + right for left in alternatives for right in predicate]
+            steps.append((None if name == "*" else name, alternatives))
+        if not steps:
+            raise _Unsupported(self.peek())
+        return steps
+
+    def disjunction(self):
+        alternatives = self.conjunction()
+        while self.peek() == "or":
+            self.take()
+            alternatives += self.conjunction()
+        return alternatives
+
+    def conjunction(self):
+        alternatives = self.term()
+        while self.peek() == "and":
+            self.take()
+            right = self.term()
+            if len(alternatives) > 1 and len(right) > 1:
+                raise _Unsupported("'and' between two 'or'")
+            alternatives = [left + other for left in alternatives for other in right]
+        return alternatives
+
+    def term(self):
+        token = self.take()
+        if token == "(":
+            alternatives = self.disjunction()
+            self.take(")")
+            return alternatives
+        if token.startswith("@"):
+            attribute = self.attribute(token)
+            self.take("=")
+            return [[(attribute, "eq", self.literal(), False)]]
+        if token in ("contains", "starts-with"):
+            self.take("(")
+            attribute, folded = self.operand()
+            self.take(",")
+            value = self.literal()
+            self.take(")")
+            if folded and value != value.lower():
+                # translate() met l'attribut en minuscules : une valeur avec majuscules ne matche jamais
+                raise _Unsupported(value)
+            return [[(attribute, token, value, folded)]]
+        raise _Unsupported(token)
+
+    def operand(self):
+        token = self.take()
+        if token.startswith("@"):
+            return self.attribute(token), False
+        if token != "translate":
+            raise _Unsupported(token)
+        self.take("(")
+        attribute = self.attribute(self.take())
+        self.take(",")
+        source = self.literal()
+        self.take(",")
+        target = self.literal()
+        self.take(")")
+        if source != _UPPER or target != _UPPER.lower():
+            raise _Unsupported("translate() other than upper to lower case")
+        return attribute, True
+
+    def attribute(self, token):
+        if not token.startswith("@") or token[1:] not in _METHODS:
+            raise _Unsupported(token)
+        return token[1:]
+
+    def literal(self):
+        token = self.take()
+        if not token.startswith(("'", '"')):
+            raise _Unsupported(token)
+        return token[1:-1]
+
+
+def _regex(how, value, folded):
+    pattern = _REGEX_SPECIAL.sub(r"\\\1", value)
+    pattern = {"eq": pattern, "contains": f".*{pattern}.*", "starts-with": f"{pattern}.*"}[how]
+    return f"(?i:{pattern})" if folded else pattern
+
+
+def _call(method, value):
+    return f".{method}({java_string(value)})"
+
+
+def _conjunction(terms):
+    """Appels UiSelector d'une conjonction de termes (attributs tous différents)."""
+    attributes = [attribute for attribute, *_ in terms]
+    if len(set(attributes)) != len(attributes):
+        raise _Unsupported("same attribute twice in 'and'")
+    calls = []
+    for attribute, how, value, folded in terms:
+        method = _METHODS[attribute][_HOW[how]]
+        if folded or method is None:
+            calls.append(_call(_METHODS[attribute][3], "(?s)" + _regex(how, value, folded)))
+        else:
+            calls.append(_call(method, value))
+    return "".join(calls)
+
+
+def _step(name, alternatives):
+    """Sélecteurs (chaînes d'appels) d'une étape : un par alternative, regroupées par attribut si possible."""
+    own = [("class", "eq", name, False)] if name else []
+    if len(alternatives) > 1 and all(len(terms) == 1 for terms in alternatives):
+        by_attribute = {}
+        for (attribute, how, value, folded), in alternatives:
+            by_attribute.setdefault(attribute, []).append(_regex(how, value, folded))
+        if name and "class" in by_attribute:
+            raise _Unsupported("class in both the node test and the predicate")
+        prefix = _conjunction(own)
+        return [prefix + _call(_METHODS[attribute][3], "(?s)(?:" + "|".join(patterns) + ")")
+                for attribute, patterns in by_attribute.items()]
+    return [_conjunction(own + terms) for terms in alternatives]
+
+
+def compile_xpath(xpath):
+    """Instructions UiSelector (séparées par "; ") équivalentes à `xpath`, None si elle n'est pas traduisible."""
+    try:
+        statements = []
+        for path in _Parser(xpath).parse():
+            selectors = [""]
+            split = False
+            for name, alternatives in reversed(path):
+                calls = _step(name, alternatives)
+                if len(calls) > 1:
+                    if split:
+                        raise _Unsupported("'or' in several steps")
+                    split = True
+                child = ".childSelector({})"
+                selectors = [f"new UiSelector(){call}" + (child.format(inner) if inner else "")
+                             for call in calls for inner in selectors]
+            statements += selectors
+    except _Unsupported:
+        return None
+    if any(selector == "new UiSelector()" for selector in statements):
+        return None
+    return "; ".join(statements)
+
+
+def is_single(selector):
+    """True si le sélecteur est une seule instruction (utilisable dans UiScrollable.scrollIntoView)."""
+    return selector is not None and "; new UiSelector()" not in selector
+
+
+class CompiledLocators:
+    """XPath compilées en UiSelector, vérifiées par profil "device|version" (gardé dans .xpath_selectors.json)
+    et chronométrées pendant le run."""
+
+    def __init__(self, path=CACHE_PATH, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self._compiled = {}
+        self._checked = {}
+        self._xpaths = {}
+        self._uses = {}
+        self._run = {}
+        # (profil, xpath) vérifiées par ce process depuis la dernière sauvegarde
+        self._changes = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        self._checked = read_json(self.path)
+
+    def compile(self, xpath):
+        if xpath not in self._compiled:
+            self._compiled[xpath] = compile_xpath(xpath)
+        return self._compiled[xpath]
+
+    def _candidate(self, driver, locator):
+        """(profil, sélecteur) si la XPath se traduit et que ce serveur accepte les UiSelector, sinon None."""
+        by, value = locator[0], locator[1]
+        if not self.enabled or by != AppiumBy.XPATH or getattr(driver, "_no_ui_selector", False):
+            return None
+        selector = self.compile(value)
+        if selector is None:
+            return None
+        caps = getattr(driver, "capabilities", None) or {}
+        if str(caps.get("automationName", "")).lower() != "uiautomator2":
+            return None
+        return device_profile(driver), selector
+
+    def _verified(self, profile, xpath, selector):
+        """Résultat de la vérification (run courant, sinon runs précédents), None si elle reste à faire."""
+        check = self._run.get((xpath, profile))
+        if check is None:
+            check = self._checked.get(profile, {}).get(xpath)
+            if check is None or check["selector"] != selector:
+                # jamais vérifiée sur ce profil (ou traduction changée depuis)
+                return None
+            with self._lock:
+                self._run[(xpath, profile)] = check
+                self._xpaths[selector] = xpath
+        return check
+
+    def locate(self, driver, locator):
+        """`locator` (by, value), ou (-android uiautomator, sélecteur) pour une XPath vérifiée.
+
+        N'envoie aucune commande : une XPath pas encore vérifiée (voir verify()), gardée parce que
+        le UiSelector trouve d'autres éléments, ou que le serveur n'accepte pas, reste une XPath.
+        """
+        candidate = self._candidate(driver, locator)
+        if candidate is None:
+            return locator
+        profile, selector = candidate
+        check = self._verified(profile, locator[1], selector)
+        if check is None or not check["match"]:
+            return locator
+        add_listener(driver, self._record)
+        return UIAUTOMATOR, selector
+
+    def find_elements(self, driver, locator):
+        """driver.find_elements() avec le locator de locate() ; vérifie la XPath dès qu'elle trouve des éléments.
+
+        La recherche XPath sert de première moitié à la vérification : seul le UiSelector est cherché en plus.
+        """
+        located = self.locate(driver, locator)
+        if located[0] == UIAUTOMATOR or self._candidate(driver, locator) is None:
+            return driver.find_elements(*located)
+        start = time.perf_counter()
+        elements = driver.find_elements(*locator)
+        if elements:
+            self.verify(driver, locator, found=elements, xpath_ms=(time.perf_counter() - start) * 1000)
+        return elements
+
+    def verify(self, driver, locator, found=None, xpath_ms=None):
+        """Compare une fois la XPath et son UiSelector (éléments trouvés, durée de chacun).
+
+        À appeler quand l'élément vient d'être trouvé : `found` / `xpath_ms` sont les éléments
+        et la durée de cette recherche XPath, sinon elle est refaite. Une XPath qui ne
+        trouve rien ne prouve rien : rien n'est enregistré et la vérification sera refaite à la
+        prochaine recherche. Ne fait rien si la XPath ne se traduit pas ou est déjà vérifiée.
+        """
+        candidate = self._candidate(driver, locator)
+        if candidate is None:
+            return
+        profile, selector = candidate
+        xpath = locator[1]
+        if self._verified(profile, xpath, selector) is not None:
+            return
+        try:
+            with unobserved():
+                start = time.perf_counter()
+                if found is None:
+                    found = driver.find_elements(AppiumBy.XPATH, xpath)
+                    xpath_ms = (time.perf_counter() - start) * 1000
+                middle = time.perf_counter()
+                by_selector = driver.find_elements(UIAUTOMATOR, selector) if found else []
+                end = time.perf_counter()
+        except InvalidSelectorException:
+            # stratégie refusée par ce serveur : XPath pour le reste de la session
+            driver._no_ui_selector = True
+            return
+        except Exception:
+            return
+        if not found:
+            return
+        match = len(found) == len(by_selector)
+        if not match:
+            print(f"⚠ UiSelector for {xpath} found {len(by_selector)} elements, XPath {len(found)}: keeping XPath")
+        elif not is_single(selector) and [e.id for e in found] != [e.id for e in by_selector]:
+            # union : instructions dans l'ordre du sélecteur, XPath dans l'ordre du document
+            match = False
+            print(f"⚠ UiSelector for {xpath} returned other elements or another order: keeping XPath")
+        check = {"selector": selector, "match": match, "xpath_ms": round(xpath_ms, 1),
+                 "selector_ms": round((end - middle) * 1000, 1)}
+        with self._lock:
+            self._checked.setdefault(profile, {})[xpath] = check
+            self._run[(xpath, profile)] = dict(check, checked_ms=round((end - start) * 1000, 1))
+            self._xpaths[selector] = xpath
+            self._changes.add((profile, xpath))
+
+    def _record(self, driver, command, params, elapsed, error):
+        if command not in ("findElement", "findElements") or (params or {}).get("using") != UIAUTOMATOR:
+            return
+        xpath = self._xpaths.get(params.get("value"))
+        if xpath is None:
+            return
+        with self._lock:
+            count, total = self._uses.get(xpath, (0, 0.0))
+            self._uses[xpath] = (count + 1, total + elapsed * 1000)
+
+    def stats(self):
+        """{xpath: {"selector", "uses", "selector_ms", "xpath_ms", "saved_ms", "checked_ms"}} du run.
+
+        `selector` vaut None pour une XPath gardée (éléments différents) ; durées en ms.
+        `saved_ms` : (durée XPath - durée UiSelector) x recherches UiSelector du run ;
+        `checked_ms` : recherches en plus faites pour la vérification pendant le run (0 sinon).
+        """
+        result = {}
+        with self._lock:
+            for (xpath, _), check in sorted(self._run.items()):
+                count, total = self._uses.get(xpath, (0, 0.0))
+                mean = total / count if count else check["selector_ms"]
+                result[xpath] = {
+                    "selector": check["selector"] if check["match"] else None,
+                    "uses": count,
+                    "selector_ms": round(mean, 1),
+                    "xpath_ms": check["xpath_ms"],
+                    "saved_ms": round((check["xpath_ms"] - mean) * count, 1) if check["match"] else 0.0,
+                    "checked_ms": check.get("checked_ms", 0.0),
+                }
+        return result
+
+    def save(self):
+        """Reporte les vérifications de ce process dans le fichier, relu sous verrou (autres workers)."""
+        if not self._changes:
+            return
+        with self._lock, file_lock(self.path):
+            checked = read_json(self.path)
+            for profile, xpath in self._changes:
+                checked.setdefault(profile, {})[xpath] = self._checked[profile][xpath]
+            write_json(self.path, checked)
+            self._checked = checked
+            self._changes.clear()
+
+
+# XPath compilées partagées par tous les page objects du process pytest
+compiler = CompiledLocators()